@@ -0,0 +1,687 @@
+#!/usr/bin/env python3
+"""
+Warm Ansible Execution Backend
+
+A cold `ansible-navigator run ...` pays for a new Python interpreter, the
+ansible-core import, plugin loading and (with an execution environment) a
+container start on every syntax check and test run.
+
+The warm backend keeps long-lived worker processes (this file run with
+--worker) that import ansible-core once and then accept playbook run requests
+over a local JSON-lines queue on their stdin. Each request is forked from the
+warm worker, so runs start with ansible already imported while still getting a
+fresh process (ansible keeps global CLI/plugin state, so runs never share an
+interpreter). The navigator command line is translated to the equivalent
+ansible-playbook arguments and the reply is turned back into a
+subprocess.CompletedProcess, so callers keep the same (success, output)
+contract through interpret_syntax_check()/classify_test_output().
+
+Each warm run reports its playbook time (inside ansible-playbook) separately
+from its overhead (worker start-up, fork, IPC and reading the output) and from
+the time it queued for an idle worker.
+
+Runs can be given abort patterns (fatal playbook-bug signatures such as
+"is undefined"): the output is scanned while it is produced and the run is
+killed shortly after the first match, returning the partial output (see
+AbortScanner; run_navigator() uses the same scanner for cold runs).
+
+The warm backend runs ansible-playbook with the controller's ansible-core, not
+inside the navigator execution environment, so the collections the playbooks
+use must be installed locally. The default backend stays "navigator".
+
+Environment variables:
+    ANSIBLE_BACKEND           "navigator" (default, cold ansible-navigator runs) or "warm"
+    ANSIBLE_BACKEND_PYTHON    Interpreter with ansible-core for the workers (default: this interpreter)
+    ANSIBLE_BACKEND_WORKERS   Maximum number of warm workers (default: 4)
+
+Usage:
+    from ansible_backend import set_ansible_backend, print_backend_stats
+    set_ansible_backend("warm")
+    ...  # run_navigator() calls now go through the warm workers
+    print_backend_stats()
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import codecs
+import signal
+import tempfile
+import threading
+import traceback
+import subprocess
+
+from connection_profile import connection_profile_env
+from output_scanner import MultiPatternScanner, first_hit
+
+
+BACKENDS = ("navigator", "warm")
+
+# Imported once by each warm worker before it accepts requests
+WARM_MODULES = (
+    'ansible.cli.playbook',
+    'ansible.executor.playbook_executor',
+    'ansible.executor.task_queue_manager',
+    'ansible.inventory.manager',
+    'ansible.vars.manager',
+    'ansible.plugins.loader',
+)
+
+# Navigator-only options (with a value) dropped when translating to ansible-playbook;
+# the execution environment ones (--senv/--eev/--co...) do not apply to warm runs,
+# which get the connection profile through the worker environment instead
+NAVIGATOR_ONLY_OPTIONS = ('--mode', '-m', '--pae', '--playbook-artifact-enable',
+                          '--pas', '--playbook-artifact-save-as',
+                          '--ee', '--execution-environment', '--eei', '--execution-environment-image',
+                          '--senv', '--set-environment-variable', '--penv', '--pass-environment-variable',
+                          '--eev', '--execution-environment-volume-mounts', '--co', '--container-options',
+                          '--ce', '--container-engine', '--pp', '--pull-policy',
+                          '--lf', '--log-file', '--ll', '--log-level')
+
+# Navigator playbook artifact path; warm runs write their task events there instead
+EVENTS_PATH_OPTIONS = ('--pas', '--playbook-artifact-save-as')
+
+# Callback plugin that records task events in warm runs (see task_events.py)
+TASK_EVENTS_CALLBACK = 'task_events'
+CALLBACK_PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'callback_plugins')
+
+# Environment that ansible-core reads at import time; workers are restarted when it changes
+CONFIG_ENV_PREFIXES = ('ANSIBLE_', 'SSH_', 'PATH')
+
+# Seconds of output still collected after an abort pattern matched (the rest of the error block)
+ABORT_GRACE_SEC = 1.0
+
+# Lines that echo playbook source or conditions rather than errors; never scanned for abort patterns
+ABORT_IGNORED_LINE_MARKERS = ('"_raw_params"', '"cmd"', '"invocation"', '"module_args"',
+                              '"false_condition"', '"conditional"')
+
+# Output that starts the next task or the recap: the error block of the match is complete
+ABORT_BLOCK_END_MARKERS = ('TASK [', 'PLAY RECAP')
+
+
+class WarmBackendError(Exception):
+    """Raised when a warm worker cannot be started or stops answering."""
+
+
+# =============================================================================
+# Early abort on playbook-bug signatures
+# =============================================================================
+
+class AbortScanner:
+    """
+    Incremental scan of run output for fatal playbook-bug signatures.
+
+    Output is fed in chunks as it arrives; once a pattern matches on a line,
+    the run should be stopped as soon as its error block is complete (the next
+    task/recap header) or ABORT_GRACE_SEC later, whichever comes first.
+    """
+
+    def __init__(self, patterns: list, grace_sec: float = ABORT_GRACE_SEC):
+        self.patterns = tuple(patterns)
+        self._matcher = MultiPatternScanner({'abort': self.patterns, 'ignored_line': ABORT_IGNORED_LINE_MARKERS})
+        self.grace_sec = grace_sec
+        self.match = None
+        self.line = None
+        self._deadline = None
+        self._tails = {}
+        self._decoders = {}
+
+    def feed(self, data, stream: str = 'stdout'):
+        """Scan the next chunk (bytes or str) of a stream."""
+        if isinstance(data, bytes):
+            decoder = self._decoders.setdefault(stream, codecs.getincrementaldecoder('utf-8')(errors='replace'))
+            data = decoder.decode(data)
+        if not data:
+            return
+        lines = (self._tails.get(stream, '') + data).split('\n')
+        self._tails[stream] = lines.pop()
+        for line in lines:
+            if self.match is not None:
+                if line.lstrip().startswith(ABORT_BLOCK_END_MARKERS):
+                    self._deadline = time.monotonic()
+                    return
+                continue
+            hits = self._matcher.scan(line, 0, 1)
+            hit = first_hit(hits, 'abort')
+            if hit and not first_hit(hits, 'ignored_line'):
+                self.match = hit['pattern']
+                self.line = line.strip()[:300]
+                self._deadline = time.monotonic() + self.grace_sec
+
+    def should_abort(self) -> bool:
+        """True once a pattern matched and its error block has been collected."""
+        return self.match is not None and time.monotonic() >= self._deadline
+
+
+# =============================================================================
+# Worker process (python ansible_backend.py --worker)
+# =============================================================================
+
+def _playbook_child(request: dict, out_path: str, err_path: str, timing_path: str):
+    """Run one ansible-playbook invocation in a process forked from the warm worker (never returns)."""
+    exit_code = 250
+    try:
+        os.setpgid(0, 0)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        for fd, path in ((1, out_path), (2, err_path)):
+            os.dup2(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), fd)
+        if request.get('events_path'):
+            os.environ['TASK_EVENTS_FILE'] = request['events_path']
+
+        from ansible.cli.playbook import PlaybookCLI
+        run_started = time.monotonic()
+        try:
+            PlaybookCLI.cli_executor(['ansible-playbook'] + request['args'])
+            exit_code = 0
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        run_sec = time.monotonic() - run_started
+
+        with open(timing_path, 'w') as f:
+            json.dump({'run_sec': run_sec}, f)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+
+def _wait_child(pid: int, timeout: float, scanner: AbortScanner = None, watched: dict = None) -> tuple[int, bool]:
+    """
+    Wait for a forked run, killing its process group when the timeout expires.
+
+    Args:
+        pid: Forked run
+        timeout: Seconds before the run is killed
+        scanner: Abort scanner fed with the run's output while it runs (optional)
+        watched: {stream name: binary file} of the run's output files, read by the scanner
+
+    Returns:
+        tuple: (exit code, timed_out) - an aborted run is killed and reported with timed_out False
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return os.waitstatus_to_exitcode(status), False
+            if scanner is not None:
+                for stream, f in watched.items():
+                    scanner.feed(f.read(), stream)
+                if scanner.should_abort():
+                    _kill_child(pid)
+                    return -signal.SIGKILL, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(0.01, remaining))
+    except BaseException:
+        _kill_child(pid)
+        raise
+    _kill_child(pid)
+    return -signal.SIGKILL, True
+
+
+def _descendants(pid: int) -> list:
+    """PIDs of all processes below pid (ansible workers detach into their own sessions)."""
+    children = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat', 'r') as f:
+                        ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                except (OSError, ValueError, IndexError):
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return []  # no /proc; only the run's process group is killed
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def _kill_child(pid: int):
+    """Kill a forked run and everything it started (ansible workers, modules, ssh)."""
+    descendants = _descendants(pid)
+    for kill in (os.killpg, os.kill):
+        try:
+            kill(pid, signal.SIGKILL)
+            break
+        except (ProcessLookupError, PermissionError):
+            continue
+    for child in descendants:
+        try:
+            os.kill(child, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        os.waitpid(pid, 0)
+    except ChildProcessError:
+        pass
+
+
+def _run_forked(request: dict) -> dict:
+    """Fork one playbook run from the warm worker and collect its output."""
+    with tempfile.TemporaryDirectory(prefix='ansible-backend-') as tmp_dir:
+        out_path = os.path.join(tmp_dir, 'stdout')
+        err_path = os.path.join(tmp_dir, 'stderr')
+        timing_path = os.path.join(tmp_dir, 'timing.json')
+
+        scanner = AbortScanner(request['abort_patterns']) if request.get('abort_patterns') else None
+        watched = {}
+        if scanner is not None:
+            for stream, path in (('stdout', out_path), ('stderr', err_path)):
+                open(path, 'wb').close()
+                watched[stream] = open(path, 'rb')
+
+        pid = os.fork()
+        if pid == 0:
+            _playbook_child(request, out_path, err_path, timing_path)
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass  # the child already did it (or exited)
+        try:
+            returncode, timed_out = _wait_child(pid, request['timeout'], scanner, watched)
+        finally:
+            for f in watched.values():
+                f.close()
+
+        reply = {'returncode': returncode, 'timed_out': timed_out, 'run_sec': None,
+                 'aborted': scanner.match if scanner is not None and scanner.should_abort() else None,
+                 'abort_line': scanner.line if scanner is not None else None}
+        for key, path in (('stdout', out_path), ('stderr', err_path)):
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    reply[key] = f.read()
+            except OSError:
+                reply[key] = ""
+        try:
+            with open(timing_path, 'r') as f:
+                reply['run_sec'] = json.load(f)['run_sec']
+        except (OSError, ValueError, KeyError):
+            pass
+        return reply
+
+
+def worker_main() -> int:
+    """
+    Warm worker loop: import ansible-core once, then answer one JSON request per line.
+
+    Requests: {"args": [...ansible-playbook arguments], "timeout": seconds, "events_path", "abort_patterns"}
+    Replies:  {"returncode", "stdout", "stderr", "timed_out", "run_sec", "aborted", "abort_line"}
+    """
+    # Replies get a private copy of stdout; anything ansible prints in the worker itself goes to stderr
+    replies = os.fdopen(os.dup(1), 'w', buffering=1)
+    os.dup2(2, 1)
+    for fd in (0, 1, 2):
+        os.set_blocking(fd, True)  # ansible refuses to import on non-blocking stdio
+
+    warmup_started = time.monotonic()
+    try:
+        import importlib
+        for module in WARM_MODULES:
+            importlib.import_module(module)
+        from ansible import __version__ as ansible_version
+    except BaseException as e:
+        replies.write(json.dumps({'ready': False, 'error': f"{type(e).__name__}: {e}"}) + "\n")
+        return 1
+    replies.write(json.dumps({
+        'ready': True,
+        'ansible_version': ansible_version,
+        'warmup_sec': round(time.monotonic() - warmup_started, 3)
+    }) + "\n")
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            return 0
+        try:
+            reply = _run_forked(json.loads(line))
+        except KeyboardInterrupt:
+            return 130
+        except Exception as e:
+            reply = {'returncode': 250, 'timed_out': False, 'run_sec': None,
+                     'stdout': "", 'stderr': f"Warm backend worker error: {e}\n{traceback.format_exc()}"}
+        replies.write(json.dumps(reply) + "\n")
+
+
+# =============================================================================
+# Worker pool (caller side)
+# =============================================================================
+
+def _config_fingerprint() -> tuple:
+    """Working directory and environment that ansible-core reads when a worker imports it."""
+    return (os.getcwd(),) + tuple(sorted(
+        (key, value) for key, value in os.environ.items() if key.startswith(CONFIG_ENV_PREFIXES)
+    ))
+
+
+def _worker_environment() -> dict:
+    """
+    Caller environment plus the managed SSH connection profile (see connection_profile.py)
+    and the task_events callback (it only writes when a run sets TASK_EVENTS_FILE).
+    """
+    env = os.environ.copy()
+    env.update(connection_profile_env())
+    env['ANSIBLE_CALLBACK_PLUGINS'] = os.pathsep.join(
+        path for path in (CALLBACK_PLUGINS_DIR, env.get('ANSIBLE_CALLBACK_PLUGINS')) if path
+    )
+    enabled = [name.strip() for name in env.get('ANSIBLE_CALLBACKS_ENABLED', '').split(',') if name.strip()]
+    if TASK_EVENTS_CALLBACK not in enabled:
+        enabled.append(TASK_EVENTS_CALLBACK)
+    env['ANSIBLE_CALLBACKS_ENABLED'] = ','.join(enabled)
+    return env
+
+
+class _Worker:
+    """One warm worker process and its request/reply pipes."""
+
+    def __init__(self, python: str, fingerprint: tuple):
+        self.fingerprint = fingerprint
+        try:
+            self.proc = subprocess.Popen(
+                [python, os.path.abspath(__file__), '--worker'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                env=_worker_environment()
+            )
+        except OSError as e:
+            raise WarmBackendError(f"cannot start warm worker with {python}: {e}")
+        ready = self._read()
+        if not ready.get('ready'):
+            self.close()
+            raise WarmBackendError(f"warm worker could not import ansible-core with {python}: {ready.get('error')}")
+        self.ansible_version = ready.get('ansible_version')
+        self.warmup_sec = ready.get('warmup_sec', 0.0)
+
+    def _read(self) -> dict:
+        line = self.proc.stdout.readline()
+        if not line:
+            raise WarmBackendError(f"warm worker exited (code {self.proc.poll()})")
+        return json.loads(line)
+
+    def request(self, args: list, timeout: int, events_path: str = None, abort_patterns: list = None) -> dict:
+        """Send one run request and wait for its reply."""
+        request = {'args': args, 'timeout': timeout, 'events_path': events_path, 'abort_patterns': abort_patterns}
+        try:
+            self.proc.stdin.write(json.dumps(request) + "\n")
+            self.proc.stdin.flush()
+        except OSError as e:
+            raise WarmBackendError(f"warm worker stopped accepting requests: {e}")
+        return self._read()
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self):
+        """Stop the worker (it exits on end of input)."""
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+
+
+class WarmAnsibleBackend:
+    """Pool of warm workers shared by concurrent checkpoint workers."""
+
+    def __init__(self, python: str = None, max_workers: int = 4):
+        """
+        Args:
+            python: Interpreter with ansible-core installed (default: this interpreter)
+            max_workers: Maximum number of concurrent warm workers
+        """
+        self.python = python or sys.executable
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        self._idle = []
+        self._lock = threading.Lock()
+        self.started = 0
+        self.warmup_sec = 0.0
+
+    def _checkout(self) -> _Worker:
+        fingerprint = _config_fingerprint()
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.fingerprint == fingerprint and worker.alive():
+                    return worker
+                worker.close()
+        worker = _Worker(self.python, fingerprint)
+        with self._lock:
+            self.started += 1
+            self.warmup_sec += worker.warmup_sec
+        if self.started == 1:
+            print(f"   ♨️  Warm Ansible backend ready (ansible-core {worker.ansible_version}, "
+                  f"warm-up {worker.warmup_sec:.2f}s)")
+        return worker
+
+    def run(self, args: list, timeout: int, events_path: str = None, abort_patterns: list = None) -> dict:
+        """
+        Run ansible-playbook with the given arguments on an idle warm worker.
+
+        Args:
+            args: ansible-playbook arguments
+            timeout: Timeout in seconds for the playbook run
+            events_path: File the task_events callback writes the run's task events to (optional)
+            abort_patterns: Playbook-bug signatures that stop the run early (optional)
+
+        Returns:
+            dict: {'returncode', 'stdout', 'stderr', 'timed_out', 'run_sec', 'aborted', 'abort_line', 'queue_sec'}
+
+        Raises:
+            WarmBackendError: If no worker could be started or the worker died
+        """
+        queued = time.monotonic()
+        with self._slots:
+            queue_sec = time.monotonic() - queued
+            worker = self._checkout()
+            try:
+                reply = worker.request(args, timeout, events_path, abort_patterns)
+            except BaseException:
+                worker.close()
+                raise
+            with self._lock:
+                self._idle.append(worker)
+        reply['queue_sec'] = queue_sec
+        return reply
+
+    def close(self):
+        """Stop all idle workers."""
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.close()
+
+
+# =============================================================================
+# Backend selection and per-run statistics
+# =============================================================================
+
+_backend_name = os.environ.get('ANSIBLE_BACKEND', 'navigator').strip().lower() or 'navigator'
+_warm_backend = None
+_backend_lock = threading.Lock()
+_backend_stats = {}
+
+
+def set_ansible_backend(name: str):
+    """
+    Select how run_navigator() executes playbooks.
+
+    Args:
+        name: "navigator" (cold ansible-navigator subprocess per run) or "warm"
+    """
+    global _backend_name
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Ansible backend: {name} (expected one of {', '.join(BACKENDS)})")
+    with _backend_lock:
+        _backend_name = name
+
+
+def get_ansible_backend() -> str:
+    """Name of the selected backend."""
+    return _backend_name
+
+
+def _get_warm_backend() -> WarmAnsibleBackend:
+    global _warm_backend
+    with _backend_lock:
+        if _warm_backend is None:
+            try:
+                max_workers = int(os.environ.get('ANSIBLE_BACKEND_WORKERS', 4))
+            except ValueError:
+                max_workers = 4
+            _warm_backend = WarmAnsibleBackend(os.environ.get('ANSIBLE_BACKEND_PYTHON'), max_workers)
+            atexit.register(_warm_backend.close)
+        return _warm_backend
+
+
+def navigator_to_playbook_args(cmd: list) -> list:
+    """
+    Translate an `ansible-navigator run ...` command line to ansible-playbook arguments.
+
+    Returns:
+        list: ansible-playbook arguments (without the program name), or None if cmd is not a run command
+    """
+    if len(cmd) < 3 or cmd[1] != 'run':
+        return None
+    args = []
+    skip_value = False
+    for arg in cmd[2:]:
+        if skip_value:
+            skip_value = False
+        elif arg in NAVIGATOR_ONLY_OPTIONS:
+            skip_value = True
+        elif not arg.startswith(tuple(option + '=' for option in NAVIGATOR_ONLY_OPTIONS)):
+            args.append(arg)
+    return args
+
+
+def navigator_events_path(cmd: list) -> str:
+    """Playbook artifact path of a navigator command line (--pas), or None."""
+    for index, arg in enumerate(cmd):
+        if arg in EVENTS_PATH_OPTIONS and index + 1 < len(cmd):
+            return cmd[index + 1]
+        for option in EVENTS_PATH_OPTIONS:
+            if arg.startswith(option + '='):
+                return arg.split('=', 1)[1]
+    return None
+
+
+def _record_run(backend: str, wall_sec: float, run_sec: float = None, queue_sec: float = 0.0):
+    with _backend_lock:
+        stats = _backend_stats.setdefault(backend, {'runs': 0, 'wall_sec': 0.0, 'run_sec': 0.0, 'queue_sec': 0.0})
+        stats['runs'] += 1
+        stats['wall_sec'] += wall_sec
+        stats['queue_sec'] += queue_sec
+        if run_sec is not None:
+            stats['run_sec'] += run_sec
+
+
+def record_navigator_run(wall_sec: float):
+    """Record a cold ansible-navigator run (start-up cannot be separated from playbook time)."""
+    _record_run('navigator', wall_sec)
+
+
+def run_warm(cmd: list, timeout: int, abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """
+    Run an ansible-navigator command line on the warm backend.
+
+    Args:
+        cmd: ansible-navigator run command (as built by build_syntax_check_command()/build_test_command())
+        timeout: Timeout in seconds for the playbook run
+        abort_patterns: Playbook-bug signatures that stop the run early (see AbortScanner)
+
+    Returns:
+        subprocess.CompletedProcess: Same shape as a navigator run, or None if the
+        warm backend is unavailable and the caller should run the command cold
+
+    Raises:
+        subprocess.TimeoutExpired: If the run exceeds the timeout (its process group is killed)
+    """
+    args = navigator_to_playbook_args(cmd)
+    if args is None:
+        return None
+    backend = _get_warm_backend()
+    started = time.monotonic()
+    try:
+        reply = backend.run(args, timeout, navigator_events_path(cmd), abort_patterns)
+    except WarmBackendError as e:
+        if backend.started == 0:
+            # Workers cannot start at all (e.g. no ansible-core for this interpreter)
+            print(f"   ⚠️  Warm Ansible backend unavailable, using ansible-navigator: {e}")
+            set_ansible_backend('navigator')
+        else:
+            print(f"   ⚠️  Warm Ansible backend failed, retrying with ansible-navigator: {e}")
+        return None
+    wall_sec = time.monotonic() - started
+
+    if reply.get('timed_out'):
+        raise subprocess.TimeoutExpired(cmd, timeout, output=reply.get('stdout'), stderr=reply.get('stderr'))
+
+    queue_sec = reply.get('queue_sec', 0.0)
+    run_sec = reply.get('run_sec')
+    if run_sec is None:
+        run_sec = wall_sec - queue_sec  # the run died before reporting; count it all as playbook time
+    _record_run('warm', wall_sec, run_sec, queue_sec)
+    print(f"   ♨️  Warm run: playbook {run_sec:.2f}s, overhead {max(0.0, wall_sec - queue_sec - run_sec):.2f}s"
+          + (f", queued {queue_sec:.2f}s" if queue_sec >= 0.01 else ""))
+    result = subprocess.CompletedProcess(cmd, reply.get('returncode', 250), reply.get('stdout', ""), reply.get('stderr', ""))
+    result.aborted = reply.get('aborted')
+    result.abort_line = reply.get('abort_line')
+    return result
+
+
+def get_backend_stats() -> dict:
+    """
+    Get per-backend run statistics.
+
+    Returns:
+        dict: {backend: {'runs', 'wall_sec', 'queue_sec', 'run_sec', 'overhead_sec'}}; run_sec
+        and overhead_sec are None for navigator runs, whose start-up is part of the wall time
+    """
+    with _backend_lock:
+        stats = {}
+        for backend, entry in _backend_stats.items():
+            separated = backend == 'warm'
+            stats[backend] = {
+                'runs': entry['runs'],
+                'wall_sec': round(entry['wall_sec'], 1),
+                'queue_sec': round(entry['queue_sec'], 1),
+                'run_sec': round(entry['run_sec'], 1) if separated else None,
+                'overhead_sec': round(entry['wall_sec'] - entry['queue_sec'] - entry['run_sec'], 1) if separated else None
+            }
+        return stats
+
+
+def print_backend_stats():
+    """Print a one-line summary per Ansible backend used."""
+    for backend, stats in get_backend_stats().items():
+        per_run = stats['wall_sec'] / stats['runs'] if stats['runs'] else 0.0
+        if stats['overhead_sec'] is None:
+            print(f"⚙️  Ansible backend '{backend}': {stats['runs']} run(s), {stats['wall_sec']}s "
+                  f"({per_run:.2f}s/run including start-up)")
+        else:
+            overhead_per_run = stats['overhead_sec'] / stats['runs'] if stats['runs'] else 0.0
+            workers = _warm_backend.started if _warm_backend is not None else 0
+            print(f"⚙️  Ansible backend '{backend}': {stats['runs']} run(s), playbook {stats['run_sec']}s, "
+                  f"overhead {stats['overhead_sec']}s ({overhead_per_run:.2f}s/run), "
+                  f"queued {stats['queue_sec']}s, {workers} worker(s) started")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--worker']:
+        sys.exit(worker_main())
+    print("Usage: python3 ansible_backend.py --worker   (started by the warm backend, reads requests on stdin)")
+    sys.exit(2)
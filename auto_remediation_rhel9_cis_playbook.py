@@ -23,6 +23,8 @@ from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from run_journal import RunJournal, JOURNAL_FILENAME
+
 load_dotenv()
 
 # =============================================================================
@@ -445,6 +447,12 @@ Examples:
         help='Force playbook generation regardless of whether playbook exists (equivalent to --no-enhance)'
     )
     
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=f'Resume a previous run: skip checkpoints already completed in {JOURNAL_FILENAME} and retry failed/pending ones'
+    )
+    
     args = parser.parse_args()
     
     args.enhance = True
@@ -469,12 +477,16 @@ Examples:
         
         # Initialize failed playbooks log file
         failed_log_file = output_dir / "failed_playbooks.log"
-        # Clear or create the log file
-        if failed_log_file.exists():
+        # Clear or create the log file (kept when resuming so earlier failures stay visible)
+        if failed_log_file.exists() and not args.resume:
             failed_log_file.unlink()
         failed_log_file.touch()
         print(f"📝 Failed playbooks will be logged to: {failed_log_file.absolute()}")
         
+        # Open the run journal (per-checkpoint status, playbook hash, attempts, timings)
+        journal = RunJournal(output_dir / JOURNAL_FILENAME, resume=args.resume)
+        print(f"📒 Run journal: {journal.path.absolute()}" + (" (resuming)" if args.resume else ""))
+        
         # Load checkpoint data from structured JSON file
         # When skip_test is True, we don't need to load data
         checkpoint_data = None
@@ -510,6 +522,16 @@ Examples:
         
         print(f"\n✅ Found {len(checkpoints)} checkpoints to process")
         
+        skipped = 0
+        if args.resume:
+            remaining = [checkpoint for checkpoint in checkpoints if not journal.is_completed(checkpoint)]
+            skipped = len(checkpoints) - len(remaining)
+            checkpoints = remaining
+            print(f"⏭️  Resuming: skipping {skipped} completed checkpoint(s), {len(checkpoints)} remaining")
+            if not checkpoints:
+                print("✅ All checkpoints already completed. Nothing to do.")
+                return
+        
         # Process all checkpoints
         print("\n" + "="*100)
         print("🚀 Starting Automated Remediation Playbook Generation")
@@ -531,6 +553,7 @@ Examples:
             print(f"Processing checkpoint {idx}/{len(checkpoints)}: {checkpoint[:80]}...")
             print(f"{'='*100}")
             
+            started = journal.start(checkpoint)
             result = process_checkpoint_automated(
                 checkpoint_data=checkpoint_data,
                 checkpoint=checkpoint,
@@ -543,6 +566,7 @@ Examples:
                 enhance=args.enhance,
                 skip_test=getattr(args, 'skip_test', False)
             )
+            journal.finish(checkpoint, result, started)
             
             results.append(result)
             
@@ -572,10 +596,13 @@ Examples:
         print("📊 FINAL SUMMARY")
         print("="*100)
         print(f"Total checkpoints processed: {len(checkpoints)}")
+        if skipped:
+            print(f"⏭️  Skipped (already completed): {skipped}")
         print(f"✅ Successful: {successful}")
         print(f"❌ Failed: {failed}")
         print(f"📁 Output directory: {output_dir.absolute()}")
         print(f"📝 Failed checkpoints log: {failed_log_file.absolute()}")
+        print(f"📒 Run journal: {journal.path.absolute()}")
         
         if failed > 0:
             print("\nFailed checkpoints (also logged to failed_playbooks.log):")
@@ -24,6 +24,14 @@ from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from run_journal import RunJournal, JOURNAL_FILENAME
+from llm_cache import print_cache_stats
+from timing_history import print_timing_stats
+from connection_profile import print_connection_stats
+from output_compaction import print_compaction_stats
+from workflow_checkpoints import print_workflow_checkpoint_stats
+from retry_controller import retry_budget, print_retry_stats
+
 load_dotenv()
 
 # =============================================================================
@@ -250,7 +258,7 @@ def get_checkpoint_info_with_agent(vector_store, checkpoint: str, verbose: bool
     Returns:
         str: Agent response with checkpoint information
     """
-    from langchain_openai import ChatOpenAI
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
     from langchain.agents import create_agent
     from langchain_core.messages import HumanMessage
     
@@ -258,12 +266,7 @@ def get_checkpoint_info_with_agent(vector_store, checkpoint: str, verbose: bool
     search_tool = create_cis_search_tool(vector_store)
     
     # Create the LLM - Use deepseek-chat for agentic tool use
-    llm = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com",
-        temperature=0
-    )
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
     
     # Create agent with system prompt optimized for extracting structured info
     system_prompt = """You are a CIS RHEL 8 security expert. Your task is to find and extract detailed information about a specific CIS checkpoint.
@@ -431,16 +434,11 @@ def extract_audit_steps_from_procedure(audit_procedure: str, checkpoint_id: str
     if not audit_procedure or len(audit_procedure) < 20:
         return []
 
-    from langchain_openai import ChatOpenAI
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
     from langchain_core.prompts import ChatPromptTemplate
     
     # Use reasoner for better logic extraction
-    llm = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com",
-        temperature=0
-    )
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
     
     # Build rationale section if provided
     rationale_section = ""
@@ -561,7 +559,7 @@ def generate_playbook_requirements_from_checkpoint(checkpoint_info: dict) -> dic
             'requirements': list[str]
         }
     """
-    from langchain_openai import ChatOpenAI
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
     from langchain_core.prompts import ChatPromptTemplate
     
     checkpoint_id = checkpoint_info.get('checkpoint_id', 'Unknown')
@@ -584,12 +582,7 @@ def generate_playbook_requirements_from_checkpoint(checkpoint_info: dict) -> dic
         }
     
     # FALLBACK: Use LLM to generate requirements
-    llm = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com",
-        temperature=0
-    )
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
     
     # Build the prompt
     additional_context = ""
@@ -773,7 +766,7 @@ def run_playbook_generation(objective, requirements, target_host, test_host, bec
     Returns:
         tuple: (success: bool, message: str)
     """
-    max_retries = int(max(len(requirements), 3) * 1.5)
+    max_retries, _ = retry_budget(requirements, audit_procedure, min_budget=len(requirements))
     
     try:
         # Import the workflow function
@@ -1103,6 +1096,12 @@ Examples:
         help='Force playbook generation regardless of whether playbook exists (equivalent to --no-enhance)'
     )
     
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=f'Resume a previous run: skip checkpoints already completed in {JOURNAL_FILENAME} and retry failed/pending ones'
+    )
+    
     args = parser.parse_args()
     
     args.enhance = True
@@ -1131,12 +1130,16 @@ Examples:
         
         # Initialize failed playbooks log file
         failed_log_file = output_dir / "failed_playbooks.log"
-        # Clear or create the log file
-        if failed_log_file.exists():
+        # Clear or create the log file (kept when resuming so earlier failures stay visible)
+        if failed_log_file.exists() and not args.resume:
             failed_log_file.unlink()
         failed_log_file.touch()
         print(f"📝 Failed playbooks will be logged to: {failed_log_file.absolute()}")
         
+        # Open the run journal (per-checkpoint status, playbook hash, attempts, timings)
+        journal = RunJournal(output_dir / JOURNAL_FILENAME, resume=args.resume)
+        print(f"📒 Run journal: {journal.path.absolute()}" + (" (resuming)" if args.resume else ""))
+        
         # When skip_test is True, we don't need to load vector store
         # We just execute existing playbooks directly
         vector_store = None
@@ -1173,6 +1176,16 @@ Examples:
         
         print(f"\n✅ Found {len(checkpoints)} checkpoints to process")
         
+        skipped = 0
+        if args.resume:
+            remaining = [checkpoint for checkpoint in checkpoints if not journal.is_completed(checkpoint)]
+            skipped = len(checkpoints) - len(remaining)
+            checkpoints = remaining
+            print(f"⏭️  Resuming: skipping {skipped} completed checkpoint(s), {len(checkpoints)} remaining")
+            if not checkpoints:
+                print("✅ All checkpoints already completed. Nothing to do.")
+                return
+        
         # Process all checkpoints
         print("\n" + "="*100)
         print("🚀 Starting Automated Playbook Generation")
@@ -1194,6 +1207,7 @@ Examples:
             print(f"Processing checkpoint {idx}/{len(checkpoints)}: {checkpoint[:80]}...")
             print(f"{'='*100}")
             
+            started = journal.start(checkpoint)
             result = process_checkpoint_automated(
                 vector_store=vector_store,
                 checkpoint=checkpoint,
@@ -1206,6 +1220,7 @@ Examples:
                 enhance=args.enhance,
                 skip_test=getattr(args, 'skip_test', False)
             )
+            journal.finish(checkpoint, result, started)
             
             results.append(result)
             
@@ -1230,10 +1245,21 @@ Examples:
         print("📊 FINAL SUMMARY")
         print("="*100)
         print(f"Total checkpoints processed: {len(checkpoints)}")
+        if skipped:
+            print(f"⏭️  Skipped (already completed): {skipped}")
         print(f"✅ Successful: {successful}")
         print(f"❌ Failed: {failed}")
         print(f"📁 Output directory: {output_dir.absolute()}")
         print(f"📝 Failed checkpoints log: {failed_log_file.absolute()}")
+        print(f"📒 Run journal: {journal.path.absolute()}")
+        print_cache_stats()
+        from deepseek_generate_playbook import print_prompt_cache_stats
+        print_prompt_cache_stats()
+        print_timing_stats()
+        print_connection_stats()
+        print_compaction_stats()
+        print_workflow_checkpoint_stats()
+        print_retry_stats()
         
         if failed > 0:
             print("\nFailed checkpoints (also logged to failed_playbooks.log):")
@@ -13,16 +13,33 @@ Usage:
     python3 auto_rhel9_cis_playbook.py
     python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks
     python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --target-host 192.168.122.16
+    python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --workers 4 --max-per-host 2
+
+    # Resume an interrupted run (skips checkpoints completed in run_journal.jsonl)
+    python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --index-file checkpoints.txt --resume
 """
 
 import os
 import sys
 import re
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+from run_journal import RunJournal, JOURNAL_FILENAME
+from llm_cache import print_cache_stats
+from timing_history import print_timing_stats
+from connection_profile import print_connection_stats
+from output_compaction import print_compaction_stats
+from workflow_checkpoints import print_workflow_checkpoint_stats
+from retry_controller import print_retry_stats
+from precompute_requirements import RequirementsStore
+from playbook_templates import render_checkpoint_template
+from ansible_backend import BACKENDS, get_ansible_backend, set_ansible_backend, print_backend_stats
+
 load_dotenv()
 
 # =============================================================================
@@ -30,11 +47,19 @@ load_dotenv()
 # =============================================================================
 
 from single_rhel9_cis_checkpoint_to_playbook import (
+    DEFAULT_JSON_PATH,
     load_checkpoint_data,
     get_checkpoint_info_from_json,
     generate_playbook_requirements_from_checkpoint,
     run_playbook_generation
 )
+from deepseek_generate_playbook import (
+    set_host_concurrency,
+    set_stage_concurrency,
+    print_stage_stats,
+    print_prompt_cache_stats
+)
+from langgraph_deepseek_generate_playbook import set_parallel_test_hosts
 
 # =============================================================================
 # Checkpoint Index Extraction (unique to auto script)
@@ -147,7 +172,8 @@ def extract_checkpoint_indices(pdf_path: str) -> list:
 
 def process_checkpoint_automated(checkpoint_data, checkpoint: str, output_dir: Path, target_host: str, 
                                   test_host: str, become_user: str, skip_execution: bool, 
-                                  verbose: bool = False, enhance: bool = True, skip_test: bool = False) -> dict:
+                                  verbose: bool = False, enhance: bool = True, skip_test: bool = False,
+                                  requirements_store: RequirementsStore = None, use_templates: bool = True) -> dict:
     """
     Process a single CIS checkpoint and generate playbook (automated, no user input).
     
@@ -162,6 +188,10 @@ def process_checkpoint_automated(checkpoint_data, checkpoint: str, output_dir: P
         verbose: If True, print debug information
         enhance: If True, check for existing playbook
         skip_test: If True, skip test tasks
+        requirements_store: Precomputed requirements (see precompute_requirements.py);
+                            entries whose checkpoint text changed are regenerated
+        use_templates: If True, render checkpoints of known families from
+                       playbook_templates.py instead of calling the LLM
     
     Returns:
         dict: {
@@ -228,8 +258,26 @@ def process_checkpoint_automated(checkpoint_data, checkpoint: str, output_dir: P
                 id_match = re.search(r'(\d+\.\d+[\d\.]*)', checkpoint)
                 checkpoint_id = id_match.group(1) if id_match else 'unknown'
             
-            # Step 2: Generate playbook requirements
-            playbook_spec = generate_playbook_requirements_from_checkpoint(checkpoint_info)
+            # Step 2: Generate playbook filename
+            safe_checkpoint_id = checkpoint_id.replace('.', '_')
+            base_filename = f"cis_audit_{safe_checkpoint_id}.yml"
+            filename = str(output_dir / base_filename)
+            result['filename'] = filename
+            
+            # Step 3: Template fast path for repetitive checkpoint families (no LLM call).
+            # An existing playbook still wins in enhance mode, same as for LLM playbooks.
+            template = None
+            if use_templates and not (enhance and os.path.exists(filename)):
+                template = render_checkpoint_template(checkpoint_info)
+            
+            # Step 4: Generate playbook requirements (or reuse the precomputed ones)
+            if template is not None:
+                print(f"    ⚡ Checkpoint matches template family '{template['family']}' - playbook rendered without LLM")
+                playbook_spec = template
+            elif requirements_store is not None:
+                playbook_spec = requirements_store.get_or_generate(checkpoint_info)
+            else:
+                playbook_spec = generate_playbook_requirements_from_checkpoint(checkpoint_info)
             
             objective = playbook_spec.get('objective', '')
             requirements = playbook_spec.get('requirements', [])
@@ -273,16 +321,18 @@ Each requirement MUST have Status and Rationale lines. The OVERALL COMPLIANCE se
                 print(f"  {idx}. {display_req}")
             print(f"{'='*100}\n")
             
-            # Step 3: Generate playbook filename
-            safe_checkpoint_id = checkpoint_id.replace('.', '_')
-            base_filename = f"cis_audit_{safe_checkpoint_id}.yml"
-            filename = str(output_dir / base_filename)
-            result['filename'] = filename
-            
             # Get the audit procedure directly from JSON data
             audit_procedure = checkpoint_info.get('audit_procedure', '')
             
-            # Step 4: Generate and optionally execute playbook
+            if template is not None:
+                # The workflow loads the rendered playbook as an existing one: it is
+                # syntax-checked and tested as usual and only goes to the LLM if the
+                # test or analysis finds problems
+                with open(filename, 'w', encoding='utf-8') as f:
+                    f.write(template['playbook'])
+                print(f"💾 Template playbook saved to: {filename}")
+            
+            # Step 5: Generate and optionally execute playbook
             success, output = run_playbook_generation(
                 objective=objective,
                 requirements=requirements,
@@ -292,7 +342,7 @@ Each requirement MUST have Status and Rationale lines. The OVERALL COMPLIANCE se
                 filename=filename,
                 skip_execution=skip_execution,
                 audit_procedure=audit_procedure if audit_procedure and len(audit_procedure) > 50 else None,
-                enhance=enhance,
+                enhance=enhance or template is not None,
                 skip_test=skip_test
             )
         
@@ -308,15 +358,27 @@ Each requirement MUST have Status and Rationale lines. The OVERALL COMPLIANCE se
         return result
 
 
+# Serializes appends to failed_playbooks.log when checkpoints run concurrently
+_failed_log_lock = threading.Lock()
+
+
 def log_failed_checkpoint(checkpoint: str, error: str, log_file: Path):
     """
     Log a failed checkpoint to the failed_playbooks.log file.
     
+    Safe to call from concurrent workers - each entry is written as one block.
+    
     Args:
         checkpoint: The checkpoint string that failed
         error: The error message
         log_file: Path to the log file
     """
+    with _failed_log_lock:
+        _write_failed_checkpoint(checkpoint, error, log_file)
+
+
+def _write_failed_checkpoint(checkpoint: str, error: str, log_file: Path):
+    """Append one failure entry to the log file (caller holds _failed_log_lock)."""
     try:
         # Ensure error is not None or empty
         if not error:
@@ -350,6 +412,68 @@ def log_failed_checkpoint(checkpoint: str, error: str, log_file: Path):
         print(f"    Traceback: {traceback.format_exc()}")
 
 
+def effective_workers(workers: int, llm_workers: int, host_workers: int) -> int:
+    """
+    Number of checkpoints to process concurrently.
+    
+    Stage limits only pipeline if there are enough workers to fill both
+    stages, so without an explicit --workers they imply one worker per LLM
+    slot plus one per host slot.
+    
+    Args:
+        workers: --workers (None if not given)
+        llm_workers: --llm-workers (0 = unlimited)
+        host_workers: --host-workers (0 = unlimited)
+        
+    Returns:
+        int: Worker count
+    """
+    if workers is not None:
+        return workers
+    if llm_workers > 0 or host_workers > 0:
+        return max(1, llm_workers) + max(1, host_workers)
+    return 1
+
+
+def run_checkpoints_concurrently(checkpoints: list, workers: int, run_one, record_result):
+    """
+    Process checkpoints on a pool of worker threads.
+    
+    On Ctrl-C the queued checkpoints are cancelled instead of waited for;
+    checkpoints that are already running finish, then the interrupt is re-raised.
+    
+    Args:
+        checkpoints: Checkpoints to process
+        workers: Number of worker threads
+        run_one: Callable (idx, checkpoint) -> result dict
+        record_result: Callable (idx, checkpoint, result), called as results complete
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {}
+    try:
+        for idx, checkpoint in enumerate(checkpoints, 1):
+            futures[executor.submit(run_one, idx, checkpoint)] = (idx, checkpoint)
+        for future in as_completed(futures):
+            idx, checkpoint = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                import traceback
+                result = {
+                    'checkpoint': checkpoint,
+                    'success': False,
+                    'filename': None,
+                    'error': f"{str(e)}\n{traceback.format_exc()}"
+                }
+            record_result(idx, checkpoint, result)
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        cancelled = sum(1 for future in futures if future.cancelled())
+        print(f"\n⚠️  Interrupted: cancelled {cancelled} queued checkpoint(s), waiting for running ones to stop")
+        raise
+    executor.shutdown()
+
+
 # =============================================================================
 # Main
 # =============================================================================
@@ -374,6 +498,12 @@ Examples:
   
   # Use checkpoint indices from file (skips PDF extraction)
   python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --index-file checkpoints.txt
+  
+  # Process 4 checkpoints concurrently, at most 2 playbook runs per test host
+  python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --workers 4 --max-per-host 2
+  
+  # Pipeline: up to 3 LLM calls in flight while 2 playbooks run on test hosts
+  python3 auto_rhel9_cis_playbook.py --output-dir ./playbooks --workers 5 --llm-workers 3 --host-workers 2
 """
     )
     
@@ -398,6 +528,13 @@ Examples:
         help='Test host for validation before target execution'
     )
     
+    parser.add_argument(
+        '--parallel-test-hosts',
+        action='store_true',
+        help='With a comma-separated --test-host list, test all hosts in one run (forks = number of hosts) '
+             'and analyze them in parallel instead of one host after another'
+    )
+    
     parser.add_argument(
         '--become-user', '-u',
         type=str,
@@ -444,13 +581,74 @@ Examples:
         help='Force playbook generation regardless of whether playbook exists (equivalent to --no-enhance)'
     )
     
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='Number of checkpoints to process concurrently (default: 1, sequential; '
+             'with --llm-workers/--host-workers: their sum)'
+    )
+    
+    parser.add_argument(
+        '--max-per-host',
+        type=int,
+        default=1,
+        help='Maximum concurrent playbook runs per test/target host when --workers > 1 (default: 1, 0 = unlimited)'
+    )
+    
+    parser.add_argument(
+        '--llm-workers',
+        type=int,
+        default=0,
+        help='Maximum concurrent LLM calls (generate/analyze) across all workers (default: 0, unlimited)'
+    )
+    
+    parser.add_argument(
+        '--host-workers',
+        type=int,
+        default=0,
+        help='Maximum concurrent syntax checks/playbook runs across all workers (default: 0, unlimited)'
+    )
+    
+    parser.add_argument(
+        '--no-templates',
+        dest='use_templates',
+        action='store_false',
+        help='Always generate playbooks with the LLM, even for checkpoint families covered by playbook_templates.py'
+    )
+    
+    parser.add_argument(
+        '--ansible-backend',
+        choices=BACKENDS,
+        default=get_ansible_backend(),
+        help='How syntax checks and test runs execute: "navigator" (cold ansible-navigator run per call) or '
+             '"warm" (long-lived ansible-playbook workers, local ansible-core) (default: ANSIBLE_BACKEND or navigator)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=f'Resume a previous run: skip checkpoints already completed in {JOURNAL_FILENAME} and retry failed/pending ones'
+    )
+    
     args = parser.parse_args()
     
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    stage_limited = args.llm_workers > 0 or args.host_workers > 0
+    if args.workers == 1 and stage_limited:
+        parser.error("--llm-workers/--host-workers need --workers > 1 "
+                     "(or leave out --workers to use their sum)")
+    workers = effective_workers(args.workers, args.llm_workers, args.host_workers)
+    
     args.enhance = True
     # If --generate is specified, set enhance=False
     if args.generate:
         args.enhance = False
     
+    set_ansible_backend(args.ansible_backend)
+    set_parallel_test_hosts(args.parallel_test_hosts)
+    
     try:
         # Get output directory (required user input)
         if args.output_dir:
@@ -468,21 +666,28 @@ Examples:
         
         # Initialize failed playbooks log file
         failed_log_file = output_dir / "failed_playbooks.log"
-        # Clear or create the log file
-        if failed_log_file.exists():
+        # Clear or create the log file (kept when resuming so earlier failures stay visible)
+        if failed_log_file.exists() and not args.resume:
             failed_log_file.unlink()
         failed_log_file.touch()
         print(f"📝 Failed playbooks will be logged to: {failed_log_file.absolute()}")
         
+        # Open the run journal (per-checkpoint status, playbook hash, attempts, timings)
+        journal = RunJournal(output_dir / JOURNAL_FILENAME, resume=args.resume)
+        print(f"📒 Run journal: {journal.path.absolute()}" + (" (resuming)" if args.resume else ""))
+        
         # Load checkpoint data from structured JSON file
         # When skip_test is True, we don't need to load data
         checkpoint_data = None
+        requirements_store = None
         if not getattr(args, 'skip_test', False):
             print("\n" + "="*100)
             print("🔧 Loading CIS RHEL 9 Benchmark Data from JSON")
             print("="*100)
             
             checkpoint_data = load_checkpoint_data()
+            requirements_store = RequirementsStore.for_benchmark(DEFAULT_JSON_PATH)
+            print(f"📦 Precomputed requirements: {len(requirements_store.entries)} in {requirements_store.path.name}")
             print("✅ Checkpoint data ready")
         
         # Get checkpoint indices - either from file or extract from PDF
@@ -509,6 +714,16 @@ Examples:
         
         print(f"\n✅ Found {len(checkpoints)} checkpoints to process")
         
+        skipped = 0
+        if args.resume:
+            remaining = [checkpoint for checkpoint in checkpoints if not journal.is_completed(checkpoint)]
+            skipped = len(checkpoints) - len(remaining)
+            checkpoints = remaining
+            print(f"⏭️  Resuming: skipping {skipped} completed checkpoint(s), {len(checkpoints)} remaining")
+            if not checkpoints:
+                print("✅ All checkpoints already completed. Nothing to do.")
+                return
+        
         # Process all checkpoints
         print("\n" + "="*100)
         print("🚀 Starting Automated Playbook Generation")
@@ -517,19 +732,27 @@ Examples:
         print(f"Output directory: {output_dir.absolute()}")
         print(f"Target host: {args.target_host}")
         print(f"Skip execution: {args.skip_execution}")
+        print(f"Ansible backend: {args.ansible_backend}")
+        if args.parallel_test_hosts:
+            print(f"Test hosts: {args.test_host} (tested together in one run)")
         if getattr(args, 'skip_test', False):
             print(f"Skip test: {args.skip_test} (will skip all test tasks, execute directly on target)")
+        if workers > 1:
+            derived = " = --llm-workers + --host-workers" if args.workers is None else ""
+            print(f"Workers: {workers}{derived} (max {args.max_per_host or 'unlimited'} concurrent run(s) per host)")
+            print(f"Stage limits: llm={args.llm_workers or 'unlimited'}, host={args.host_workers or 'unlimited'}")
         print("="*100)
         
-        results = []
-        successful = 0
-        failed = 0
+        results = [None] * len(checkpoints)
+        counters = {'completed': 0, 'successful': 0, 'failed': 0}
+        progress_lock = threading.Lock()
         
-        for idx, checkpoint in enumerate(checkpoints, 1):
+        def run_one(idx: int, checkpoint: str) -> dict:
             print(f"\n{'='*100}")
             print(f"Processing checkpoint {idx}/{len(checkpoints)}: {checkpoint[:80]}...")
             print(f"{'='*100}")
             
+            started = journal.start(checkpoint)
             result = process_checkpoint_automated(
                 checkpoint_data=checkpoint_data,
                 checkpoint=checkpoint,
@@ -540,19 +763,18 @@ Examples:
                 skip_execution=args.skip_execution,
                 verbose=args.verbose,
                 enhance=args.enhance,
-                skip_test=getattr(args, 'skip_test', False)
+                skip_test=getattr(args, 'skip_test', False),
+                requirements_store=requirements_store,
+                use_templates=args.use_templates
             )
+            journal.finish(checkpoint, result, started)
+            return result
+        
+        def record_result(idx: int, checkpoint: str, result: dict):
+            results[idx - 1] = result
             
-            results.append(result)
-            
-            if result['success']:
-                successful += 1
-                print(f"✅ Success: {result['filename']}")
-            else:
-                failed += 1
-                error_msg = result.get('error', 'Unknown error')
-                print(f"❌ Failed: {error_msg[:200]}..." if len(error_msg) > 200 else f"❌ Failed: {error_msg}")
-                
+            if not result['success']:
+                error_msg = result.get('error') or 'Unknown error'
                 # Log failed checkpoint to file
                 try:
                     log_failed_checkpoint(
@@ -563,18 +785,56 @@ Examples:
                 except Exception as log_error:
                     print(f"    ⚠️  Critical: Failed to log checkpoint to file: {log_error}")
             
-            # Progress summary
-            print(f"\nProgress: {idx}/{len(checkpoints)} | Successful: {successful} | Failed: {failed}")
+            with progress_lock:
+                counters['completed'] += 1
+                if result['success']:
+                    counters['successful'] += 1
+                    print(f"✅ Success: {result['filename']}")
+                else:
+                    counters['failed'] += 1
+                    error_msg = result.get('error') or 'Unknown error'
+                    print(f"❌ Failed: {error_msg[:200]}..." if len(error_msg) > 200 else f"❌ Failed: {error_msg}")
+                
+                # Progress summary
+                print(f"\nProgress: {counters['completed']}/{len(checkpoints)} | Successful: {counters['successful']} | Failed: {counters['failed']}")
+        
+        if workers == 1:
+            for idx, checkpoint in enumerate(checkpoints, 1):
+                record_result(idx, checkpoint, run_one(idx, checkpoint))
+        else:
+            set_host_concurrency(args.max_per_host)
+            set_stage_concurrency("llm", args.llm_workers)
+            set_stage_concurrency("host", args.host_workers)
+            run_checkpoints_concurrently(checkpoints, workers, run_one, record_result)
+        
+        successful = counters['successful']
+        failed = counters['failed']
         
         # Final summary
         print("\n" + "="*100)
         print("📊 FINAL SUMMARY")
         print("="*100)
         print(f"Total checkpoints processed: {len(checkpoints)}")
+        if skipped:
+            print(f"⏭️  Skipped (already completed): {skipped}")
+        if workers > 1:
+            print(f"👷 Workers: {workers}")
+            print_stage_stats()
         print(f"✅ Successful: {successful}")
         print(f"❌ Failed: {failed}")
         print(f"📁 Output directory: {output_dir.absolute()}")
         print(f"📝 Failed checkpoints log: {failed_log_file.absolute()}")
+        print(f"📒 Run journal: {journal.path.absolute()}")
+        print_cache_stats()
+        print_prompt_cache_stats()
+        print_backend_stats()
+        print_timing_stats()
+        print_connection_stats()
+        print_compaction_stats()
+        print_workflow_checkpoint_stats()
+        print_retry_stats()
+        if requirements_store is not None:
+            print(f"📦 Requirements store: {requirements_store.summary()}")
         
         if failed > 0:
             print("\nFailed checkpoints (also logged to failed_playbooks.log):")
@@ -0,0 +1,81 @@
+# Task event recorder for the warm Ansible backend (ansible_backend.py)
+#
+# Writes one JSON line per task result to the file named by TASK_EVENTS_FILE,
+# using the same record layout as the task entries of an ansible-navigator
+# playbook artifact, so task_events.py reads both the same way.
+
+from __future__ import annotations
+
+DOCUMENTATION = """
+    name: task_events
+    type: aggregate
+    short_description: Record per-task results as JSON lines
+    description:
+        - Appends one JSON record per task result (task, host, result, changed, res, duration) to the file in TASK_EVENTS_FILE.
+        - Does nothing when TASK_EVENTS_FILE is not set.
+    requirements:
+        - enable in configuration (ANSIBLE_CALLBACKS_ENABLED=task_events)
+"""
+
+import os
+import json
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+# Result keys kept in each record (others, like invocation, are dropped)
+RESULT_KEYS = ('changed', 'rc', 'stdout', 'stderr', 'msg', 'module_stderr', 'exception',
+               'skipped', 'skip_reason', 'failed', 'unreachable', 'ansible_facts', 'results')
+
+
+def _attr(obj, name):
+    """Public attribute on ansible-core >= 2.19, underscored one before."""
+    value = getattr(obj, name, None)
+    return value if value is not None else getattr(obj, '_' + name, None)
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'task_events'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._path = os.environ.get('TASK_EVENTS_FILE')
+        self._started = {}
+
+    def _write(self, result, status: str, ignored: bool = False):
+        if not self._path:
+            return
+        task = _attr(result, 'task')
+        host = _attr(result, 'host')
+        res = _attr(result, 'result') or {}
+        started = self._started.pop((host.get_name(), task._uuid), None)
+        record = {
+            'task': task.get_name(),
+            'task_action': task.action,
+            'host': host.get_name(),
+            '__result': 'IGNORED' if ignored else status.upper(),
+            '__changed': bool(res.get('changed', False)),
+            'ignore_errors': ignored,
+            'duration': round(time.monotonic() - started, 3) if started else None,
+            'res': {key: res[key] for key in RESULT_KEYS if key in res},
+        }
+        with open(self._path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def v2_runner_on_start(self, host, task):
+        self._started[(host.get_name(), task._uuid)] = time.monotonic()
+
+    def v2_runner_on_ok(self, result):
+        self._write(result, 'ok')
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._write(result, 'failed', ignored=ignore_errors)
+
+    def v2_runner_on_skipped(self, result):
+        self._write(result, 'skipped')
+
+    def v2_runner_on_unreachable(self, result):
+        self._write(result, 'unreachable')
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Local Compliance Report Evaluation
+
+Every generated audit playbook ends with a "Generate compliance report" debug
+task that prints a structured report:
+
+    REQUIREMENT 1 - <requirement text>:
+      Task: ...
+      Command: ...
+      Exit code: 0
+      Data: ...
+      Status: PASS
+      Rationale: ...
+    ...
+    REQUIREMENT 3 - OVERALL Verify: <title>. Rationale: PASS when req_1=PASS and req_2=PASS, FAIL otherwise:
+      ...
+      Status: PASS
+    OVERALL COMPLIANCE:
+      Result: PASS
+      Rationale: ...
+
+When every requirement has an evaluated status and the OVERALL result follows
+the OVERALL Verify rationale rule, the compliance verdict can be taken straight
+from the report. The workflow then skips the two AI analysis calls (data
+collection + compliance) and decides on the structured verdict; it only falls
+back to the AI for ambiguous reports (UNKNOWN statuses, missing data,
+free-form OVERALL rules, mismatches). format_compliance_verdict() renders a
+verdict as markdown for display.
+
+The report is parsed once per run into a frozen ComplianceReport (a tuple of
+RequirementResult records with status, rationale, rc and data); the local
+evaluation and the status checks in deepseek_generate_playbook.py all read
+that object instead of re-scanning the run output. parse_run_report() keeps
+the reports of the last RUN_REPORT_CACHE_SIZE outputs, so the workflow state
+only holds the output text and re-parsing it is a cache hit.
+
+Usage:
+    report = parse_run_report(test_output)
+    verdict, reason = evaluate_compliance_report(test_output, report)
+    if verdict is not None:
+        ...verdict['overall_status'], verdict['requirements'][i]['status'] ...
+        print(format_compliance_verdict(verdict))
+"""
+
+import re
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+VALID_STATUSES = ('PASS', 'FAIL', 'NA', 'UNKNOWN')
+
+# Status -> AI compliance status wording used by the analysis prompts
+COMPLIANCE_STATUS_MAP = {
+    'PASS': 'COMPLIANT',
+    'FAIL': 'NON-COMPLIANT',
+    'NA': 'NA',
+    'UNKNOWN': 'UNKNOWN'
+}
+
+# Data placeholders left by the report template when a task never ran
+MISSING_DATA_MARKERS = ('Not collected yet', 'Data collection failed')
+
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+REQUIREMENT_HEADER_PATTERN = re.compile(r'^\s*REQUIREMENT\s+(\d+)\s*-\s*(.*?):?\s*$', re.IGNORECASE)
+FIELD_PATTERN = re.compile(r'^\s*(Task|Command|Exit code|Data|Status|Result|Rationale):\s*(.*)$', re.IGNORECASE)
+OVERALL_RULE_PATTERN = re.compile(r'PASS\s+(?:when|if)\s+(.+?)\s*,\s*FAIL\s+otherwise', re.IGNORECASE)
+RULE_TERM_PATTERN = re.compile(r'^\(?\s*req_?0*(\d+)\s*(?:==|=|is)\s*[\'"]?(PASS|FAIL|NA|UNKNOWN)[\'"]?\s*\)?$', re.IGNORECASE)
+
+
+def extract_compliance_report(test_output: str) -> str:
+    """
+    Extract the compliance report text from playbook execution output.
+
+    Args:
+        test_output: Playbook execution output (ansible-navigator stdout)
+
+    Returns:
+        str: Report text (one line per report line), or "" if not found
+    """
+    test_output = ANSI_ESCAPE_PATTERN.sub('', test_output or '')
+
+    # The report is the "msg" list of the "Generate compliance report" debug task
+    try:
+        msg_matches = re.findall(r'"msg":\s*\[(.*?)\]', test_output, re.DOTALL)
+        for msg_match in msg_matches:
+            if 'COMPLIANCE REPORT' not in msg_match:
+                continue  # only the report block is worth decoding
+            try:
+                msg_array = json.loads('[' + msg_match + ']')
+                msg_text = '\n'.join(str(item) for item in msg_array)
+            except (json.JSONDecodeError, ValueError):
+                # If JSON parsing fails, extract the quoted strings manually
+                strings = re.findall(r'"([^"]*)"', msg_match)
+                msg_text = '\n'.join(strings)
+            if 'COMPLIANCE REPORT' in msg_text:
+                return msg_text
+    except Exception:
+        pass
+
+    # Fall back to scanning plain output lines
+    lines = test_output.split('\n')
+    in_compliance_report = False
+    report_lines = []
+    for i, line in enumerate(lines):
+        if 'COMPLIANCE REPORT' in line or ('COMPLIANCE' in line and 'REPORT' in line):
+            in_compliance_report = True
+            report_lines.append(line)
+            continue
+        if in_compliance_report:
+            if 'PLAY RECAP' in line or ('TASK [' in line and i > 0 and len(report_lines) > 10):
+                break
+            report_lines.append(line)
+    return '\n'.join(report_lines)
+
+
+@dataclass(frozen=True, slots=True)
+class RequirementResult:
+    """One REQUIREMENT entry of the compliance report."""
+    index: int
+    title: str
+    task: str = None
+    command: str = None
+    exit_code: str = None   # 'Exit code' field as printed
+    rc: int = None          # exit_code as int, None when not a number
+    data: str = None
+    status: str = None      # upper-cased; not necessarily one of VALID_STATUSES
+    rationale: str = None
+
+    @property
+    def is_overall(self) -> bool:
+        """True for the 'REQUIREMENT N - OVERALL Verify: ...' entry."""
+        return 'OVERALL' in self.title.split(':')[0].upper()
+
+    def __repr__(self) -> str:
+        return f"RequirementResult({self.index}, status={self.status!r}, rc={self.rc!r})"
+
+
+@dataclass(frozen=True, slots=True)
+class ComplianceReport:
+    """
+    Compliance report of one run, parsed once (see parse_run_report()).
+
+    Frozen (tuples instead of lists), because parse_run_report() hands the same
+    object to every caller that asks for the report of the same output.
+    """
+    text: str = ""
+    requirements: tuple = ()          # RequirementResult in report order
+    overall_found: bool = False       # OVERALL COMPLIANCE section present
+    overall_status: str = None
+    overall_rationale: str = None
+    status_lines: tuple = ()          # (line_no, line) of requirement 'Status:' lines
+
+    @property
+    def found(self) -> bool:
+        return bool(self.text)
+
+    def requirement_statuses(self) -> dict:
+        """Requirement index -> status for the evaluated (PASS/FAIL/NA/UNKNOWN) non-OVERALL requirements."""
+        return {req.index: req.status for req in self.requirements
+                if not req.is_overall and req.status in VALID_STATUSES}
+
+    def overall_requirement(self) -> RequirementResult:
+        """The OVERALL Verify requirement, or None."""
+        return next((req for req in self.requirements if req.is_overall), None)
+
+    def __repr__(self) -> str:
+        return f"ComplianceReport({len(self.requirements)} requirements, overall={self.overall_status!r})"
+
+
+def parse_compliance_report(report_text: str) -> ComplianceReport:
+    """
+    Parse a compliance report into requirements and the OVERALL section.
+
+    Args:
+        report_text: Text returned by extract_compliance_report()
+
+    Returns:
+        ComplianceReport: Requirements in report order plus the OVERALL result
+    """
+    requirements = []      # field dicts of the RequirementResult entries
+    overall = {}           # OVERALL COMPLIANCE fields
+    status_lines = []
+    overall_found = False
+    current = None
+
+    for line_no, line in enumerate(report_text.split('\n'), 1):
+        if 'Status:' in line and 'OVERALL' not in line.upper():
+            status_lines.append((line_no, line))
+        header = REQUIREMENT_HEADER_PATTERN.match(line)
+        if header:
+            current = {'index': int(header.group(1)), 'title': header.group(2).strip()}
+            requirements.append(current)
+            continue
+        if 'OVERALL COMPLIANCE' in line.upper():
+            overall_found = True
+            current = overall
+            continue
+        if current is None:
+            continue
+        field = FIELD_PATTERN.match(line)
+        if not field:
+            continue
+        name = field.group(1).lower().replace(' ', '_')
+        value = field.group(2).strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1].strip()
+        if name in ('status', 'result'):
+            current['status'] = value.upper()
+        elif current is overall:
+            if name == 'rationale':
+                overall['rationale'] = value
+        else:
+            current[name] = value
+            if name == 'exit_code':
+                current['rc'] = _parse_exit_code(value)
+
+    return ComplianceReport(
+        text=report_text,
+        requirements=tuple(RequirementResult(**fields) for fields in requirements),
+        overall_found=overall_found,
+        overall_status=overall.get('status'),
+        overall_rationale=overall.get('rationale'),
+        status_lines=tuple(status_lines)
+    )
+
+
+# How many recent run outputs parse_run_report() keeps the parsed report of
+RUN_REPORT_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=RUN_REPORT_CACHE_SIZE)
+def parse_run_report(test_output: str) -> ComplianceReport:
+    """
+    Extract and parse the compliance report of a run (once per run).
+
+    The reports of recent outputs are kept, so callers that need the report of
+    the same output share one parse (the report is frozen, so they cannot
+    change it for each other).
+
+    Args:
+        test_output: Playbook execution output
+
+    Returns:
+        ComplianceReport: Parsed report (report.found is False when the output has none)
+    """
+    return parse_compliance_report(extract_compliance_report(test_output))
+
+
+def _parse_exit_code(value: str):
+    """Parse an 'Exit code' field, returning None when it is not a number."""
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def evaluate_overall_rule(rule_text: str, statuses: dict) -> tuple[str, str]:
+    """
+    Evaluate an OVERALL Verify rationale rule such as
+    "PASS when req_1=PASS and req_2=PASS, FAIL otherwise".
+
+    Only flat AND-only or OR-only combinations of req_N=STATUS terms are
+    evaluated; anything else is left to the AI analysis.
+
+    Args:
+        rule_text: Requirement title/rationale containing the rule
+        statuses: Requirement index -> status
+
+    Returns:
+        tuple: (expected_status, reason) - expected_status is None if the rule can't be evaluated
+    """
+    rule_match = OVERALL_RULE_PATTERN.search(rule_text or '')
+    if not rule_match:
+        return None, "OVERALL rule is not of the form 'PASS when req_N=STATUS ..., FAIL otherwise'"
+    condition = rule_match.group(1).strip()
+
+    operators = {op.upper() for op in re.findall(r'\s(AND|OR)\s', condition, re.IGNORECASE)}
+    if len(operators) > 1:
+        return None, f"OVERALL rule mixes AND/OR: {condition}"
+    terms = re.split(r'\s+(?:AND|OR)\s+', condition, flags=re.IGNORECASE)
+
+    results = []
+    for term in terms:
+        term_match = RULE_TERM_PATTERN.match(term.strip())
+        if not term_match:
+            return None, f"OVERALL rule term not understood: {term.strip()}"
+        req_num, expected = int(term_match.group(1)), term_match.group(2).upper()
+        if req_num not in statuses:
+            return None, f"OVERALL rule references missing requirement {req_num}"
+        results.append(statuses[req_num] == expected)
+
+    satisfied = any(results) if operators == {'OR'} else all(results)
+    return ('PASS' if satisfied else 'FAIL'), condition
+
+
+def format_compliance_verdict(verdict: dict) -> str:
+    """Render a local compliance verdict as markdown for display (laid out like the AI compliance analysis)."""
+    lines = [
+        "## LOCAL COMPLIANCE REPORT EVALUATION (AI analysis skipped)",
+        "",
+        f"- **DATA COLLECTION**: {verdict['data_collection']}",
+        f"- **COMPLIANCE ANALYSIS**: {verdict['compliance_analysis']}",
+        ""
+    ]
+    for req in verdict['requirements']:
+        exit_code = req['exit_code'] if req['exit_code'] is not None else 'N/A'
+        lines.append(f"**Requirement {req['index']}: {req['title']}**")
+        lines.append(f"- **Data Collected**: Exit code: {exit_code}, Output: \"{req['data'] or ''}\"")
+        lines.append(f"- **Compliance Status**: {COMPLIANCE_STATUS_MAP[req['status']]}")
+        lines.append(f"- **Reasoning**: {req['rationale'] or 'Status reported by the playbook'}")
+        lines.append("")
+    lines += [
+        f"- **COMPLIANCE STATUS**: {COMPLIANCE_STATUS_MAP[verdict['overall_status']]}",
+        f"  - OVERALL rule: {verdict['rule']} -> {verdict['overall_status']} (matches the playbook's OVERALL COMPLIANCE)",
+    ]
+    return '\n'.join(lines)
+
+
+def evaluate_compliance_report(test_output: str, report: ComplianceReport = None) -> tuple[dict, str]:
+    """
+    Evaluate the playbook's compliance report locally, without the AI.
+
+    The report is conclusive when:
+    - Every requirement (numbered 1..N) has Status PASS, FAIL or NA
+    - No evaluated requirement is missing data or has an error exit code (>= 2)
+    - The OVERALL result equals the last requirement's status and follows the
+      OVERALL Verify rationale rule (a single requirement is its own OVERALL)
+
+    Args:
+        test_output: Playbook execution output
+        report: The run's parsed report (parsed from test_output when not given)
+
+    Returns:
+        tuple: (verdict, reason)
+        - verdict: None when the AI analysis is still needed, otherwise
+          {'data_collection': 'PASS', 'compliance_analysis': 'PASS',
+           'overall_status': 'PASS'|'FAIL', 'rule': str,
+           'requirements': [{'index', 'title', 'status', 'exit_code', 'data', 'rationale'}, ...]}
+          (plain values, so it can be kept in the checkpointed workflow state)
+        - reason: Why the report is (in)conclusive
+    """
+    if report is None:
+        report = parse_run_report(test_output)
+    if not report.found:
+        return None, "compliance report not found"
+
+    requirements = report.requirements
+    if not requirements:
+        return None, "no REQUIREMENT entries in compliance report"
+    if not report.overall_status:
+        return None, "OVERALL COMPLIANCE result missing"
+
+    indices = [req.index for req in requirements]
+    if indices != list(range(1, len(requirements) + 1)):
+        return None, f"requirement numbering is not 1..N: {indices}"
+
+    for req in requirements:
+        status = req.status
+        if status not in VALID_STATUSES:
+            return None, f"requirement {req.index} status not evaluated: {status!r}"
+        if status == 'UNKNOWN':
+            return None, f"requirement {req.index} status is UNKNOWN"
+        if status == 'NA':
+            continue
+        if req.data is None or any(marker in req.data for marker in MISSING_DATA_MARKERS):
+            return None, f"requirement {req.index} has no collected data"
+        if req.rc is not None and req.rc >= 2:
+            return None, f"requirement {req.index} command exited with {req.rc}"
+
+    overall_status = report.overall_status
+    last = requirements[-1]
+    if overall_status not in ('PASS', 'FAIL'):
+        return None, f"OVERALL result is {overall_status!r}"
+    if overall_status != last.status:
+        return None, f"OVERALL result {overall_status} differs from requirement {last.index} status {last.status}"
+
+    if len(requirements) == 1:
+        rule_reason = "single requirement determines OVERALL"
+    else:
+        statuses = {req.index: req.status for req in requirements}
+        expected, rule_reason = evaluate_overall_rule(f"{last.title} {last.rationale or ''}", statuses)
+        if expected is None:
+            return None, rule_reason
+        if expected != overall_status:
+            return None, f"OVERALL result {overall_status} does not follow rule '{rule_reason}' (expected {expected})"
+
+    verdict = {
+        'data_collection': 'PASS',
+        'compliance_analysis': 'PASS',
+        'overall_status': overall_status,
+        'rule': rule_reason,
+        'requirements': [
+            {'index': req.index, 'title': req.title, 'status': req.status, 'exit_code': req.exit_code,
+             'data': req.data, 'rationale': req.rationale}
+            for req in requirements
+        ]
+    }
+    return verdict, f"OVERALL rule: {rule_reason}"
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Managed SSH Connection Profile for Playbook Runs
+
+With ansible's defaults each syntax check and test run opens fresh SSH
+sessions to the same test hosts: ControlPersist is 60 s, control sockets live
+in a per-user directory that execution environment containers do not see,
+and modules are copied with one sftp transfer per task.
+
+The pipeline generates one connection profile (CONNECTION_PROFILE_DIR) and
+applies it to every run:
+
+    - persistent ControlMaster sockets (ControlPersist 10 min) in
+      <profile>/cp, shared by all runs of the batch
+    - pipelining (modules are piped through the existing SSH session)
+    - optionally (CONNECTION_FACT_CACHE_SEC > 0) a jsonfile fact cache in
+      <profile>/facts with smart gathering; off by default, because an audit
+      run judged on cached facts can miss a change made on the host since
+
+Cold ansible-navigator runs get the settings as --senv variables and the
+profile directory mounted into the execution environment (--eev); warm
+backend workers (ansible_backend.py) get them in their environment. Settings
+already present in the caller's environment win.
+
+Before a test run, measure_connection_setup() opens (or checks) the shared
+ControlMaster to each host with the same ControlPath ansible uses, so the run
+reuses it, and times it: each run reports its connection setup time versus
+its task time (print_connection_stats() sums them for the batch).
+
+Environment variables:
+    CONNECTION_PROFILE_DIR       Profile directory (default: ~/.ansible/cis_connection_profile)
+    CONNECTION_PERSIST_SEC       ControlPersist of the shared masters (default: 600)
+    CONNECTION_FACT_CACHE_SEC    Fact cache lifetime, 0 = facts gathered on every run (default: 0)
+    CONNECTION_PROFILE_DISABLE   Set to 1 to run with ansible's own connection settings
+
+Usage:
+    cmd = with_connection_profile(cmd)                 # navigator command lines
+    env.update(connection_profile_env())               # warm workers
+    setup_sec, reused = measure_connection_setup(host)
+    record_connection_timing(setup_sec, task_sec)
+"""
+
+import os
+import time
+import shutil
+import threading
+import subprocess
+
+
+DEFAULT_PROFILE_DIR = os.path.join("~", ".ansible", "cis_connection_profile")
+DEFAULT_PERSIST_SEC = 600
+DEFAULT_FACT_CACHE_SEC = 0
+
+# ControlPath ansible and measure_connection_setup() share (%h host, %p port, %r user)
+CONTROL_PATH_TEMPLATE = "%h-%p-%r"
+
+# Connection plugins the ControlMaster probe applies to
+SSH_TRANSPORTS = ('ssh', 'smart', 'ansible.builtin.ssh')
+
+PROBE_TIMEOUT_SEC = 15
+
+_profile_lock = threading.Lock()
+_connection_stats = {'runs': 0, 'setup_sec': 0.0, 'task_sec': 0.0, 'reused': 0, 'opened': 0, 'failed': 0}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def is_profile_enabled() -> bool:
+    """Check whether runs use the managed connection profile."""
+    return os.environ.get('CONNECTION_PROFILE_DISABLE', '').lower() not in ('1', 'true', 'yes')
+
+
+def profile_dir() -> str:
+    """Absolute profile directory, created with its cp/ and facts/ subdirectories."""
+    path = os.path.abspath(os.path.expanduser(os.environ.get('CONNECTION_PROFILE_DIR', DEFAULT_PROFILE_DIR)))
+    for subdir in ('cp', 'facts'):
+        os.makedirs(os.path.join(path, subdir), mode=0o700, exist_ok=True)
+    return path
+
+
+def connection_profile_env() -> dict:
+    """
+    Ansible settings of the connection profile.
+
+    Returns:
+        dict: ANSIBLE_* environment variables (empty when the profile is disabled);
+        variables already set in the caller's environment are left out
+    """
+    if not is_profile_enabled():
+        return {}
+    path = profile_dir()
+    settings = {
+        'ANSIBLE_SSH_ARGS': f"-C -o ControlMaster=auto -o ControlPersist={_env_int('CONNECTION_PERSIST_SEC', DEFAULT_PERSIST_SEC)}s",
+        'ANSIBLE_SSH_CONTROL_PATH_DIR': os.path.join(path, 'cp'),
+        'ANSIBLE_SSH_CONTROL_PATH': f"%(directory)s/{CONTROL_PATH_TEMPLATE.replace('%', '%%')}",
+        'ANSIBLE_PIPELINING': 'True',
+    }
+    fact_cache_sec = _env_int('CONNECTION_FACT_CACHE_SEC', DEFAULT_FACT_CACHE_SEC)
+    if fact_cache_sec > 0:
+        settings.update({
+            'ANSIBLE_GATHERING': 'smart',
+            'ANSIBLE_CACHE_PLUGIN': 'jsonfile',
+            'ANSIBLE_CACHE_PLUGIN_CONNECTION': os.path.join(path, 'facts'),
+            'ANSIBLE_CACHE_PLUGIN_TIMEOUT': str(fact_cache_sec),
+        })
+    return {key: value for key, value in settings.items() if key not in os.environ}
+
+
+def with_connection_profile(cmd: list) -> list:
+    """
+    Apply the connection profile to an `ansible-navigator run` command line.
+
+    Returns:
+        list: cmd plus one --senv per setting and the profile directory mounted
+        into the execution environment (cmd unchanged when the profile is disabled);
+        settings and the mount already on the command line are not added again
+    """
+    settings = connection_profile_env()
+    if not settings or len(cmd) < 2 or cmd[1] != 'run':
+        return cmd
+    path = profile_dir()
+    mount = f"{path}:{path}:z"  # :z = shared SELinux label, concurrent runs mount it
+    present = {(option, value) for option, value in zip(cmd, cmd[1:])}
+    cmd = list(cmd)
+    for key, value in settings.items():
+        if ('--senv', f"{key}={value}") not in present:
+            cmd.extend(['--senv', f"{key}={value}"])
+    if ('--eev', mount) not in present:
+        cmd.extend(['--eev', mount])
+    return cmd
+
+
+def measure_connection_setup(host: str, user: str = "root") -> tuple:
+    """
+    Open (or check) the shared ControlMaster to a host and time it.
+
+    Uses the profile's ControlPath, so the playbook run that follows reuses the
+    master instead of connecting again.
+
+    Args:
+        host: Target host
+        user: Remote user of the runs
+
+    Returns:
+        tuple: (setup_seconds, reused) - reused is True when a master was already
+        open; (None, False) if the host cannot be reached over SSH or the probe
+        does not apply (profile disabled, non-SSH transport, no ssh client)
+    """
+    transport = os.environ.get('ANSIBLE_TRANSPORT', os.environ.get('ANSIBLE_CONNECTION', 'ssh'))
+    if not is_profile_enabled() or transport not in SSH_TRANSPORTS or not shutil.which('ssh'):
+        return None, False
+    control_path = os.path.join(profile_dir(), 'cp', CONTROL_PATH_TEMPLATE)
+    options = ['-o', f"ControlPath={control_path}", '-o', 'BatchMode=yes', '-o', 'ConnectTimeout=10']
+
+    started = time.monotonic()
+    try:
+        check = subprocess.run(['ssh', *options, '-O', 'check', f"{user}@{host}"],
+                               capture_output=True, timeout=PROBE_TIMEOUT_SEC)
+        reused = check.returncode == 0
+        if not reused:
+            persist = _env_int('CONNECTION_PERSIST_SEC', DEFAULT_PERSIST_SEC)
+            opened = subprocess.run(['ssh', *options, '-o', 'ControlMaster=auto', '-o', f"ControlPersist={persist}s",
+                                     f"{user}@{host}", 'true'],
+                                    stdin=subprocess.DEVNULL, capture_output=True, timeout=PROBE_TIMEOUT_SEC)
+            if opened.returncode != 0:
+                return None, False
+    except (OSError, subprocess.TimeoutExpired):
+        return None, False
+    return time.monotonic() - started, reused
+
+
+def record_connection_timing(host: str, setup_sec: float, reused: bool, task_sec: float):
+    """
+    Report one run's connection setup time versus its task time.
+
+    Args:
+        host: Target host (or comma-separated hosts of a fan-out run)
+        setup_sec: Time measure_connection_setup() took, None if the probe failed or did not apply
+        reused: True if an open master was reused
+        task_sec: Time spent in the run's tasks
+    """
+    with _profile_lock:
+        _connection_stats['runs'] += 1
+        _connection_stats['task_sec'] += task_sec
+        if setup_sec is None:
+            _connection_stats['failed'] += 1
+        else:
+            _connection_stats['setup_sec'] += setup_sec
+            _connection_stats['reused' if reused else 'opened'] += 1
+    if setup_sec is None:
+        print(f"   🔌 Connection to {host}: not measured; tasks {task_sec:.2f}s")
+    else:
+        print(f"   🔌 Connection to {host}: setup {setup_sec:.2f}s ({'reused master' if reused else 'new master'}) "
+              f"vs tasks {task_sec:.2f}s")
+
+
+def get_connection_stats() -> dict:
+    """
+    Get the connection setup versus task time totals.
+
+    Returns:
+        dict: {'runs', 'setup_sec', 'task_sec', 'reused', 'opened', 'failed'}
+    """
+    with _profile_lock:
+        stats = dict(_connection_stats)
+    stats['setup_sec'] = round(stats['setup_sec'], 1)
+    stats['task_sec'] = round(stats['task_sec'], 1)
+    return stats
+
+
+def print_connection_stats():
+    """Print the connection profile and its setup versus task time totals."""
+    if not is_profile_enabled():
+        print("🔌 Connection profile: disabled")
+        return
+    stats = get_connection_stats()
+    print(f"🔌 Connection profile {profile_dir()}: {stats['runs']} run(s), setup {stats['setup_sec']}s "
+          f"({stats['opened']} new master(s), {stats['reused']} reused, {stats['failed']} not measured) "
+          f"vs tasks {stats['task_sec']}s")
@@ -50,6 +50,16 @@ import subprocess
 import argparse
 import shutil
 import re
+import time
+import uuid
+import signal
+import asyncio
+import tempfile
+import selectors
+import threading
+import weakref
+import yaml
+from contextlib import contextmanager, asynccontextmanager, ExitStack, AsyncExitStack
 from dotenv import load_dotenv
 
 
@@ -98,24 +108,704 @@ def get_ansible_navigator_path() -> str:
     
     # Last resort: return the command name and hope it's in PATH
     return 'ansible-navigator'
-from langchain_deepseek import ChatDeepSeek
+from llm_clients import get_llm, REASONER_PARAMS
 
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM model
-model = ChatDeepSeek(
-    #model="deepseek-chat",
-    model="deepseek-reasoner",
-    base_url="https://api.deepseek.com",
-    temperature=0,
-    #max_tokens=None,
-    max_tokens=16384,
-    #max_tokens=8192,
-    timeout=1800,  # 30 minutes timeout
-    max_retries=3,
-    request_timeout=1800  # Explicit request timeout: 30 minutes
-)
+
+def get_model():
+    """
+    Get the shared deepseek-reasoner client.
+    
+    The client is built on first use (see llm_clients.py), so importing this
+    module for runs that never call the LLM creates no client.
+    """
+    return get_llm("deepseek", **REASONER_PARAMS)
+
+
+def __getattr__(name):
+    # Keep `deepseek_generate_playbook.model` working without building it at import time
+    if name == 'model':
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# On-disk response cache (configured from LLM_CACHE_* environment variables)
+from llm_cache import get_llm_cache, cache_key
+from compliance_report import ComplianceReport, VALID_STATUSES, parse_run_report, evaluate_compliance_report, format_compliance_verdict
+from playbook_patch import PlaybookPatchError, parse_playbook_patch, apply_playbook_patch, list_task_names
+from ansible_backend import get_ansible_backend, run_warm, record_navigator_run, AbortScanner
+from playbook_preflight import preflight_playbook, format_preflight_errors
+from task_events import load_task_events, event_text, recap_from_events, report_lines_from_events, render_task_events
+from timing_history import (get_timing_history, checkpoint_key, task_timings, running_task, add_async_to_tasks,
+                            MIN_TIMEOUTS)
+from connection_profile import with_connection_profile, measure_connection_setup, record_connection_timing
+from output_scanner import MultiPatternScanner, first_hit, group_hits, next_hit, previous_hit
+from output_compaction import compact_run_output, is_compaction_enabled
+from step_runner import Call, Steps, run_steps, arun_steps, RunCancelled, current_cancel_event, raise_if_cancelled
+
+# =============================================================================
+# Per-host execution limits (shared by concurrent checkpoint workers)
+# =============================================================================
+
+_host_concurrency_limit = 0  # 0 = unlimited
+_host_semaphores = {}
+_host_async_semaphores = weakref.WeakKeyDictionary()  # event loop -> {host: asyncio.BoundedSemaphore}
+_host_semaphores_lock = threading.Lock()
+
+
+def _loop_semaphore(registry: weakref.WeakKeyDictionary, key: str, limit: int) -> asyncio.BoundedSemaphore:
+    """
+    The running event loop's semaphore for key in registry (created on first use).
+    
+    asyncio semaphores must not be shared between event loops, so each loop (e.g.
+    each asyncio.run() of a batch) gets its own; the caller holds the registry's lock.
+    Semaphores of closed loops are dropped (a semaphore keeps its loop alive).
+    """
+    for loop in [loop for loop in registry if loop.is_closed()]:
+        del registry[loop]
+    semaphores = registry.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(key)
+    if semaphore is None:
+        semaphore = asyncio.BoundedSemaphore(limit)
+        semaphores[key] = semaphore
+    return semaphore
+
+
+def set_host_concurrency(limit: int):
+    """
+    Limit how many playbook runs may execute against the same host at once.
+    
+    Args:
+        limit: Maximum concurrent runs per host (0 or less = unlimited)
+    """
+    global _host_concurrency_limit
+    with _host_semaphores_lock:
+        _host_concurrency_limit = max(0, int(limit or 0))
+        _host_semaphores.clear()
+        _host_async_semaphores.clear()
+
+
+@contextmanager
+def host_slot(host: str):
+    """
+    Context manager that holds one execution slot on the given host.
+    
+    Blocks while the host already has `limit` playbook runs in flight.
+    Does nothing when no limit has been configured.
+    """
+    if _host_concurrency_limit <= 0:
+        yield
+        return
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(_host_concurrency_limit)
+            _host_semaphores[host] = semaphore
+    with semaphore:
+        yield
+
+
+@asynccontextmanager
+async def ahost_slot(host: str):
+    """Async variant of host_slot() for coroutines sharing one event loop."""
+    if _host_concurrency_limit <= 0:
+        yield
+        return
+    with _host_semaphores_lock:
+        semaphore = _loop_semaphore(_host_async_semaphores, host, _host_concurrency_limit)
+    async with semaphore:
+        yield
+
+
+# =============================================================================
+# Pipeline stage limits (LLM calls vs. host execution)
+# =============================================================================
+# Concurrent checkpoint workers move through two kinds of work: waiting on the
+# LLM (generate/analyze) and waiting on a host (syntax check/test run). Giving
+# each stage its own limit lets checkpoint B generate while checkpoint A runs
+# on the test host, keeping both the API quota and the test VMs busy.
+
+PIPELINE_STAGES = ("llm", "host")
+
+_stage_semaphores = {}
+_stage_async_semaphores = weakref.WeakKeyDictionary()  # event loop -> {stage: asyncio.BoundedSemaphore}
+_stage_limits = {}
+_stage_stats = {}
+_stage_lock = threading.Lock()
+
+
+def set_stage_concurrency(stage: str, limit: int):
+    """
+    Limit how many workers may be inside a pipeline stage at once.
+    
+    Args:
+        stage: Stage name ("llm" or "host")
+        limit: Maximum concurrent workers in the stage (0 or less = unlimited)
+    """
+    limit = max(0, int(limit or 0))
+    with _stage_lock:
+        _stage_limits[stage] = limit
+        _stage_semaphores[stage] = threading.BoundedSemaphore(limit) if limit > 0 else None
+        for semaphores in _stage_async_semaphores.values():
+            semaphores.pop(stage, None)
+
+
+def _stage_enter(stage: str, queued: float) -> tuple[dict, float]:
+    """Record entry into a stage; returns (stats, start time) for _stage_exit()."""
+    started = time.monotonic()
+    with _stage_lock:
+        stats = _stage_stats.setdefault(stage, {'calls': 0, 'wait_sec': 0.0, 'busy_sec': 0.0, 'in_flight': 0, 'peak': 0})
+        stats['calls'] += 1
+        stats['wait_sec'] += started - queued
+        stats['in_flight'] += 1
+        stats['peak'] = max(stats['peak'], stats['in_flight'])
+    return stats, started
+
+
+def _stage_exit(stats: dict, started: float):
+    """Record exit from a stage."""
+    with _stage_lock:
+        stats['busy_sec'] += time.monotonic() - started
+        stats['in_flight'] -= 1
+
+
+@contextmanager
+def stage_slot(stage: str):
+    """
+    Context manager that holds one slot in a pipeline stage and records
+    how long the caller queued for it and how long it was busy.
+    """
+    semaphore = _stage_semaphores.get(stage)
+    queued = time.monotonic()
+    if semaphore is not None:
+        semaphore.acquire()
+    stats, started = _stage_enter(stage, queued)
+    try:
+        yield
+    finally:
+        _stage_exit(stats, started)
+        if semaphore is not None:
+            semaphore.release()
+
+
+@asynccontextmanager
+async def astage_slot(stage: str):
+    """Async variant of stage_slot() for coroutines sharing one event loop."""
+    with _stage_lock:
+        limit = _stage_limits.get(stage, 0)
+        semaphore = _loop_semaphore(_stage_async_semaphores, stage, limit) if limit > 0 else None
+    queued = time.monotonic()
+    if semaphore is not None:
+        await semaphore.acquire()
+    stats, started = _stage_enter(stage, queued)
+    try:
+        yield
+    finally:
+        _stage_exit(stats, started)
+        if semaphore is not None:
+            semaphore.release()
+
+
+def get_stage_stats() -> dict:
+    """
+    Get per-stage usage statistics.
+    
+    Returns:
+        dict: {stage: {'calls', 'wait_sec', 'busy_sec', 'peak', 'limit'}}
+    """
+    with _stage_lock:
+        return {
+            stage: {
+                'calls': stats['calls'],
+                'wait_sec': round(stats['wait_sec'], 1),
+                'busy_sec': round(stats['busy_sec'], 1),
+                'peak': stats['peak'],
+                'limit': _stage_limits.get(stage, 0)
+            }
+            for stage, stats in _stage_stats.items()
+        }
+
+
+def print_stage_stats():
+    """Print a one-line summary per pipeline stage."""
+    for stage, stats in get_stage_stats().items():
+        limit = stats['limit'] or 'unlimited'
+        print(f"⏱️  Stage '{stage}': {stats['calls']} call(s), busy {stats['busy_sec']}s, "
+              f"queued {stats['wait_sec']}s, peak {stats['peak']}/{limit}")
+
+
+# =============================================================================
+# Pipeline stage slots as steps (see step_runner.py)
+# =============================================================================
+
+class Holding:
+    """A step that runs another step while holding a pipeline stage slot and a slot on each host."""
+
+    def __init__(self, stage: str, step, hosts: list = ()):
+        self.stage = stage
+        self.step = step
+        self.hosts = sorted(hosts)  # a fixed order so concurrent fan-outs cannot deadlock
+
+    def run(self):
+        with ExitStack() as slots:
+            for host in self.hosts:
+                slots.enter_context(host_slot(host))
+            slots.enter_context(stage_slot(self.stage))
+            return self.step.run()
+
+    async def arun(self):
+        async with AsyncExitStack() as slots:
+            for host in self.hosts:
+                await slots.enter_async_context(ahost_slot(host))
+            await slots.enter_async_context(astage_slot(self.stage))
+            return await self.step.arun()
+
+
+# =============================================================================
+# LLM invocation (shared retry loop for sync and async callers)
+# =============================================================================
+
+class LLMTimeoutError(Exception):
+    """Raised when every attempt of an LLM call timed out."""
+
+
+def _is_timeout_error(error: Exception) -> bool:
+    """Check whether an LLM client exception is a timeout."""
+    error_msg = str(error).lower()
+    return "timeout" in error_msg or "timed out" in error_msg
+
+
+def _model_name() -> str:
+    """Name of the shared model (part of the response cache key)."""
+    model = get_model()
+    return getattr(model, 'model_name', None) or getattr(model, 'model', None) or 'unknown'
+
+
+# DeepSeek context (prefix) cache accounting, summed over all LLM calls
+_prompt_cache_lock = threading.Lock()
+_prompt_cache_stats = {'calls': 0, 'hit_tokens': 0, 'miss_tokens': 0}
+
+
+def _prompt_cache_usage(response) -> tuple[int, int]:
+    """
+    Extract the cached/uncached prompt token counts from a model response.
+    
+    DeepSeek reports prompt_cache_hit_tokens / prompt_cache_miss_tokens in the
+    raw token usage; other clients only fill LangChain's usage_metadata.
+    
+    Returns:
+        tuple: (hit_tokens, miss_tokens), or (None, None) if the response has no usage data
+    """
+    token_usage = (getattr(response, 'response_metadata', None) or {}).get('token_usage') or {}
+    hit_tokens = token_usage.get('prompt_cache_hit_tokens')
+    miss_tokens = token_usage.get('prompt_cache_miss_tokens')
+    if hit_tokens is not None and miss_tokens is not None:
+        return hit_tokens, miss_tokens
+    usage = getattr(response, 'usage_metadata', None) or {}
+    if 'input_tokens' not in usage:
+        return None, None
+    hit_tokens = (usage.get('input_token_details') or {}).get('cache_read') or 0
+    return hit_tokens, usage['input_tokens'] - hit_tokens
+
+
+def _record_prompt_cache_usage(response, label: str, quiet: bool):
+    """Add a response's cached/uncached prompt tokens to the totals and report them."""
+    hit_tokens, miss_tokens = _prompt_cache_usage(response)
+    if hit_tokens is None:
+        return
+    with _prompt_cache_lock:
+        _prompt_cache_stats['calls'] += 1
+        _prompt_cache_stats['hit_tokens'] += hit_tokens
+        _prompt_cache_stats['miss_tokens'] += miss_tokens
+    total = hit_tokens + miss_tokens
+    if not quiet and total:
+        print(f"🧮 {label} prompt tokens: {hit_tokens} cached, {miss_tokens} uncached "
+              f"({hit_tokens / total * 100:.0f}% prefix cache hit)")
+
+
+def get_prompt_cache_stats() -> dict:
+    """Get the total cached/uncached prompt tokens reported by the API."""
+    with _prompt_cache_lock:
+        return dict(_prompt_cache_stats)
+
+
+def print_prompt_cache_stats():
+    """Print the total cached/uncached prompt tokens reported by the API."""
+    stats = get_prompt_cache_stats()
+    total = stats['hit_tokens'] + stats['miss_tokens']
+    if not total:
+        return
+    print(f"🧮 Prompt tokens over {stats['calls']} LLM call(s): {stats['hit_tokens']} cached, "
+          f"{stats['miss_tokens']} uncached ({stats['hit_tokens'] / total * 100:.0f}% prefix cache hit)")
+
+
+def _cached_response(prompt, cache_site: str, use_cache: bool, quiet: bool) -> tuple[str, str]:
+    """
+    Look up a prompt in the response cache.
+    
+    Returns:
+        tuple: (key, cached_content) - key is None when caching is off for this call
+    """
+    if not use_cache or not cache_site:
+        return None, None
+    key = cache_key(_model_name(), prompt)
+    content = get_llm_cache().get(key, site=cache_site)
+    if content is not None and not quiet:
+        print(f"💾 Using cached response for {cache_site} ({key[:12]})")
+    return key, content
+
+
+def invoke_llm_steps(prompt, label: str = "LLM call", max_attempts: int = 3, quiet: bool = False,
+                     cache_site: str = None, use_cache: bool = True):
+    """
+    Steps that invoke the shared model, retrying on timeouts (see run_steps()).
+    
+    Args:
+        prompt: Prompt string or list of messages
+        label: Name used in progress messages (e.g., "Generation")
+        max_attempts: Number of attempts before giving up on timeouts
+        quiet: If True, suppress progress messages
+        cache_site: Call-site name for the response cache (None = not cached)
+        use_cache: If False, bypass the response cache for this call
+        
+    Returns:
+        str: Response content
+        
+    Raises:
+        LLMTimeoutError: If all attempts timed out (other errors are re-raised immediately)
+    """
+    key, cached = _cached_response(prompt, cache_site, use_cache, quiet)
+    if cached is not None:
+        return cached
+    for attempt in range(1, max_attempts + 1):
+        # A call in flight cannot be interrupted, but an abandoned one is not retried
+        raise_if_cancelled()
+        try:
+            if not quiet:
+                print(f"{label} attempt {attempt}/{max_attempts}...")
+            model = get_model()
+            response = yield Holding("llm", Call(model.invoke, model.ainvoke, prompt))
+            _record_prompt_cache_usage(response, label, quiet)
+            if key:
+                get_llm_cache().put(key, response.content, model_name=_model_name(), site=cache_site)
+            return response.content
+        except Exception as e:
+            if not _is_timeout_error(e):
+                raise
+            if not quiet:
+                print(f"⚠️  {label} timed out on attempt {attempt}/{max_attempts}")
+            if attempt < max_attempts:
+                if not quiet:
+                    print(f"🔄 Retrying {label.lower()}...")
+                continue
+            raise LLMTimeoutError(f"{label} timed out after {max_attempts} attempts") from e
+
+
+def invoke_llm(*args, **kwargs) -> str:
+    """Invoke the shared model, retrying on timeouts (arguments: see invoke_llm_steps())."""
+    return run_steps(invoke_llm_steps(*args, **kwargs))
+
+
+async def ainvoke_llm(*args, **kwargs) -> str:
+    """Async variant of invoke_llm() using the model's ainvoke()."""
+    return await arun_steps(invoke_llm_steps(*args, **kwargs))
+
+
+# =============================================================================
+# ansible-navigator subprocess runners
+# =============================================================================
+
+# Label key of the execution environment container of a cold run (see _label_run_container())
+RUN_CONTAINER_LABEL = "cis_run"
+
+# Seconds a stopped run gets to exit on SIGTERM before it is killed
+RUN_STOP_GRACE_SEC = 5
+
+CONTAINER_REMOVE_TIMEOUT_SEC = 60
+
+
+def _cmd_option(cmd: list, names: tuple) -> str:
+    """Value of a command-line option given as `--name value` or `--name=value` (None if absent)."""
+    for index, arg in enumerate(cmd):
+        for name in names:
+            if arg == name and index + 1 < len(cmd):
+                return cmd[index + 1]
+            if arg.startswith(name + '='):
+                return arg[len(name) + 1:]
+    return None
+
+
+def _label_run_container(cmd: list) -> tuple:
+    """
+    Give the execution environment container of an `ansible-navigator run` a unique label.
+    
+    The container runs under the container engine's monitor (conmon), outside the
+    run's process group, so killing ansible-navigator leaves it running; the label
+    lets _remove_run_container() find it. Note that --co on the command line
+    replaces container-options from ansible-navigator.yml (the repo's has none).
+    
+    Returns:
+        tuple: (cmd, container) - container is (engine, label), or None (cmd
+        unchanged) for other commands, a disabled execution environment or a
+        missing container engine
+    """
+    if len(cmd) < 2 or cmd[1] != 'run' or _cmd_option(cmd, ('--ee', '--execution-environment')) == 'false':
+        return cmd, None
+    engine = (_cmd_option(cmd, ('--ce', '--container-engine'))
+              or os.environ.get('ANSIBLE_NAVIGATOR_CONTAINER_ENGINE', 'auto'))
+    if engine == 'auto':
+        engine = 'podman' if shutil.which('podman') else 'docker'
+    if not shutil.which(engine):
+        return cmd, None
+    label = f"{RUN_CONTAINER_LABEL}={uuid.uuid4().hex}"
+    return [*cmd, f"--co=--label={label}"], (engine, label)
+
+
+def _remove_run_container(container: tuple):
+    """Force-remove the labeled execution environment container of a stopped run (blocks until it is gone)."""
+    if container is None:
+        return
+    engine, label = container
+    try:
+        listed = subprocess.run([engine, 'ps', '-aq', '--filter', f"label={label}"],
+                                capture_output=True, text=True, timeout=CONTAINER_REMOVE_TIMEOUT_SEC)
+        container_ids = listed.stdout.split()
+        if container_ids:
+            subprocess.run([engine, 'rm', '-f', *container_ids], capture_output=True, timeout=CONTAINER_REMOVE_TIMEOUT_SEC)
+            print(f"   🧹 Removed the stopped run's execution environment container ({', '.join(c[:12] for c in container_ids)})")
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"⚠️  Could not remove the stopped run's execution environment container ({label}): {e}")
+
+
+def _signal_process_group(process, sig: int):
+    """Send a signal to a run started in its own session and everything it started."""
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        try:
+            process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+
+def _stop_run(process: subprocess.Popen, container: tuple):
+    """
+    Stop a run and wait until it is gone.
+    
+    SIGTERM goes to the run's process group first (the container engine client
+    passes it on to the container), SIGKILL after RUN_STOP_GRACE_SEC; then the
+    run's execution environment container is removed.
+    """
+    _signal_process_group(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=RUN_STOP_GRACE_SEC)
+    except subprocess.TimeoutExpired:
+        _signal_process_group(process, signal.SIGKILL)
+        process.wait()
+    _remove_run_container(container)
+
+
+async def _astop_run(process: asyncio.subprocess.Process, container: tuple):
+    """Async variant of _stop_run()."""
+    _signal_process_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), RUN_STOP_GRACE_SEC)
+    except asyncio.TimeoutError:
+        _signal_process_group(process, signal.SIGKILL)
+        await process.wait()
+    await asyncio.to_thread(_remove_run_container, container)
+
+
+class _StreamedRun:
+    """Output, abort scan and deadline of a streamed ansible-navigator run (shared by the sync and async runners)."""
+
+    def __init__(self, cmd: list, timeout: int, abort_patterns: list = None):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.scanner = AbortScanner(abort_patterns) if abort_patterns else None
+        self.chunks = {'stdout': [], 'stderr': []}
+        self.deadline = time.monotonic() + timeout
+        self.aborted = False
+
+    def feed(self, data: bytes, stream: str):
+        """Record the next chunk of a stream and scan it for abort patterns."""
+        self.chunks[stream].append(data)
+        if self.scanner is not None:
+            self.scanner.feed(data, stream)
+
+    def stop_reason(self, cancel_event: threading.Event = None) -> str:
+        """Why the run must be stopped now ('abort', 'cancel' or 'timeout'), or None to keep reading."""
+        if self.scanner is not None and self.scanner.should_abort():
+            return 'abort'
+        if cancel_event is not None and cancel_event.is_set():
+            return 'cancel'
+        if time.monotonic() >= self.deadline:
+            return 'timeout'
+        return None
+
+    def poll_interval(self) -> float:
+        """How long to wait for output before checking stop_reason() again."""
+        return max(0.0, min(0.1, self.deadline - time.monotonic()))
+
+    def stopped(self, reason: str):
+        """
+        Record that the run was killed for reason (see stop_reason()).
+        
+        Raises:
+            RunCancelled: For a cancelled run
+            subprocess.TimeoutExpired: For a timed-out run (with the output read so far)
+        """
+        if reason == 'cancel':
+            raise RunCancelled("run cancelled: its result is no longer needed")
+        if reason == 'timeout':
+            raise subprocess.TimeoutExpired(self.cmd, self.timeout, output=b"".join(self.chunks['stdout']),
+                                            stderr=b"".join(self.chunks['stderr']))
+        self.aborted = True
+
+    def result(self, returncode: int) -> subprocess.CompletedProcess:
+        """The CompletedProcess of the run (aborted runs carry the matched signature)."""
+        result = subprocess.CompletedProcess(
+            self.cmd,
+            returncode,
+            b"".join(self.chunks['stdout']).decode('utf-8', errors='replace'),
+            b"".join(self.chunks['stderr']).decode('utf-8', errors='replace')
+        )
+        result.aborted = self.scanner.match if self.aborted else None
+        result.abort_line = self.scanner.line if self.aborted else None
+        return result
+
+
+def _run_navigator_streaming(cmd: list, timeout: int, abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """Run ansible-navigator, reading its output as it arrives and stopping it on an abort pattern, timeout or cancel."""
+    cmd, container = _label_run_container(cmd)
+    run = _StreamedRun(cmd, timeout, abort_patterns)
+    cancel_event = current_cancel_event()
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=os.environ,  # Pass current environment to find ansible-navigator in venv
+        start_new_session=True  # so an abort/timeout also stops the ansible workers it forked
+    )
+    selector = selectors.DefaultSelector()
+    try:
+        selector.register(process.stdout, selectors.EVENT_READ, 'stdout')
+        selector.register(process.stderr, selectors.EVENT_READ, 'stderr')
+        while selector.get_map():
+            reason = run.stop_reason(cancel_event)
+            if reason:
+                _stop_run(process, container)
+                run.stopped(reason)
+                break
+            for key, _ in selector.select(timeout=run.poll_interval()):
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                run.feed(data, key.data)
+        returncode = process.wait()
+    except BaseException:
+        if process.poll() is None:
+            _stop_run(process, container)
+        raise
+    finally:
+        selector.close()
+        process.stdout.close()
+        process.stderr.close()
+    return run.result(returncode)
+
+
+async def _arun_navigator_streaming(cmd: list, timeout: int, abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """Async variant of _run_navigator_streaming() (cancelling the task stops the run)."""
+    cmd, container = _label_run_container(cmd)
+    run = _StreamedRun(cmd, timeout, abort_patterns)
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=os.environ,
+        start_new_session=True
+    )
+    
+    async def pump(stream, name):
+        while True:
+            data = await stream.read(65536)
+            if not data:
+                return
+            run.feed(data, name)
+    
+    readers = [asyncio.create_task(pump(process.stdout, 'stdout')), asyncio.create_task(pump(process.stderr, 'stderr'))]
+    try:
+        while True:
+            _, pending = await asyncio.wait(readers, timeout=run.poll_interval())
+            if not pending:
+                break
+            reason = run.stop_reason()
+            if reason:
+                await _astop_run(process, container)
+                run.stopped(reason)
+                break
+        returncode = await process.wait()
+    except BaseException:
+        if process.returncode is None:
+            await _astop_run(process, container)
+        raise
+    finally:
+        for reader in readers:
+            reader.cancel()
+    return run.result(returncode)
+
+
+def run_navigator_steps(cmd: list, timeout: int, abort_patterns: list = None):
+    """
+    Steps that run an ansible-navigator command and capture its output (see run_steps()).
+    
+    With ANSIBLE_BACKEND=warm (see ansible_backend.py) the run goes to a warm
+    ansible-playbook worker instead; the cold subprocess is used as fallback.
+    
+    The output is read while it streams in. With abort_patterns it is scanned
+    and the run is killed soon after a pattern matches; the returned result then
+    has `aborted` (the matched pattern) and `abort_line` set and holds the
+    partial output.
+    
+    Cold runs get the managed SSH connection profile (see connection_profile.py);
+    warm workers already run with it.
+    
+    Raises:
+        subprocess.TimeoutExpired: If the command exceeds the timeout (the run is
+            killed; the exception holds the output read so far)
+    """
+    if get_ansible_backend() == "warm":
+        result = yield Call(run_warm, None, cmd, timeout, abort_patterns)
+        if result is not None:
+            return result
+    cmd = with_connection_profile(cmd)
+    started = time.monotonic()
+    result = yield Call(_run_navigator_streaming, _arun_navigator_streaming, cmd, timeout, abort_patterns)
+    record_navigator_run(time.monotonic() - started)
+    return result
+
+
+def run_navigator(cmd: list, timeout: int, abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """Run an ansible-navigator command and capture its output (see run_navigator_steps())."""
+    return run_steps(run_navigator_steps(cmd, timeout, abort_patterns))
+
+
+async def arun_navigator(cmd: list, timeout: int, abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """Async variant of run_navigator() using asyncio.create_subprocess_exec."""
+    return await arun_steps(run_navigator_steps(cmd, timeout, abort_patterns))
+
+
+def _navigator_not_found_message(error: Exception, ansible_nav: str) -> str:
+    """Build the error message for a missing ansible-navigator binary."""
+    error_msg = f"ansible-navigator command not found: {error}\n"
+    error_msg += f"   Tried to execute: {ansible_nav}\n"
+    error_msg += f"   Python executable: {sys.executable}\n"
+    error_msg += f"   PATH: {os.environ.get('PATH', 'Not set')}"
+    return error_msg
+
 
 def parse_requirement_index(req_text: str) -> tuple[int, str]:
     """
@@ -132,7 +822,7 @@ def parse_requirement_index(req_text: str) -> tuple[int, str]:
     return -1, req_text.strip()
 
 
-def generate_playbook(
+def build_generation_prompt(
     playbook_objective: str,
     target_host: str = "master-1",
     become_user: str = "root",
@@ -140,10 +830,11 @@ def generate_playbook(
     example_output: str = "",
     audit_procedure: str = None,
     current_playbook: str = None,
-    feedback: str = None
-):
+    feedback: str = None,
+    patch_mode: bool = False
+) -> str:
     """
-    Generate or enhance Ansible playbook based on custom requirements or audit procedure.
+    Build the LLM prompt to generate or enhance a playbook (see generate_playbook()).
     
     Args:
         playbook_objective: Description of what the playbook should achieve
@@ -155,6 +846,7 @@ def generate_playbook(
                         generates an audit playbook based on this procedure
         current_playbook: Existing playbook content to enhance (if provided, enhances instead of regenerating)
         feedback: Analysis feedback/advice for enhancing the playbook (used with current_playbook)
+        patch_mode: If True (enhancement only), ask for task edit blocks instead of the whole playbook
     """
     
     if requirements is None:
@@ -341,7 +1033,7 @@ The following feedback identifies issues and provides recommendations for enhanc
         return """
 ## 1. REQUIREMENT INDEXING
 **CRITICAL - USE EXACT REQUIREMENT INDEX NUMBERS:**
-- Requirement indices MUST match what's given above. If requirement is "2. Collect OS info", use req_2, data_2, task_2_*, result_2 - NOT req_1!
+- Requirement indices MUST match the numbered requirements given at the end of this prompt. If requirement is "2. Collect OS info", use req_2, data_2, task_2_*, result_2 - NOT req_1!
 - Task names: Use ' - ' (dash) instead of ':' (colon), e.g., 'Req 1 - description' not 'Req 1: description'
 
 ## 2. SIMPLICITY RULES
@@ -355,7 +1047,7 @@ The following feedback identifies issues and provides recommendations for enhanc
 4. NO complex Jinja2 - use simple expressions
 5. ONE task per requirement
 6. Use shell/command for simple checks (faster than modules)
-7. Use EXACT requirement text in vars - copy from requirements above!
+7. Use EXACT requirement text in vars - copy from the requirements list!
    - **CRITICAL: ALL req_ variables MUST be quoted strings (use double quotes)**
    - ❌ WRONG: `req_2: Run script to check for audit log files`
    - ✅ CORRECT: `req_2: "Run script to check for audit log files"`
@@ -371,7 +1063,7 @@ The following feedback identifies issues and provides recommendations for enhanc
   gather_facts: false
   vars:
     kcs_article: "[KCS URL]"
-    # COPY EXACT requirement text from requirements above!
+    # COPY EXACT requirement text from the requirements list!
     # CRITICAL: ALL req_ variables MUST be quoted strings (use double quotes)
     # ❌ WRONG: req_2: Run script to check for audit log files
     # ✅ CORRECT: req_2: "Run script to check for audit log files"
@@ -1015,69 +1707,94 @@ vars:
     
     common_sections = build_common_prompt_sections()
     
-    # Build the base prompt
-    if is_enhancement:
-        base_prompt = f"""Enhance the existing Ansible playbook based on the feedback provided below.
+    # Static instructions go first and per-checkpoint content last, so every call
+    # shares one long identical prefix that DeepSeek's context cache can serve
+    static_prefix = f"""You are an expert Ansible engineer. You write MINIMAL Ansible playbooks that collect data for CIS Benchmark audits.
+Follow every rule below. The task, objective, audit procedure and numbered requirements for this request are given at the end of this prompt.
+{common_sections}"""
+    
+    # Patch mode: the model returns edit blocks for individual tasks (see playbook_patch.py)
+    patch_format_section = ""
+    task_names_section = ""
+    closing_instruction = "Enhance the existing playbook by applying the feedback above. Return the complete enhanced playbook with all fixes applied."
+    if is_enhancement and patch_mode:
+        patch_format_section = """
+**PATCH OUTPUT FORMAT (overrides the OUTPUT rule above):**
+Do NOT return the whole playbook. Return ONLY edit blocks for the tasks that must change, using exact task names from the current playbook:
+
+REPLACE TASK: <exact task name>
+```yaml
+- name: <task name>
+  <complete replacement task>
+```
 
-**Objective:** {playbook_objective}
-{audit_procedure_section}
-**Requirements to collect data for:**
-{requirements_text}{example_section}{enhancement_section}
-{common_sections}
+INSERT AFTER TASK: <exact task name>
+```yaml
+- name: <new task name>
+  <complete new task>
+```
 
+INSERT BEFORE TASK: <exact task name>
+```yaml
+- name: <new task name>
+  <complete new task>
+```
+
+DELETE TASK: <exact task name>
+
+**Patch rules:**
+- Each YAML block is one or more complete tasks written as list items starting with "- name:"
+- Copy task names exactly from the task list at the end of this prompt; every edited task name must be unique
+- Only tasks under `tasks:` can be edited. If the fix needs changes to vars or play-level keys, or touches most tasks, return the complete playbook instead (starting with ---)
+- No explanations outside the edit blocks
+"""
+        task_names_section = "\n\n**Task names in the current playbook:**\n" + "\n".join(
+            f"- {name}" for name in list_task_names(current_playbook)
+        )
+        closing_instruction = "Return only the edit blocks needed to apply the feedback above."
+    
+    # Build the base prompt
+    if is_enhancement:
+        base_prompt = f"""{static_prefix}
 **ENHANCEMENT INSTRUCTIONS:**
 1. **PRESERVE WORKING PARTS**: Keep all working tasks, variables, and logic that are correct
-2. **APPLY SPECIFIC FIXES**: Make only the changes recommended in the feedback above
+2. **APPLY SPECIFIC FIXES**: Make only the changes recommended in the feedback
 3. **MAINTAIN STRUCTURE**: Keep the same playbook structure, variable names, and task organization unless the feedback specifically requires changes
 4. **FIX IDENTIFIED ISSUES**: Address each issue mentioned in the feedback
 5. **FOLLOW RECOMMENDATIONS**: Implement the specific recommendations provided in the feedback
 6. **DO NOT REGENERATE**: This is an ENHANCEMENT task, not a regeneration. Only modify what needs to be fixed based on the feedback.
 
 **IMPORTANT**: The current playbook is mostly correct. Only fix the specific issues identified in the feedback. Do not rewrite the entire playbook unless absolutely necessary.
+{patch_format_section}
+---
+# TASK: Enhance the existing Ansible playbook based on the feedback provided below.
+
+**Objective:** {playbook_objective}
+{audit_procedure_section}
+**Requirements to collect data for:**
+{requirements_text}{example_section}{enhancement_section}{task_names_section}
 
-Enhance the existing playbook by applying the feedback above. Return the complete enhanced playbook with all fixes applied."""
+{closing_instruction}"""
     else:
-        base_prompt = f"""Generate a MINIMAL Ansible playbook for data collection.
+        base_prompt = f"""{static_prefix}
+---
+# TASK: Generate a MINIMAL Ansible playbook for data collection.
 
 **Objective:** {playbook_objective}
 {audit_procedure_section}
 **Requirements to collect data for:**
 {requirements_text}{example_section}
-{common_sections}
 
 Generate the minimal playbook now:"""
     
-    # Use the base_prompt as prompt_template
-    prompt_template = base_prompt
-    
-    # Don't use ChatPromptTemplate - invoke model directly to avoid brace parsing issues
-    from langchain_core.messages import HumanMessage
-    
-    print("Generating Ansible playbook...")
-    print("=" * 80)
-    
-    # Add retry logic for timeout handling
-    max_generation_attempts = 3
-    for attempt in range(1, max_generation_attempts + 1):
-        try:
-            print(f"Generation attempt {attempt}/{max_generation_attempts}...")
-            response = model.invoke([HumanMessage(content=prompt_template)])
-            playbook_content = response.content
-            break  # Success, exit retry loop
-        except Exception as e:
-            error_msg = str(e)
-            if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                print(f"⚠️  Generation timed out on attempt {attempt}/{max_generation_attempts}")
-                if attempt < max_generation_attempts:
-                    print(f"🔄 Retrying playbook generation...")
-                    continue
-                else:
-                    print(f"❌ All {max_generation_attempts} generation attempts timed out")
-                    raise Exception(f"Playbook generation timed out after {max_generation_attempts} attempts") from e
-            else:
-                # Non-timeout error, raise immediately
-                raise
-    
+    return base_prompt
+
+
+def clean_generated_playbook(playbook_content: str) -> str:
+    """
+    Strip markdown fences and stray language tags from an LLM response
+    and make sure the playbook starts with '---'.
+    """
     # Clean up the response - remove markdown code blocks if present
     if "```yaml" in playbook_content:
         playbook_content = playbook_content.split("```yaml")[1].split("```")[0].strip()
@@ -1097,6 +1814,121 @@ Generate the minimal playbook now:"""
     return playbook_content
 
 
+def _patch_applies(current_playbook: str, feedback: str, patch_mode: bool) -> bool:
+    """Check whether an enhancement can be requested as task edits."""
+    return bool(patch_mode and current_playbook and feedback and list_task_names(current_playbook))
+
+
+def apply_patch_response(response: str, current_playbook: str) -> str:
+    """
+    Apply a patch-mode LLM response to the current playbook.
+    
+    Args:
+        response: LLM response with REPLACE/INSERT/DELETE TASK blocks (or a complete playbook)
+        current_playbook: Playbook the edits refer to
+        
+    Returns:
+        str: Enhanced playbook, or None if the response can't be applied
+    """
+    try:
+        edits = parse_playbook_patch(response)
+        patched = apply_playbook_patch(current_playbook, edits)
+    except PlaybookPatchError as e:
+        if not re.search(r'(?im)^\s*\**\s*(REPLACE|INSERT BEFORE|INSERT AFTER|DELETE) TASK', response):
+            # The model chose to return a complete playbook (allowed for wide changes)
+            playbook = clean_generated_playbook(response)
+            try:
+                plays = yaml.safe_load(playbook)
+            except yaml.YAMLError:
+                plays = None
+            if isinstance(plays, list) and plays and all(isinstance(play, dict) for play in plays):
+                print("ℹ️  Model returned a complete playbook instead of task edits")
+                return playbook
+        print(f"⚠️  Patch could not be applied ({e}) - falling back to full regeneration")
+        return None
+    
+    print(f"✂️  Applied {len(edits)} task edit(s): {len(response)} chars returned "
+          f"instead of a {len(patched)} char playbook")
+    for edit in edits:
+        print(f"   - {edit['op']}: {edit['task']}")
+    return patched
+
+
+def generate_playbook_steps(
+    playbook_objective: str,
+    target_host: str = "master-1",
+    become_user: str = "root",
+    requirements: list = None,
+    example_output: str = "",
+    audit_procedure: str = None,
+    current_playbook: str = None,
+    feedback: str = None,
+    use_cache: bool = True,
+    patch_mode: bool = True
+):
+    """
+    Steps that generate or enhance an Ansible playbook based on custom requirements or
+    audit procedure (see run_steps()).
+    
+    Args:
+        playbook_objective: Description of what the playbook should achieve
+        target_host: Default target host for the playbook
+        become_user: User to become (usually root)
+        requirements: List of requirement strings describing what the playbook should do
+        example_output: Example command output to provide context
+        audit_procedure: CIS Benchmark audit procedure (script/commands) - when provided,
+                        generates an audit playbook based on this procedure
+        current_playbook: Existing playbook content to enhance (if provided, enhances instead of regenerating)
+        feedback: Analysis feedback/advice for enhancing the playbook (used with current_playbook)
+        use_cache: If False, bypass the on-disk LLM response cache (e.g., when regenerating
+                   after the cached playbook failed)
+        patch_mode: When enhancing, ask for task edits (applied locally) instead of the whole
+                    playbook; falls back to full regeneration if the edits can't be applied
+    """
+    from langchain_core.messages import HumanMessage
+    
+    if _patch_applies(current_playbook, feedback, patch_mode):
+        print("Enhancing Ansible playbook (patch mode)...")
+        print("=" * 80)
+        patch_prompt = build_generation_prompt(
+            playbook_objective, target_host, become_user, requirements,
+            example_output, audit_procedure, current_playbook, feedback, patch_mode=True
+        )
+        try:
+            response = yield from invoke_llm_steps([HumanMessage(content=patch_prompt)], label="Patch", cache_site="patch", use_cache=use_cache)
+            patched = apply_patch_response(response, current_playbook)
+            if patched is not None:
+                return patched
+        except LLMTimeoutError:
+            print("⚠️  Patch request timed out - falling back to full regeneration")
+    
+    prompt_template = build_generation_prompt(
+        playbook_objective, target_host, become_user, requirements,
+        example_output, audit_procedure, current_playbook, feedback
+    )
+    
+    # Don't use ChatPromptTemplate - invoke model directly to avoid brace parsing issues
+    print("Generating Ansible playbook...")
+    print("=" * 80)
+    
+    try:
+        playbook_content = yield from invoke_llm_steps([HumanMessage(content=prompt_template)], label="Generation", cache_site="generation", use_cache=use_cache)
+    except LLMTimeoutError as e:
+        raise Exception("Playbook generation timed out after 3 attempts") from e
+    
+    return clean_generated_playbook(playbook_content)
+
+
+def generate_playbook(*args, **kwargs) -> str:
+    """Generate or enhance an Ansible playbook (arguments: see generate_playbook_steps())."""
+    return run_steps(generate_playbook_steps(*args, **kwargs))
+
+
+async def agenerate_playbook(*args, **kwargs) -> str:
+    """Async variant of generate_playbook()."""
+    return await arun_steps(generate_playbook_steps(*args, **kwargs))
+
+
 def fix_yaml_special_chars(content: str) -> str:
     r"""
     Fix common YAML syntax issues with special characters in shell commands.
@@ -1201,95 +2033,140 @@ def save_playbook(content: str, filename: str = "kill_packet_recvmsg_process.yml
     print(f"\n✅ Playbook saved to: {filename}")
 
 
-def check_playbook_syntax(filename: str, target_host: str) -> tuple[bool, str]:
+def build_syntax_check_command(ansible_nav: str, filename: str, target_host: str) -> list:
+    """Build the ansible-navigator --syntax-check command line."""
+    return [
+        ansible_nav, 'run', 
+        filename, 
+        '-i', f'{target_host},',
+        '-u', 'root',  # Use root user to connect
+        '-v',  # Verbose output
+        '--syntax-check',
+        '--mode', 'stdout'  # Force output to stdout instead of interactive mode
+    ]
+
+
+def interpret_syntax_check(filename: str, result: subprocess.CompletedProcess) -> tuple[bool, str]:
     """
-    Check Ansible playbook syntax.
+    Turn a completed syntax-check run into (is_valid, error_message).
     
     Args:
-        filename: Path to the playbook file
-        
-    Returns:
-        tuple: (is_valid, error_message)
+        filename: Path to the playbook file (used for a YAML fallback check)
+        result: Completed ansible-navigator process
     """
-    try:
-        print(f"\n🔍 Checking playbook syntax: {filename}")
-        
-        # Initialize ansible_nav early in case of errors
-        ansible_nav = get_ansible_navigator_path()
-        
-        # First, check if the playbook file exists
-        if not os.path.isfile(filename):
-            error_msg = f"Playbook file not found: {filename}"
+    if result.returncode == 0:
+        print("✅ Syntax check passed!")
+        return True, ""
+    
+    # Combine stdout and stderr
+    error_output = []
+    
+    if result.stdout and result.stdout.strip():
+        error_output.append("=== STDOUT ===")
+        error_output.append(result.stdout)
+    
+    if result.stderr and result.stderr.strip():
+        error_output.append("=== STDERR ===")
+        error_output.append(result.stderr)
+    
+    # If both are empty, provide helpful message
+    if not error_output:
+        error_output.append("No error output captured. Checking playbook file...")
+        # Try to validate the YAML directly
+        try:
+            import yaml
+            with open(filename, 'r') as f:
+                yaml.safe_load_all(f)
+            error_output.append("YAML structure is valid. Issue may be with Ansible-specific syntax.")
+        except yaml.YAMLError as e:
+            error_output.append(f"YAML Parsing Error: {str(e)}")
+        except Exception as e:
+            error_output.append(f"Error reading file: {str(e)}")
+    
+    error_msg = "\n".join(error_output)
+    
+    print(f"❌ Syntax check failed!")
+    print("\n" + "="*80)
+    print("SYNTAX ERROR DETAILS:")
+    print("="*80)
+    print(error_msg)
+    print("="*80)
+    
+    return False, error_msg
+
+
+def preflight_syntax_check(filename: str, requirements: list = None) -> tuple[bool, str]:
+    """
+    Validate a playbook file in-process (YAML, Jinja2, requirement variables)
+    so broken playbooks fail in milliseconds instead of via ansible-navigator.
+    
+    Args:
+        filename: Path to the playbook file
+        requirements: Playbook requirements to cross-check status_N/data_N/task_N_* against
+        
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    started = time.monotonic()
+    with open(filename, 'r', encoding='utf-8') as f:
+        errors = preflight_playbook(f.read(), requirements)
+    elapsed_ms = (time.monotonic() - started) * 1000
+    
+    if not errors:
+        print(f"⚡ Pre-flight validation passed ({elapsed_ms:.0f} ms)")
+        return True, ""
+    
+    error_msg = format_preflight_errors(errors)
+    print(f"❌ Pre-flight validation failed in {elapsed_ms:.0f} ms - not running ansible-navigator")
+    print("\n" + "="*80)
+    print(error_msg)
+    print("="*80)
+    return False, error_msg
+
+
+def check_playbook_syntax_steps(filename: str, target_host: str, requirements: list = None):
+    """
+    Steps that check Ansible playbook syntax (see run_steps()).
+    
+    Runs the in-process pre-flight validation first; only locally clean
+    playbooks are sent to ansible-navigator --syntax-check.
+    
+    Args:
+        filename: Path to the playbook file
+        target_host: Host used for the syntax-check inventory
+        requirements: Playbook requirements for the pre-flight variable cross-check (optional)
+        
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    try:
+        print(f"\n🔍 Checking playbook syntax: {filename}")
+        
+        # Initialize ansible_nav early in case of errors
+        ansible_nav = get_ansible_navigator_path()
+        
+        # First, check if the playbook file exists
+        if not os.path.isfile(filename):
+            error_msg = f"Playbook file not found: {filename}"
             print(f"❌ {error_msg}")
             return False, error_msg
         
-        cmd = [
-            ansible_nav, 'run', 
-            filename, 
-            '-i', f'{target_host},',
-            '-u', 'root',  # Use root user to connect
-            '-v',  # Verbose output
-            '--syntax-check',
-            '--mode', 'stdout'  # Force output to stdout instead of interactive mode
-        ]
+        is_valid, error_msg = preflight_syntax_check(filename, requirements)
+        if not is_valid:
+            return False, error_msg
+        
+        cmd = build_syntax_check_command(ansible_nav, filename, target_host)
         print(f"Command: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30,
-            env=os.environ  # Pass current environment
-        )
+        result = yield Holding("host", Steps(run_timed_navigator_steps(cmd, filename, [target_host], 'syntax')))
         
-        if result.returncode == 0:
-            print("✅ Syntax check passed!")
-            return True, ""
-        else:
-            # Combine stdout and stderr
-            error_output = []
-            
-            if result.stdout and result.stdout.strip():
-                error_output.append("=== STDOUT ===")
-                error_output.append(result.stdout)
-            
-            if result.stderr and result.stderr.strip():
-                error_output.append("=== STDERR ===")
-                error_output.append(result.stderr)
-            
-            # If both are empty, provide helpful message
-            if not error_output:
-                error_output.append("No error output captured. Checking playbook file...")
-                # Try to validate the YAML directly
-                try:
-                    import yaml
-                    with open(filename, 'r') as f:
-                        yaml.safe_load_all(f)
-                    error_output.append("YAML structure is valid. Issue may be with Ansible-specific syntax.")
-                except yaml.YAMLError as e:
-                    error_output.append(f"YAML Parsing Error: {str(e)}")
-                except Exception as e:
-                    error_output.append(f"Error reading file: {str(e)}")
-            
-            error_msg = "\n".join(error_output)
+        return interpret_syntax_check(filename, result)
             
-            print(f"❌ Syntax check failed!")
-            print("\n" + "="*80)
-            print("SYNTAX ERROR DETAILS:")
-            print("="*80)
-            print(error_msg)
-            print("="*80)
-            
-            return False, error_msg
-            
-    except subprocess.TimeoutExpired:
-        error_msg = "Syntax check timed out after 30 seconds"
+    except subprocess.TimeoutExpired as e:
+        error_msg = f"Syntax check timed out after {e.timeout} seconds"
         print(f"❌ {error_msg}")
         return False, error_msg
     except FileNotFoundError as e:
-        error_msg = f"ansible-navigator command not found: {e}\n"
-        error_msg += f"   Tried to execute: {ansible_nav}\n"
-        error_msg += f"   Python executable: {sys.executable}\n"
-        error_msg += f"   PATH: {os.environ.get('PATH', 'Not set')}"
+        error_msg = _navigator_not_found_message(e, ansible_nav)
         print(f"❌ {error_msg}")
         return False, error_msg
     except Exception as e:
@@ -1298,6 +2175,21 @@ def check_playbook_syntax(filename: str, target_host: str) -> tuple[bool, str]:
         return False, error_msg
 
 
+def check_playbook_syntax(filename: str, target_host: str, requirements: list = None) -> tuple[bool, str]:
+    """Check Ansible playbook syntax (see check_playbook_syntax_steps())."""
+    return run_steps(check_playbook_syntax_steps(filename, target_host, requirements))
+
+
+async def acheck_playbook_syntax(filename: str, target_host: str, requirements: list = None) -> tuple[bool, str]:
+    """Async variant of check_playbook_syntax()."""
+    return await arun_steps(check_playbook_syntax_steps(filename, target_host, requirements))
+
+
+# Task header and status markers used by filter_verbose_task_output()
+TASK_LINE_PATTERN = re.compile(r'^TASK\s+\[([^\]]+)\]\s*')
+TASK_STATUS_MARKERS = ('skipping:', 'fatal:', 'ok:', 'changed:', 'failed:')
+
+
 def filter_verbose_task_output(output: str) -> str:
     """
     Filter verbose Ansible task output to reduce data size for AI feedback.
@@ -1311,8 +2203,6 @@ def filter_verbose_task_output(output: str) -> str:
     Returns:
         Filtered output with verbose task details removed
     """
-    import re
-    
     lines = output.split('\n')
     filtered_lines = []
     i = 0
@@ -1322,21 +2212,14 @@ def filter_verbose_task_output(output: str) -> str:
         next_line = lines[i]
 
         # Check if this is a TASK line
-        task_match = re.match(r'^TASK\s+\[([^\]]+)\]\s*', next_line)
-        if task_match:
+        if next_line.startswith('TASK') and TASK_LINE_PATTERN.match(next_line):
             # Found a TASK line - keep it
             filtered_lines.append(next_line)
             Skip = True
 
-
-        #if re.search(r'\s*ok:\s*', line):
-
-        if (re.search(r'\s*skipping:\s*', next_line) or
-            re.search(r'\s*fatal:\s*', next_line) or
-            re.search(r'\s*ok:\s*', next_line) or
-            re.search(r'\s*changed:\s*', next_line) or
-            re.search(r'\s*failed:\s*', next_line)):
-
+        # Status lines end the skipped task details (plain substring checks: the
+        # markers may appear anywhere in the line)
+        if any(marker in next_line for marker in TASK_STATUS_MARKERS):
             Skip = False
 
         if not Skip:
@@ -1347,9 +2230,648 @@ def filter_verbose_task_output(output: str) -> str:
     return '\n'.join(filtered_lines)
 
 
-def test_playbook_on_server(filename: str, target_host: str = "192.168.122.16", check_mode: bool = False, verbose: str = "v", skip_debug: bool = False) -> tuple[bool, str]:
+def compact_test_output(output: str, events: list = None) -> str:
+    """
+    Reduce a run's output for AI feedback (see output_compaction.py).
+    
+    Args:
+        output: Raw run output (stdout + stderr)
+        events: Task events of the run, if recorded
+        
+    Returns:
+        str: Per-task summaries within OUTPUT_TOKEN_BUDGET, or the filtered
+             output / event rendering when compaction is disabled
+    """
+    if not is_compaction_enabled():
+        return render_task_events(events) if events else filter_verbose_task_output(output)
+    return compact_run_output(output, events)
+
+
+def _normalize_verbose(verbose) -> str:
+    """Normalize a verbose level (legacy bool values are accepted for backward compatibility)."""
+    if isinstance(verbose, bool):
+        return "v" if verbose else ""
+    if verbose not in ["", "v", "vv", "vvv"]:
+        return "v"  # Default to "v" if invalid value
+    return verbose
+
+
+def build_test_command(ansible_nav: str, filename: str, target_host: str, check_mode: bool = False,
+                       verbose: str = "v", skip_debug: bool = False, events_path: str = None,
+                       forks: int = None) -> list:
+    """
+    Build the ansible-navigator command used to run a playbook against a host.
+
+    If events_path is given, the run saves its task events there as a playbook
+    artifact (read back with load_task_events()). target_host may be a
+    comma-separated host list; forks sets how many of them run in parallel.
+    """
+    cmd = [
+        ansible_nav, 'run', 
+        filename, 
+        '-i', f'{target_host},',
+        '-u', 'root'  # Use root user to connect
+    ]
+    
+    # Add verbose flags based on level
+    if verbose == "v":
+        cmd.append('-v')
+    elif verbose == "vv":
+        cmd.append('-vv')
+    elif verbose == "vvv":
+        cmd.append('-vvv')
+    # If verbose is "", don't add any verbose flag
+
+    if check_mode:
+        cmd.append('--check')  # Dry-run mode
+    
+    if skip_debug:
+        cmd.extend(['--skip-tags', 'debug'])  # Skip troubleshooting debug tasks
+    
+    if events_path:
+        cmd.extend(['--pae', 'true', '--pas', events_path])  # Structured task events
+    
+    if forks:
+        cmd.extend(['--forks', str(forks)])
+    
+    return cmd
+
+
+# Output patterns that indicate a PLAYBOOK BUG (retry/regeneration needed)
+PLAYBOOK_BUG_PATTERNS = [
+    ("undefined variable", "Undefined variable error"),
+    ("is undefined", "Variable is undefined"),
+    ("'dict object' has no attribute", "Invalid attribute access"),
+    ("Syntax Error while loading YAML", "YAML syntax error"),
+    ("template error while templating string", "Jinja2 template error"),
+    ("Unexpected end of template", "Jinja2 unclosed block"),
+    ("expected token 'end of print statement'", "Jinja2 syntax error"),
+    ("Jinja was looking for the following tags", "Jinja2 missing closing tag"),
+    ("The error was:", "Ansible task error"),
+    ("undefined method", "Undefined method call"),
+    ("cannot be converted to", "Type conversion error"),
+    ("Invalid/incorrect password", "Authentication error in task"),
+    ("failed at splitting arguments", "YAML/Jinja2 parsing error - likely due to complex script in shell module"),
+    ("unbalanced jinja2 block", "Jinja2 parsing error - likely due to curly braces in shell script"),
+    ("Missing end of comment tag", "Jinja2 parsing error - likely bash variable ${#var} mistaken for Jinja2 comment"),
+    # Shell syntax errors (even if task shows ok due to ignore_errors)
+    ("syntax error near unexpected token", "Shell syntax error - likely bash-specific syntax used with /bin/sh"),
+    ("syntax error:", "Shell syntax error in command"),
+    ("/bin/sh: -c: line", "Shell script error - command may require bash instead of sh"),
+    ("bad substitution", "Shell bad substitution - bash syntax used with /bin/sh"),
+    ("unexpected EOF", "Shell unexpected end of file"),
+    ("command not found", "Command not found - missing binary or path issue"),
+]
+
+# Errors that are playbook bugs even when the failing task has ignore_errors: true
+IGNORED_FATAL_ERROR_PATTERNS = [
+    ("Invalid data passed to 'loop'", "Invalid loop data - playbook bug"),
+    ("Invalid data passed to", "Invalid data passed to task - playbook bug"),
+    ("is undefined", "Undefined variable - playbook bug"),
+    ("template error", "Jinja2 template error - playbook bug"),
+    ("syntax error", "Syntax error - playbook bug"),
+    ("cannot be converted to", "Type conversion error - playbook bug"),
+    ("'dict object' has no attribute", "Invalid attribute access - playbook bug"),
+    ("has no attribute", "Invalid attribute access - playbook bug"),
+    ("Unexpected end of template", "Jinja2 unclosed block - playbook bug"),
+    ("expected token", "Jinja2 syntax error - playbook bug"),
+]
+
+# Connection problems (validation cannot be done on the host)
+CONNECTION_ERROR_PATTERNS = [
+    "Failed to connect to the host",
+    "Permission denied",
+    "Connection refused",
+    "No route to host",
+    "Host key verification failed",
+    "UNREACHABLE",
+    "SSH Error: data could not be sent"
+]
+
+# Signatures that always mean a broken playbook: test runs are stopped as soon as
+# one shows up (see run_navigator(abort_patterns=...)) instead of running to the end
+EARLY_ABORT_PATTERNS = [
+    "is undefined",
+    "undefined variable",
+    "'dict object' has no attribute",
+    "template error while templating string",
+    "Unexpected end of template",
+    "expected token 'end of print statement'",
+    "Jinja was looking for the following tags",
+    "failed at splitting arguments",
+    "unbalanced jinja2 block",
+    "Missing end of comment tag",
+    "syntax error near unexpected token",
+    "bad substitution",
+    "Invalid data passed to 'loop'",
+]
+
+# OS version mismatch (playbook is valid, just wrong target)
+OS_VERSION_PATTERNS = [
+    "This playbook only supports Red Hat Enterprise Linux",
+    "ansible_distribution_major_version",
+    "OS version mismatch",
+    "distribution version",
+    "Only supported on"
+]
+
+# Ansible fatal error block: fatal: [host]: FAILED! => {... "msg": "error message" ...}
+FATAL_ERROR_BLOCK_PATTERN = re.compile(r'fatal:\s*\[[^\]]+\]:\s*FAILED!\s*=>\s*\{[^}]*"msg":\s*"([^"]+)"')
+
+# All of the above in one matcher, plus the markers used to place fatal errors
+# (see output_scanner.py): classify_test_output() scans an output only once
+TEST_OUTPUT_SCANNER = MultiPatternScanner({
+    'bug': PLAYBOOK_BUG_PATTERNS,
+    'ignored_fatal': IGNORED_FATAL_ERROR_PATTERNS,
+    'connection': CONNECTION_ERROR_PATTERNS,
+    'os_version': OS_VERSION_PATTERNS,
+    'fatal': ["fatal:"],
+    'ignoring': ["...ignoring"],
+    'task': ["TASK ["],
+})
+
+
+def attach_task_events(result: subprocess.CompletedProcess, events_path: str):
+    """
+    Attach the task events of a test run to its result (result.events).
+    
+    A run stopped early on a playbook-bug signature has incomplete events, so it
+    is classified from its partial output instead.
+    """
+    aborted = getattr(result, 'aborted', None)
+    if aborted:
+        print(f"⏹️  Run stopped early on playbook bug signature '{aborted}'")
+        print(f"   {result.abort_line}")
+        result.events = None
+    else:
+        result.events = load_task_events(events_path)
+
+
+# =============================================================================
+# Adaptive run timeouts (see timing_history.py)
+# =============================================================================
+
+def plan_run_timeout(filename: str, hosts: list, kind: str) -> tuple[int, str]:
+    """
+    Timeout for a syntax check or test run from the timing history.
+    
+    The largest timeout over the hosts is used. Before a test run, shell tasks
+    the history shows are slow (or hung) on any host are switched to async/poll
+    in a temporary copy of the playbook next to it (the playbook file and the
+    workflow's playbook content stay as generated), and the timeout is raised
+    to fit their async limits.
+    
+    Args:
+        filename: Path to the playbook file
+        hosts: Hosts in the run's inventory
+        kind: 'syntax' or 'test'
+        
+    Returns:
+        tuple: (timeout in seconds, playbook file to run) - the file to run is the
+        async copy when tasks were switched (the caller removes it), else filename
+    """
+    history = get_timing_history()
+    checkpoint = checkpoint_key(filename)
+    timeout, reason = max(history.timeout_for(checkpoint, host, kind) for host in hosts)
+    run_filename = filename
+    
+    if kind == 'test':
+        async_tasks = {}
+        for host in hosts:
+            for name, seconds in history.long_tasks(checkpoint, host).items():
+                async_tasks[name] = max(seconds, async_tasks.get(name, 0))
+        if async_tasks:
+            with open(filename, 'r', encoding='utf-8') as f:
+                playbook_content = f.read()
+            playbook_content, changed = add_async_to_tasks(playbook_content, async_tasks)
+            if changed:
+                directory, basename = os.path.split(os.path.abspath(filename))
+                fd, run_filename = tempfile.mkstemp(prefix=f".{basename}.", suffix=".async.yml", dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(playbook_content)
+                history.note_async_tasks(len(changed))
+                print(f"   ⏳ Running {len(changed)} long task(s) with async/poll: {', '.join(changed)}")
+            async_budget = min(history.cap_sec, sum(async_tasks.values()) + MIN_TIMEOUTS['test'])
+            if async_budget > timeout:
+                timeout, reason = async_budget, f"fits async limits of {len(async_tasks)} long task(s)"
+    
+    print(f"   ⏱️  Timeout: {timeout}s ({reason})")
+    return timeout, run_filename
+
+
+def _run_copy_command(cmd: list, filename: str, run_filename: str) -> list:
+    """cmd running run_filename (the async copy from plan_run_timeout()) instead of filename."""
+    if run_filename == filename:
+        return cmd
+    return [run_filename if arg == filename else arg for arg in cmd]
+
+
+def _remove_run_copy(filename: str, run_filename: str):
+    """Remove the async copy plan_run_timeout() made for a run."""
+    if run_filename != filename:
+        try:
+            os.remove(run_filename)
+        except OSError:
+            pass
+
+
+def record_run_timing(filename: str, hosts: list, kind: str, timeout: int, duration: float,
+                      events: list = None, timed_out_output=None):
+    """
+    Record a syntax check or test run in the timing history.
+    
+    Args:
+        filename: Path to the playbook file
+        hosts: Hosts in the run's inventory
+        kind: 'syntax' or 'test'
+        timeout: Timeout the run was given
+        duration: Wall time of the run in seconds
+        events: Task events of a test run (per-task durations for each host)
+        timed_out_output: Partial stdout of a run killed at its timeout; the task it
+            was running is recorded as hung
+    """
+    history = get_timing_history()
+    checkpoint = checkpoint_key(filename)
+    timed_out = timed_out_output is not None
+    hung_task = running_task(timed_out_output) if timed_out else None
+    for host in hosts:
+        tasks = task_timings(events, host)
+        if hung_task:
+            tasks[hung_task] = {'duration': timeout, 'action': None, 'timed_out': True}
+        history.record(checkpoint, host, kind, timeout if timed_out else duration, timeout,
+                       timed_out=timed_out, tasks=tasks)
+
+
+def measure_run_connections(hosts: list) -> tuple:
+    """
+    Open (or reuse) the shared SSH master to each host of a test run before it starts.
+    
+    Returns:
+        tuple: (setup_seconds, reused) - summed over the hosts; setup_seconds is None
+        if any host could not be measured, reused is True only if every master was reused
+    """
+    setup_total = 0.0
+    all_reused = True
+    for host in hosts:
+        setup_sec, reused = measure_connection_setup(host)
+        if setup_sec is None:
+            return None, False
+        setup_total += setup_sec
+        all_reused = all_reused and reused
+    return setup_total, all_reused
+
+
+def report_run_connections(hosts: list, connection: tuple, result: subprocess.CompletedProcess, duration: float):
+    """Report a test run's connection setup time versus its task time (slowest host when fanned out)."""
+    events = getattr(result, 'events', None)
+    if events:
+        task_sec = max(sum(timing['duration'] for timing in task_timings(events, host).values()) for host in hosts)
+    else:
+        task_sec = duration
+    setup_sec, reused = connection
+    record_connection_timing(','.join(hosts), setup_sec, reused, task_sec)
+
+
+def run_timed_navigator_steps(cmd: list, filename: str, hosts: list, kind: str, events_path: str = None,
+                              abort_patterns: list = None):
+    """
+    run_navigator_steps() with a timeout from the timing history; the run is recorded there.
+    
+    For test runs (events_path given) the task events are attached to the result,
+    and the SSH connection setup is measured before the run and reported against
+    the run's task time. Runs stopped early on a playbook bug, and test runs
+    without task events, are not recorded in the history since their duration
+    says nothing about the playbook's run time.
+    
+    Raises:
+        subprocess.TimeoutExpired: If the run exceeds its timeout (e.timeout holds the timeout used)
+    """
+    timeout, run_filename = plan_run_timeout(filename, hosts, kind)
+    connection = (yield Call(measure_run_connections, None, hosts)) if kind == 'test' else None
+    started = time.monotonic()
+    try:
+        result = yield from run_navigator_steps(_run_copy_command(cmd, filename, run_filename), timeout, abort_patterns)
+    except subprocess.TimeoutExpired as e:
+        events = load_task_events(events_path) if events_path else None
+        record_run_timing(filename, hosts, kind, timeout, time.monotonic() - started, events, e.output or "")
+        raise
+    finally:
+        _remove_run_copy(filename, run_filename)
+    duration = time.monotonic() - started
+    if events_path:
+        attach_task_events(result, events_path)
+    if connection is not None:
+        report_run_connections(hosts, connection, result, duration)
+    if not getattr(result, 'aborted', None) and (kind != 'test' or result.events):
+        record_run_timing(filename, hosts, kind, timeout, duration, getattr(result, 'events', None))
+    return result
+
+
+def run_timed_navigator(cmd: list, filename: str, hosts: list, kind: str, events_path: str = None,
+                        abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """run_navigator() with a timeout from the timing history (see run_timed_navigator_steps())."""
+    return run_steps(run_timed_navigator_steps(cmd, filename, hosts, kind, events_path, abort_patterns))
+
+
+async def arun_timed_navigator(cmd: list, filename: str, hosts: list, kind: str, events_path: str = None,
+                               abort_patterns: list = None) -> subprocess.CompletedProcess:
+    """Async variant of run_timed_navigator()."""
+    return await arun_steps(run_timed_navigator_steps(cmd, filename, hosts, kind, events_path, abort_patterns))
+
+
+def classify_test_output(result: subprocess.CompletedProcess, mode_desc: str) -> tuple[bool, str]:
+    """
+    Classify a completed ansible-navigator run into (is_successful, output).
+    
+    Detects playbook bugs, ignored fatal errors, failed tasks, connection errors,
+    OS version mismatches and accepted compliance findings.
+    
+    Uses the structured task events of the run (result.events, see task_events.py)
+    when they were recorded, and the raw stdout/stderr otherwise.
+
+    Args:
+        result: Completed ansible-navigator process
+        mode_desc: Human-readable run mode used in progress messages
+        
+    Returns:
+        tuple: (is_successful, output) - output is compacted to per-task summaries (compact_test_output())
+    """
+    events = getattr(result, 'events', None)
+    if events:
+        return classify_task_events(result, events, mode_desc)
+
+    raw_output = result.stdout + result.stderr
+
+    # Compact verbose task output to reduce data size for AI feedback
+    # Keep full output for error detection, then compact before returning
+    output = raw_output
+
+    # One pass over the output finds every pattern of every check below
+    hits = TEST_OUTPUT_SCANNER.scan(output)
+
+    # Check for PLAYBOOK BUGS that require retry/regeneration
+    # (even if ignored, undefined variables are still bugs)
+    bug = first_hit(hits, 'bug')
+    if bug:
+        print(f"❌ PLAYBOOK BUG DETECTED: {bug['label']}")
+        print("   This is a playbook error, not a verification failure")
+        print("   The playbook needs to be regenerated with corrections")
+        print("\n" + "="*80)
+        print("ERROR DETAILS:")
+        print("="*80)
+        print(bug['context'])
+        print("="*80)
+
+        # Return detailed error with filtered context - CRITICAL: Return False immediately when bug detected
+        # Filter output before returning to reduce data size
+        filtered_output = compact_test_output(output)
+        return False, f"PLAYBOOK BUG: {bug['label']}\n\nError context:\n{bug['context']}\n\nFull pattern: {bug['pattern']}\n\nFiltered output:\n{filtered_output}"
+
+    if result.returncode == 0:
+        print(f"✅ Playbook executed successfully in {mode_desc}!")
+
+        # CRITICAL: Check for fatal errors in ignored tasks (playbook bugs)
+        # Even if tasks are ignored (ignore_errors: true), fatal errors indicate playbook bugs
+        # These are playbook bugs that need to be fixed, not verification failures
+        # Check if there are fatal errors that are being ignored
+        has_fatal_error = False
+        fatal_error_details = []
+
+        # Fatal errors: "fatal: [host]: FAILED! => {"msg": "error message"}
+        ignoring_hits = group_hits(hits, 'ignoring')
+        task_hits = group_hits(hits, 'task')
+        for fatal_hit in group_hits(hits, 'fatal'):
+            fatal_match = FATAL_ERROR_BLOCK_PATTERN.match(output, fatal_hit['start'])
+            if not fatal_match:
+                continue
+            error_msg = fatal_match.group(1)
+            match_end = fatal_match.end()
+
+            # Check if this error matches any playbook bug pattern (hits inside the msg)
+            error_hit = first_hit(hits, 'ignored_fatal', fatal_match.start(1), fatal_match.end(1))
+            if error_hit:
+                # Check if this fatal error is being ignored
+                # Look for "...ignoring" after the fatal error block
+                next_ignoring = next_hit(ignoring_hits, match_end)
+                if next_ignoring and next_ignoring['start'] - match_end < 300:
+                    # This fatal error is being ignored - it's a playbook bug!
+                    has_fatal_error = True
+                    # Extract task name if available (the TASK [ header before it)
+                    task_hit = previous_hit(task_hits, fatal_hit['start'])
+                    task_name = ""
+                    if task_hit:
+                        task_end = output.find("]", task_hit['start'])
+                        if task_end != -1:
+                            task_name = output[task_hit['start']:task_end+1]
+
+                    description = error_hit['label']
+                    error_detail = f"{description}"
+                    if task_name:
+                        error_detail += f" in {task_name}"
+                    error_detail += f": {error_msg[:300]}"
+                    fatal_error_details.append(error_detail)
+                    print(f"❌ PLAYBOOK BUG DETECTED (ignored task): {description}")
+                    if task_name:
+                        print(f"   Task: {task_name}")
+                    print(f"   Error: {error_msg[:300]}")
+
+        # For verification/compliance playbooks, success means it completed
+        # We don't require failed=0 because checks are allowed to find non-compliance
+        if "ok=" in output and "PLAY RECAP" in output:
+            # Check PLAY RECAP for actual task failures
+            # Look for "failed=N" where N > 0
+            recap_match = re.search(r'failed=(\d+)', output)
+            if recap_match:
+                failed_count = int(recap_match.group(1))
+                if failed_count > 0:
+                    print(f"⚠️  Playbook has {failed_count} failed task(s)")
+                    # This could be a playbook bug, return failure to trigger retry
+                    # Filter output before returning to reduce data size
+                    filtered_output = compact_test_output(output)
+                    return False, f"Playbook had {failed_count} failed tasks\n\n{filtered_output}"
+
+            # Check for ignored tasks with fatal errors (playbook bugs)
+            if has_fatal_error:
+                error_summary = "\n".join(fatal_error_details)
+                print(f"❌ PLAYBOOK BUG: Fatal errors detected in ignored tasks")
+                print("   These errors indicate playbook bugs that need to be fixed")
+                print("   The playbook will be regenerated with corrections")
+                # Filter output before returning to reduce data size
+                filtered_output = compact_test_output(output)
+                return False, f"PLAYBOOK BUG: Fatal errors in ignored tasks (playbook bugs)\n\nErrors:\n{error_summary}\n\nFiltered output:\n{filtered_output}"
+
+            print("✅ Playbook completed successfully!")
+
+            # Check for compliance report
+            if "COMPLIANT" in output or "NON-COMPLIANT" in output or "Compliance" in output:
+                print("✅ Compliance report generated")
+
+            # Parse Ansible output for specific checks
+            if "PLAY RECAP" in output:
+                recap_start = output.find("PLAY RECAP")
+                recap_section = output[recap_start:recap_start+200].split("\n")[0:4]
+                for line in recap_section:
+                    if line.strip():
+                        print(f"   {line}")
+
+            # Filter output before returning to reduce data size for AI feedback
+            filtered_output = compact_test_output(output)
+            return True, filtered_output
+        else:
+            # Filter output before returning to reduce data size
+            filtered_output = compact_test_output(output)
+            return False, f"Execution completed but output format unexpected:\n{filtered_output}"
+    else:
+        print(f"⚠️  Playbook execution returned code: {result.returncode}")
+
+        # Check if it's an SSH/connection issue
+        # Ansible-navigator returns code 4 for connection issues
+        is_connection_error = (
+            result.returncode == 4 or 
+            first_hit(hits, 'connection') is not None
+        )
+
+        if is_connection_error:
+            print("⚠️  SSH connection issue detected")
+            print("   Cannot connect to the host for validation")
+            print("   ⚠️  WARNING: Validation cannot be done on the host")
+            print("   The playbook syntax is valid, but execution testing is not possible")
+            return False, "CONNECTION_ERROR: Cannot connect to host - validation cannot be performed"
+
+        # Check if it's an OS version mismatch (playbook is valid, just wrong target)
+        if first_hit(hits, 'os_version'):
+            print("⚠️  OS version mismatch detected")
+            print("   The playbook is valid but targets a different OS version than the test host")
+            print("   This is expected when KCS article specifies a different OS version")
+            print("   ✅ Treating as successful generation - playbook syntax and logic are correct")
+            return True, "OS version mismatch - playbook valid for different OS version"
+
+        # For verification playbooks, even non-zero exit codes might be acceptable
+        # if the playbook completed and generated a report
+        if "PLAY RECAP" in output and ("COMPLIANT" in output or "Compliance" in output):
+            print("⚠️  Playbook exited with non-zero code but completed verification")
+            print("   This is acceptable for compliance check playbooks")
+            print("   ✅ Treating as successful - compliance report was generated")
+            return True, "Compliance verification completed with findings"
+
+        # If we get here, it's a non-zero exit code and not a known acceptable case
+        # Return the filtered output as error message
+        filtered_output = compact_test_output(output)
+        return False, f"Playbook execution failed with return code {result.returncode}\n\nFiltered output:\n{filtered_output}"
+
+
+def classify_task_events(result: subprocess.CompletedProcess, events: list, mode_desc: str) -> tuple[bool, str]:
+    """
+    Classify a run from its per-task events (same rules as classify_test_output()).
+
+    Bug patterns are matched against each task's msg/stderr/stdout instead of the
+    whole -vvv output, the recap is counted from the events, and the returned
+    output is the compacted event rendering (including the compliance report).
+
+    Args:
+        result: Completed run (its stderr is also checked for errors outside tasks)
+        events: Events from load_task_events()
+        mode_desc: Human-readable run mode used in progress messages
+
+    Returns:
+        tuple: (is_successful, output)
     """
-    Test the playbook on a real server to verify it meets requirements.
+    output = compact_test_output(result.stdout + result.stderr, events)
+    scanned = [(event, TEST_OUTPUT_SCANNER.scan(event_text(event))) for event in events]
+    scanned.append((None, TEST_OUTPUT_SCANNER.scan(result.stderr or "")))
+
+    # Check for PLAYBOOK BUGS that require retry/regeneration
+    # (highest-priority pattern first, then the earliest task)
+    bugs = [(hit['priority'], index, event, hit) for index, (event, hits) in enumerate(scanned)
+            for hit in [first_hit(hits, 'bug')] if hit]
+    if bugs:
+        _, _, event, bug = min(bugs, key=lambda item: item[:2])
+        print(f"❌ PLAYBOOK BUG DETECTED: {bug['label']}")
+        print("   This is a playbook error, not a verification failure")
+        print("   The playbook needs to be regenerated with corrections")
+        error_context = bug['context']
+        if event is not None:
+            error_context = f"TASK [{event['task']}] {event['status']} on {event['host']} (rc={event['rc']})\n{error_context}"
+        print("\n" + "="*80)
+        print("ERROR DETAILS:")
+        print("="*80)
+        print(error_context)
+        print("="*80)
+        return False, f"PLAYBOOK BUG: {bug['label']}\n\nError context:\n{error_context}\n\nFull pattern: {bug['pattern']}\n\nFiltered output:\n{output}"
+
+    recap = recap_from_events(events)
+    failed_count = sum(counts['failed'] for counts in recap.values())
+    report_lines = report_lines_from_events(events)
+
+    if result.returncode == 0:
+        print(f"✅ Playbook executed successfully in {mode_desc}!")
+
+        # Fatal errors in ignored tasks (ignore_errors: true) are still playbook bugs
+        fatal_error_details = []
+        for event in events:
+            if not event['ignored']:
+                continue
+            error_msg = str(event['msg'])
+            error_hit = first_hit(TEST_OUTPUT_SCANNER.scan(error_msg), 'ignored_fatal')
+            if error_hit:
+                description = error_hit['label']
+                fatal_error_details.append(f"{description} in TASK [{event['task']}]: {error_msg[:300]}")
+                print(f"❌ PLAYBOOK BUG DETECTED (ignored task): {description}")
+                print(f"   Task: TASK [{event['task']}]")
+                print(f"   Error: {error_msg[:300]}")
+
+        if failed_count > 0:
+            print(f"⚠️  Playbook has {failed_count} failed task(s)")
+            return False, f"Playbook had {failed_count} failed tasks\n\n{output}"
+
+        if fatal_error_details:
+            error_summary = "\n".join(fatal_error_details)
+            print(f"❌ PLAYBOOK BUG: Fatal errors detected in ignored tasks")
+            print("   These errors indicate playbook bugs that need to be fixed")
+            print("   The playbook will be regenerated with corrections")
+            return False, f"PLAYBOOK BUG: Fatal errors in ignored tasks (playbook bugs)\n\nErrors:\n{error_summary}\n\nFiltered output:\n{output}"
+
+        print("✅ Playbook completed successfully!")
+        if report_lines:
+            print("✅ Compliance report generated")
+        for host, counts in recap.items():
+            print(f"   {host} : " + "  ".join(f"{key}={value}" for key, value in counts.items()))
+        return True, output
+
+    print(f"⚠️  Playbook execution returned code: {result.returncode}")
+
+    # Ansible-navigator returns code 4 for connection issues
+    task_hits = [hits for _, hits in scanned[:-1]]  # stderr only counts for playbook bugs
+    is_connection_error = (
+        result.returncode == 4 or
+        any(event['status'] == 'unreachable' for event in events) or
+        any(first_hit(hits, 'connection') for hits in task_hits)
+    )
+    if is_connection_error:
+        print("⚠️  SSH connection issue detected")
+        print("   Cannot connect to the host for validation")
+        print("   ⚠️  WARNING: Validation cannot be done on the host")
+        print("   The playbook syntax is valid, but execution testing is not possible")
+        return False, "CONNECTION_ERROR: Cannot connect to host - validation cannot be performed"
+
+    if any(first_hit(hits, 'os_version') for hits in task_hits):
+        print("⚠️  OS version mismatch detected")
+        print("   The playbook is valid but targets a different OS version than the test host")
+        print("   ✅ Treating as successful generation - playbook syntax and logic are correct")
+        return True, "OS version mismatch - playbook valid for different OS version"
+
+    if report_lines:
+        print("⚠️  Playbook exited with non-zero code but completed verification")
+        print("   This is acceptable for compliance check playbooks")
+        print("   ✅ Treating as successful - compliance report was generated")
+        return True, "Compliance verification completed with findings"
+
+    return False, f"Playbook execution failed with return code {result.returncode}\n\nFiltered output:\n{output}"
+
+
+def test_playbook_on_server_steps(filename: str, target_host: str = "192.168.122.16", check_mode: bool = False, verbose: str = "v", skip_debug: bool = False):
+    """
+    Steps that test the playbook on a real server to verify it meets requirements (see run_steps()).
     
     Args:
         filename: Path to the playbook file
@@ -1359,14 +2881,10 @@ def test_playbook_on_server(filename: str, target_host: str = "192.168.122.16",
         skip_debug: If True, skip debug-tagged tasks (for production execution)
         
     Returns:
-        tuple: (is_successful, output) - output is filtered to reduce verbose task details
+        tuple: (is_successful, output) - output is compacted to per-task summaries (compact_test_output())
     """
     try:
-        # Normalize verbose level (handle legacy bool values for backward compatibility)
-        if isinstance(verbose, bool):
-            verbose = "v" if verbose else ""
-        elif verbose not in ["", "v", "vv", "vvv"]:
-            verbose = "v"  # Default to "v" if invalid value
+        verbose = _normalize_verbose(verbose)
         
         mode_desc = "check mode (dry-run)" if check_mode else "execution mode"
         if skip_debug:
@@ -1382,288 +2900,160 @@ def test_playbook_on_server(filename: str, target_host: str = "192.168.122.16",
             print(f"❌ {error_msg}")
             return False, error_msg
         
-        # Build ansible-navigator command
-        cmd = [
-            ansible_nav, 'run', 
-            filename, 
-            '-i', f'{target_host},',
-            '-u', 'root'  # Use root user to connect
-        ]
-        
-        # Add verbose flags based on level
-        if verbose == "v":
-            cmd.append('-v')
-        elif verbose == "vv":
-            cmd.append('-vv')
-        elif verbose == "vvv":
-            cmd.append('-vvv')
-        # If verbose is "", don't add any verbose flag
-
-        if check_mode:
-            cmd.append('--check')  # Dry-run mode
-        
-        if skip_debug:
-            cmd.extend(['--skip-tags', 'debug'])  # Skip troubleshooting debug tasks
+        with tempfile.TemporaryDirectory(prefix='cis-task-events-') as events_dir:
+            events_path = os.path.join(events_dir, 'artifact.json')
+            cmd = build_test_command(ansible_nav, filename, target_host, check_mode, verbose, skip_debug, events_path)
+            print(f"   Running: {' '.join(cmd)}")
+
+            result = yield Holding("host", Steps(run_timed_navigator_steps(cmd, filename, [target_host], 'test', events_path,
+                                                                         EARLY_ABORT_PATTERNS)), hosts=[target_host])
+
+        return classify_test_output(result, mode_desc)
             
+    except RunCancelled as e:
+        print(f"⏹️  Test run on {target_host} cancelled")
+        return False, str(e)
+    except subprocess.TimeoutExpired as e:
+        error_msg = f"Playbook execution timed out after {e.timeout} seconds"
+        print(f"❌ {error_msg}")
+        return False, error_msg
+    except FileNotFoundError as e:
+        error_msg = _navigator_not_found_message(e, ansible_nav)
+        print(f"❌ {error_msg}")
+        return False, error_msg
+    except Exception as e:
+        error_msg = f"Error during playbook testing: {str(e)}"
+        print(f"❌ {error_msg}")
+        return False, error_msg
+
+
+def test_playbook_on_server(filename: str, target_host: str = "192.168.122.16", check_mode: bool = False, verbose: str = "v", skip_debug: bool = False) -> tuple[bool, str]:
+    """Test the playbook on a real server (see test_playbook_on_server_steps())."""
+    return run_steps(test_playbook_on_server_steps(filename, target_host, check_mode, verbose, skip_debug))
+
+
+async def atest_playbook_on_server(filename: str, target_host: str = "192.168.122.16", check_mode: bool = False, verbose: str = "v", skip_debug: bool = False) -> tuple[bool, str]:
+    """Async variant of test_playbook_on_server()."""
+    return await arun_steps(test_playbook_on_server_steps(filename, target_host, check_mode, verbose, skip_debug))
+
+
+# =============================================================================
+# Multi-host test runs (one run fanned out across all test hosts)
+# =============================================================================
+
+def split_host_results(result: subprocess.CompletedProcess, hosts: list, mode_desc: str) -> dict:
+    """
+    Classify a multi-host run separately for each host.
+    
+    Each host is classified from its own task events (its return code is derived
+    from its unreachable/failed tasks). Without task events the combined output
+    cannot be attributed to hosts, so every host gets the combined classification.
+    
+    Args:
+        result: Completed run against all hosts
+        hosts: Hosts in the run's inventory
+        mode_desc: Human-readable run mode used in progress messages
         
-        print(f"   Running: {' '.join(cmd)}")
+    Returns:
+        dict: {host: (is_successful, output)}
+    """
+    events = getattr(result, 'events', None)
+    if not events:
+        print("⚠️  No task events recorded - classifying the combined output for all hosts")
+        host_result = classify_test_output(result, mode_desc)
+        return {host: host_result for host in hosts}
+    
+    host_results = {}
+    for host in hosts:
+        print(f"\n🖥️  Results for {host}:")
+        host_events = [event for event in events if event['host'] == host]
+        if not host_events:
+            print("⚠️  No task results for this host")
+            host_results[host] = (False, f"CONNECTION_ERROR: No task results from {host} - validation cannot be performed")
+            continue
+        if any(event['status'] == 'unreachable' for event in host_events):
+            returncode = 4
+        elif any(event['status'] == 'failed' for event in host_events):
+            returncode = 2
+        else:
+            returncode = 0
+        host_run = subprocess.CompletedProcess(result.args, returncode, "", result.stderr)
+        host_run.events = host_events
+        host_results[host] = classify_test_output(host_run, mode_desc)
+    return host_results
+
+
+def test_playbook_on_hosts_steps(filename: str, target_hosts: list, check_mode: bool = False, verbose: str = "v", skip_debug: bool = False):
+    """
+    Steps that test the playbook on several servers in one run (one inventory, forks = number
+    of hosts; see run_steps()).
+    
+    Args:
+        filename: Path to the playbook file
+        target_hosts: Target server IPs/hostnames
+        check_mode: If True, run in check mode (dry-run, no changes made)
+        verbose: Verbose level - "v" (default, basic info), "vv" (detailed), "vvv" (very detailed), "" (silent)
+        skip_debug: If True, skip debug-tagged tasks (for production execution)
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,  # 2 minutes timeout for execution
-            env=os.environ  # Pass current environment to find ansible-navigator in venv
-        )
+    Returns:
+        dict: {host: (is_successful, output)} - same contract as test_playbook_on_server() per host
+    """
+    try:
+        verbose = _normalize_verbose(verbose)
         
-        raw_output = result.stdout + result.stderr
+        mode_desc = "check mode (dry-run)" if check_mode else "execution mode"
+        if skip_debug:
+            mode_desc += " [skipping debug tasks]"
+        print(f"\n🧪 Testing playbook on {len(target_hosts)} servers in one run: {', '.join(target_hosts)} ({mode_desc})")
         
-        # Filter verbose task output to reduce data size for AI feedback
-        # Keep full output for error detection, then filter before returning
-        output = raw_output
+        # Initialize ansible_nav early in case of errors
+        ansible_nav = get_ansible_navigator_path()
         
-        # Check for PLAYBOOK BUGS that require retry/regeneration
-        playbook_bug_patterns = [
-            ("undefined variable", "Undefined variable error"),
-            ("is undefined", "Variable is undefined"),
-            ("'dict object' has no attribute", "Invalid attribute access"),
-            ("Syntax Error while loading YAML", "YAML syntax error"),
-            ("template error while templating string", "Jinja2 template error"),
-            ("Unexpected end of template", "Jinja2 unclosed block"),
-            ("expected token 'end of print statement'", "Jinja2 syntax error"),
-            ("Jinja was looking for the following tags", "Jinja2 missing closing tag"),
-            ("The error was:", "Ansible task error"),
-            ("undefined method", "Undefined method call"),
-            ("cannot be converted to", "Type conversion error"),
-            ("Invalid/incorrect password", "Authentication error in task"),
-            ("failed at splitting arguments", "YAML/Jinja2 parsing error - likely due to complex script in shell module"),
-            ("unbalanced jinja2 block", "Jinja2 parsing error - likely due to curly braces in shell script"),
-            ("Missing end of comment tag", "Jinja2 parsing error - likely bash variable ${#var} mistaken for Jinja2 comment"),
-            # Shell syntax errors (even if task shows ok due to ignore_errors)
-            ("syntax error near unexpected token", "Shell syntax error - likely bash-specific syntax used with /bin/sh"),
-            ("syntax error:", "Shell syntax error in command"),
-            ("/bin/sh: -c: line", "Shell script error - command may require bash instead of sh"),
-            ("bad substitution", "Shell bad substitution - bash syntax used with /bin/sh"),
-            ("unexpected EOF", "Shell unexpected end of file"),
-            ("command not found", "Command not found - missing binary or path issue"),
-        ]
+        if not os.path.isfile(filename):
+            error_msg = f"Playbook file not found: {filename}"
+            print(f"❌ {error_msg}")
+            return {host: (False, error_msg) for host in target_hosts}
         
-        for pattern, description in playbook_bug_patterns:
-            if pattern in output:
-                # Check if it's being ignored (has "...ignoring" after the error)
-                # Even if ignored, undefined variables are still bugs
-                
-                print(f"❌ PLAYBOOK BUG DETECTED: {description}")
-                print("   This is a playbook error, not a verification failure")
-                print("   The playbook needs to be regenerated with corrections")
-                print("\n" + "="*80)
-                print("ERROR DETAILS:")
-                print("="*80)
-                # Extract and show the error context
-                error_lines = output.split('\n')
-                error_context_lines = []
-                for i, line in enumerate(error_lines):
-                    if pattern in line:
-                        # Show surrounding context
-                        start = max(0, i-3)
-                        end = min(len(error_lines), i+8)
-                        error_context_lines = error_lines[start:end]
-                        print('\n'.join(error_context_lines))
-                        break
-                print("="*80)
-                
-                # Return detailed error with filtered context - CRITICAL: Return False immediately when bug detected
-                full_error_context = '\n'.join(error_context_lines) if error_context_lines else output[:500]
-                # Filter output before returning to reduce data size
-                filtered_output = filter_verbose_task_output(output)
-                return False, f"PLAYBOOK BUG: {description}\n\nError context:\n{full_error_context}\n\nFull pattern: {pattern}\n\nFiltered output:\n{filtered_output}"
-
-        if result.returncode == 0:
-            print(f"✅ Playbook executed successfully in {mode_desc}!")
-            
-            # CRITICAL: Check for fatal errors in ignored tasks (playbook bugs)
-            # Even if tasks are ignored (ignore_errors: true), fatal errors indicate playbook bugs
-            # These are playbook bugs that need to be fixed, not verification failures
-            fatal_error_patterns = [
-                ("Invalid data passed to 'loop'", "Invalid loop data - playbook bug"),
-                ("Invalid data passed to", "Invalid data passed to task - playbook bug"),
-                ("is undefined", "Undefined variable - playbook bug"),
-                ("template error", "Jinja2 template error - playbook bug"),
-                ("syntax error", "Syntax error - playbook bug"),
-                ("cannot be converted to", "Type conversion error - playbook bug"),
-                ("'dict object' has no attribute", "Invalid attribute access - playbook bug"),
-                ("has no attribute", "Invalid attribute access - playbook bug"),
-                ("Unexpected end of template", "Jinja2 unclosed block - playbook bug"),
-                ("expected token", "Jinja2 syntax error - playbook bug"),
-            ]
-            
-            # Check if there are fatal errors that are being ignored
-            has_fatal_error = False
-            fatal_error_details = []
+        with tempfile.TemporaryDirectory(prefix='cis-task-events-') as events_dir:
+            events_path = os.path.join(events_dir, 'artifact.json')
+            cmd = build_test_command(ansible_nav, filename, ','.join(target_hosts), check_mode, verbose, skip_debug,
+                                     events_path, forks=len(target_hosts))
+            print(f"   Running: {' '.join(cmd)}")
             
-            import re
-            # Find all fatal errors in the output
-            # Pattern: "fatal: [host]: FAILED! => {"msg": "error message"}
-            fatal_blocks = re.finditer(
-                r'fatal:\s*\[[^\]]+\]:\s*FAILED!\s*=>\s*\{[^}]*"msg":\s*"([^"]+)"',
-                output,
-                re.DOTALL
-            )
-            
-            for fatal_match in fatal_blocks:
-                error_msg = fatal_match.group(1)
-                match_start = fatal_match.start()
-                match_end = fatal_match.end()
-                
-                # Check if this error matches any playbook bug pattern
-                for error_pattern, description in fatal_error_patterns:
-                    if error_pattern in error_msg:
-                        # Check if this fatal error is being ignored
-                        # Look for "...ignoring" after the fatal error block
-                        next_ignoring = output.find("...ignoring", match_end)
-                        if next_ignoring != -1 and next_ignoring - match_end < 300:
-                            # This fatal error is being ignored - it's a playbook bug!
-                            has_fatal_error = True
-                            # Extract task name if available (look backwards for TASK [)
-                            task_start = output.rfind("TASK [", 0, match_start)
-                            task_name = ""
-                            if task_start != -1:
-                                task_end = output.find("]", task_start)
-                                if task_end != -1:
-                                    task_name = output[task_start:task_end+1]
-                            
-                            error_detail = f"{description}"
-                            if task_name:
-                                error_detail += f" in {task_name}"
-                            error_detail += f": {error_msg[:300]}"
-                            fatal_error_details.append(error_detail)
-                            print(f"❌ PLAYBOOK BUG DETECTED (ignored task): {description}")
-                            if task_name:
-                                print(f"   Task: {task_name}")
-                            print(f"   Error: {error_msg[:300]}")
-                        break  # Found a match, no need to check other patterns for this error
-            
-            # For verification/compliance playbooks, success means it completed
-            # We don't require failed=0 because checks are allowed to find non-compliance
-            if "ok=" in output and "PLAY RECAP" in output:
-                # Check PLAY RECAP for actual task failures
-                # Look for "failed=N" where N > 0
-                import re
-                recap_match = re.search(r'failed=(\d+)', output)
-                if recap_match:
-                    failed_count = int(recap_match.group(1))
-                    if failed_count > 0:
-                        print(f"⚠️  Playbook has {failed_count} failed task(s)")
-                        # This could be a playbook bug, return failure to trigger retry
-                        # Filter output before returning to reduce data size
-                        filtered_output = filter_verbose_task_output(output)
-                        return False, f"Playbook had {failed_count} failed tasks\n\n{filtered_output}"
-                
-                # Check for ignored tasks with fatal errors (playbook bugs)
-                if has_fatal_error:
-                    error_summary = "\n".join(fatal_error_details)
-                    print(f"❌ PLAYBOOK BUG: Fatal errors detected in ignored tasks")
-                    print("   These errors indicate playbook bugs that need to be fixed")
-                    print("   The playbook will be regenerated with corrections")
-                    # Filter output before returning to reduce data size
-                    filtered_output = filter_verbose_task_output(output)
-                    return False, f"PLAYBOOK BUG: Fatal errors in ignored tasks (playbook bugs)\n\nErrors:\n{error_summary}\n\nFiltered output:\n{filtered_output}"
-                
-                print("✅ Playbook completed successfully!")
-                
-                # Check for compliance report
-                if "COMPLIANT" in output or "NON-COMPLIANT" in output or "Compliance" in output:
-                    print("✅ Compliance report generated")
-                
-                # Parse Ansible output for specific checks
-                if "PLAY RECAP" in output:
-                    recap_start = output.find("PLAY RECAP")
-                    recap_section = output[recap_start:recap_start+200].split("\n")[0:4]
-                    for line in recap_section:
-                        if line.strip():
-                            print(f"   {line}")
-                
-                # Filter output before returning to reduce data size for AI feedback
-                filtered_output = filter_verbose_task_output(output)
-                return True, filtered_output
-            else:
-                # Filter output before returning to reduce data size
-                filtered_output = filter_verbose_task_output(output)
-                return False, f"Execution completed but output format unexpected:\n{filtered_output}"
-        else:
-            print(f"⚠️  Playbook execution returned code: {result.returncode}")
-            
-            # Check if it's an SSH/connection issue
-            # Ansible-navigator returns code 4 for connection issues
-            connection_error_patterns = [
-                "Failed to connect to the host",
-                "Permission denied",
-                "Connection refused",
-                "No route to host",
-                "Host key verification failed",
-                "UNREACHABLE",
-                "SSH Error: data could not be sent"
-            ]
-            
-            is_connection_error = (
-                result.returncode == 4 or 
-                any(pattern in output for pattern in connection_error_patterns)
-            )
-            
-            if is_connection_error:
-                print("⚠️  SSH connection issue detected")
-                print("   Cannot connect to the host for validation")
-                print("   ⚠️  WARNING: Validation cannot be done on the host")
-                print("   The playbook syntax is valid, but execution testing is not possible")
-                return False, "CONNECTION_ERROR: Cannot connect to host - validation cannot be performed"
-            
-            # Check if it's an OS version mismatch (playbook is valid, just wrong target)
-            os_version_patterns = [
-                "This playbook only supports Red Hat Enterprise Linux",
-                "ansible_distribution_major_version",
-                "OS version mismatch",
-                "distribution version",
-                "Only supported on"
-            ]
-            
-            if any(pattern in output for pattern in os_version_patterns):
-                print("⚠️  OS version mismatch detected")
-                print("   The playbook is valid but targets a different OS version than the test host")
-                print("   This is expected when KCS article specifies a different OS version")
-                print("   ✅ Treating as successful generation - playbook syntax and logic are correct")
-                return True, "OS version mismatch - playbook valid for different OS version"
-            
-            # For verification playbooks, even non-zero exit codes might be acceptable
-            # if the playbook completed and generated a report
-            if "PLAY RECAP" in output and ("COMPLIANT" in output or "Compliance" in output):
-                print("⚠️  Playbook exited with non-zero code but completed verification")
-                print("   This is acceptable for compliance check playbooks")
-                print("   ✅ Treating as successful - compliance report was generated")
-                return True, "Compliance verification completed with findings"
-            
-            # If we get here, it's a non-zero exit code and not a known acceptable case
-            # Return the filtered output as error message
-            filtered_output = filter_verbose_task_output(output)
-            return False, f"Playbook execution failed with return code {result.returncode}\n\nFiltered output:\n{filtered_output}"
+            # Hold a slot on every host
+            result = yield Holding("host", Steps(run_timed_navigator_steps(cmd, filename, target_hosts, 'test', events_path,
+                                                                         EARLY_ABORT_PATTERNS)), hosts=target_hosts)
+        
+        return split_host_results(result, target_hosts, mode_desc)
             
-    except subprocess.TimeoutExpired:
-        error_msg = "Playbook execution timed out after 120 seconds"
+    except RunCancelled as e:
+        print(f"⏹️  Test run on {', '.join(target_hosts)} cancelled")
+        return {host: (False, str(e)) for host in target_hosts}
+    except subprocess.TimeoutExpired as e:
+        error_msg = f"Playbook execution timed out after {e.timeout} seconds"
         print(f"❌ {error_msg}")
-        return False, error_msg
+        return {host: (False, error_msg) for host in target_hosts}
     except FileNotFoundError as e:
-        error_msg = f"ansible-navigator command not found: {e}\n"
-        error_msg += f"   Tried to execute: {ansible_nav}\n"
-        error_msg += f"   Python executable: {sys.executable}\n"
-        error_msg += f"   PATH: {os.environ.get('PATH', 'Not set')}"
+        error_msg = _navigator_not_found_message(e, ansible_nav)
         print(f"❌ {error_msg}")
-        return False, error_msg
+        return {host: (False, error_msg) for host in target_hosts}
     except Exception as e:
         error_msg = f"Error during playbook testing: {str(e)}"
         print(f"❌ {error_msg}")
-        return False, error_msg
+        return {host: (False, error_msg) for host in target_hosts}
 
 
-def verify_status_alignment(test_output: str, analysis_message: str) -> tuple[bool, str]:
+def test_playbook_on_hosts(filename: str, target_hosts: list, check_mode: bool = False, verbose: str = "v", skip_debug: bool = False) -> dict:
+    """Test the playbook on several servers in one run (see test_playbook_on_hosts_steps())."""
+    return run_steps(test_playbook_on_hosts_steps(filename, target_hosts, check_mode, verbose, skip_debug))
+
+
+async def atest_playbook_on_hosts(filename: str, target_hosts: list, check_mode: bool = False, verbose: str = "v", skip_debug: bool = False) -> dict:
+    """Async variant of test_playbook_on_hosts()."""
+    return await arun_steps(test_playbook_on_hosts_steps(filename, target_hosts, check_mode, verbose, skip_debug))
+
+
+def verify_status_alignment(test_output: str, analysis_message: str, report: ComplianceReport = None) -> tuple[bool, str]:
     """
     Verify that playbook statuses (PASS/FAIL/NA/UNKNOWN) align with AI analysis (COMPLIANT/NON-COMPLIANT/UNKNOWN/NA).
     
@@ -1682,6 +3072,7 @@ def verify_status_alignment(test_output: str, analysis_message: str) -> tuple[bo
     Args:
         test_output: Playbook execution output containing statuses
         analysis_message: AI analysis message containing compliance statuses
+        report: The run's parsed compliance report (parsed from test_output when not given)
         
     Returns:
         tuple: (is_aligned, alignment_message)
@@ -1690,31 +3081,17 @@ def verify_status_alignment(test_output: str, analysis_message: str) -> tuple[bo
     """
     import re
     
-    # Extract requirement statuses from playbook output
-    playbook_statuses = {}
-    overall_playbook_status = None
-    overall_req_num = None  # Track which requirement number is the OVERALL requirement
-    
-    # Pattern to match "REQUIREMENT N - ..." followed by "Status: PASS/FAIL/NA"
-    # Also check if it's the OVERALL requirement
-    req_pattern = r'REQUIREMENT\s+(\d+)\s*-\s*([^:]*):\s*.*?Status:\s*(PASS|FAIL|NA|UNKNOWN)'
-    for match in re.finditer(req_pattern, test_output, re.DOTALL | re.IGNORECASE):
-        req_num = int(match.group(1))
-        req_title = match.group(2).strip().upper()
-        status = match.group(3).upper()
-        
-        # Check if this is the OVERALL requirement (skip in individual comparison)
-        if "OVERALL" in req_title:
-            overall_req_num = req_num
-            # Still store it but we'll skip it in individual requirement comparison
-        else:
-            playbook_statuses[req_num] = status
+    if report is None:
+        report = parse_run_report(test_output)
     
-    # Extract overall status from playbook output (from OVERALL COMPLIANCE section)
-    overall_pattern = r'OVERALL\s+COMPLIANCE:.*?Result:\s*(PASS|FAIL|NA|UNKNOWN)'
-    overall_match = re.search(overall_pattern, test_output, re.DOTALL | re.IGNORECASE)
-    if overall_match:
-        overall_playbook_status = overall_match.group(1).upper()
+    # Requirement statuses from the playbook's compliance report
+    # (the OVERALL requirement is skipped in the individual comparison)
+    playbook_statuses = report.requirement_statuses()
+    overall_requirement = report.overall_requirement()
+    overall_req_num = overall_requirement.index if overall_requirement else None
+    
+    # Overall status from the OVERALL COMPLIANCE section
+    overall_playbook_status = report.overall_status if report.overall_status in VALID_STATUSES else None
     
     # Extract compliance statuses from AI analysis
     ai_statuses = {}
@@ -1960,12 +3337,13 @@ def extract_playbook_issues_from_analysis(analysis_message: str) -> tuple[bool,
     return False, ""
 
 
-def check_status_values_evaluated(test_output: str) -> tuple[bool, str]:
+def check_status_values_evaluated(test_output: str, report: ComplianceReport = None) -> tuple[bool, str]:
     """
     Check if status values in the compliance report are evaluated (PASS/FAIL/NA) or contain Jinja2 expressions.
     
     Args:
         test_output: Playbook execution output
+        report: The run's parsed compliance report (parsed from test_output when not given)
         
     Returns:
         tuple: (is_valid, error_message)
@@ -1973,62 +3351,12 @@ def check_status_values_evaluated(test_output: str) -> tuple[bool, str]:
         - error_message: Description of issues found if invalid
     """
     import re
-    import json
-    
-    # First, try to extract the compliance report from Ansible JSON output
-    # The report is typically in the "msg" field of the "Generate compliance report" task
-    compliance_report_text = ""
     
-    # Try to extract from JSON structure (Ansible output format)
-    try:
-        # Look for the "Generate compliance report" task output
-        # Pattern: "msg": [ "line1", "line2", ... ]
-        msg_pattern = r'"msg":\s*\[(.*?)\]'
-        msg_matches = re.findall(msg_pattern, test_output, re.DOTALL)
-        
-        for msg_match in msg_matches:
-            # Try to parse as JSON array
-            try:
-                msg_array = json.loads('[' + msg_match + ']')
-                # Join all strings in the array
-                msg_text = '\n'.join(str(item) for item in msg_array)
-                if 'COMPLIANCE REPORT' in msg_text:
-                    compliance_report_text = msg_text
-                    break
-            except (json.JSONDecodeError, ValueError):
-                # If JSON parsing fails, try to extract strings manually
-                # Pattern: "string content"
-                string_pattern = r'"([^"]*)"'
-                strings = re.findall(string_pattern, msg_match)
-                msg_text = '\n'.join(strings)
-                if 'COMPLIANCE REPORT' in msg_text:
-                    compliance_report_text = msg_text
-                    break
-    except Exception:
-        pass
-    
-    # If we couldn't extract from JSON, use the original method
-    if not compliance_report_text:
-        lines = test_output.split('\n')
-        in_compliance_report = False
-        report_lines = []
-        
-        for i, line in enumerate(lines):
-            # Detect start of compliance report
-            if 'COMPLIANCE REPORT' in line or ('COMPLIANCE' in line and 'REPORT' in line):
-                in_compliance_report = True
-                report_lines.append(line)
-                continue
-            
-            # Detect end of compliance report
-            if in_compliance_report:
-                if 'PLAY RECAP' in line or ('TASK [' in line and i > 0 and len(report_lines) > 10):
-                    break
-                report_lines.append(line)
-        
-        compliance_report_text = '\n'.join(report_lines)
+    # The compliance report (the "msg" list of the "Generate compliance report" task)
+    if report is None:
+        report = parse_run_report(test_output)
     
-    if not compliance_report_text:
+    if not report.found:
         # If we can't find the compliance report, assume it's OK (might be in a different format)
         return True, "Compliance report not found in expected format, skipping status validation"
     
@@ -2045,14 +3373,8 @@ def check_status_values_evaluated(test_output: str) -> tuple[bool, str]:
         r'Status:\s*trim\s*\}\}\}\}',  # Status: ... trim }}}}
     ]
     
-    # Extract all status lines from the compliance report
-    status_lines = []
-    lines = compliance_report_text.split('\n')
-    
-    for i, line in enumerate(lines):
-        # Check for status lines (but not "OVERALL COMPLIANCE" section)
-        if 'Status:' in line and 'OVERALL' not in line.upper():
-            status_lines.append((i+1, line))
+    # Status lines of the compliance report (but not the "OVERALL COMPLIANCE" section)
+    status_lines = report.status_lines
     
     # Check each status line for Jinja2 expressions
     issues = []
@@ -2146,34 +3468,13 @@ def check_status_values_evaluated(test_output: str) -> tuple[bool, str]:
     return True, "All status values are correctly evaluated"
 
 
-def analyze_playbook(
+def build_playbook_analysis_prompt(
     requirements: list[str],
     playbook_objective: str,
     playbook_content: str,
     audit_procedure: str = None
-) -> tuple[bool, str]:
-    """
-    Analyze if the playbook structure and content correctly implements all requirements (STAGE 0: PLAYBOOK STRUCTURE CHECK).
-    
-    This function checks if the playbook content has tasks implementing all requirements BEFORE execution.
-    It verifies the playbook structure matches the requirements and CIS audit procedure.
-    
-    Args:
-        requirements: List of requirements
-        playbook_objective: The objective of the playbook
-        playbook_content: The actual playbook YAML content
-        audit_procedure: CIS Benchmark audit procedure (optional)
-        
-    Returns:
-        tuple: (is_valid, playbook_analysis_message)
-        - is_valid: True if playbook structure correctly implements all requirements
-        - playbook_analysis_message: AI's analysis of playbook structure
-    """
-    print("\n" + "=" * 80)
-    print("🔍 STAGE 0: PLAYBOOK STRUCTURE ANALYSIS")
-    print("=" * 80)
-    print("Checking if playbook structure correctly implements all requirements...")
-    
+) -> str:
+    """Build the STAGE 0 playbook structure analysis prompt (see analyze_playbook())."""
     # Format requirements for analysis
     requirements_text = "\n".join([f"{i+1}. {req}" for i, req in enumerate(requirements)])
     
@@ -2208,6 +3509,7 @@ The playbook MUST implement this audit procedure correctly:
     # Note: We need to escape % characters for .format() - % becomes %%
     # Also need to escape { and } for .format() - { becomes {{ and } becomes }}
     # For Jinja2 template syntax like {% set %}, we use {{%% set %%}} which becomes {% set %} after format
+    # Per-checkpoint input is placed after the static instructions (prefix-cache friendly)
     playbook_analysis_prompt = """You are an expert Ansible auditor. Analyze if a playbook STRUCTURE correctly implements all requirements.
 
 **SCOPE:**
@@ -2220,16 +3522,7 @@ The playbook MUST implement this audit procedure correctly:
 - **NA**: Skip related task or Did not execute the related task
 - **UNKNOWN**: Cannot determine from data (error collecting, ambiguous requirement)
 
-**INPUT:**
-**Playbook Objective:** {objective}
-{audit_procedure_section}
-**Requirements to implement:**
-{requirements}
-
-**Actual Playbook Content (YAML):**
-```yaml
-{playbook_content}
-```
+**INPUT:** The playbook objective, requirements and playbook content are given at the end of this prompt, after the instructions.
 
 **VERIFICATION TASKS:**
 
@@ -2582,6 +3875,18 @@ ADVICE TO UPDATE PLAYBOOK:
 7. **CRITICAL**: Do NOT provide advice about "Generate compliance report" task output format - only verify task exists
 ```
 
+---
+**INPUT:**
+**Playbook Objective:** {objective}
+{audit_procedure_section}
+**Requirements to implement:**
+{requirements}
+
+**Actual Playbook Content (YAML):**
+```yaml
+{playbook_content}
+```
+
 **Your Response:**"""
     
     # Use .replace() instead of .format() to avoid issues with % characters
@@ -2591,102 +3896,128 @@ ADVICE TO UPDATE PLAYBOOK:
     playbook_analysis_prompt = playbook_analysis_prompt.replace('{requirements}', requirements_text)
     playbook_analysis_prompt = playbook_analysis_prompt.replace('{playbook_content}', playbook_content)
     
-    try:
-        print("Analyzing playbook structure (this may take a minute)...")
-        
-        # Use the LLM directly
-        max_attempts = 3
-        for attempt in range(1, max_attempts + 1):
-            try:
-                print(f"Playbook structure analysis attempt {attempt}/{max_attempts}...")
-                response = model.invoke(playbook_analysis_prompt)
-                result = response.content.strip()
-                break
-            except Exception as e:
-                error_msg = str(e)
-                if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                    print(f"⚠️  Analysis timed out on attempt {attempt}, retrying...")
-                    if attempt < max_attempts:
-                        continue
-                    else:
-                        print("⚠️  Analysis timed out, assuming playbook structure is valid...")
-                        return True, "PLAYBOOK_STRUCTURE: PASS (Analysis timed out - assuming valid)"
-                else:
-                    raise
-        
-        print("\n📊 Playbook Structure Analysis Result:")
-        print("-" * 80)
-        # Show full result, not truncated
+    return playbook_analysis_prompt
+
+
+def interpret_playbook_analysis(result: str) -> tuple[bool, str]:
+    """
+    Interpret the LLM's playbook structure analysis.
+    
+    Returns:
+        tuple: (is_valid, playbook_analysis_message)
+    """
+    print("\n📊 Playbook Structure Analysis Result:")
+    print("-" * 80)
+    # Show full result, not truncated
+    print(result)
+    print("-" * 80)
+
+    # Check result - IMPORTANT: Check for FAIL first because "FAIL" might contain "PASS"
+    result_upper = result.upper()
+
+    if "PLAYBOOK_STRUCTURE: FAIL" in result_upper or "REQUIREMENT_MAPPING_ERROR" in result_upper:
+        print("\n❌ PLAYBOOK STRUCTURE: FAIL - Requirements not properly implemented")
+        print("\n📋 Full Analysis Details:")
+        print("=" * 80)
         print(result)
-        print("-" * 80)
-        
-        # Check result - IMPORTANT: Check for FAIL first because "FAIL" might contain "PASS"
-        result_upper = result.upper()
-        
-        if "PLAYBOOK_STRUCTURE: FAIL" in result_upper or "REQUIREMENT_MAPPING_ERROR" in result_upper:
-            print("\n❌ PLAYBOOK STRUCTURE: FAIL - Requirements not properly implemented")
-            print("\n📋 Full Analysis Details:")
-            print("=" * 80)
-            print(result)
-            print("=" * 80)
+        print("=" * 80)
+        return False, result
+    elif "PLAYBOOK_STRUCTURE: PASS" in result_upper:
+        print("\n✅ PLAYBOOK STRUCTURE: PASS - All requirements properly implemented")
+        return True, result
+    else:
+        # Ambiguous result - check for positive/negative indicators
+        if any(word in result.lower() for word in ["missing", "not implemented", "not found", "incorrect", "wrong", "error"]):
+            print("\n❌ PLAYBOOK STRUCTURE: FAIL - Issues found (negative indicators detected)")
             return False, result
-        elif "PLAYBOOK_STRUCTURE: PASS" in result_upper:
-            print("\n✅ PLAYBOOK STRUCTURE: PASS - All requirements properly implemented")
+        elif any(word in result.lower() for word in ["all requirements", "properly implemented", "correctly", "verified"]):
+            print("\n✅ PLAYBOOK STRUCTURE: PASS - Structure appears correct")
             return True, result
         else:
-            # Ambiguous result - check for positive/negative indicators
-            if any(word in result.lower() for word in ["missing", "not implemented", "not found", "incorrect", "wrong", "error"]):
-                print("\n❌ PLAYBOOK STRUCTURE: FAIL - Issues found (negative indicators detected)")
-                return False, result
-            elif any(word in result.lower() for word in ["all requirements", "properly implemented", "correctly", "verified"]):
-                print("\n✅ PLAYBOOK STRUCTURE: PASS - Structure appears correct")
-                return True, result
-            else:
-                print("\n⚠️  PLAYBOOK STRUCTURE: UNCLEAR - Assuming valid")
-                return True, result
-                
-    except Exception as e:
-        error_msg = f"Error during playbook structure analysis: {str(e)}"
-        print(f"❌ {error_msg}")
-        # On error, assume valid to not block
-        return True, f"PLAYBOOK_STRUCTURE: PASS (Check failed but proceeding: {error_msg})"
+            print("\n⚠️  PLAYBOOK STRUCTURE: UNCLEAR - Assuming valid")
+            return True, result
+
 
+def _playbook_analysis_error(error: Exception) -> tuple[bool, str]:
+    """Result used when the structure analysis itself fails (assume valid to not block)."""
+    error_msg = f"Error during playbook structure analysis: {str(error)}"
+    print(f"❌ {error_msg}")
+    return True, f"PLAYBOOK_STRUCTURE: PASS (Check failed but proceeding: {error_msg})"
 
-def analyze_data_collection(
+
+def analyze_playbook_steps(
     requirements: list[str],
     playbook_objective: str,
-    test_output: str,
-    playbook_content: str = None,
+    playbook_content: str,
     audit_procedure: str = None,
-    suppress_header: bool = False
-) -> tuple[bool, str]:
+    use_cache: bool = True
+):
     """
-    Analyze if the playbook collected sufficient data (STAGE 1: DATA SUFFICIENCY CHECK).
+    Steps that analyze if the playbook structure and content correctly implements all requirements
+    (STAGE 0: PLAYBOOK STRUCTURE CHECK; see run_steps()).
     
-    This function ONLY checks if data was collected properly.
-    It also validates that status values are correctly evaluated (PASS/FAIL/NA/UNKNOWN).
+    This function checks if the playbook content has tasks implementing all requirements BEFORE execution.
+    It verifies the playbook structure matches the requirements and CIS audit procedure.
     
     Args:
         requirements: List of requirements
         playbook_objective: The objective of the playbook
-        test_output: Output from data collection playbook
-        playbook_content: The actual playbook YAML content (optional, used to analyze status evaluation issues)
+        playbook_content: The actual playbook YAML content
         audit_procedure: CIS Benchmark audit procedure (optional)
-        suppress_header: If True, suppress the header output (used when called from analyze_playbook_output)
+        use_cache: If False, bypass the on-disk LLM response cache
         
     Returns:
-        tuple: (is_sufficient, data_collection_analysis_message)
-        - is_sufficient: True if data was collected properly and status values are correct
-        - data_collection_analysis_message: AI's analysis of data collection sufficiency
+        tuple: (is_valid, playbook_analysis_message)
+        - is_valid: True if playbook structure correctly implements all requirements
+        - playbook_analysis_message: AI's analysis of playbook structure
     """
-    if not suppress_header:
-        print("\n" + "=" * 80)
-        print("🔍 STAGE 1: DATA COLLECTION ANALYSIS")
-        print("=" * 80)
-        print("Checking if playbook collected sufficient data...")
+    print("\n" + "=" * 80)
+    print("🔍 STAGE 0: PLAYBOOK STRUCTURE ANALYSIS")
+    print("=" * 80)
+    print("Checking if playbook structure correctly implements all requirements...")
     
+    playbook_analysis_prompt = build_playbook_analysis_prompt(
+        requirements, playbook_objective, playbook_content, audit_procedure
+    )
+    
+    try:
+        print("Analyzing playbook structure (this may take a minute)...")
+        
+        try:
+            result = (yield from invoke_llm_steps(playbook_analysis_prompt, label="Playbook structure analysis", cache_site="playbook_analysis", use_cache=use_cache)).strip()
+        except LLMTimeoutError:
+            print("⚠️  Analysis timed out, assuming playbook structure is valid...")
+            return True, "PLAYBOOK_STRUCTURE: PASS (Analysis timed out - assuming valid)"
+        
+        return interpret_playbook_analysis(result)
+                
+    except Exception as e:
+        # On error, assume valid to not block
+        return _playbook_analysis_error(e)
+
+
+def analyze_playbook(*args, **kwargs) -> tuple[bool, str]:
+    """Analyze the playbook structure against the requirements (arguments: see analyze_playbook_steps())."""
+    return run_steps(analyze_playbook_steps(*args, **kwargs))
+
+
+async def aanalyze_playbook(*args, **kwargs) -> tuple[bool, str]:
+    """Async variant of analyze_playbook()."""
+    return await arun_steps(analyze_playbook_steps(*args, **kwargs))
+
+
+def build_data_collection_prompt(
+    requirements: list[str],
+    playbook_objective: str,
+    test_output: str,
+    playbook_content: str = None,
+    audit_procedure: str = None,
+    suppress_header: bool = False,
+    report: ComplianceReport = None
+) -> str:
+    """Build the STAGE 1 data collection analysis prompt (see analyze_data_collection())."""
     # First, check if status values are correctly evaluated
-    status_values_valid, status_validation_error = check_status_values_evaluated(test_output)
+    status_values_valid, status_validation_error = check_status_values_evaluated(test_output, report)
     status_evaluation_issue = None
     if not status_values_valid:
         if not suppress_header:
@@ -2765,21 +4096,12 @@ The following is the actual playbook YAML. Use this to identify why status value
 
 """
     
-    # Build data collection analysis prompt
+    # Build data collection analysis prompt (per-checkpoint input after the static instructions)
     data_collection_prompt = """You are an expert Ansible auditor. Your task is to check if a playbook COLLECTED SUFFICIENT DATA.
 
 **DO NOT perform compliance analysis. ONLY check if data was collected.**
 
-**Playbook Objective:**
-{objective}
-{audit_procedure_section}
-**Requirements to collect data for:**
-{requirements}
-{playbook_content_section}
-**Playbook Execution Output:**
-```
-{output}
-```
+The playbook objective, requirements and execution output are given at the end of this prompt, after the instructions.
 
 **YOUR TASK - DATA SUFFICIENCY CHECK:**
 
@@ -2910,6 +4232,18 @@ Example: `journalctl | grep 'Connection timed out'` returns exit code 1 with emp
 
 DO NOT analyze compliance - just verify data collection ran and reported results, and that status values are correctly evaluated.
 
+---
+**Playbook Objective:**
+{objective}
+{audit_procedure_section}
+**Requirements to collect data for:**
+{requirements}
+{playbook_content_section}
+**Playbook Execution Output:**
+```
+{output}
+```
+
 **Your Response:**""".format(
         objective=playbook_objective,
         audit_procedure_section=audit_procedure_section,
@@ -2918,139 +4252,146 @@ DO NOT analyze compliance - just verify data collection ran and reported results
         output=test_output[-8000:]  # Limit output size to avoid token issues
     )
     
-    try:
+    return data_collection_prompt
+
+
+def interpret_data_collection_analysis(result: str, suppress_header: bool = False) -> tuple[bool, str]:
+    """
+    Interpret the LLM's data collection analysis.
+    
+    Returns:
+        tuple: (is_sufficient, data_collection_analysis_message)
+    """
+    if not suppress_header:
+        print("\n📊 Data Collection Analysis Result:")
+        print("-" * 40)
+        print(result)
+        #print(result[:1000] + ("..." if len(result) > 1000 else ""))
+        print("-" * 40)
+
+    # Check result - IMPORTANT: Check for FAIL first because "FAIL" might contain "PASS"
+    result_upper = result.upper()
+
+    # Check for status evaluation errors first (most critical)
+    if "STATUS_EVALUATION_ERROR" in result_upper or ("STATUS_EVALUATION" in result_upper and "ERROR" in result_upper):
         if not suppress_header:
-            print("Analyzing data collection (this may take a minute)...")
-        
-        # Use the LLM directly
-        max_attempts = 3
-        for attempt in range(1, max_attempts + 1):
-            try:
-                if not suppress_header:
-                    print(f"Data collection analysis attempt {attempt}/{max_attempts}...")
-                response = model.invoke(data_collection_prompt)
-                result = response.content.strip()
-                break
-            except Exception as e:
-                error_msg = str(e)
-                if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                    if not suppress_header:
-                        print(f"⚠️  Analysis timed out on attempt {attempt}, retrying...")
-                    if attempt < max_attempts:
-                        continue
-                    else:
-                        if not suppress_header:
-                            print("⚠️  Analysis timed out, assuming data is sufficient...")
-                        return True, "DATA_COLLECTION: PASS (Analysis timed out - assuming sufficient)"
-                else:
-                    raise
-        
+            print("\n❌ DATA COLLECTION: FAIL - Status values not evaluated correctly")
+        return False, result
+
+    if "DATA_COLLECTION: FAIL" in result_upper or "INSUFFICIENT_DATA" in result or "INSUFFICIENT" in result_upper[:200]:
         if not suppress_header:
-            print("\n📊 Data Collection Analysis Result:")
-            print("-" * 40)
-            print(result)
-            #print(result[:1000] + ("..." if len(result) > 1000 else ""))
-            print("-" * 40)
-        
-        # Check result - IMPORTANT: Check for FAIL first because "FAIL" might contain "PASS"
-        result_upper = result.upper()
-        
-        # Check for status evaluation errors first (most critical)
-        if "STATUS_EVALUATION_ERROR" in result_upper or ("STATUS_EVALUATION" in result_upper and "ERROR" in result_upper):
-            if not suppress_header:
-                print("\n❌ DATA COLLECTION: FAIL - Status values not evaluated correctly")
-            return False, result
-        
-        if "DATA_COLLECTION: FAIL" in result_upper or "INSUFFICIENT_DATA" in result or "INSUFFICIENT" in result_upper[:200]:
+            print("\n❌ DATA COLLECTION: FAIL - Data collection insufficient")
+        return False, result
+    elif "DATA_COLLECTION: PASS" in result_upper or ("SUFFICIENT" in result_upper[:200] and "INSUFFICIENT" not in result_upper[:200] and "STATUS_EVALUATION" not in result_upper):
+        if not suppress_header:
+            print("\n✅ DATA COLLECTION: PASS - Data collection sufficient")
+        return True, result
+    else:
+        # Ambiguous result - check for positive/negative indicators
+        if any(word in result.lower() for word in ["missing", "incomplete", "not collected", "failed to collect", "advice to update", "status_evaluation"]):
             if not suppress_header:
-                print("\n❌ DATA COLLECTION: FAIL - Data collection insufficient")
+                print("\n❌ DATA COLLECTION: FAIL - Data appears insufficient or status evaluation issue (found negative indicators)")
             return False, result
-        elif "DATA_COLLECTION: PASS" in result_upper or ("SUFFICIENT" in result_upper[:200] and "INSUFFICIENT" not in result_upper[:200] and "STATUS_EVALUATION" not in result_upper):
+        elif any(word in result.lower() for word in ["all requirements have", "data values collected", "sufficient"]) and "status_evaluation" not in result.lower():
             if not suppress_header:
-                print("\n✅ DATA COLLECTION: PASS - Data collection sufficient")
+                print("\n✅ DATA COLLECTION: PASS - Data appears sufficient")
             return True, result
         else:
-            # Ambiguous result - check for positive/negative indicators
-            if any(word in result.lower() for word in ["missing", "incomplete", "not collected", "failed to collect", "advice to update", "status_evaluation"]):
-                if not suppress_header:
-                    print("\n❌ DATA COLLECTION: FAIL - Data appears insufficient or status evaluation issue (found negative indicators)")
-                return False, result
-            elif any(word in result.lower() for word in ["all requirements have", "data values collected", "sufficient"]) and "status_evaluation" not in result.lower():
-                if not suppress_header:
-                    print("\n✅ DATA COLLECTION: PASS - Data appears sufficient")
-                return True, result
-            else:
-                if not suppress_header:
-                    print("\n⚠️  DATA COLLECTION: UNCLEAR - Assuming sufficient")
-                return True, result
-                
-    except Exception as e:
-        error_msg = f"Error during data collection analysis: {str(e)}"
-        print(f"❌ {error_msg}")
-        # On error, assume sufficient to not block
-        return True, f"DATA_COLLECTION: PASS (Check failed but proceeding: {error_msg})"
+            if not suppress_header:
+                print("\n⚠️  DATA COLLECTION: UNCLEAR - Assuming sufficient")
+            return True, result
+
 
+def _data_collection_error(error: Exception) -> tuple[bool, str]:
+    """Result used when the data collection analysis itself fails (assume sufficient to not block)."""
+    error_msg = f"Error during data collection analysis: {str(error)}"
+    print(f"❌ {error_msg}")
+    return True, f"DATA_COLLECTION: PASS (Check failed but proceeding: {error_msg})"
 
-def analyze_playbook_output(
+
+def _data_collection_timeout(suppress_header: bool) -> tuple[bool, str]:
+    """Result used when every data collection analysis attempt timed out."""
+    if not suppress_header:
+        print("⚠️  Analysis timed out, assuming data is sufficient...")
+    return True, "DATA_COLLECTION: PASS (Analysis timed out - assuming sufficient)"
+
+
+def analyze_data_collection_steps(
     requirements: list[str],
     playbook_objective: str,
     test_output: str,
-    audit_procedure: str = None,
     playbook_content: str = None,
-    suppress_header: bool = False
-) -> tuple[bool, str]:
+    audit_procedure: str = None,
+    suppress_header: bool = False,
+    use_cache: bool = True,
+    report: ComplianceReport = None
+):
     """
-    Analyze the playbook data collection output and determine compliance for each requirement.
-    
-    NEW APPROACH: Playbooks only collect data, AI determines compliance.
+    Steps that analyze if the playbook collected sufficient data (STAGE 1: DATA SUFFICIENCY CHECK;
+    see run_steps()).
     
-    This function:
-    1. First calls analyze_data_collection() to check if data was collected properly
-    2. If data collection passes, performs full compliance analysis
+    This function ONLY checks if data was collected properly.
+    It also validates that status values are correctly evaluated (PASS/FAIL/NA/UNKNOWN).
     
     Args:
-        requirements: Original list of requirements
+        requirements: List of requirements
         playbook_objective: The objective of the playbook
         test_output: Output from data collection playbook
-        audit_procedure: CIS Benchmark audit procedure with expected outputs (optional)
-        playbook_content: The actual playbook YAML content (optional, used to verify conditional execution)
-        suppress_header: If True, suppress the "AI COMPLIANCE ANALYSIS" header (default: False)
+        playbook_content: The actual playbook YAML content (optional, used to analyze status evaluation issues)
+        audit_procedure: CIS Benchmark audit procedure (optional)
+        suppress_header: If True, suppress the header output (used when called from analyze_playbook_output)
+        use_cache: If False, bypass the on-disk LLM response cache
+        report: The run's parsed compliance report (parsed from test_output when not given)
         
     Returns:
-        tuple: (is_verified, compliance_analysis_message)
-        - is_verified: True if playbook collected data properly and analysis completed
-        - compliance_analysis_message: AI's compliance determination for each requirement
+        tuple: (is_sufficient, data_collection_analysis_message)
+        - is_sufficient: True if data was collected properly and status values are correct
+        - data_collection_analysis_message: AI's analysis of data collection sufficiency
     """
     if not suppress_header:
         print("\n" + "=" * 80)
-        print("🔍 AI COMPLIANCE ANALYSIS (Analyzing Collected Data)")
+        print("🔍 STAGE 1: DATA COLLECTION ANALYSIS")
         print("=" * 80)
+        print("Checking if playbook collected sufficient data...")
     
-    # NOTE: STAGE 0 (Playbook Structure Analysis) is now handled by LangGraph workflow
-    # in langgraph_deepseek_generate_playbook.py before test execution.
-    # This function only handles STAGE 1 (Data Collection) and STAGE 2 (Compliance Analysis).
-    
-    # STAGE 1: Check data collection
-    # Suppress header since it will be included in the final analysis result
-    data_collection_passed, data_collection_analysis = analyze_data_collection(
-        requirements=requirements,
-        playbook_objective=playbook_objective,
-        test_output=test_output,
-        playbook_content=playbook_content,
-        audit_procedure=audit_procedure,
-        suppress_header=True
+    data_collection_prompt = build_data_collection_prompt(
+        requirements, playbook_objective, test_output, playbook_content, audit_procedure, suppress_header, report
     )
     
-    # If data collection failed, return early with the data collection analysis
-    if not data_collection_passed:
-        print("\n⚠️  Insufficient Data Collected")
-        print("   The playbook's compliance report is missing actual data.")
-        print("   AI provided specific advice to improve data collection.")
-        return False, data_collection_analysis
-    
-    # STAGE 2: Data collection passed, proceed with full compliance analysis
-    print("Playbook collected data. AI now determining compliance...")
-    
+    try:
+        if not suppress_header:
+            print("Analyzing data collection (this may take a minute)...")
+        
+        try:
+            result = (yield from invoke_llm_steps(data_collection_prompt, label="Data collection analysis", quiet=suppress_header, cache_site="data_collection", use_cache=use_cache)).strip()
+        except LLMTimeoutError:
+            return _data_collection_timeout(suppress_header)
+        
+        return interpret_data_collection_analysis(result, suppress_header)
+                
+    except Exception as e:
+        # On error, assume sufficient to not block
+        return _data_collection_error(e)
+
+
+def analyze_data_collection(*args, **kwargs) -> tuple[bool, str]:
+    """Analyze if the playbook collected sufficient data (arguments: see analyze_data_collection_steps())."""
+    return run_steps(analyze_data_collection_steps(*args, **kwargs))
+
+
+async def aanalyze_data_collection(*args, **kwargs) -> tuple[bool, str]:
+    """Async variant of analyze_data_collection()."""
+    return await arun_steps(analyze_data_collection_steps(*args, **kwargs))
+
+
+def build_compliance_analysis_prompt(
+    requirements: list[str],
+    playbook_objective: str,
+    test_output: str,
+    audit_procedure: str = None,
+    playbook_content: str = None
+) -> str:
+    """Build the STAGE 2 compliance analysis prompt (see analyze_playbook_output())."""
     # Format requirements for analysis
     requirements_text = "\n".join([f"{i+1}. {req}" for i, req in enumerate(requirements)])
     
@@ -3129,21 +4470,11 @@ The following is the actual playbook YAML that was executed:
 
 """
     
-    # Build analysis prompt without f-string to avoid issues with curly braces in test_output
+    # Build analysis prompt without f-string to avoid issues with curly braces in test_output.
+    # Per-checkpoint input is placed after the static instructions (prefix-cache friendly).
     analysis_prompt = """You are an expert Ansible compliance auditor. Your task is to analyze whether a playbook CORRECTLY REPORTS compliance status based on what it found.
 
-**Original Objective:**
-{objective}
-
-**Original Requirements:**
-{requirements}
-{audit_context}
-**Actual Playbook Content (for reference):**
-{playbook_content_section}
-**Actual Playbook Execution Output:**
-```
-{output}
-```
+The original objective, requirements, audit procedure, playbook content and execution output are given at the end of this prompt, after the instructions.
 
 **CRITICAL TASK:** Analyze the COMPLIANCE REPORT and verify the status/rationale for each requirement.
 
@@ -3151,7 +4482,7 @@ The following is the actual playbook YAML that was executed:
 - Playbooks now ONLY collect data (no compliance determination)
 - YOU (AI) will analyze the collected data and determine compliance
 - This approach is MORE INTELLIGENT and works across various servers
-- **USE THE AUDIT PROCEDURE** (if provided above) to understand expected outputs and pass/fail criteria
+- **USE THE AUDIT PROCEDURE** (if provided at the end) to understand expected outputs and pass/fail criteria
 
 **YOUR TASK - COMPLIANCE ANALYSIS:**
 
@@ -3186,7 +4517,7 @@ If the report contains real data for all requirements, then determine compliance
 - Do NOT treat empty output as "insufficient data" - it is sufficient data meaning "not found"
 
 **Verification Checklist:**
-1. Does the playbook collect data for EVERY requirement listed above?
+1. Does the playbook collect data for EVERY requirement listed at the end?
 2. **Is the playbook ONLY collecting data (not determining compliance)?** ✅ This is correct!
 3. For each requirement, is relevant data collected OR error message provided?
 4. Based on the collected data, can you determine compliance?
@@ -3578,6 +4909,20 @@ Based on the collected data, here is the compliance analysis for each requiremen
     2) The playbook correctly did not execute Requirements 2 and 3, following CIS procedure.
 ```
 
+---
+**Original Objective:**
+{objective}
+
+**Original Requirements:**
+{requirements}
+{audit_context}
+**Actual Playbook Content (for reference):**
+{playbook_content_section}
+**Actual Playbook Execution Output:**
+```
+{output}
+```
+
 **Your Analysis:**"""
     
     # Format the prompt with actual values
@@ -3588,153 +4933,285 @@ Based on the collected data, here is the compliance analysis for each requiremen
         playbook_content_section=playbook_content_section,
         output=test_output
     )
+    
+    return analysis_prompt
 
-    try:
-        # Use the LLM directly without ChatPromptTemplate to avoid issues with curly braces
-        print("Analyzing playbook output (this may take a few minutes)...")
-        
-        # Add retry logic for timeout handling
-        max_analysis_attempts = 3
-        for attempt in range(1, max_analysis_attempts + 1):
-            try:
-                print(f"Analysis attempt {attempt}/{max_analysis_attempts}...")
-                response = model.invoke(analysis_prompt)
-                analysis_result = response.content.strip()
-                
-                # Prepend DATA COLLECTION analysis to the full compliance analysis
-                # This ensures the final message includes both stages
-                if data_collection_analysis and "DATA_COLLECTION: PASS" in data_collection_analysis.upper():
-                    # Insert DATA COLLECTION section at the beginning of the analysis
-                    if "## STAGE 2: COMPLIANCE ANALYSIS" in analysis_result:
-                        # Insert before STAGE 2
-                        analysis_result = analysis_result.replace(
-                            "## STAGE 2: COMPLIANCE ANALYSIS",
-                            f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n## STAGE 2: COMPLIANCE ANALYSIS"
-                        )
-                    elif "## OVERALL ASSESSMENT" in analysis_result:
-                        # Insert before OVERALL ASSESSMENT
-                        analysis_result = analysis_result.replace(
-                            "## OVERALL ASSESSMENT",
-                            f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n## OVERALL ASSESSMENT"
-                        )
-                    else:
-                        # Prepend at the beginning
-                        analysis_result = f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n{analysis_result}"
-                
-                break  # Success, exit retry loop
-            except Exception as e:
-                error_msg = str(e)
-                if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                    print(f"⚠️  Analysis timed out on attempt {attempt}/{max_analysis_attempts}")
-                    if attempt < max_analysis_attempts:
-                        print(f"🔄 Retrying analysis...")
-                        continue
-                    else:
-                        print(f"❌ All {max_analysis_attempts} analysis attempts timed out")
-                        # Fall back to passing if analysis times out
-                        print("⚠️  Analysis timed out, proceeding anyway...")
-                        return True, "PASS: Analysis timed out - unable to verify, proceeding with execution"
-                else:
-                    # Non-timeout error, re-raise
-                    raise
-        
-        print("\n📊 Analysis Result:")
-        print("=" * 80)
-        print(analysis_result)
-        print("=" * 80)
-        
-        # Check if data is insufficient - look for it anywhere in the response
-        if "INSUFFICIENT_DATA" in analysis_result or "INSUFFICIENT DATA" in analysis_result:
-            print("\n⚠️  Insufficient Data Collected")
-            print("   The playbook's compliance report is missing actual data.")
-            print("   AI provided specific advice to improve data collection.")
-            return False, analysis_result
-        
-        # Check the two critical sections: DATA COLLECTION, COMPLIANCE ANALYSIS
-        # NOTE: PLAYBOOK ANALYSIS is now handled separately (after syntax check, before test execution)
-        analysis_upper = analysis_result.upper()
-        import re
-        
-        # Extract status from each section
-        data_collection_status = None
-        compliance_analysis_status = None
-        
-        # Check DATA COLLECTION status
-        data_collection_patterns = [
-            r'DATA\s+COLLECTION[:\s]*PASS',
-            r'\*\*DATA\s+COLLECTION\*\*[:\s]*PASS',
-            r'-\s*\*\*DATA\s+COLLECTION\*\*[:\s]*PASS',
+
+def merge_data_collection_analysis(analysis_result: str, data_collection_analysis: str) -> str:
+    """
+    Prepend the STAGE 1 data collection analysis to the STAGE 2 compliance analysis
+    so the final message includes both stages.
+    """
+    if data_collection_analysis and "DATA_COLLECTION: PASS" in data_collection_analysis.upper():
+        # Insert DATA COLLECTION section at the beginning of the analysis
+        if "## STAGE 2: COMPLIANCE ANALYSIS" in analysis_result:
+            # Insert before STAGE 2
+            analysis_result = analysis_result.replace(
+                "## STAGE 2: COMPLIANCE ANALYSIS",
+                f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n## STAGE 2: COMPLIANCE ANALYSIS"
+            )
+        elif "## OVERALL ASSESSMENT" in analysis_result:
+            # Insert before OVERALL ASSESSMENT
+            analysis_result = analysis_result.replace(
+                "## OVERALL ASSESSMENT",
+                f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n## OVERALL ASSESSMENT"
+            )
+        else:
+            # Prepend at the beginning
+            analysis_result = f"## STAGE 1: DATA COLLECTION ANALYSIS\n\n{data_collection_analysis}\n\n{analysis_result}"
+    return analysis_result
+
+
+def interpret_compliance_analysis(analysis_result: str) -> tuple[bool, str]:
+    """
+    Interpret the LLM's compliance analysis (DATA COLLECTION and COMPLIANCE ANALYSIS sections).
+    
+    Returns:
+        tuple: (is_verified, compliance_analysis_message)
+    """
+    print("\n📊 Analysis Result:")
+    print("=" * 80)
+    print(analysis_result)
+    print("=" * 80)
+
+    # Check if data is insufficient - look for it anywhere in the response
+    if "INSUFFICIENT_DATA" in analysis_result or "INSUFFICIENT DATA" in analysis_result:
+        print("\n⚠️  Insufficient Data Collected")
+        print("   The playbook's compliance report is missing actual data.")
+        print("   AI provided specific advice to improve data collection.")
+        return False, analysis_result
+
+    # Check the two critical sections: DATA COLLECTION, COMPLIANCE ANALYSIS
+    # NOTE: PLAYBOOK ANALYSIS is now handled separately (after syntax check, before test execution)
+    analysis_upper = analysis_result.upper()
+    import re
+
+    # Extract status from each section
+    data_collection_status = None
+    compliance_analysis_status = None
+
+    # Check DATA COLLECTION status
+    data_collection_patterns = [
+        r'DATA\s+COLLECTION[:\s]*PASS',
+        r'\*\*DATA\s+COLLECTION\*\*[:\s]*PASS',
+        r'-\s*\*\*DATA\s+COLLECTION\*\*[:\s]*PASS',
+    ]
+    for pattern in data_collection_patterns:
+        if re.search(pattern, analysis_upper):
+            data_collection_status = 'PASS'
+            break
+
+    if not data_collection_status:
+        data_collection_fail_patterns = [
+            r'DATA\s+COLLECTION[:\s]*FAIL',
+            r'\*\*DATA\s+COLLECTION\*\*[:\s]*FAIL',
         ]
-        for pattern in data_collection_patterns:
+        for pattern in data_collection_fail_patterns:
             if re.search(pattern, analysis_upper):
-                data_collection_status = 'PASS'
+                data_collection_status = 'FAIL'
                 break
-        
-        if not data_collection_status:
-            data_collection_fail_patterns = [
-                r'DATA\s+COLLECTION[:\s]*FAIL',
-                r'\*\*DATA\s+COLLECTION\*\*[:\s]*FAIL',
-            ]
-            for pattern in data_collection_fail_patterns:
-                if re.search(pattern, analysis_upper):
-                    data_collection_status = 'FAIL'
-                    break
-        
-        # Check COMPLIANCE ANALYSIS (PASS/FAIL, not COMPLIANT/NON-COMPLIANT)
-        compliance_analysis_patterns = [
-            r'COMPLIANCE\s+ANALYSIS[:\s]*PASS',
-            r'\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*PASS',
-            r'-\s*\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*PASS',
+
+    # Check COMPLIANCE ANALYSIS (PASS/FAIL, not COMPLIANT/NON-COMPLIANT)
+    compliance_analysis_patterns = [
+        r'COMPLIANCE\s+ANALYSIS[:\s]*PASS',
+        r'\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*PASS',
+        r'-\s*\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*PASS',
+    ]
+    for pattern in compliance_analysis_patterns:
+        if re.search(pattern, analysis_upper):
+            compliance_analysis_status = 'PASS'
+            break
+
+    if not compliance_analysis_status:
+        compliance_analysis_fail_patterns = [
+            r'COMPLIANCE\s+ANALYSIS[:\s]*FAIL',
+            r'\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*FAIL',
+            r'-\s*\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*FAIL',
         ]
-        for pattern in compliance_analysis_patterns:
+        for pattern in compliance_analysis_fail_patterns:
             if re.search(pattern, analysis_upper):
-                compliance_analysis_status = 'PASS'
+                compliance_analysis_status = 'FAIL'
                 break
+
+    # Determine if both sections are correct
+    all_sections_pass = (
+        data_collection_status == 'PASS' and
+        compliance_analysis_status == 'PASS'
+    )
+
+    if all_sections_pass:
+        print("\n✅ AI Compliance Analysis: COMPLETE")
+        print("   All sections passed:")
+        print(f"   - DATA COLLECTION: {data_collection_status}")
+        print(f"   - COMPLIANCE ANALYSIS: {compliance_analysis_status}")
+        return True, analysis_result
+    else:
+        # Check which sections failed
+        failed_sections = []
+        if data_collection_status != 'PASS':
+            failed_sections.append(f"DATA COLLECTION: {data_collection_status or 'NOT FOUND'}")
+        if compliance_analysis_status != 'PASS':
+            failed_sections.append(f"COMPLIANCE ANALYSIS: {compliance_analysis_status or 'NOT FOUND'}")
+
+        print("\n❌ AI Compliance Analysis: Issues Found")
+        print("   The following sections have problems:")
+        for section in failed_sections:
+            print(f"   - {section}")
+        print("   Analysis result will be used for playbook enhancement.")
+        return False, analysis_result
+
+
+def _insufficient_data_result(data_collection_analysis: str) -> tuple[bool, str]:
+    """Result used when STAGE 1 finds the collected data insufficient."""
+    print("\n⚠️  Insufficient Data Collected")
+    print("   The playbook's compliance report is missing actual data.")
+    print("   AI provided specific advice to improve data collection.")
+    return False, data_collection_analysis
+
+
+def _compliance_analysis_timeout() -> tuple[bool, str]:
+    """Result used when every compliance analysis attempt timed out."""
+    # Fall back to passing if analysis times out
+    print("⚠️  Analysis timed out, proceeding anyway...")
+    return True, "PASS: Analysis timed out - unable to verify, proceeding with execution"
+
+
+def evaluate_compliance_locally(test_output: str, report: ComplianceReport = None) -> dict:
+    """
+    Try to determine compliance from the playbook's own report (no AI call).
+    
+    Returns:
+        dict: Structured verdict (see evaluate_compliance_report()), or None if the
+              report is ambiguous and the AI analysis is needed
+    """
+    verdict, reason = evaluate_compliance_report(test_output, report)
+    if verdict is None:
+        print(f"ℹ️  Local report evaluation inconclusive ({reason}) - using AI analysis")
+        return None
+    print("⚡ Compliance report is conclusive - skipping AI data collection and compliance analysis")
+    print("\n📊 Analysis Result:")
+    print("=" * 80)
+    print(format_compliance_verdict(verdict))
+    print("=" * 80)
+    return verdict
+
+
+def _compliance_analysis_error(error: Exception) -> tuple[bool, str]:
+    """Result used when the compliance analysis itself fails (don't block execution)."""
+    error_msg = f"Error during output analysis: {str(error)}"
+    print(f"❌ {error_msg}")
+    print("⚠️  Analysis failed, proceeding anyway...")
+    return True, error_msg
+
+
+def analyze_playbook_output_steps(
+    requirements: list[str],
+    playbook_objective: str,
+    test_output: str,
+    audit_procedure: str = None,
+    playbook_content: str = None,
+    suppress_header: bool = False,
+    use_cache: bool = True,
+    local_evaluation: bool = True,
+    report: ComplianceReport = None
+):
+    """
+    Steps that analyze the playbook data collection output and determine compliance for each
+    requirement (see run_steps()).
+    
+    NEW APPROACH: Playbooks only collect data, AI determines compliance.
+    
+    This function:
+    1. Evaluates the playbook's COMPLIANCE REPORT locally; if it is conclusive
+       (all statuses evaluated, OVERALL follows its rationale rule) no AI call is made
+    2. Otherwise calls analyze_data_collection() to check if data was collected properly
+    3. If data collection passes, performs full compliance analysis
+    
+    Args:
+        requirements: Original list of requirements
+        playbook_objective: The objective of the playbook
+        test_output: Output from data collection playbook
+        audit_procedure: CIS Benchmark audit procedure with expected outputs (optional)
+        playbook_content: The actual playbook YAML content (optional, used to verify conditional execution)
+        suppress_header: If True, suppress the "AI COMPLIANCE ANALYSIS" header (default: False)
+        use_cache: If False, bypass the on-disk LLM response cache
+        local_evaluation: If False, always use the AI analysis even for conclusive reports
+        report: The run's parsed compliance report (see parse_run_report()); parsed
+            from test_output once here when not given
         
-        if not compliance_analysis_status:
-            compliance_analysis_fail_patterns = [
-                r'COMPLIANCE\s+ANALYSIS[:\s]*FAIL',
-                r'\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*FAIL',
-                r'-\s*\*\*COMPLIANCE\s+ANALYSIS\*\*[:\s]*FAIL',
-            ]
-            for pattern in compliance_analysis_fail_patterns:
-                if re.search(pattern, analysis_upper):
-                    compliance_analysis_status = 'FAIL'
-                    break
-        
-        # Determine if both sections are correct
-        all_sections_pass = (
-            data_collection_status == 'PASS' and
-            compliance_analysis_status == 'PASS'
-        )
+    Returns:
+        tuple: (is_verified, compliance_analysis_message)
+        - is_verified: True if playbook collected data properly and analysis completed
+        - compliance_analysis_message: AI's compliance determination for each requirement
+          (a conclusive local verdict rendered for display; callers that decide on the
+          verdict call evaluate_compliance_locally() themselves)
+    """
+    if not suppress_header:
+        print("\n" + "=" * 80)
+        print("🔍 AI COMPLIANCE ANALYSIS (Analyzing Collected Data)")
+        print("=" * 80)
+    
+    # NOTE: STAGE 0 (Playbook Structure Analysis) is now handled by LangGraph workflow
+    # in langgraph_deepseek_generate_playbook.py before test execution.
+    # This function only handles STAGE 1 (Data Collection) and STAGE 2 (Compliance Analysis).
+    
+    # A conclusive compliance report makes both AI stages unnecessary
+    if report is None:
+        report = parse_run_report(test_output)
+    if local_evaluation:
+        verdict = evaluate_compliance_locally(test_output, report)
+        if verdict is not None:
+            return True, format_compliance_verdict(verdict)
+    
+    # STAGE 1: Check data collection
+    # Suppress header since it will be included in the final analysis result
+    data_collection_passed, data_collection_analysis = yield from analyze_data_collection_steps(
+        requirements=requirements,
+        playbook_objective=playbook_objective,
+        test_output=test_output,
+        playbook_content=playbook_content,
+        audit_procedure=audit_procedure,
+        suppress_header=True,
+        use_cache=use_cache,
+        report=report
+    )
+    
+    # If data collection failed, return early with the data collection analysis
+    if not data_collection_passed:
+        return _insufficient_data_result(data_collection_analysis)
+    
+    # STAGE 2: Data collection passed, proceed with full compliance analysis
+    print("Playbook collected data. AI now determining compliance...")
+    
+    analysis_prompt = build_compliance_analysis_prompt(
+        requirements, playbook_objective, test_output, audit_procedure, playbook_content
+    )
 
-        if all_sections_pass:
-            print("\n✅ AI Compliance Analysis: COMPLETE")
-            print("   All sections passed:")
-            print(f"   - DATA COLLECTION: {data_collection_status}")
-            print(f"   - COMPLIANCE ANALYSIS: {compliance_analysis_status}")
-            return True, analysis_result
-        else:
-            # Check which sections failed
-            failed_sections = []
-            if data_collection_status != 'PASS':
-                failed_sections.append(f"DATA COLLECTION: {data_collection_status or 'NOT FOUND'}")
-            if compliance_analysis_status != 'PASS':
-                failed_sections.append(f"COMPLIANCE ANALYSIS: {compliance_analysis_status or 'NOT FOUND'}")
-            
-            print("\n❌ AI Compliance Analysis: Issues Found")
-            print("   The following sections have problems:")
-            for section in failed_sections:
-                print(f"   - {section}")
-            print("   Analysis result will be used for playbook enhancement.")
-            return False, analysis_result
+    try:
+        # Use the LLM directly without ChatPromptTemplate to avoid issues with curly braces
+        print("Analyzing playbook output (this may take a few minutes)...")
+        
+        try:
+            analysis_result = (yield from invoke_llm_steps(analysis_prompt, label="Analysis", cache_site="compliance_analysis", use_cache=use_cache)).strip()
+        except LLMTimeoutError:
+            return _compliance_analysis_timeout()
+        
+        analysis_result = merge_data_collection_analysis(analysis_result, data_collection_analysis)
+        return interpret_compliance_analysis(analysis_result)
             
     except Exception as e:
-        error_msg = f"Error during output analysis: {str(e)}"
-        print(f"❌ {error_msg}")
         # If analysis fails, default to passing (don't block execution)
-        print("⚠️  Analysis failed, proceeding anyway...")
-        return True, error_msg
+        return _compliance_analysis_error(e)
+
+
+def analyze_playbook_output(*args, **kwargs) -> tuple[bool, str]:
+    """Analyze the playbook output and determine compliance (arguments: see analyze_playbook_output_steps())."""
+    return run_steps(analyze_playbook_output_steps(*args, **kwargs))
+
+
+async def aanalyze_playbook_output(*args, **kwargs) -> tuple[bool, str]:
+    """Async variant of analyze_playbook_output()."""
+    return await arun_steps(analyze_playbook_output_steps(*args, **kwargs))
 
 
 def main():
@@ -4049,13 +5526,21 @@ root     2822221 2819327  0 13:07 pts/1    00:00:00 grep --color=auto -i 2290657
                 except Exception:
                     pass
                 
-                analysis_passed, analysis_message = analyze_playbook_output(
-                    requirements=requirements,
-                    playbook_objective=playbook_objective,
-                    test_output=test_output,
-                    audit_procedure=audit_procedure,
-                    playbook_content=current_playbook_for_analysis
-                )
+                # Parse the run's compliance report once for the analysis and the status checks
+                run_report = parse_run_report(test_output)
+                local_verdict = evaluate_compliance_locally(test_output, run_report)
+                if local_verdict is not None:
+                    analysis_passed, analysis_message = True, format_compliance_verdict(local_verdict)
+                else:
+                    analysis_passed, analysis_message = analyze_playbook_output(
+                        requirements=requirements,
+                        playbook_objective=playbook_objective,
+                        test_output=test_output,
+                        audit_procedure=audit_procedure,
+                        playbook_content=current_playbook_for_analysis,
+                        report=run_report,
+                        local_evaluation=False
+                    )
                 
                 # Check if this is a PLAYBOOK STRUCTURE ANALYSIS failure (STAGE 0)
                 is_structure_failure = (
@@ -4077,7 +5562,10 @@ root     2822221 2819327  0 13:07 pts/1    00:00:00 grep --color=auto -i 2290657
                 )
                 
                 # Check for PLAYBOOK ANALYSIS: FAIL status (STAGE 2)
-                has_issues, extracted_advice = extract_playbook_issues_from_analysis(analysis_message)
+                if local_verdict is not None:
+                    has_issues, extracted_advice = False, None
+                else:
+                    has_issues, extracted_advice = extract_playbook_issues_from_analysis(analysis_message)
                 
                 # Check if COMPLIANCE ANALYSIS is missing, invalid, or FAIL (STAGE 2)
                 # COMPLIANCE ANALYSIS should be PASS or FAIL
@@ -4099,7 +5587,11 @@ root     2822221 2819327  0 13:07 pts/1    00:00:00 grep --color=auto -i 2290657
                 )
                 
                 # Verify status alignment between playbook output and AI analysis
-                status_aligned, alignment_message = verify_status_alignment(test_output, analysis_message)
+                if local_verdict is not None:
+                    # The verdict was read from the playbook's own report
+                    status_aligned, alignment_message = True, "Verdict taken from the compliance report"
+                else:
+                    status_aligned, alignment_message = verify_status_alignment(test_output, analysis_message, run_report)
                 
                 # Debug output
                 print(f"\n🔍 DEBUG: PLAYBOOK ANALYSIS status check:")
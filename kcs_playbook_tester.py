@@ -293,9 +293,9 @@ def analyze_data_collection(
     
     Returns a summary of what data was collected.
     """
-    from langchain_deepseek import ChatDeepSeek
+    from llm_clients import get_llm
     
-    llm = ChatDeepSeek(model="deepseek-chat", temperature=0)
+    llm = get_llm("deepseek", model="deepseek-chat", temperature=0)
     
     # Combine all outputs
     combined_output = "\n\n".join([
@@ -350,9 +350,9 @@ def analyze_compliance(
     
     Returns a compliance analysis report.
     """
-    from langchain_deepseek import ChatDeepSeek
+    from llm_clients import get_llm
     
-    llm = ChatDeepSeek(model="deepseek-chat", temperature=0)
+    llm = get_llm("deepseek", model="deepseek-chat", temperature=0)
     
     # Format requirements
     req_text = "\n".join([f"{i+1}. {req}" for i, req in enumerate(matching_requirements)])
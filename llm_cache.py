@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed On-Disk LLM Response Cache
+
+Playbook generation and analysis prompts are sent at temperature 0, so the
+same prompt to the same model can be answered from disk instead of paying
+again for a multi-minute deepseek-reasoner call when a batch is re-run with
+unchanged inputs.
+
+Each response is stored as one JSON file named by sha256(model + prompt).
+The cache is bounded in size; when it grows past the limit the least recently
+used entries (by file mtime, refreshed on every hit) are evicted. The total size
+is scanned once and then kept up to date on every write, so the directory is
+only scanned again when the limit is exceeded (and eviction then goes down to
+90% of the limit).
+
+Environment variables:
+    LLM_CACHE_DIR            Cache directory (default: .llm_cache)
+    LLM_CACHE_MAX_MB         Size limit in MB (default: 512)
+    LLM_CACHE_DISABLE        Set to 1 to disable the cache entirely
+    LLM_CACHE_DISABLE_SITES  Comma-separated call sites to opt out, e.g.
+                             "generation,compliance_analysis"
+
+Call sites (see deepseek_generate_playbook.py):
+    generation, patch, playbook_analysis, data_collection, compliance_analysis
+"""
+
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_MAX_MB = 512
+EVICT_TO_FRACTION = 0.9  # Eviction frees room down to this share of max_bytes, so the next writes need no scan
+
+
+def _prompt_text(prompt) -> str:
+    """Serialize a prompt (string or list of messages) for hashing."""
+    if isinstance(prompt, str):
+        return prompt
+    parts = []
+    for message in prompt:
+        role = getattr(message, 'type', message.__class__.__name__)
+        content = getattr(message, 'content', message)
+        parts.append(f"{role}:{content}")
+    return "\n\x00\n".join(parts)
+
+
+def cache_key(model_name: str, prompt) -> str:
+    """
+    Compute the cache key for a model/prompt pair.
+
+    Args:
+        model_name: Model identifier (e.g., "deepseek-reasoner")
+        prompt: Prompt string or list of messages
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b"\x00")
+    digest.update(_prompt_text(prompt).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """Size-bounded LRU cache of LLM responses stored as files."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024,
+                 enabled: bool = True, disabled_sites=None):
+        """
+        Args:
+            cache_dir: Directory holding the cache files
+            max_bytes: Maximum total size of cached responses
+            enabled: If False, every lookup is a miss and nothing is stored
+            disabled_sites: Call-site names that never use the cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.disabled_sites = set(disabled_sites or [])
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Size of the cache files, None until the first write scans them
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'bypassed': 0}
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def is_active(self, site: str = None) -> bool:
+        """Check whether the cache is used for a call site."""
+        return self.enabled and site not in self.disabled_sites
+
+    def get(self, key: str, site: str = None) -> str:
+        """
+        Look up a cached response.
+
+        Returns:
+            str: Cached response content, or None on a miss
+        """
+        if not self.is_active(site):
+            self._count('bypassed')
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Refresh recency for LRU eviction
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+        self._count('hits')
+        return entry.get('content')
+
+    def put(self, key: str, content: str, model_name: str = "", site: str = None):
+        """Store a response and evict old entries if the cache is over its size limit."""
+        if not self.is_active(site) or not content:
+            return
+        path = self._path(key)
+        try:
+            replaced_size = path.stat().st_size
+        except OSError:
+            replaced_size = 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'model': model_name, 'site': site, 'content': content}, f, ensure_ascii=False)
+            written_size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)  # Atomic so concurrent readers never see partial files
+        except OSError as e:
+            print(f"⚠️  LLM cache write failed: {e}")
+            return
+        with self._lock:
+            self.stats['writes'] += 1
+            if self._total_bytes is not None:
+                self._total_bytes += written_size - replaced_size
+            over_limit = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _evict(self):
+        """Scan the cache and, if it is over max_bytes, delete least recently used entries down to EVICT_TO_FRACTION of it."""
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+            self._total_bytes = total
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                self.stats['evictions'] += 1
+            self._total_bytes = total
+
+    def summary(self) -> str:
+        """One-line hit/miss summary for run reports."""
+        stats = self.stats
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = f"{stats['hits'] / lookups * 100:.0f}%" if lookups else "n/a"
+        return (f"hits {stats['hits']}, misses {stats['misses']} (hit rate {hit_rate}), "
+                f"writes {stats['writes']}, evictions {stats['evictions']}, bypassed {stats['bypassed']}")
+
+
+def _cache_from_env() -> LLMCache:
+    """Build the shared cache from environment variables."""
+    disabled_sites = [site.strip() for site in os.environ.get('LLM_CACHE_DISABLE_SITES', '').split(',') if site.strip()]
+    try:
+        max_mb = float(os.environ.get('LLM_CACHE_MAX_MB', DEFAULT_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_MAX_MB
+    return LLMCache(
+        cache_dir=os.environ.get('LLM_CACHE_DIR', DEFAULT_CACHE_DIR),
+        max_bytes=int(max_mb * 1024 * 1024),
+        enabled=os.environ.get('LLM_CACHE_DISABLE', '').lower() not in ('1', 'true', 'yes'),
+        disabled_sites=disabled_sites
+    )
+
+
+# Shared cache instance used by deepseek_generate_playbook.invoke_llm(),
+# created on first use so environment variables loaded by load_dotenv() apply
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Get the shared cache instance."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = _cache_from_env()
+        return _llm_cache
+
+
+def print_cache_stats():
+    """Print the shared cache hit/miss counters."""
+    llm_cache = get_llm_cache()
+    if llm_cache.enabled:
+        print(f"💾 LLM cache: {llm_cache.summary()}")
+    else:
+        print("💾 LLM cache: disabled")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Shared LLM Client Registry
+
+Chat model clients are built lazily on first use and cached by client class and
+parameters, so every call site asking for the same model/settings gets the same
+instance instead of constructing a new client (and HTTP connection pool) per
+call. All clients share one keep-alive httpx connection pool, so calls to
+api.deepseek.com reuse established TLS connections.
+
+Async connections belong to the event loop that opened them, so clients asked
+for inside a running event loop (the ainvoke() paths) are cached per loop and
+share that loop's httpx.AsyncClient pool; a batch that calls asyncio.run()
+several times gets a fresh pool per loop instead of connections of a closed
+loop.
+
+Importing this module (or a module that uses it) builds nothing; runs that
+never call the LLM (e.g., --skip-test runs on existing playbooks) create no client.
+
+Environment variables:
+    LLM_HTTP_MAX_CONNECTIONS  Size of the shared connection pool (default: 20)
+
+Usage:
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
+"""
+
+import os
+import asyncio
+import threading
+import weakref
+
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+
+# deepseek-reasoner settings used for playbook generation and analysis
+REASONER_PARAMS = dict(
+    model="deepseek-reasoner",
+    base_url=DEEPSEEK_BASE_URL,
+    temperature=0,
+    max_tokens=16384,
+    timeout=1800,  # 30 minutes timeout
+    max_retries=3
+)
+
+# deepseek-chat through the OpenAI-compatible client (requirement extraction, agents)
+DEEPSEEK_CHAT_PARAMS = dict(
+    model="deepseek-chat",
+    base_url=DEEPSEEK_BASE_URL,
+    temperature=0
+)
+
+_clients = {}
+_clients_lock = threading.Lock()
+_http_client = None
+_loop_clients = weakref.WeakKeyDictionary()  # event loop -> {'http': httpx.AsyncClient, 'clients': {key: client}}
+
+
+def _pool_settings() -> dict:
+    """httpx pool limits and timeouts of the shared connection pools."""
+    import httpx
+    try:
+        max_connections = int(os.environ.get('LLM_HTTP_MAX_CONNECTIONS', 20))
+    except ValueError:
+        max_connections = 20
+    return dict(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=120
+        ),
+        timeout=httpx.Timeout(1800, connect=30)
+    )
+
+
+def _shared_http_client():
+    """Keep-alive connection pool shared by every client (created on first use)."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(**_pool_settings())
+    return _http_client
+
+
+def _running_loop():
+    """The running event loop, or None outside of one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _build_client(client: str, params: dict, http_async_client=None):
+    """Construct a chat model client (with the loop's async pool when given)."""
+    pools = dict(http_client=_shared_http_client())
+    if http_async_client is not None:
+        pools['http_async_client'] = http_async_client
+    if client == "deepseek":
+        from langchain_deepseek import ChatDeepSeek
+        return ChatDeepSeek(**pools, **params)
+    if client == "openai":
+        from langchain_openai import ChatOpenAI
+        if 'api_key' not in params and params.get('base_url') == DEEPSEEK_BASE_URL:
+            params = dict(params, api_key=os.getenv("DEEPSEEK_API_KEY"))
+        return ChatOpenAI(**pools, **params)
+    raise ValueError(f"Unknown LLM client: {client}")
+
+
+def get_llm(client: str = "deepseek", **params):
+    """
+    Get the shared chat model client for a client class and parameters.
+
+    Args:
+        client: "deepseek" (ChatDeepSeek) or "openai" (ChatOpenAI)
+        **params: Model parameters (model, base_url, temperature, max_tokens, ...)
+
+    Returns:
+        BaseChatModel: Cached client instance (inside a running event loop, the
+        loop's instance, whose ainvoke() uses the loop's shared async pool)
+    """
+    key = (client, tuple(sorted(params.items())))
+    loop = _running_loop()
+    with _clients_lock:
+        if loop is None:
+            clients, http_async_client = _clients, None
+        else:
+            for closed in [other for other in _loop_clients if other.is_closed()]:
+                del _loop_clients[closed]  # their pools may keep the loop alive
+            loop_state = _loop_clients.get(loop)
+            if loop_state is None:
+                import httpx
+                loop_state = {'http': httpx.AsyncClient(**_pool_settings()), 'clients': {}}
+                _loop_clients[loop] = loop_state
+            clients, http_async_client = loop_state['clients'], loop_state['http']
+        llm = clients.get(key)
+        if llm is None:
+            llm = _build_client(client, params, http_async_client)
+            clients[key] = llm
+        return llm
+
+
+def client_count() -> int:
+    """Number of clients built so far (those of live event loops included)."""
+    with _clients_lock:
+        return len(_clients) + sum(len(state['clients']) for state in _loop_clients.values())
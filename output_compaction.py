@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Output Compaction for LLM Feedback
+
+Run output goes into test_output / error_message and from there into every
+analysis and enhancement prompt. Most of a -vvv run is JSON result blobs
+(module invocation dumps, stdout_lines repeating stdout, ansible_facts) and
+long stdout/stderr that the model does not need.
+
+A run is reduced to one summary per task result:
+
+    TASK [Req 1 - Check sshd PermitEmptyPasswords global setting] ****
+    changed: [192.168.122.16] => {"rc": 0, "stdout": "permitemptypasswords no"} (0.42s)
+
+with only name, status, rc, stdout, stderr and msg; long values keep their
+first and last lines. The trimming is tuned to a token budget: the loosest
+trim level whose rendering fits OUTPUT_TOKEN_BUDGET is used (failed and
+ignored tasks keep two levels more than the rest), and if even the tightest
+level does not fit, the ok/changed/skipped results are replaced by a count.
+The compliance report task and the PLAY RECAP are always kept verbatim, so
+extract_compliance_report() and the recap checks read the compacted output
+exactly like the raw one.
+
+Token counts are estimated locally with DeepSeek's published ratio (about 0.3
+tokens per English character, 0.6 per CJK character); every compaction logs
+the counts before and after, and print_compaction_stats() sums them.
+
+Environment variables:
+    OUTPUT_TOKEN_BUDGET        Token budget of one compacted run output (default: 4000)
+    OUTPUT_COMPACTION_DISABLE  Set to 1 to send the uncompacted (filtered) output
+
+Usage:
+    compact = compact_run_output(raw_output)               # -vvv stdout
+    compact = compact_run_output(raw_output, events)       # task events (task_events.py)
+"""
+
+import os
+import re
+import json
+import threading
+
+from task_events import REPORT_TASK_MARKER, recap_from_events
+
+
+DEFAULT_TOKEN_BUDGET = 4000
+
+TOKENS_PER_CHAR = 0.3           # English text (DeepSeek tokenizer estimate)
+TOKENS_PER_WIDE_CHAR = 0.6      # CJK and other multi-byte characters
+
+# (head lines, tail lines, max characters per line) - loosest first; (0, 0, 0) drops the field
+TRIM_LEVELS = (
+    (20, 20, 400),
+    (10, 10, 300),
+    (5, 5, 200),
+    (2, 2, 160),
+    (1, 1, 120),
+    (0, 0, 0),
+)
+FAILED_LEVEL_BONUS = 2          # failed/ignored results are trimmed this many levels less
+
+# Result fields kept in a task summary
+SUMMARY_FIELDS = ('rc', 'stdout', 'stderr', 'msg')
+
+# Navigator event markers (ESC[K<base64>ESC[<n>D) and ANSI colors in stdout
+EVENT_MARKER_PATTERN = re.compile(r'\x1b\[K[A-Za-z0-9+/=]*\x1b\[\d+D')
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+TASK_HEADER_PATTERN = re.compile(r'^(?:TASK|RUNNING HANDLER) \[(.*)\]')
+BANNER_STARS_PATTERN = re.compile(r'\s*\*{3,}\s*$')     # the screen-wide "*****" of PLAY/RECAP headers
+RESULT_LINE_PATTERN = re.compile(
+    r'^(ok|changed|skipping|fatal|failed): \[([^\]]+)\](: FAILED!|: UNREACHABLE!)?'
+    r'(?: => \(item=(.*?)\))?(?: => (.*))?$'
+)
+RESULT_STATUSES = {'ok': 'ok', 'changed': 'changed', 'skipping': 'skipped', 'fatal': 'failed', 'failed': 'failed'}
+
+# Lines outside task results that are worth keeping
+KEPT_LINE_PREFIXES = ('ERROR', '[ERROR]', '[WARNING]', 'fatal', 'PLAY [', 'NO MORE HOSTS')
+
+_stats_lock = threading.Lock()
+_compaction_stats = {'runs': 0, 'tokens_before': 0, 'tokens_after': 0}
+
+
+def is_compaction_enabled() -> bool:
+    """Check whether run outputs are compacted."""
+    return os.environ.get('OUTPUT_COMPACTION_DISABLE', '').lower() not in ('1', 'true', 'yes')
+
+
+def get_token_budget() -> int:
+    """Token budget of one compacted run output (OUTPUT_TOKEN_BUDGET)."""
+    try:
+        return max(int(os.environ.get('OUTPUT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)), 1)
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the prompt tokens of a text.
+
+    Returns:
+        int: About 0.3 tokens per single-byte character and 0.6 per multi-byte character
+    """
+    if not text:
+        return 0
+    wide = (len(text.encode('utf-8')) - len(text)) // 2
+    return int((len(text) - wide) * TOKENS_PER_CHAR + wide * TOKENS_PER_WIDE_CHAR + 0.5)
+
+
+def clean_output(output: str) -> str:
+    """Remove navigator event markers and ANSI colors from run output."""
+    return ANSI_ESCAPE_PATTERN.sub('', EVENT_MARKER_PATTERN.sub('', output or ''))
+
+
+def _result_from_json(task: str, host: str, status: str, item: str, body: str) -> dict:
+    """Event-like record (see task_events.py) for one result line of the -vvv output."""
+    try:
+        result = json.loads(body) if body else {}
+    except ValueError:
+        result = {'msg': body}
+    if not isinstance(result, dict):
+        result = {'msg': result}
+    if status == 'ok' and result.get('changed'):
+        status = 'changed'
+    return {
+        'task': f"{task} (item={item})" if item else task,
+        'host': host,
+        'status': status,
+        'ignored': False,
+        'rc': result.get('rc'),
+        'stdout': result.get('stdout') or '',
+        'stderr': result.get('stderr') or '',
+        'msg': result.get('msg') if result.get('msg') is not None else '',
+        'duration': None,
+        'result': result
+    }
+
+
+def parse_verbose_output(output: str) -> tuple:
+    """
+    Parse ansible-navigator stdout into per-task results.
+
+    Args:
+        output: Raw run output (any verbosity)
+
+    Returns:
+        tuple: (results, recap_lines, other_lines) - event-like result records in
+        run order, the PLAY RECAP section, and kept lines outside task results
+        (errors, warnings, play headers) as (number of results before it, line)
+    """
+    lines = clean_output(output).split('\n')
+    results = []
+    recap_lines = []
+    other_lines = []
+    task = None
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+        i += 1
+        if line.startswith('PLAY'):
+            line = BANNER_STARS_PATTERN.sub(' ' + '*' * 20, line)
+        if recap_lines:
+            if line.strip():
+                recap_lines.append(line)
+            continue
+        if line.startswith('PLAY RECAP'):
+            recap_lines.append(line)
+            continue
+        header = TASK_HEADER_PATTERN.match(line)
+        if header:
+            task = header.group(1)
+            continue
+        result_line = RESULT_LINE_PATTERN.match(line)
+        if result_line and task is not None:
+            keyword, host, failure, item, body = result_line.groups()
+            body = (body or '').strip()
+            if body == '{':
+                # Multi-line JSON result: ends with a "}" line at column 0
+                block = ['{']
+                while i < len(lines):
+                    block.append(lines[i].rstrip())
+                    i += 1
+                    if block[-1] == '}':
+                        break
+                body = '\n'.join(block)
+            status = 'unreachable' if failure == ': UNREACHABLE!' else RESULT_STATUSES[keyword]
+            results.append(_result_from_json(task, host, status, item, body))
+            continue
+        if line.strip() == '...ignoring' and results:
+            results[-1]['status'] = 'ignored'
+            results[-1]['ignored'] = True
+            continue
+        if line.startswith(KEPT_LINE_PREFIXES):
+            other_lines.append((len(results), line))
+    return results, recap_lines, other_lines
+
+
+def trim_text(text: str, head: int, tail: int, max_chars: int) -> str:
+    """
+    Keep the first `head` and last `tail` lines of a text (each cut to max_chars).
+
+    Returns:
+        str: Trimmed text with a marker for the dropped lines, "" when head and tail are 0
+    """
+    if head == 0 and tail == 0:
+        return ""
+    lines = text.split('\n')
+    if len(lines) > head + tail:
+        dropped = len(lines) - head - tail
+        lines = lines[:head] + [f"... ({dropped} lines trimmed) ..."] + (lines[-tail:] if tail else [])
+    half = max_chars // 2
+    return '\n'.join(
+        line if len(line) <= max_chars else f"{line[:half]} ... ({len(line) - 2 * half} chars trimmed) ... {line[-half:]}"
+        for line in lines
+    )
+
+
+def _is_report(result: dict) -> bool:
+    msg = result['msg']
+    return isinstance(msg, list) and any(REPORT_TASK_MARKER in str(line) for line in msg)
+
+
+def _is_failure(result: dict) -> bool:
+    return result['status'] in ('failed', 'ignored', 'unreachable')
+
+
+def _summary(result: dict, level: tuple) -> dict:
+    """Kept fields of a result, trimmed to a trim level."""
+    head, tail, max_chars = level
+    summary = {}
+    for field in SUMMARY_FIELDS:
+        value = result[field]
+        if value in (None, '', []):
+            continue
+        if field == 'rc':
+            summary['rc'] = value
+            continue
+        if not isinstance(value, str):
+            value = '\n'.join(str(line) for line in value) if isinstance(value, list) else json.dumps(value, default=str)
+        value = trim_text(value, head, tail, max_chars)
+        if value:
+            summary[field] = value
+    if result['status'] == 'skipped' and result['result'].get('skip_reason') and head:
+        summary['skip_reason'] = result['result']['skip_reason']
+    return summary
+
+
+def _render_result(result: dict, level_index: int) -> list:
+    """Lines of one task summary."""
+    host = result['host']
+    prefix = {
+        'ok': f"ok: [{host}]",
+        'changed': f"changed: [{host}]",
+        'skipped': f"skipping: [{host}]",
+        'failed': f"fatal: [{host}]: FAILED!",
+        'ignored': f"fatal: [{host}]: FAILED!",
+        'unreachable': f"fatal: [{host}]: UNREACHABLE!",
+    }[result['status']]
+    duration = f" ({result['duration']:.2f}s)" if result['duration'] is not None else ""
+    if _is_report(result):
+        # Verbatim, in the "msg": [...] layout extract_compliance_report() reads
+        body = json.dumps({'msg': [str(line) for line in result['msg']]}, indent=4, ensure_ascii=False)
+    else:
+        if _is_failure(result):
+            level_index = max(level_index - FAILED_LEVEL_BONUS, 0)
+        summary = _summary(result, TRIM_LEVELS[level_index])
+        body = json.dumps(summary, ensure_ascii=False, default=str) if summary else ""
+    lines = [f"TASK [{result['task']}] " + "*" * 20, f"{prefix} => {body}{duration}" if body else f"{prefix}{duration}"]
+    if result['ignored']:
+        lines.append("...ignoring")
+    return lines
+
+
+def render_compact(results: list, recap_lines: list, other_lines: list, level_index: int,
+                   keep_all: bool = True) -> str:
+    """
+    Render task summaries at one trim level.
+
+    Args:
+        results: Event-like result records
+        recap_lines: PLAY RECAP section (kept verbatim)
+        other_lines: (position, line) of error/warning/play lines outside task results
+        level_index: Index into TRIM_LEVELS
+        keep_all: False to replace ok/changed/skipped results (except the report) by a count
+    """
+    lines = []
+    omitted = 0
+    for index, result in enumerate(results):
+        lines.extend(line for position, line in other_lines if position == index)
+        if not keep_all and not _is_failure(result) and not _is_report(result):
+            omitted += 1
+            continue
+        lines.extend(_render_result(result, level_index))
+    lines.extend(line for position, line in other_lines if position >= len(results))
+    if omitted:
+        lines.append(f"... ({omitted} ok/changed/skipped task results omitted to fit the token budget) ...")
+    lines.append("")
+    lines.extend(recap_lines)
+    return '\n'.join(lines)
+
+
+def _recap_lines_from_events(events: list) -> list:
+    """PLAY RECAP section rendered from task events (like render_task_events())."""
+    lines = ["PLAY RECAP " + "*" * 20]
+    for host, counts in recap_from_events(events).items():
+        lines.append(f"{host} : " + "    ".join(f"{key}={value}" for key, value in counts.items()))
+    return lines
+
+
+def _fit_results(results: list, recap_lines: list, other_lines: list, budget: int) -> tuple:
+    """Task summaries at the loosest trim level that fits the budget (the tightest one otherwise)."""
+    for keep_all in (True, False):
+        for level_index, (head, tail, _) in enumerate(TRIM_LEVELS):
+            compact = render_compact(results, recap_lines, other_lines, level_index, keep_all)
+            description = f"{len(results)} task results, {head}+{tail} lines per field"
+            if not keep_all:
+                description += ", ok results omitted"
+            if estimate_tokens(compact) <= budget:
+                return compact, description
+    return compact, description
+
+
+def _fit_text(text: str, budget: int) -> tuple:
+    """Head and tail of an output without task results (e.g. the playbook failed to load)."""
+    for head, tail, max_chars in TRIM_LEVELS[:-1]:
+        compact = trim_text(text, head * 5, tail * 5, max_chars)
+        if estimate_tokens(compact) <= budget:
+            break
+    return compact, f"no task results, {head * 5}+{tail * 5} lines of output"
+
+
+def compact_run_output(output: str, events: list = None, budget: int = None) -> str:
+    """
+    Reduce a run to per-task summaries that fit a token budget.
+
+    Args:
+        output: Raw run output (stdout + stderr)
+        events: Task events of the run (load_task_events()); parsed from output when None
+        budget: Token budget (default: OUTPUT_TOKEN_BUDGET)
+
+    Returns:
+        str: Compacted output; the cleaned output trimmed to the budget when no
+        task results could be found (e.g. the playbook failed to load)
+    """
+    budget = budget or get_token_budget()
+    tokens_before = estimate_tokens(output)
+
+    if events:
+        results, recap_lines, other_lines = events, _recap_lines_from_events(events), []
+    else:
+        results, recap_lines, other_lines = parse_verbose_output(output)
+
+    if results:
+        compact, description = _fit_results(results, recap_lines, other_lines, budget)
+    else:
+        compact, description = _fit_text(clean_output(output), budget)
+
+    tokens_after = estimate_tokens(compact)
+    with _stats_lock:
+        _compaction_stats['runs'] += 1
+        _compaction_stats['tokens_before'] += tokens_before
+        _compaction_stats['tokens_after'] += tokens_after
+    print(f"🗜️  Output compaction: ~{tokens_before} -> ~{tokens_after} tokens (budget {budget}; {description})")
+    return compact
+
+
+def get_compaction_stats() -> dict:
+    """
+    Get the compaction totals.
+
+    Returns:
+        dict: {'runs', 'tokens_before', 'tokens_after'}
+    """
+    with _stats_lock:
+        return dict(_compaction_stats)
+
+
+def print_compaction_stats():
+    """Print the estimated tokens saved by output compaction."""
+    if not is_compaction_enabled():
+        print("🗜️  Output compaction: disabled")
+        return
+    stats = get_compaction_stats()
+    saved = stats['tokens_before'] - stats['tokens_after']
+    print(f"🗜️  Output compaction: {stats['runs']} run(s), ~{stats['tokens_before']} -> ~{stats['tokens_after']} tokens "
+          f"(~{saved} saved, budget {get_token_budget()} per run)")
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Multi-Pattern Scanner for Playbook Output
+
+-vvv run output runs into megabytes, and classify_test_output() looks for
+several pattern groups in it (playbook bugs, ignored fatal errors, connection
+and OS version patterns) along with the context of each hit.
+
+MultiPatternScanner compiles all literal patterns of all groups into one
+trie-shaped alternation regex (common prefixes factored out, like an
+Aho-Corasick automaton) and walks the text once. Every hit is returned with
+its group, pattern, label, offsets, line number, line and a context window:
+
+    scanner = MultiPatternScanner({
+        'bug': [("is undefined", "Variable is undefined"), ...],
+        'connection': ["UNREACHABLE", ...],
+    })
+    hits = scanner.scan(output)
+    bug = first_hit(hits, 'bug')     # highest-priority pattern, earliest position
+    if bug:
+        print(bug['context'])
+
+Patterns are matched case-sensitively, like `pattern in text`.
+Overlapping hits are all reported: a pattern that is a prefix of another, or
+that starts inside another pattern's match, still gets its own hit.
+"""
+
+import re
+import bisect
+
+
+def _trie_regex(patterns: list) -> str:
+    """Alternation regex for literal patterns with common prefixes factored out (longest match wins)."""
+    trie = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        regex = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{regex})?" if '' in node else regex
+
+    return build(trie)
+
+
+class MultiPatternScanner:
+    """One compiled matcher for several named groups of literal patterns."""
+
+    def __init__(self, groups: dict):
+        """
+        Args:
+            groups: {group: [pattern or (pattern, label), ...]} - list order is the
+                priority of the patterns within a group; a pattern may appear in
+                several groups
+        """
+        self._members = {}   # pattern -> [(group, label, priority)]
+        for group, patterns in groups.items():
+            for priority, entry in enumerate(patterns):
+                pattern, label = entry if isinstance(entry, tuple) else (entry, entry)
+                self._members.setdefault(pattern, []).append((group, label, priority))
+        patterns = [pattern for pattern in self._members if pattern]
+        self._regex = re.compile(_trie_regex(patterns) if patterns else r'(?!)')  # (?!) never matches
+        # Patterns that are prefixes of a longer pattern match at the same position
+        self._prefixes = {
+            pattern: [other for other in patterns if other != pattern and pattern.startswith(other)]
+            for pattern in patterns
+        }
+
+    def scan(self, text: str, before: int = 3, after: int = 8) -> list:
+        """
+        Find every pattern occurrence in one pass over text.
+
+        Args:
+            text: Text to scan
+            before: Lines of context above the hit line
+            after: The context ends `after` lines below the hit line's start
+                (the hit line plus after - 1 lines, like lines[i - before:i + after])
+
+        Returns:
+            list: Hits ordered by position, each {'group', 'pattern', 'label',
+            'priority', 'start', 'end', 'line_no' (1-based), 'line', 'context'}
+        """
+        hits = []
+        line_no = 1
+        counted_to = 0
+        position = 0
+        while True:
+            match = self._regex.search(text, position)
+            if match is None:
+                break
+            start = match.start()
+            line_no += text.count('\n', counted_to, start)
+            counted_to = start
+            line_start = text.rfind('\n', 0, start) + 1
+            line_end = text.find('\n', start)
+            line_end = len(text) if line_end == -1 else line_end
+            context = _context(text, line_start, line_end, before, after)
+            for pattern in [match.group()] + self._prefixes[match.group()]:
+                for group, label, priority in self._members[pattern]:
+                    hits.append({
+                        'group': group,
+                        'pattern': pattern,
+                        'label': label,
+                        'priority': priority,
+                        'start': start,
+                        'end': start + len(pattern),
+                        'line_no': line_no,
+                        'line': text[line_start:line_end],
+                        'context': context
+                    })
+            position = start + 1  # patterns starting inside this match are found too
+        return hits
+
+
+def _context(text: str, line_start: int, line_end: int, before: int, after: int) -> str:
+    """The hit line with up to `before` lines above and `after` lines below it."""
+    start = line_start
+    for _ in range(before):
+        if start == 0:
+            break
+        start = text.rfind('\n', 0, start - 1) + 1
+    end = line_end
+    for _ in range(after - 1):
+        if end >= len(text):
+            break
+        next_end = text.find('\n', end + 1)
+        end = len(text) if next_end == -1 else next_end
+    return text[start:end]
+
+
+def group_hits(hits: list, group: str) -> list:
+    """Hits of one group, in position order."""
+    return [hit for hit in hits if hit['group'] == group]
+
+
+def first_hit(hits: list, group: str, start: int = 0, end: int = None) -> dict:
+    """
+    Highest-priority hit of a group (earliest position on ties), or None.
+
+    Args:
+        hits: Hits from MultiPatternScanner.scan()
+        group: Group name
+        start, end: Only consider hits lying entirely within text[start:end]
+    """
+    candidates = [hit for hit in hits if hit['group'] == group and hit['start'] >= start
+                  and (end is None or hit['end'] <= end)]
+    return min(candidates, key=lambda hit: (hit['priority'], hit['start'])) if candidates else None
+
+
+def next_hit(hits: list, position: int) -> dict:
+    """First hit starting at or after position (hits of a single group, in position order), or None."""
+    index = bisect.bisect_left([hit['start'] for hit in hits], position)
+    return hits[index] if index < len(hits) else None
+
+
+def previous_hit(hits: list, position: int) -> dict:
+    """Last hit starting before position (hits of a single group, in position order), or None."""
+    index = bisect.bisect_left([hit['start'] for hit in hits], position)
+    return hits[index - 1] if index > 0 else None
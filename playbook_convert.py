@@ -17,11 +17,15 @@ import yaml
 import subprocess
 import sys, io
 import copy
+import time
 from pathlib import Path
 
 from ruamel.yaml import YAML
 import sys
 
+from timing_history import get_timing_history, checkpoint_key
+from connection_profile import with_connection_profile
+
 # Register custom constructors for Ansible-specific YAML tags.
 # !unsafe tells Ansible to treat the value as a literal string (no Jinja2 processing).
 # PyYAML's safe_load doesn't know about it, so we add a handler that just returns the value as-is.
@@ -210,15 +214,22 @@ def test_playbook(playbook_file, checkpoint_id, test_host):
         '--mode', 'stdout',
         '-e', f'index="{checkpoint_id}"'
     ]
+    cmd = with_connection_profile(cmd)
     
     print(f"Running: {' '.join(cmd)}")
+    history = get_timing_history()
+    checkpoint = checkpoint_key(playbook_file)
+    timeout, reason = history.timeout_for(checkpoint, test_host, 'convert')
+    print(f"⏱️  Timeout: {timeout}s ({reason})")
+    started = time.monotonic()
     try:
         result = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=300
+            timeout=timeout
         )
+        history.record(checkpoint, test_host, 'convert', time.monotonic() - started, timeout)
         
         if result.returncode == 0:
             print(f"✅ Test passed for {playbook_file.name}")
@@ -230,7 +241,8 @@ def test_playbook(playbook_file, checkpoint_id, test_host):
             print(f"STDERR:\n{result.stderr[:1000]}")
             return False
     except subprocess.TimeoutExpired:
-        print(f"❌ Test timed out for {playbook_file.name}")
+        history.record(checkpoint, test_host, 'convert', timeout, timeout, timed_out=True)
+        print(f"❌ Test timed out for {playbook_file.name} after {timeout}s")
         return False
     except Exception as e:
         print(f"❌ Error testing {playbook_file.name}: {e}")
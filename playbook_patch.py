@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Patch-Based Playbook Enhancement
+
+In patch mode a retry does not have the reasoner emit the entire playbook
+again (often 300+ lines); the model only returns edit blocks for the tasks
+that need to change:
+
+    REPLACE TASK: Req 2 - Check sshd Match blocks
+    ```yaml
+    - name: Req 2 - Check sshd Match blocks
+      shell: ...
+    ```
+
+    INSERT AFTER TASK: Req 2 - Check sshd Match blocks
+    ```yaml
+    - name: Store requirement 2 details
+      set_fact: ...
+    ```
+
+    INSERT BEFORE TASK: <task name>   (same as INSERT AFTER, placed before)
+
+    DELETE TASK: <task name>
+
+Edits are applied to the playbook text (tasks are located by their exact
+name), so comments, block scalars and formatting of untouched tasks are kept.
+The result must still parse as YAML; any problem raises PlaybookPatchError so
+the caller can fall back to full regeneration.
+
+Usage:
+    edits = parse_playbook_patch(llm_response)
+    new_playbook = apply_playbook_patch(current_playbook, edits)
+"""
+
+import re
+import textwrap
+
+import yaml
+
+
+PATCH_OPERATIONS = {
+    'REPLACE TASK': 'replace',
+    'INSERT BEFORE TASK': 'insert_before',
+    'INSERT AFTER TASK': 'insert_after',
+    'DELETE TASK': 'delete'
+}
+
+EDIT_HEADER_PATTERN = re.compile(
+    r'^\s*\**\s*(REPLACE TASK|INSERT BEFORE TASK|INSERT AFTER TASK|DELETE TASK)\s*\**\s*:\s*(.+?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+YAML_FENCE_PATTERN = re.compile(r'```(?:ya?ml)?[ \t]*\n(.*?)```', re.DOTALL | re.IGNORECASE)
+TASKS_KEY_PATTERN = re.compile(r'^(\s*)tasks:\s*(#.*)?$')
+LIST_ITEM_PATTERN = re.compile(r'^(\s*)-\s')
+NAME_PATTERN = re.compile(r'^\s*(?:-\s+)?name:\s*(.+?)\s*$')
+
+
+class PlaybookPatchError(ValueError):
+    """Raised when a patch response can't be parsed or applied."""
+
+
+def _normalize_name(name: str) -> str:
+    """Normalize a task name for matching (quotes, markdown, whitespace)."""
+    name = name.strip().strip('`*').strip()
+    if len(name) >= 2 and name[0] == name[-1] and name[0] in '"\'':
+        name = name[1:-1]
+    return ' '.join(name.split())
+
+
+def _indent_of(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _is_blank_or_comment(line: str) -> bool:
+    stripped = line.strip()
+    return not stripped or stripped.startswith('#')
+
+
+def locate_tasks(playbook: str) -> list[dict]:
+    """
+    Find the top-level entries of every play's `tasks:` list.
+
+    Args:
+        playbook: Playbook YAML text
+
+    Returns:
+        list: [{'name', 'start', 'end', 'indent'}, ...] - line ranges [start, end)
+              in playbook.split('\\n'); comments directly above a task belong to it
+    """
+    lines = playbook.split('\n')
+    tasks = []
+    i = 0
+    while i < len(lines):
+        key_match = TASKS_KEY_PATTERN.match(lines[i])
+        if not key_match:
+            i += 1
+            continue
+        key_indent = len(key_match.group(1))
+
+        # First list item after "tasks:" sets the item indentation
+        j = i + 1
+        while j < len(lines) and _is_blank_or_comment(lines[j]):
+            j += 1
+        item_match = LIST_ITEM_PATTERN.match(lines[j]) if j < len(lines) else None
+        if not item_match or len(item_match.group(1)) < key_indent:
+            i = j
+            continue
+        item_indent = len(item_match.group(1))
+
+        # Split the section into items
+        section_tasks = []
+        k = j
+        while k < len(lines):
+            line = lines[k]
+            if not _is_blank_or_comment(line):
+                indent = _indent_of(line)
+                if indent < item_indent or (indent == item_indent and not LIST_ITEM_PATTERN.match(line)):
+                    break
+                if indent == item_indent:
+                    if section_tasks:
+                        section_tasks[-1]['end'] = k
+                    section_tasks.append({'name': None, 'start': k, 'end': None, 'indent': item_indent})
+            k += 1
+        if section_tasks:
+            section_tasks[-1]['end'] = k
+
+        for task in section_tasks:
+            # Trailing blank/comment lines at item level belong to the next task
+            while task['end'] > task['start'] + 1 and _is_blank_or_comment(lines[task['end'] - 1]) \
+                    and _indent_of(lines[task['end'] - 1]) <= item_indent:
+                task['end'] -= 1
+            for line in lines[task['start']:task['end']]:
+                if _indent_of(line) in (item_indent, item_indent + 2):
+                    name_match = NAME_PATTERN.match(line)
+                    if name_match:
+                        task['name'] = _normalize_name(name_match.group(1))
+                        break
+        # Attach the comment lines above each task (after the previous task) to it
+        for prev, task in zip(section_tasks, section_tasks[1:]):
+            task['start'] = prev['end']
+        tasks.extend(section_tasks)
+        i = k
+    return tasks
+
+
+def parse_playbook_patch(response: str) -> list[dict]:
+    """
+    Parse the edit blocks of a patch response.
+
+    Args:
+        response: LLM response text
+
+    Returns:
+        list: [{'op', 'task', 'content'}, ...] in response order ('content' is None for deletes)
+
+    Raises:
+        PlaybookPatchError: If no edit blocks are found or an edit is missing its YAML
+    """
+    headers = list(EDIT_HEADER_PATTERN.finditer(response))
+    if not headers:
+        raise PlaybookPatchError("no REPLACE/INSERT/DELETE TASK blocks in response")
+
+    edits = []
+    for n, header in enumerate(headers):
+        op = PATCH_OPERATIONS[' '.join(header.group(1).upper().split())]
+        body_end = headers[n + 1].start() if n + 1 < len(headers) else len(response)
+        body = response[header.end():body_end]
+        content = None
+        if op != 'delete':
+            fence = YAML_FENCE_PATTERN.search(body)
+            if not fence or not fence.group(1).strip():
+                raise PlaybookPatchError(f"{header.group(1).upper()} '{header.group(2)}' has no ```yaml block")
+            content = fence.group(1)
+        edits.append({'op': op, 'task': _normalize_name(header.group(2)), 'content': content})
+    return edits
+
+
+def _reindent_task(content: str, indent: int) -> list[str]:
+    """Re-indent a task snippet from the model to the playbook's task indentation."""
+    snippet = textwrap.dedent(content.expandtabs(2)).strip('\n')
+    if snippet.startswith('tasks:'):
+        snippet = textwrap.dedent(snippet[len('tasks:'):]).strip('\n')
+    if not snippet.lstrip().startswith('- '):
+        raise PlaybookPatchError("task snippet must be a YAML list item starting with '- '")
+    try:
+        parsed = yaml.safe_load(snippet)
+    except yaml.YAMLError as e:
+        raise PlaybookPatchError(f"task snippet is not valid YAML: {e}") from e
+    if not isinstance(parsed, list) or not all(isinstance(task, dict) for task in parsed):
+        raise PlaybookPatchError("task snippet must be a list of task mappings")
+    return [(' ' * indent + line) if line.strip() else '' for line in snippet.split('\n')]
+
+
+def apply_playbook_patch(playbook: str, edits: list[dict]) -> str:
+    """
+    Apply parsed edit blocks to a playbook.
+
+    Args:
+        playbook: Current playbook YAML text
+        edits: Edits returned by parse_playbook_patch()
+
+    Returns:
+        str: Patched playbook
+
+    Raises:
+        PlaybookPatchError: If a task is missing/ambiguous, edits conflict, or the
+                            patched playbook is not valid YAML
+    """
+    lines = playbook.split('\n')
+    tasks = locate_tasks(playbook)
+    by_name = {}
+    for task in tasks:
+        if task['name']:
+            by_name.setdefault(task['name'], []).append(task)
+
+    # Resolve every edit against the original task list before changing anything
+    replacements = {}   # task start -> replacement lines ([] for delete)
+    before = {}         # task start -> inserted lines
+    after = {}          # task start -> inserted lines
+    for edit in edits:
+        matches = by_name.get(edit['task'], [])
+        if not matches:
+            raise PlaybookPatchError(f"task not found: '{edit['task']}'")
+        if len(matches) > 1:
+            raise PlaybookPatchError(f"task name is not unique: '{edit['task']}'")
+        task = matches[0]
+        if edit['op'] in ('replace', 'delete'):
+            if task['start'] in replacements:
+                raise PlaybookPatchError(f"task edited more than once: '{edit['task']}'")
+            replacements[task['start']] = [] if edit['op'] == 'delete' else _reindent_task(edit['content'], task['indent'])
+        elif edit['op'] == 'insert_before':
+            before.setdefault(task['start'], []).extend(_reindent_task(edit['content'], task['indent']))
+        else:
+            after.setdefault(task['start'], []).extend(_reindent_task(edit['content'], task['indent']))
+
+    patched = []
+    position = 0
+    for task in tasks:
+        patched.extend(lines[position:task['start']])
+        original = lines[task['start']:task['end']]
+        patched.extend(before.get(task['start'], []))
+        if task['start'] in replacements and not replacements[task['start']]:
+            pass  # Deleted together with its comment lines
+        elif task['start'] in replacements:
+            # Keep the comment lines above the task, replace the task itself
+            leading = 0
+            while leading < len(original) and _is_blank_or_comment(original[leading]):
+                leading += 1
+            patched.extend(original[:leading])
+            patched.extend(replacements[task['start']])
+        else:
+            patched.extend(original)
+        patched.extend(after.get(task['start'], []))
+        position = task['end']
+    patched.extend(lines[position:])
+    new_playbook = '\n'.join(patched)
+
+    try:
+        plays = yaml.safe_load(new_playbook)
+    except yaml.YAMLError as e:
+        raise PlaybookPatchError(f"patched playbook is not valid YAML: {e}") from e
+    if not isinstance(plays, list) or not all(isinstance(play, dict) for play in plays):
+        raise PlaybookPatchError("patched playbook is not a list of plays")
+    for play in plays:
+        if not isinstance(play.get('tasks', []), list):
+            raise PlaybookPatchError("patched play 'tasks' is not a list")
+    return new_playbook
+
+
+def list_task_names(playbook: str) -> list[str]:
+    """Names of the top-level tasks (for showing the model which names it can target)."""
+    return [task['name'] for task in locate_tasks(playbook) if task['name']]
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+In-Process Playbook Pre-Flight Validation
+
+A syntax check through `ansible-navigator run --syntax-check` costs an
+interpreter and possibly a container start-up, while many generated playbooks
+fail on problems that can be found locally in milliseconds:
+
+    - YAML that does not parse (or is not a list of plays)
+    - Jinja2 that does not parse: unbalanced {% if %}/{% for %} blocks, stray
+      braces, and bash `${#var}` read as the start of a Jinja2 comment
+    - requirement variables that do not line up with the requirements:
+      status_N/data_N/task_N_* for a requirement that does not exist, or
+      status_N/data_N used (e.g. in the compliance report) but never set
+      (skipped when the playbook can set variables the check cannot see:
+      vars_files, include_vars, included tasks/roles, templated names)
+
+Only playbooks that pass these checks are sent to ansible-navigator; failures
+come back as a structured error list, formatted as the syntax-check error
+message so the retry feedback to the LLM has one format.
+
+Jinja2 templates are parsed, not rendered, so unknown filters/tests (Ansible
+adds its own) and runtime values are left to ansible-navigator. When Jinja2
+is not installed the Jinja2 checks are skipped.
+
+Usage:
+    errors = preflight_playbook(playbook_content, requirements)
+    if errors:
+        print(format_preflight_errors(errors))
+"""
+
+import re
+
+import yaml
+
+
+# Task keywords Ansible evaluates as bare Jinja2 expressions
+CONDITIONAL_KEYS = ('when', 'failed_when', 'changed_when', 'until')
+
+# Task lists of a play and of a block
+PLAY_TASK_KEYS = ('pre_tasks', 'tasks', 'post_tasks', 'handlers')
+BLOCK_TASK_KEYS = ('block', 'rescue', 'always')
+
+SET_FACT_MODULES = ('set_fact', 'ansible.builtin.set_fact', 'ansible.legacy.set_fact')
+
+# Task modules that set variables whose names are not in the playbook itself
+OPAQUE_VARIABLE_MODULES = tuple(
+    f"{prefix}{module}"
+    for prefix in ('', 'ansible.builtin.', 'ansible.legacy.')
+    for module in ('include_vars', 'include_tasks', 'import_tasks', 'include_role', 'import_role')
+)
+
+REQUIREMENT_VAR_PATTERN = re.compile(r'\b(status|data|rationale)_0*(\d+)\b')
+TASK_VAR_PATTERN = re.compile(r'\btask_0*(\d+)_[A-Za-z]\w*')
+KEY_VALUE_PATTERN = re.compile(r'(?:^|\s)([A-Za-z_]\w*)=')  # set_fact: status_1=PASS data_1=x
+BASH_LENGTH_PATTERN = re.compile(r'\$\{#')
+
+
+class _UnsafeText(str):
+    """A `!unsafe` string: Ansible never templates it."""
+
+
+class _PlaybookLoader(yaml.SafeLoader):
+    """SafeLoader that accepts the Ansible-specific `!unsafe` and `!vault` tags."""
+
+
+_PlaybookLoader.add_constructor('!unsafe', lambda loader, node: _UnsafeText(loader.construct_scalar(node)))
+_PlaybookLoader.add_constructor('!vault', lambda loader, node: _UnsafeText(loader.construct_scalar(node)))
+
+
+def _error(check: str, location: str, message: str) -> dict:
+    return {'check': check, 'location': location, 'message': message}
+
+
+# =============================================================================
+# Playbook walking
+# =============================================================================
+
+def _task_label(task: dict, number: int) -> str:
+    name = task.get('name')
+    return f"task '{name}'" if name else f"task #{number}"
+
+
+def _iter_tasks(tasks, parent: str):
+    """Yield (location, task) for every task, descending into block/rescue/always."""
+    if not isinstance(tasks, list):
+        return
+    for number, task in enumerate(tasks, 1):
+        if not isinstance(task, dict):
+            continue
+        location = f"{parent} > {_task_label(task, number)}"
+        yield location, task
+        for key in BLOCK_TASK_KEYS:
+            yield from _iter_tasks(task.get(key), f"{location} > {key}")
+
+
+def _iter_strings(value, path: str):
+    """Yield (path, string) for every string value below value (keys are not templated)."""
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _iter_strings(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _iter_strings(item, f"{path}[{index}]")
+
+
+def _iter_templates(plays: list):
+    """
+    Yield (location, template source, is_conditional) for every string Ansible templates.
+
+    Conditionals (when/failed_when/...) are bare expressions; other strings
+    are only templated by Ansible when they contain Jinja2 markup.
+    """
+    for play_number, play in enumerate(plays, 1):
+        play_location = f"play {play_number}"
+        for path, text in _iter_strings(play.get('vars'), 'vars'):
+            yield f"{play_location} > {path}", text, False
+        for task_key in PLAY_TASK_KEYS:
+            for location, task in _iter_tasks(play.get(task_key), f"{play_location} > {task_key}"):
+                for key, value in task.items():
+                    if key in BLOCK_TASK_KEYS:
+                        continue
+                    if key in CONDITIONAL_KEYS:
+                        for condition in (value if isinstance(value, list) else [value]):
+                            if isinstance(condition, str) and not isinstance(condition, _UnsafeText):
+                                yield f"{location} > {key}", condition, True
+                        continue
+                    for path, text in _iter_strings(value, key):
+                        yield f"{location} > {path}", text, False
+
+
+# =============================================================================
+# Checks
+# =============================================================================
+
+def _parse_playbook(playbook_content: str) -> tuple[list, list]:
+    """Parse the playbook YAML; returns (plays, errors)."""
+    try:
+        plays = yaml.load(playbook_content, Loader=_PlaybookLoader)
+    except yaml.YAMLError as e:
+        mark = getattr(e, 'problem_mark', None)
+        location = f"line {mark.line + 1}, column {mark.column + 1}" if mark else "playbook"
+        problem = getattr(e, 'problem', None) or str(e)
+        return [], [_error('yaml', location, f"YAML does not parse: {problem}")]
+
+    if not isinstance(plays, list) or not plays:
+        return [], [_error('yaml', 'playbook', "Playbook must be a non-empty YAML list of plays")]
+    errors = [
+        _error('yaml', f"play {number}", "Play must be a mapping with hosts and tasks")
+        for number, play in enumerate(plays, 1) if not isinstance(play, dict)
+    ]
+    return [play for play in plays if isinstance(play, dict)], errors
+
+
+def _jinja_environment():
+    """Jinja2 environment used only for parsing, or None when Jinja2 is not installed."""
+    try:
+        import jinja2
+    except ImportError:
+        return None
+    return jinja2.Environment(extensions=['jinja2.ext.do', 'jinja2.ext.loopcontrols'])
+
+
+def _check_templates(plays: list) -> list:
+    """Parse every templated string (and bare conditional) with Jinja2."""
+    environment = _jinja_environment()
+    if environment is None:
+        return []
+    import jinja2
+
+    errors = []
+    for location, text, is_conditional in _iter_templates(plays):
+        if isinstance(text, _UnsafeText):
+            continue
+        if is_conditional:
+            if '{{' in text or '{%' in text:
+                continue  # templated conditional: Ansible warns and templates it as a string
+            source = f"{{% if {text} %}}{{% endif %}}"
+        elif '{{' in text or '{%' in text or '{#' in text:
+            source = text
+        else:
+            continue
+        try:
+            environment.parse(source)
+        except jinja2.TemplateSyntaxError as e:
+            message = f"Jinja2 does not parse: {e.message}"
+            if is_conditional:
+                message += f" (condition: {text.strip()[:80]})"
+            else:
+                lines = text.splitlines()
+                if e.lineno and 0 < e.lineno <= len(lines):
+                    message += f" (template line {e.lineno}: {lines[e.lineno - 1].strip()[:80]})"
+            if 'comment' in (e.message or '') and BASH_LENGTH_PATTERN.search(text):
+                message += ("; bash `${#var}` starts a Jinja2 comment - wrap the script in "
+                            "{% raw %}...{% endraw %}")
+            errors.append(_error('jinja2', location, message))
+    return errors
+
+
+def _requirement_indices(requirements: list) -> list:
+    """
+    Requirement numbers, by position (1..len) as the generation prompts number them.
+
+    An explicit "N. " prefix ("2. Collect OS info" -> 2) overrides the position.
+    """
+    indices = []
+    for position, requirement in enumerate(requirements or [], 1):
+        match = re.match(r'^(\d+)\.\s', str(requirement).strip())
+        indices.append(int(match.group(1)) if match else position)
+    return sorted(set(indices))
+
+
+def _defined_variables(plays: list) -> tuple[set, bool]:
+    """
+    Variables a playbook sets: play/task vars, set_fact keys (dict or key=value form) and register names.
+
+    Returns:
+        tuple: (names, complete) - complete is False when the playbook may also set
+        variables whose names cannot be read from it (vars_files, include_vars,
+        included tasks/roles, templated set_fact/vars keys)
+    """
+    defined = set()
+    complete = True
+    for play in plays:
+        if play.get('vars_files') or play.get('roles'):
+            complete = False
+        if isinstance(play.get('vars'), dict):
+            defined.update(play['vars'])
+        for task_key in PLAY_TASK_KEYS:
+            for _, task in _iter_tasks(play.get(task_key), task_key):
+                if any(module in task for module in OPAQUE_VARIABLE_MODULES):
+                    complete = False
+                if isinstance(task.get('vars'), dict):
+                    defined.update(task['vars'])
+                if isinstance(task.get('register'), str):
+                    defined.add(task['register'])
+                for module in SET_FACT_MODULES:
+                    if isinstance(task.get(module), dict):
+                        defined.update(task[module])
+                    elif isinstance(task.get(module), str):
+                        defined.update(KEY_VALUE_PATTERN.findall(task[module]))
+    names = {str(name) for name in defined}
+    if any('{{' in name or '{%' in name for name in names):
+        complete = False
+    return names, complete
+
+
+def _normalized(names: set, prefix: str) -> set:
+    """Requirement indices of the prefix_N variables in names (status_01 and status_1 are the same)."""
+    indices = set()
+    for name in names:
+        match = re.fullmatch(rf'{prefix}_0*(\d+)', name)
+        if match:
+            indices.add(int(match.group(1)))
+    return indices
+
+
+def _check_requirement_variables(plays: list, requirements: list) -> list:
+    """Cross-check status_N/data_N/task_N_* usage against the requirement numbers."""
+    indices = _requirement_indices(requirements)
+    if not indices:
+        return []
+    known = set(indices)
+    defined, defined_complete = _defined_variables(plays)
+
+    # Variables referenced from templates and conditionals, with the first place each is used
+    referenced = {}
+    for location, text, is_conditional in _iter_templates(plays):
+        if isinstance(text, _UnsafeText) or not (is_conditional or '{{' in text or '{%' in text):
+            continue
+        for match in REQUIREMENT_VAR_PATTERN.finditer(text):
+            referenced.setdefault((match.group(1), int(match.group(2))), location)
+        for match in TASK_VAR_PATTERN.finditer(text):
+            referenced.setdefault(('task', int(match.group(1))), location)
+
+    numbered = ', '.join(str(index) for index in indices)
+    errors = []
+    for (kind, index), location in sorted(referenced.items(), key=lambda item: (item[0][1], item[0][0])):
+        if index not in known:
+            errors.append(_error('variables', location,
+                                 f"{kind}_{index} refers to requirement {index}, but the requirements are numbered {numbered}"))
+        elif kind in ('status', 'data') and defined_complete and index not in _normalized(defined, kind):
+            errors.append(_error('variables', location,
+                                 f"{kind}_{index} is used but never set (no vars/set_fact/register defines it)"))
+    return errors
+
+
+def preflight_playbook(playbook_content: str, requirements: list = None) -> list:
+    """
+    Validate a playbook locally before running ansible-navigator --syntax-check.
+
+    Args:
+        playbook_content: Playbook YAML text
+        requirements: Playbook requirements, numbered by position (or by an explicit
+            "N. " prefix) and cross-checked against the status_N/data_N/task_N_*
+            variables; None skips that check
+
+    Returns:
+        list: Errors as {'check': 'yaml'|'jinja2'|'variables', 'location': str, 'message': str};
+        empty when the playbook is locally clean
+    """
+    plays, errors = _parse_playbook(playbook_content)
+    if not plays:
+        return errors
+    errors += _check_templates(plays)
+    errors += _check_requirement_variables(plays, requirements)
+    return errors
+
+
+def format_preflight_errors(errors: list) -> str:
+    """Format pre-flight errors as a syntax-check error message (one issue per line)."""
+    lines = [f"Pre-flight validation failed ({len(errors)} issue(s)):"]
+    for error in errors:
+        lines.append(f"- [{error['check']}] {error['location']}: {error['message']}")
+    return "\n".join(lines)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Precomputed Playbook Requirements Store
+
+Requirement extraction (generate_playbook_requirements_from_checkpoint()) only
+depends on the checkpoint text in the benchmark JSON. This script extracts
+requirements for all checkpoints once, in parallel, and stores them in a
+sidecar file next to the benchmark JSON, so batch runs do not call the LLM
+for them again:
+
+    resources/CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.requirements.json
+
+    {"version": 1,
+     "benchmark": "CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.json",
+     "entries": {"1.1.1.1": {"source_sha256": "...", "objective": "...",
+                             "requirements": [...], "generated_at": "..."}}}
+
+Entries are keyed by checkpoint ID and the sha256 of the source text used for
+extraction (title, rationale, audit and remediation procedures). A lookup only
+hits when the hash still matches, so re-running the precompute (or a batch run
+of auto_rhel9_cis_playbook.py) regenerates just the checkpoints whose text
+changed in the benchmark JSON.
+
+Usage:
+    python3 precompute_requirements.py                 # the batch run's DEFAULT_JSON_PATH
+    python3 precompute_requirements.py --workers 8
+    python3 precompute_requirements.py --json resources/CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.json
+    python3 precompute_requirements.py --force          # regenerate every entry
+
+    store = RequirementsStore.for_benchmark(json_path)
+    playbook_spec = store.get_or_generate(checkpoint_info)
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from datetime import datetime
+from dotenv import load_dotenv
+
+# The benchmark JSON the batch run (auto_rhel9_cis_playbook.py) reads, so both use the same sidecar
+from single_rhel9_cis_checkpoint_to_playbook import DEFAULT_JSON_PATH
+
+load_dotenv()
+
+
+STORE_VERSION = 1
+STORE_SUFFIX = ".requirements.json"
+
+# checkpoint_info fields that generate_playbook_requirements_from_checkpoint() reads
+SOURCE_FIELDS = ('checkpoint_id', 'title', 'rationale', 'audit_procedure', 'remediation_procedure')
+
+# Generic requirements returned when extraction fails; never stored so the next run retries
+FALLBACK_REQUIREMENT_PREFIX = "Check system configuration for CIS "
+
+
+def store_path_for(json_path) -> Path:
+    """Sidecar store path for a benchmark JSON file."""
+    json_path = Path(json_path)
+    return json_path.with_name(json_path.stem + STORE_SUFFIX)
+
+
+def source_hash(checkpoint_info: dict) -> str:
+    """
+    Hash the checkpoint text requirement extraction depends on.
+
+    Args:
+        checkpoint_info: Dict returned by get_checkpoint_info_from_json()
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    digest = hashlib.sha256()
+    for field in SOURCE_FIELDS:
+        digest.update(field.encode('utf-8'))
+        digest.update(b"\x00")
+        digest.update(str(checkpoint_info.get(field) or '').encode('utf-8'))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _is_fallback(playbook_spec: dict) -> bool:
+    """Check whether extraction fell back to the generic requirements."""
+    return any(req.startswith(FALLBACK_REQUIREMENT_PREFIX) for req in playbook_spec.get('requirements', []))
+
+
+class RequirementsStore:
+    """Sidecar JSON store of extracted requirements. Safe to use from concurrent workers."""
+
+    def __init__(self, path, benchmark: str = ""):
+        """
+        Load the store (a missing, unreadable, corrupt or outdated file starts empty).
+
+        Args:
+            path: Path to the sidecar JSON file
+            benchmark: Benchmark JSON filename recorded in the store
+        """
+        self.path = Path(path)
+        self.benchmark = benchmark
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.stats = {'hits': 0, 'stale': 0, 'generated': 0}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == STORE_VERSION and isinstance(data.get('entries'), dict):
+                self.entries = data['entries']
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_benchmark(cls, json_path) -> "RequirementsStore":
+        """Open the sidecar store of a benchmark JSON file."""
+        return cls(store_path_for(json_path), benchmark=Path(json_path).name)
+
+    def get(self, checkpoint_info: dict) -> dict:
+        """
+        Look up stored requirements for a checkpoint.
+
+        Returns:
+            dict: {'objective', 'requirements'} (a copy), or None if missing or the source text changed
+        """
+        checkpoint_id = checkpoint_info.get('checkpoint_id')
+        with self._lock:
+            entry = self.entries.get(checkpoint_id)
+            if entry is None:
+                return None
+            if (not isinstance(entry, dict) or not isinstance(entry.get('requirements'), list)
+                    or entry.get('source_sha256') != source_hash(checkpoint_info)):
+                self.stats['stale'] += 1
+                return None
+            self.stats['hits'] += 1
+            return {'objective': entry.get('objective', ''), 'requirements': list(entry['requirements'])}
+
+    def put(self, checkpoint_info: dict, playbook_spec: dict, save: bool = True):
+        """
+        Store the requirements for a checkpoint (generic fallback results are skipped).
+
+        Args:
+            checkpoint_info: Checkpoint the requirements were generated from
+            playbook_spec: {'objective', 'requirements'} from generate_playbook_requirements_from_checkpoint()
+            save: If True, write the store to disk immediately
+        """
+        if not playbook_spec.get('requirements') or _is_fallback(playbook_spec):
+            return
+        with self._lock:
+            self.entries[checkpoint_info.get('checkpoint_id')] = {
+                'source_sha256': source_hash(checkpoint_info),
+                'objective': playbook_spec.get('objective', ''),
+                'requirements': list(playbook_spec['requirements']),
+                'generated_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self.stats['generated'] += 1
+        if save:
+            self.save()
+
+    def get_or_generate(self, checkpoint_info: dict) -> dict:
+        """
+        Return stored requirements, regenerating (and storing) them if missing or stale.
+
+        Args:
+            checkpoint_info: Dict returned by get_checkpoint_info_from_json()
+
+        Returns:
+            dict: {'objective': str, 'requirements': list[str]}
+        """
+        playbook_spec = self.get(checkpoint_info)
+        if playbook_spec is not None:
+            print(f"    📦 Using precomputed requirements for {checkpoint_info.get('checkpoint_id')} ({self.path.name})")
+            return playbook_spec
+
+        from single_rhel9_cis_checkpoint_to_playbook import generate_playbook_requirements_from_checkpoint
+        playbook_spec = generate_playbook_requirements_from_checkpoint(checkpoint_info)
+        self.put(checkpoint_info, playbook_spec)
+        return {'objective': playbook_spec.get('objective', ''), 'requirements': list(playbook_spec.get('requirements', []))}
+
+    def save(self):
+        """Write the store atomically (sorted by checkpoint ID for readable diffs)."""
+        with self._lock:
+            data = {
+                'version': STORE_VERSION,
+                'benchmark': self.benchmark,
+                'entries': dict(sorted(self.entries.items(), key=lambda item: _id_sort_key(item[0])))
+            }
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"⚠️  Requirements store write failed: {e}")
+
+    def summary(self) -> str:
+        """One-line usage summary for run reports."""
+        return (f"hits {self.stats['hits']}, regenerated {self.stats['generated']} "
+                f"(stale {self.stats['stale']}), {len(self.entries)} stored")
+
+
+def _id_sort_key(checkpoint_id: str):
+    """Sort checkpoint IDs numerically (1.1.2 before 1.1.10)."""
+    return [int(part) if part.isdigit() else 0 for part in str(checkpoint_id).split('.')]
+
+
+# =============================================================================
+# Precompute Command
+# =============================================================================
+
+def precompute_requirements(json_path, workers: int = 4, force: bool = False) -> RequirementsStore:
+    """
+    Extract requirements for every checkpoint in a benchmark JSON file.
+
+    Args:
+        json_path: Path to the benchmark JSON file
+        workers: Number of checkpoints to extract concurrently
+        force: If True, regenerate entries even when the source text is unchanged
+
+    Returns:
+        RequirementsStore: The updated store
+    """
+    from single_rhel9_cis_checkpoint_to_playbook import (
+        load_checkpoint_data,
+        get_checkpoint_info_from_json,
+        generate_playbook_requirements_from_checkpoint
+    )
+
+    checkpoint_data = load_checkpoint_data(Path(json_path))
+    store = RequirementsStore.for_benchmark(json_path)
+    print(f"📦 Requirements store: {store.path} ({len(store.entries)} entries)")
+
+    pending = []
+    for cp in checkpoint_data:
+        checkpoint_info = get_checkpoint_info_from_json(checkpoint_data, cp['id'])
+        if checkpoint_info is None:
+            continue
+        if force or store.get(checkpoint_info) is None:
+            pending.append(checkpoint_info)
+
+    print(f"✅ {len(checkpoint_data) - len(pending)} up to date, {len(pending)} to extract with {workers} worker(s)")
+    if not pending:
+        return store
+
+    failed = []
+    completed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate_playbook_requirements_from_checkpoint, checkpoint_info): checkpoint_info
+            for checkpoint_info in pending
+        }
+        for future in as_completed(futures):
+            checkpoint_info = futures[future]
+            checkpoint_id = checkpoint_info['checkpoint_id']
+            completed += 1
+            try:
+                playbook_spec = future.result()
+            except Exception as e:
+                failed.append(checkpoint_id)
+                print(f"❌ [{completed}/{len(pending)}] {checkpoint_id}: {e}")
+                continue
+            if _is_fallback(playbook_spec):
+                failed.append(checkpoint_id)
+                print(f"⚠️  [{completed}/{len(pending)}] {checkpoint_id}: extraction fell back to generic requirements, not stored")
+                continue
+            store.put(checkpoint_info, playbook_spec, save=False)
+            print(f"✅ [{completed}/{len(pending)}] {checkpoint_id}: {len(playbook_spec['requirements'])} requirement(s)")
+            # Save periodically so an interrupted run keeps its progress
+            if completed % 10 == 0:
+                store.save()
+
+    store.save()
+    print(f"\n📦 Stored {len(store.entries)} checkpoint(s) in {store.path}")
+    if failed:
+        print(f"⚠️  {len(failed)} checkpoint(s) not stored (will be extracted at run time): {', '.join(sorted(failed, key=_id_sort_key))}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Precompute playbook requirements for every checkpoint of a CIS benchmark JSON file'
+    )
+    parser.add_argument(
+        '--json',
+        type=str,
+        default=str(DEFAULT_JSON_PATH),
+        help=f'Benchmark JSON file (default: {DEFAULT_JSON_PATH.relative_to(Path(__file__).parent)}, '
+             f'the one the batch run reads)'
+    )
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=4,
+        help='Number of checkpoints to extract concurrently (default: 4)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Regenerate all entries, even when the checkpoint text is unchanged'
+    )
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        precompute_requirements(args.json, workers=args.workers, force=args.force)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted; entries extracted so far were saved periodically")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Failure-Fingerprint Retry Controller for the Playbook Workflow
+
+A retry that fails with the very same "command not found" or connection
+error as the one before will most likely fail the same way again, and a
+fixed attempt budget would keep looping until it is used up.
+
+Every failure that sends the workflow back to generation is reduced to a
+fingerprint:
+
+    {'id': '3f9c0a1b2d', 'stage': 'test', 'error_class': 'Command not found',
+     'task': 'Req 2 - Check auditd rules', 'pattern': 'auditctl: command not found'}
+
+    stage        syntax, structure, test or analysis (the node that failed)
+    error_class  normalized class from one MultiPatternScanner pass (CAUSE_PATTERNS)
+    task         the TASK [...] the failure belongs to
+    pattern      the failure message with numbers, hex ids and addresses masked,
+                 so "rc=127 on 192.168.122.16" and "rc=127 on 192.168.122.17" match
+
+decide_retry() compares the new fingerprint with the previous ones: the
+second identical failure in a row escalates (the next generation is told the
+approach failed twice and must change, and skips the LLM cache), the
+RETRY_REPEAT_LIMIT-th stops the workflow instead of burning the rest of the
+budget. The budget itself comes from retry_budget(), scaled by how hard the
+checkpoint is (requirements and audit procedure size), so easy checkpoints
+get fewer attempts than hard ones; the caller only passes a small floor
+(one attempt per requirement). Causes, stages and budgets are counted for
+the batch summary (print_retry_stats()).
+
+Environment variables:
+    RETRY_REPEAT_LIMIT         Identical failures in a row that stop the workflow (default: 3, 0 = never stop)
+    RETRY_BUDGET_SCALE         Multiplier of the difficulty budgets (default: 1.0)
+    RETRY_CONTROLLER_DISABLE   Set to 1 to only record fingerprints (never escalate or stop)
+
+Usage:
+    max_retries, difficulty = retry_budget(requirements, audit_procedure, min_budget=len(requirements))
+    fingerprint = failure_fingerprint('test', test_output)
+    decision, streak = decide_retry(previous_fingerprints, fingerprint)
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import Counter
+
+from output_scanner import MultiPatternScanner, first_hit
+
+
+DEFAULT_REPEAT_LIMIT = 3
+ESCALATE_STREAK = 2             # identical failures in a row that escalate
+
+# Attempt budget per checkpoint difficulty (before RETRY_BUDGET_SCALE)
+DIFFICULTY_BUDGETS = {'easy': 6, 'medium': 9, 'hard': 12}
+EASY_MAX_SCORE = 3
+MEDIUM_MAX_SCORE = 6
+AUDIT_LINES_PER_POINT = 15      # audit procedure lines worth one requirement
+AUDIT_SCRIPT_POINTS = 2         # audit procedure that is a shell script
+
+MAX_PATTERN_CHARS = 160
+
+# Failure causes in priority order: (pattern, error class)
+CAUSE_PATTERNS = [
+    ("CONNECTION_ERROR", "Connection error"),
+    ("UNREACHABLE!", "Connection error"),
+    ("Connection timed out", "Connection error"),
+    ("timed out", "Timeout"),
+    ("command not found", "Command not found"),
+    ("No such file or directory", "File not found"),
+    ("is undefined", "Undefined variable"),
+    ("undefined variable", "Undefined variable"),
+    ("has no attribute", "Undefined attribute"),
+    ("template error", "Template error"),
+    ("TemplateSyntaxError", "Template error"),
+    ("Syntax Error", "YAML syntax error"),
+    ("syntax error", "YAML syntax error"),
+    ("Permission denied", "Permission denied"),
+    ("MODULE FAILURE", "Module failure"),
+    ("Unsupported parameters", "Invalid module arguments"),
+    ("couldn't resolve module", "Unknown module"),
+    ("Status misalignment", "Status misalignment"),
+    ("FAILED!", "Failed task"),
+    ("fatal:", "Failed task"),
+]
+
+_cause_scanner = MultiPatternScanner({'cause': CAUSE_PATTERNS})
+
+_TASK_RE = re.compile(r'TASK \[([^\]]*)\]')
+_BUG_RE = re.compile(r'PLAYBOOK BUG:\s*([^\n]+?)(?:\s+-\s+|\n|$)')
+_MSG_RE = re.compile(r'"msg":\s*"((?:[^"\\]|\\.)*)"')
+_REQ_NUMBER_RE = re.compile(r'\breq(?:uirement)?\s*#?\s*(\d+)', re.IGNORECASE)
+_MASK_RES = (
+    (re.compile(r'\b0x[0-9a-f]+\b'), '#'),
+    (re.compile(r'\b[0-9a-f]{8,}\b'), '#'),
+    (re.compile(r'\d+'), '#'),
+    (re.compile(r'\s+'), ' '),
+)
+
+_retry_lock = threading.Lock()
+_retry_stats = {'retries': 0, 'escalated': 0, 'stopped': 0,
+                'causes': Counter(), 'stages': Counter(), 'budgets': Counter()}
+
+
+def is_retry_controller_enabled() -> bool:
+    """Check whether repeated failures escalate and stop the workflow."""
+    return os.environ.get('RETRY_CONTROLLER_DISABLE', '').lower() not in ('1', 'true', 'yes')
+
+
+def _repeat_limit() -> int:
+    try:
+        return max(0, int(os.environ.get('RETRY_REPEAT_LIMIT', DEFAULT_REPEAT_LIMIT)))
+    except ValueError:
+        return DEFAULT_REPEAT_LIMIT
+
+
+def _budget_scale() -> float:
+    try:
+        return max(0.1, float(os.environ.get('RETRY_BUDGET_SCALE', 1.0)))
+    except ValueError:
+        return 1.0
+
+
+# ============================================================================
+# Fingerprints
+# ============================================================================
+
+def normalize_failure_message(message: str) -> str:
+    """Lower-case a failure message and mask numbers, hex ids and whitespace runs."""
+    message = message.lower()
+    for regex, replacement in _MASK_RES:
+        message = regex.sub(replacement, message)
+    return message.strip()[:MAX_PATTERN_CHARS]
+
+
+def _failure_line(hit: dict) -> str:
+    """The message of a hit's line: the JSON "msg" of a fatal result, else the line itself."""
+    match = _MSG_RE.search(hit['context'][hit['context'].find(hit['line']):])
+    return match.group(1) if match else hit['line']
+
+
+def _structure_pattern(text: str) -> str:
+    """Requirement numbers on the FAIL lines of a structure analysis."""
+    failing = sorted({int(number) for line in text.split('\n') if 'FAIL' in line.upper()
+                      for number in _REQ_NUMBER_RE.findall(line)})
+    return 'fail req ' + ','.join(str(number) for number in failing) if failing else 'fail'
+
+
+def failure_fingerprint(stage: str, text: str, report=None) -> dict:
+    """
+    Reduce one failure to a fingerprint.
+
+    Args:
+        stage: Node that failed: 'syntax', 'structure', 'test' or 'analysis'
+        text: Its failure text (syntax error, structure analysis, test output or analysis message)
+        report: ComplianceReport of the run ('analysis' stage), None if not available
+
+    Returns:
+        dict: {'id', 'stage', 'error_class', 'task', 'pattern'}
+    """
+    text = text or ""
+    hits = _cause_scanner.scan(text, before=0, after=4)
+    hit = first_hit(hits, 'cause')
+    bug = _BUG_RE.search(text)
+    error_class = bug.group(1).strip() if bug else (hit['label'] if hit else f"{stage.capitalize()} failure")
+
+    task = ""
+    anchor = hit['start'] if hit else len(text)
+    tasks = list(_TASK_RE.finditer(text, 0, anchor))
+    if tasks:
+        task = tasks[-1].group(1).strip()
+
+    if stage == 'structure':
+        pattern = _structure_pattern(text)
+    elif stage == 'analysis' and report is not None and report.requirements:
+        statuses = report.requirement_statuses()
+        failing = [req for req in report.requirements if not req.is_overall and statuses.get(req.index) != 'PASS']
+        pattern = ' '.join(f"{index}:{status}" for index, status in sorted(statuses.items())) or 'no statuses'
+        if failing and not task:
+            task = failing[0].task or failing[0].title or ""
+    elif hit:
+        pattern = normalize_failure_message(_failure_line(hit))
+    else:
+        pattern = normalize_failure_message(next((line for line in text.split('\n') if line.strip()), ""))
+
+    key = json.dumps([stage, error_class, task, pattern])
+    return {
+        'id': hashlib.sha1(key.encode('utf-8')).hexdigest()[:10],
+        'stage': stage,
+        'error_class': error_class,
+        'task': task,
+        'pattern': pattern,
+    }
+
+
+# ============================================================================
+# Retry decisions
+# ============================================================================
+
+def repeat_streak(history: list, fingerprint: dict) -> int:
+    """Identical failures in a row ending with fingerprint (history holds the earlier ones)."""
+    streak = 1
+    for previous in reversed(history):
+        if previous.get('id') != fingerprint['id']:
+            break
+        streak += 1
+    return streak
+
+
+def decide_retry(history: list, fingerprint: dict) -> tuple:
+    """
+    Decide what to do about a failure.
+
+    Args:
+        history: Fingerprints of the earlier failures of this workflow, oldest first
+        fingerprint: The new failure
+
+    Returns:
+        tuple: (decision, streak) - decision is 'retry', 'escalate' (same failure twice
+        in a row, change the approach) or 'stop' (RETRY_REPEAT_LIMIT in a row)
+    """
+    streak = repeat_streak(history, fingerprint)
+    if not is_retry_controller_enabled():
+        return 'retry', streak
+    limit = _repeat_limit()
+    if limit and streak >= limit:
+        return 'stop', streak
+    if streak >= ESCALATE_STREAK:
+        return 'escalate', streak
+    return 'retry', streak
+
+
+def escalation_feedback(fingerprint: dict, streak: int) -> str:
+    """Generation feedback telling the LLM that its approach keeps failing the same way."""
+    task = f" in task '{fingerprint['task']}'" if fingerprint['task'] else ""
+    return (
+        f"REPEATED FAILURE: the last {streak} attempts failed the same way{task} "
+        f"({fingerprint['stage']} stage, {fingerprint['error_class']}: {fingerprint['pattern']}).\n"
+        f"Repeating the previous fix will fail again. Use a DIFFERENT approach for this part of the "
+        f"playbook (another module, command or check), and do not reuse the failing command as is."
+    )
+
+
+def describe_fingerprint(fingerprint: dict) -> str:
+    """One-line description of a fingerprint."""
+    task = f" [{fingerprint['task']}]" if fingerprint['task'] else ""
+    return f"{fingerprint['stage']}: {fingerprint['error_class']}{task} - {fingerprint['pattern'][:80]}"
+
+
+def record_retry(fingerprint: dict, decision: str):
+    """Count one failure (and its decision) for print_retry_stats()."""
+    with _retry_lock:
+        _retry_stats['retries'] += 1
+        _retry_stats['causes'][fingerprint['error_class']] += 1
+        _retry_stats['stages'][fingerprint['stage']] += 1
+        if decision == 'escalate':
+            _retry_stats['escalated'] += 1
+        elif decision == 'stop':
+            _retry_stats['stopped'] += 1
+
+
+# ============================================================================
+# Attempt budget
+# ============================================================================
+
+def checkpoint_difficulty(requirements: list, audit_procedure: str = None) -> str:
+    """
+    Rate how hard a checkpoint is to get right.
+
+    Args:
+        requirements: Checkpoint requirements
+        audit_procedure: CIS Benchmark audit procedure text
+
+    Returns:
+        str: 'easy', 'medium' or 'hard'
+    """
+    audit_procedure = audit_procedure or ""
+    score = len(requirements) + len(audit_procedure.strip().split('\n')) // AUDIT_LINES_PER_POINT
+    if '#!/' in audit_procedure or re.search(r'^\s*(?:for|while|if)\s.*(?:do|then)\s*$', audit_procedure, re.MULTILINE):
+        score += AUDIT_SCRIPT_POINTS
+    if score <= EASY_MAX_SCORE:
+        return 'easy'
+    if score <= MEDIUM_MAX_SCORE:
+        return 'medium'
+    return 'hard'
+
+
+def retry_budget(requirements: list, audit_procedure: str = None, min_budget: int = 0) -> tuple:
+    """
+    Attempt budget of a checkpoint, scaled by its difficulty.
+
+    Args:
+        requirements: Checkpoint requirements
+        audit_procedure: CIS Benchmark audit procedure text
+        min_budget: Floor of the budget, e.g. one attempt per requirement
+                    (RETRY_BUDGET_SCALE still applies)
+
+    Returns:
+        tuple: (max_retries, difficulty)
+    """
+    difficulty = checkpoint_difficulty(requirements, audit_procedure)
+    budget = max(1, round(max(DIFFICULTY_BUDGETS[difficulty], min_budget) * _budget_scale()))
+    with _retry_lock:
+        _retry_stats['budgets'][difficulty] += 1
+    return budget, difficulty
+
+
+# ============================================================================
+# Statistics
+# ============================================================================
+
+def get_retry_stats() -> dict:
+    """
+    Get the retry counts and histograms.
+
+    Returns:
+        dict: {'retries', 'escalated', 'stopped', 'causes', 'stages', 'budgets'}
+        (the histograms as plain dicts, most common first)
+    """
+    with _retry_lock:
+        stats = {key: (dict(value.most_common()) if isinstance(value, Counter) else value)
+                 for key, value in _retry_stats.items()}
+    return stats
+
+
+def print_retry_stats():
+    """Print the retry counts and the retry-cause histogram."""
+    stats = get_retry_stats()
+    budgets = ', '.join(f"{count} {difficulty}" for difficulty, count in stats['budgets'].items()) or 'none'
+    mode = "" if is_retry_controller_enabled() else " (escalation and stop disabled)"
+    print(f"🔁 Retry controller{mode}: {stats['retries']} retries, {stats['escalated']} escalated, "
+          f"{stats['stopped']} stopped on a repeated failure; budgets: {budgets}")
+    if not stats['causes']:
+        return
+    stages = ', '.join(f"{stage} {count}" for stage, count in stats['stages'].items())
+    print(f"   Retry stages: {stages}")
+    print("   Retry causes:")
+    width = max(len(cause) for cause in stats['causes'])
+    most = max(stats['causes'].values())
+    for cause, count in stats['causes'].items():
+        bar = '█' * max(1, round(count * 30 / most))
+        print(f"   {cause:<{width}}  {bar} {count}")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Run Journal for Automated CIS Playbook Batches
+
+Keeps an append-only JSONL journal (run_journal.jsonl) in the output directory
+so a batch run of auto_rhel9_cis_playbook.py / auto_rhel8_cis_playbook.py /
+auto_remediation_rhel9_cis_playbook.py can be resumed after a crash or Ctrl-C.
+
+Each line is one JSON record:
+    {"event": "run_start", "resume": false, "timestamp": "..."}
+    {"event": "checkpoint", "checkpoint": "...", "status": "pending", "attempt": 1, "started_at": "..."}
+    {"event": "checkpoint", "checkpoint": "...", "status": "success", "attempt": 1,
+     "filename": "...", "playbook_sha256": "...", "started_at": "...",
+     "finished_at": "...", "duration_sec": 42.1, "error": null}
+
+The last record for a checkpoint wins. A non-resume run_start record starts a
+new lineage, so only results recorded since the last fresh run are reused.
+
+Usage:
+    journal = RunJournal(output_dir / "run_journal.jsonl", resume=args.resume)
+    if journal.is_completed(checkpoint):
+        ...skip...
+    started = journal.start(checkpoint)
+    result = process_checkpoint_automated(...)
+    journal.finish(checkpoint, result, started)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+
+
+JOURNAL_FILENAME = "run_journal.jsonl"
+
+
+def playbook_sha256(filename: str) -> str:
+    """
+    Compute the SHA-256 of a playbook file.
+
+    Args:
+        filename: Path to the playbook file
+
+    Returns:
+        str: Hex digest, or None if the file does not exist
+    """
+    if not filename or not os.path.exists(filename):
+        return None
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunJournal:
+    """
+    Append-only JSONL journal of per-checkpoint status, playbook hash,
+    attempts and timings. Safe to use from concurrent checkpoint workers.
+    """
+
+    def __init__(self, path, resume: bool = False):
+        """
+        Open (or create) the journal and record the start of a run.
+
+        Args:
+            path: Path to the JSONL journal file
+            resume: If True, keep the state from the previous run lineage;
+                    otherwise start a fresh lineage (history is kept on disk)
+        """
+        self.path = Path(path)
+        self.resume = resume
+        self._lock = threading.Lock()
+        self._state = {}      # checkpoint -> last record
+        self._attempts = {}   # checkpoint -> number of starts in this lineage
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self._load()
+        self._end_partial_line()
+        self._append({
+            'event': 'run_start',
+            'resume': resume,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def _load(self):
+        """Replay the journal file into in-memory state."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line - ignore it
+                    continue
+                if record.get('event') == 'run_start':
+                    if not record.get('resume'):
+                        self._state.clear()
+                        self._attempts.clear()
+                    continue
+                checkpoint = record.get('checkpoint')
+                if not checkpoint:
+                    continue
+                self._state[checkpoint] = record
+                if record.get('status') == 'pending':
+                    self._attempts[checkpoint] = record.get('attempt', self._attempts.get(checkpoint, 0) + 1)
+
+    def _end_partial_line(self):
+        """Terminate a truncated last line left by a crash, so the next record starts on its own line."""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _append(self, record: dict):
+        """Append one record and force it to disk."""
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def status(self, checkpoint: str) -> str:
+        """
+        Get the last recorded status of a checkpoint.
+
+        Returns:
+            str: 'pending', 'success', 'failed', or None if never started
+        """
+        record = self._state.get(checkpoint)
+        return record.get('status') if record else None
+
+    def is_completed(self, checkpoint: str) -> bool:
+        """
+        Check whether a checkpoint finished successfully and its playbook is unchanged.
+
+        A playbook that was deleted or edited since it was recorded is not
+        considered complete, so it is picked up again on resume.
+        """
+        record = self._state.get(checkpoint)
+        if not record or record.get('status') != 'success':
+            return False
+        filename = record.get('filename')
+        if filename and record.get('playbook_sha256'):
+            return playbook_sha256(filename) == record['playbook_sha256']
+        return True
+
+    def start(self, checkpoint: str) -> float:
+        """
+        Record that a checkpoint is being processed.
+
+        Returns:
+            float: Start time (time.time()) to pass to finish()
+        """
+        started = time.time()
+        with self._lock:
+            attempt = self._attempts.get(checkpoint, 0) + 1
+            self._attempts[checkpoint] = attempt
+        record = {
+            'event': 'checkpoint',
+            'checkpoint': checkpoint,
+            'status': 'pending',
+            'attempt': attempt,
+            'started_at': datetime.fromtimestamp(started).isoformat()
+        }
+        self._state[checkpoint] = record
+        self._append(record)
+        return started
+
+    def finish(self, checkpoint: str, result: dict, started: float):
+        """
+        Record the outcome of a checkpoint.
+
+        Args:
+            checkpoint: The checkpoint string
+            result: Result dict from process_checkpoint_automated
+                    ({'checkpoint', 'success', 'filename', 'error'})
+            started: Start time returned by start()
+        """
+        finished = time.time()
+        filename = result.get('filename')
+        error = result.get('error')
+        record = {
+            'event': 'checkpoint',
+            'checkpoint': checkpoint,
+            'status': 'success' if result.get('success') else 'failed',
+            'attempt': self._attempts.get(checkpoint, 1),
+            'filename': filename,
+            'playbook_sha256': playbook_sha256(filename),
+            'started_at': datetime.fromtimestamp(started).isoformat(),
+            'finished_at': datetime.fromtimestamp(finished).isoformat(),
+            'duration_sec': round(finished - started, 2),
+            'error': error[:2000] if error else None
+        }
+        self._state[checkpoint] = record
+        self._append(record)
@@ -21,6 +21,8 @@ import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
+from retry_controller import retry_budget
+
 load_dotenv()
 
 # =============================================================================
@@ -1104,8 +1106,8 @@ def run_playbook_generation(objective, requirements, target_host, test_host, bec
     print("🚀 Calling langgraph_deepseek_generate_playbook to generate and execute playbook...")
     print("="*100)
     
-    max_retries = int(max(len(requirements), 3) * 1.5)
-    print(f"Max retries: {max_retries} (based on {len(requirements)} requirements)")
+    max_retries, difficulty = retry_budget(requirements, audit_procedure, min_budget=len(requirements))
+    print(f"Max retries: {max_retries} ({difficulty} checkpoint, {len(requirements)} requirements)")
     print()
     
     try:
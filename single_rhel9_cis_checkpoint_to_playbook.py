@@ -13,7 +13,6 @@ Usage:
     python3 single_rhel9_cis_checkpoint_to_playbook.py --checkpoint "1.1.1.1" --target-host 192.168.122.16
 """
 
-import os
 import sys
 import json
 import re
@@ -21,6 +20,8 @@ import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
+from retry_controller import retry_budget
+
 load_dotenv()
 
 # =============================================================================
@@ -175,16 +176,12 @@ def extract_audit_steps_from_procedure(audit_procedure: str, checkpoint_id: str
     if not audit_procedure or len(audit_procedure) < 20:
         return []
 
-    from langchain_openai import ChatOpenAI
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
     from langchain_core.prompts import ChatPromptTemplate
+    from deepseek_generate_playbook import stage_slot
     
     # Use reasoner for better logic extraction
-    llm = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com",
-        temperature=0
-    )
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
     
     # Build rationale section if provided
     rationale_section = ""
@@ -243,12 +240,13 @@ Generate the JSON list now:"""
     chain = prompt | llm
     
     try:
-        response = chain.invoke({
-            'checkpoint_id': checkpoint_id,
-            'title': title,
-            'rationale_section': rationale_section,
-            'audit_procedure': audit_procedure
-        })
+        with stage_slot("llm"):
+            response = chain.invoke({
+                'checkpoint_id': checkpoint_id,
+                'title': title,
+                'rationale_section': rationale_section,
+                'audit_procedure': audit_procedure
+            })
         
         response_text = response.content.strip()
         
@@ -308,8 +306,9 @@ def generate_playbook_requirements_from_checkpoint(checkpoint_info: dict) -> dic
             'requirements': list[str]
         }
     """
-    from langchain_openai import ChatOpenAI
+    from llm_clients import get_llm, DEEPSEEK_CHAT_PARAMS
     from langchain_core.prompts import ChatPromptTemplate
+    from deepseek_generate_playbook import stage_slot
     
     checkpoint_id = checkpoint_info.get('checkpoint_id', 'Unknown')
     title = checkpoint_info.get('title', '')
@@ -418,12 +417,7 @@ def generate_playbook_requirements_from_checkpoint(checkpoint_info: dict) -> dic
     print(f"    ⚠️ Could not extract requirements directly, using LLM generation...")
     
     # FALLBACK: Use LLM to generate requirements
-    llm = ChatOpenAI(
-        model="deepseek-chat",
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-        base_url="https://api.deepseek.com",
-        temperature=0
-    )
+    llm = get_llm("openai", **DEEPSEEK_CHAT_PARAMS)
     
     # Build additional context from remediation procedure if available
     additional_context = ""
@@ -524,16 +518,17 @@ Generate the JSON now:"""
     prompt = ChatPromptTemplate.from_template(prompt_template)
     chain = prompt | llm
     
-    response = chain.invoke({
-        'checkpoint_id': checkpoint_info.get('checkpoint_id', 'Unknown'),
-        'title': checkpoint_info.get('title', '') or 'Unknown',
-        'profile_applicability': checkpoint_info.get('profile_applicability', '') or 'Not specified',
-        'description': checkpoint_info.get('description', '') or 'Not specified',
-        'additional_context': additional_context,
-        'rationale': checkpoint_info.get('rationale', '') or 'Not specified',
-        'audit_procedure': checkpoint_info.get('audit_procedure', '') or 'Not specified',
-        'remediation_procedure': checkpoint_info.get('remediation_procedure', '') or 'Not specified'
-    })
+    with stage_slot("llm"):
+        response = chain.invoke({
+            'checkpoint_id': checkpoint_info.get('checkpoint_id', 'Unknown'),
+            'title': checkpoint_info.get('title', '') or 'Unknown',
+            'profile_applicability': checkpoint_info.get('profile_applicability', '') or 'Not specified',
+            'description': checkpoint_info.get('description', '') or 'Not specified',
+            'additional_context': additional_context,
+            'rationale': checkpoint_info.get('rationale', '') or 'Not specified',
+            'audit_procedure': checkpoint_info.get('audit_procedure', '') or 'Not specified',
+            'remediation_procedure': checkpoint_info.get('remediation_procedure', '') or 'Not specified'
+        })
     
     response_text = response.content.strip()
     
@@ -635,8 +630,8 @@ def run_playbook_generation(objective, requirements, target_host, test_host, bec
     print("🚀 Calling langgraph_deepseek_generate_playbook to generate and execute playbook...")
     print("="*100)
     
-    max_retries = int(max(len(requirements), 3) * 3)
-    print(f"Max retries: {max_retries} (based on {len(requirements)} requirements)")
+    max_retries, difficulty = retry_budget(requirements, audit_procedure, min_budget=len(requirements))
+    print(f"Max retries: {max_retries} ({difficulty} checkpoint, {len(requirements)} requirements)")
     print()
     
     try:
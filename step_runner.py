@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Step Runners: One Implementation for the Sync and Async Workflow Paths
+
+The playbook workflow runs with invoke() (worker threads, blocking LLM calls
+and ansible-navigator runs) or ainvoke() (one event loop). Functions that wait
+on the LLM, on ansible-navigator or on a slot are written once as generators
+("steps") that yield what they wait on and get its result (or exception) back:
+
+    def check_steps(filename):
+        result = yield Call(run_check, arun_check, filename)
+        return interpret(result)
+
+run_steps() drives them in the calling thread (blocking calls), arun_steps()
+on the running event loop (coroutines), so a sync/async pair of public
+functions is two thin wrappers around one generator. A step is any object
+with run() and arun():
+
+    Call       waits on fn(...) or, on an event loop, on afn(...)
+    Steps      runs nested steps
+    Parallel   runs named steps at the same time and can stop the ones still
+               running once the finished ones decide the outcome
+
+Parallel branches run in threads on the sync path; cancellable_runs() lets
+it stop the ansible-navigator runs (RunCancelled) and LLM retries
+(raise_if_cancelled()) of a branch whose result is no longer needed. On an
+event loop the branch tasks are cancelled.
+
+Environment variables:
+    PARALLEL_BRANCH_WORKERS   Threads shared by all sync Parallel steps (default: 16)
+
+Usage:
+    result = run_steps(check_steps(filename))
+    result = await arun_steps(check_steps(filename))
+"""
+
+import os
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+DEFAULT_PARALLEL_BRANCH_WORKERS = 16
+
+_branch_executor = None
+_branch_executor_lock = threading.Lock()
+
+
+# =============================================================================
+# Cancellation of runs started by a Parallel branch
+# =============================================================================
+
+class RunCancelled(Exception):
+    """Raised when a run is stopped because its result is no longer needed (see cancellable_runs())."""
+
+
+_run_cancel = threading.local()
+
+
+@contextmanager
+def cancellable_runs(cancel_event: threading.Event):
+    """
+    Context manager that lets another thread stop the runs this thread starts.
+    
+    Once cancel_event is set, runs that watch current_cancel_event() stop and
+    raise RunCancelled (a cold ansible-navigator run in deepseek_generate_playbook.py
+    is stopped together with the ansible workers it forked and its execution
+    environment container), and LLM calls are not retried (raise_if_cancelled()).
+    Warm backend runs cannot be interrupted; they finish and their result is
+    discarded by the caller.
+    """
+    previous = getattr(_run_cancel, 'event', None)
+    _run_cancel.event = cancel_event
+    try:
+        yield
+    finally:
+        _run_cancel.event = previous
+
+
+def current_cancel_event() -> threading.Event:
+    """The cancel event of the runs this thread starts, or None (see cancellable_runs())."""
+    return getattr(_run_cancel, 'event', None)
+
+
+def raise_if_cancelled():
+    """Raise RunCancelled if the runs of this thread were cancelled (see cancellable_runs())."""
+    cancel_event = current_cancel_event()
+    if cancel_event is not None and cancel_event.is_set():
+        raise RunCancelled("cancelled: the result is no longer needed")
+
+
+# =============================================================================
+# Steps
+# =============================================================================
+
+class Call:
+    """A step that waits on fn(*args, **kwargs), or on afn(*args, **kwargs) when driven on an event loop."""
+
+    def __init__(self, fn, afn=None, *args, **kwargs):
+        self.fn = fn
+        self.afn = afn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        return self.fn(*self.args, **self.kwargs)
+
+    async def arun(self):
+        if self.afn is None:
+            # Blocking call without a coroutine variant: keep it off the event loop
+            return await asyncio.to_thread(self.fn, *self.args, **self.kwargs)
+        return await self.afn(*self.args, **self.kwargs)
+
+
+class Steps:
+    """A step that runs nested steps (e.g. to hold a slot around several calls)."""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def run(self):
+        return run_steps(self.steps)
+
+    async def arun(self):
+        return await arun_steps(self.steps)
+
+
+def _get_branch_executor():
+    """The thread pool shared by all sync Parallel steps (PARALLEL_BRANCH_WORKERS threads, created on first use)."""
+    global _branch_executor
+    with _branch_executor_lock:
+        if _branch_executor is None:
+            workers = int(os.environ.get('PARALLEL_BRANCH_WORKERS', DEFAULT_PARALLEL_BRANCH_WORKERS))
+            _branch_executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='parallel-steps')
+        return _branch_executor
+
+
+class Parallel:
+    """
+    A step that runs named steps at the same time.
+    
+    The result is {name: result} of the branches that finished. Once stop_when(results)
+    is true the remaining branches are cancelled and not waited for: on an event loop
+    their tasks are cancelled; in threads their ansible-navigator runs are stopped
+    and their LLM calls are not retried (see cancellable_runs()), but an LLM call
+    already in flight cannot be interrupted - it keeps its thread from the shared,
+    bounded pool (PARALLEL_BRANCH_WORKERS) and its "llm" stage slot until it
+    returns (at most the client's request timeout). Branches must not start
+    Parallel steps themselves.
+    """
+
+    def __init__(self, branches: dict, stop_when=None):
+        self.branches = branches
+        self.stop_when = stop_when
+
+    def _should_stop(self, results: dict, pending: set) -> bool:
+        return bool(pending) and self.stop_when is not None and self.stop_when(results)
+
+    def _ordered(self, results: dict) -> dict:
+        return {name: results[name] for name in self.branches if name in results}
+
+    def run(self):
+        cancel_event = threading.Event()
+
+        def run_branch(steps):
+            with cancellable_runs(cancel_event):
+                return run_steps(steps)
+
+        executor = _get_branch_executor()
+        futures = {executor.submit(run_branch, steps): name for name, steps in self.branches.items()}
+        results = {}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[futures[future]] = future.result()
+                if self._should_stop(results, pending):
+                    break
+        finally:
+            cancel_event.set()
+            for future in pending:
+                future.cancel()
+        return self._ordered(results)
+
+    async def arun(self):
+        tasks = {asyncio.create_task(arun_steps(steps)): name for name, steps in self.branches.items()}
+        results = {}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks[task]] = task.result()
+                if self._should_stop(results, pending):
+                    break
+        finally:
+            # Cancelling a test run stops its ansible-navigator run and execution environment container
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return self._ordered(results)
+
+
+def run_steps(steps):
+    """
+    Drive steps in the calling thread.
+    
+    Args:
+        steps: Generator yielding Call/Steps/Holding/Parallel steps
+        
+    Returns:
+        The generator's return value
+    """
+    value, error = None, None
+    try:
+        while True:
+            try:
+                step = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                value, error = step.run(), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        steps.close()
+
+
+async def arun_steps(steps):
+    """Async variant of run_steps() driving the steps on the running event loop."""
+    value, error = None, None
+    try:
+        while True:
+            try:
+                step = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                value, error = await step.arun(), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        # Also runs the generator's cleanup when the task is cancelled
+        steps.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Structured Task Events for Playbook Test Runs
+
+Each test run records one event per task result, so a run is classified
+from structured task results rather than by pattern-matching its -vvv
+stdout:
+
+    - ansible-navigator runs save a playbook artifact (--pae true --pas <file>)
+      holding the ansible-runner job events
+    - warm backend runs (ansible_backend.py) enable callback_plugins/task_events.py,
+      which writes the same task records as JSON lines
+
+Both are normalized to:
+
+    {'task': 'Req 1 - Check ...', 'host': '192.168.122.16', 'action': 'shell',
+     'status': 'ok'|'changed'|'failed'|'ignored'|'skipped'|'unreachable',
+     'ignored': False, 'rc': 0, 'stdout': '...', 'stderr': '', 'msg': '',
+     'duration': 0.42, 'result': {...}}
+
+classify_test_output() detects playbook bugs, counts the recap and renders
+the compliance report from these records; the raw stdout is only used when
+no events were recorded (e.g. the playbook failed to load).
+
+Usage:
+    events = load_task_events(path)          # None if nothing was recorded
+    recap = recap_from_events(events)
+    print(render_task_events(events))
+"""
+
+import json
+
+
+EVENT_STATUSES = ('ok', 'changed', 'failed', 'ignored', 'skipped', 'unreachable')
+
+# Result fields searched for error patterns
+TEXT_FIELDS = ('msg', 'stderr', 'module_stderr', 'exception', 'stdout')
+
+REPORT_TASK_MARKER = 'COMPLIANCE REPORT'
+
+
+def _normalize(record: dict) -> dict:
+    """Turn a navigator artifact task entry (or task_events callback record) into an event."""
+    result = record.get('res') or {}
+    if not isinstance(result, dict):
+        result = {'msg': str(result)}
+    status = str(record.get('__result') or '').lower()
+    if status not in EVENT_STATUSES:
+        return None  # in-progress entries of tasks that never finished
+    if status == 'ok' and (record.get('__changed') or result.get('changed')):
+        status = 'changed'
+    duration = record.get('duration')
+    return {
+        'task': record.get('task') or '',
+        'host': record.get('host') or '',
+        'action': record.get('task_action') or '',
+        'status': status,
+        'ignored': status == 'ignored',
+        'rc': result.get('rc'),
+        'stdout': result.get('stdout') or '',
+        'stderr': result.get('stderr') or '',
+        'msg': result.get('msg') if result.get('msg') is not None else '',
+        'duration': float(duration) if isinstance(duration, (int, float)) else None,
+        'result': result
+    }
+
+
+def load_task_events(path: str) -> list:
+    """
+    Load the task events of a test run.
+
+    Args:
+        path: Navigator playbook artifact (JSON) or task_events callback output (JSON lines)
+
+    Returns:
+        list: Events in execution order, or None if the file is missing, empty or unreadable
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return None
+    if not content.strip():
+        return None
+
+    records = []
+    try:
+        artifact = json.loads(content)
+    except ValueError:
+        artifact = None
+    if isinstance(artifact, dict) and 'plays' in artifact:
+        for play in artifact.get('plays') or []:
+            records.extend(play.get('tasks') or [])
+    else:
+        for line in content.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    events = [event for event in (_normalize(record) for record in records if isinstance(record, dict)) if event]
+    return events or None
+
+
+def event_text(event: dict) -> str:
+    """Error-relevant text of an event (msg, stderr, module_stderr, exception, stdout)."""
+    parts = []
+    for field in TEXT_FIELDS:
+        value = event['result'].get(field)
+        if value:
+            parts.append(value if isinstance(value, str) else json.dumps(value, default=str))
+    return "\n".join(parts)
+
+
+def recap_from_events(events: list) -> dict:
+    """
+    Count results per host like the PLAY RECAP (ok includes changed and ignored).
+
+    Returns:
+        dict: {host: {'ok', 'changed', 'unreachable', 'failed', 'skipped', 'rescued', 'ignored'}}
+    """
+    recap = {}
+    for event in events:
+        counts = recap.setdefault(event['host'], dict.fromkeys(
+            ('ok', 'changed', 'unreachable', 'failed', 'skipped', 'rescued', 'ignored'), 0))
+        status = event['status']
+        if status in ('ok', 'changed', 'ignored'):
+            counts['ok'] += 1
+        if status in ('changed', 'failed', 'unreachable', 'skipped', 'ignored'):
+            counts[status] += 1
+    return recap
+
+
+def report_lines_from_events(events: list) -> list:
+    """The compliance report lines (msg list of the report debug task), or [] if not found."""
+    for event in reversed(events):
+        msg = event['msg']
+        lines = msg if isinstance(msg, list) else str(msg).splitlines()
+        if any(REPORT_TASK_MARKER in str(line) for line in lines):
+            return [str(line) for line in lines]
+    return []
+
+
+def _result_summary(event: dict) -> dict:
+    summary = {}
+    for field in ('rc', 'stdout', 'stderr', 'msg'):
+        value = event[field]
+        if value not in (None, '', []):
+            summary[field] = value
+    if event['status'] == 'skipped' and event['result'].get('skip_reason'):
+        summary['skip_reason'] = event['result']['skip_reason']
+    return summary
+
+
+def render_task_events(events: list) -> str:
+    """
+    Render events as compact ansible-style output for AI feedback.
+
+    Each task shows its status, rc, stdout, stderr and msg (no -vvv connection
+    noise); the compliance report keeps the `"msg": [...]` layout that
+    extract_compliance_report() reads.
+    """
+    lines = []
+    for event in events:
+        lines.append(f"TASK [{event['task']}] " + "*" * 20)
+        host = event['host']
+        duration = f" ({event['duration']:.2f}s)" if event['duration'] is not None else ""
+        summary = _result_summary(event)
+        if isinstance(event['msg'], list):
+            body = json.dumps({'msg': event['msg']}, indent=4, ensure_ascii=False, default=str)
+        else:
+            body = json.dumps(summary, ensure_ascii=False, default=str) if summary else ""
+        prefix = {
+            'ok': f"ok: [{host}]",
+            'changed': f"changed: [{host}]",
+            'skipped': f"skipping: [{host}]",
+            'failed': f"fatal: [{host}]: FAILED!",
+            'ignored': f"fatal: [{host}]: FAILED!",
+            'unreachable': f"fatal: [{host}]: UNREACHABLE!",
+        }[event['status']]
+        lines.append(f"{prefix} => {body}{duration}" if body else f"{prefix}{duration}")
+        if event['ignored']:
+            lines.append("...ignoring")
+        lines.append("")
+
+    lines.append("PLAY RECAP " + "*" * 20)
+    for host, counts in recap_from_events(events).items():
+        lines.append(f"{host} : " + "    ".join(f"{key}={value}" for key, value in counts.items()))
+    return "\n".join(lines)
@@ -0,0 +1,134 @@
+"""Tests for the early-abort scanner and the navigator command translation of the warm backend (ansible_backend.py)."""
+
+import pytest
+
+from ansible_backend import AbortScanner, navigator_events_path, navigator_to_playbook_args
+from connection_profile import with_connection_profile
+from deepseek_generate_playbook import build_syntax_check_command, build_test_command
+
+
+PATTERNS = ["is undefined", "undefined variable", "template error while templating string"]
+
+BUGGY_OUTPUT = (
+    "TASK [Req 1 - Check cramfs module] ***\n"
+    "fatal: [192.168.122.16]: FAILED! => {\"msg\": \"'req1_result' is undefined\"}\n"
+    "fatal: [192.168.122.17]: FAILED! => {\"msg\": \"'req2_result' is undefined\"}\n"
+    "...ignoring\n"
+    "TASK [Req 2 - Check sshd] ***\n"
+)
+
+CLEAN_OUTPUT = (
+    "TASK [Req 1 - Check cramfs module] ***\n"
+    "ok: [192.168.122.16] => {\"changed\": false, \"stdout\": \"module not loaded\"}\n"
+    "TASK [Generate compliance report] ***\n"
+    "ok: [192.168.122.16] => {\"msg\": [\"Status: PASS\"]}\n"
+    "PLAY RECAP ***\n"
+    "192.168.122.16 : ok=2 changed=0 unreachable=0 failed=0\n"
+)
+
+
+def test_pattern_split_across_chunks_is_found():
+    scanner = AbortScanner(PATTERNS, grace_sec=0)
+    data = BUGGY_OUTPUT.encode()
+    split = data.index(b"is undefined") + 4
+
+    scanner.feed(data[:split])
+    assert scanner.match is None
+    scanner.feed(data[split:])
+
+    assert scanner.match == "is undefined"
+    assert scanner.should_abort()
+
+
+def test_abort_records_the_first_undefined_variable_line():
+    scanner = AbortScanner(PATTERNS, grace_sec=60)
+    for line in BUGGY_OUTPUT.splitlines(keepends=True):
+        scanner.feed(line)
+
+    assert scanner.line == "fatal: [192.168.122.16]: FAILED! => {\"msg\": \"'req1_result' is undefined\"}"
+    # The next task header completes the error block before the grace period ends
+    assert scanner.should_abort()
+
+
+def test_error_block_is_collected_until_the_grace_period_or_next_task():
+    scanner = AbortScanner(PATTERNS, grace_sec=60)
+    scanner.feed(BUGGY_OUTPUT.split("...ignoring")[0])
+
+    assert scanner.match == "is undefined"
+    assert not scanner.should_abort()
+
+
+def test_interleaved_streams_keep_their_own_partial_lines():
+    scanner = AbortScanner(PATTERNS, grace_sec=0)
+    scanner.feed(b"fatal: [host]: FAILED! => {\"msg\": \"'x' is und", 'stdout')
+    scanner.feed(b"[WARNING]: Invalid characters were found in group names\n", 'stderr')
+    assert scanner.match is None
+
+    scanner.feed(b"efined\"}\n", 'stdout')
+    assert scanner.match == "is undefined"
+    assert scanner.line.startswith("fatal: [host]")
+
+
+def test_partial_line_is_not_scanned_until_it_ends():
+    scanner = AbortScanner(PATTERNS, grace_sec=0)
+    scanner.feed("fatal: [host]: FAILED! => {\"msg\": \"'x' is undefined\"}")
+
+    assert scanner.match is None
+    scanner.feed("\n")
+    assert scanner.should_abort()
+
+
+def test_echoed_playbook_source_does_not_abort():
+    scanner = AbortScanner(PATTERNS, grace_sec=0)
+    scanner.feed("    \"_raw_params\": \"echo '{{ item }} is undefined'\",\n")
+
+    assert scanner.match is None
+    assert not scanner.should_abort()
+
+
+def test_clean_output_never_aborts():
+    scanner = AbortScanner(PATTERNS, grace_sec=0)
+    data = CLEAN_OUTPUT.encode()
+    for start in range(0, len(data), 7):
+        scanner.feed(data[start:start + 7])
+        assert not scanner.should_abort()
+
+    assert scanner.match is None and scanner.line is None
+
+
+NAV = "/usr/bin/ansible-navigator"
+PLAYBOOK = "cis_audit_1_1_1.yml"
+
+
+@pytest.mark.parametrize("cmd, args, events_path", [
+    (build_syntax_check_command(NAV, PLAYBOOK, "192.168.122.16"),
+     [PLAYBOOK, '-i', "192.168.122.16,", '-u', 'root', '-v', '--syntax-check'], None),
+    (build_test_command(NAV, PLAYBOOK, "192.168.122.16"),
+     [PLAYBOOK, '-i', "192.168.122.16,", '-u', 'root', '-v'], None),
+    (build_test_command(NAV, PLAYBOOK, "192.168.122.16", check_mode=True, verbose="vvv", skip_debug=True),
+     [PLAYBOOK, '-i', "192.168.122.16,", '-u', 'root', '-vvv', '--check', '--skip-tags', 'debug'], None),
+    (build_test_command(NAV, PLAYBOOK, "192.168.122.16,192.168.122.17", verbose="",
+                        events_path="/tmp/events/artifact.json", forks=2),
+     [PLAYBOOK, '-i', "192.168.122.16,192.168.122.17,", '-u', 'root', '--forks', '2'], "/tmp/events/artifact.json"),
+    ([NAV, 'run', PLAYBOOK, '-i', "192.168.122.16,", '--mode=stdout', '--ee', 'false',
+      '--pae=true', '--pas=/tmp/events/artifact.json', '--co=--label=cis-audit-run=0f3c'],
+     [PLAYBOOK, '-i', "192.168.122.16,"], "/tmp/events/artifact.json"),
+])
+def test_navigator_command_translates_to_playbook_args(cmd, args, events_path):
+    assert navigator_to_playbook_args(cmd) == args
+    assert navigator_events_path(cmd) == events_path
+
+
+def test_connection_profile_options_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONNECTION_PROFILE_DIR', str(tmp_path))
+    monkeypatch.delenv('CONNECTION_PROFILE_DISABLE', raising=False)
+    cmd = build_test_command(NAV, PLAYBOOK, "192.168.122.16", events_path="/tmp/events/artifact.json")
+    profiled = with_connection_profile(cmd)
+    assert '--senv' in profiled and '--eev' in profiled
+
+    assert navigator_to_playbook_args(profiled) == navigator_to_playbook_args(cmd)
+
+
+def test_other_navigator_subcommands_are_not_translated():
+    assert navigator_to_playbook_args([NAV, 'collections']) is None
+    assert navigator_to_playbook_args([NAV]) is None
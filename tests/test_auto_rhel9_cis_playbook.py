@@ -0,0 +1,51 @@
+"""Tests for the concurrent checkpoint worker pool (auto_rhel9_cis_playbook.py)."""
+
+import threading
+import time
+
+import pytest
+
+from auto_rhel9_cis_playbook import run_checkpoints_concurrently
+
+
+CHECKPOINTS = [f"1.1.1.{number} Ensure module {number} is not available" for number in range(1, 7)]
+
+
+def test_results_are_recorded_for_every_checkpoint():
+    recorded = {}
+
+    def run_one(idx, checkpoint):
+        if idx == 3:
+            raise RuntimeError("generation failed")
+        return {'checkpoint': checkpoint, 'success': True, 'filename': f"{idx}.yml", 'error': None}
+
+    def record_result(idx, checkpoint, result):
+        recorded[idx] = result
+
+    run_checkpoints_concurrently(CHECKPOINTS, 2, run_one, record_result)
+
+    assert sorted(recorded) == [1, 2, 3, 4, 5, 6]
+    assert recorded[3]['success'] is False and 'generation failed' in recorded[3]['error']
+
+
+def test_interrupt_cancels_queued_checkpoints():
+    started = []
+    release = threading.Event()
+
+    def run_one(idx, checkpoint):
+        started.append(idx)
+        if idx != 1:
+            release.wait(5)
+        return {'checkpoint': checkpoint, 'success': True, 'filename': f"{idx}.yml", 'error': None}
+
+    def record_result(idx, checkpoint, result):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_checkpoints_concurrently(CHECKPOINTS, 2, run_one, record_result)
+    release.set()
+    time.sleep(0.2)
+
+    # Only the two workers' checkpoints ever started; the queued ones were cancelled
+    assert len(started) <= 3
+    assert set(started) <= {1, 2, 3}
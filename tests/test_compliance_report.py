@@ -0,0 +1,73 @@
+"""Tests for the local evaluation of playbook compliance reports (compliance_report.py)."""
+
+import dataclasses
+import json
+
+import pytest
+
+from compliance_report import evaluate_compliance_report, format_compliance_verdict, parse_run_report
+
+
+def _run_output(report_lines):
+    """ansible-navigator stdout of a 'Generate compliance report' debug task."""
+    return ("TASK [Generate compliance report] ***\nok: [192.168.122.16] => {\n    \"msg\": "
+            + json.dumps(report_lines, indent=8) + "\n}\n\nPLAY RECAP ***\n")
+
+
+REPORT = [
+    "========================================================",
+    "        COMPLIANCE REPORT",
+    "========================================================",
+    "REQUIREMENT 1 - Check cramfs module is not loaded:",
+    "  Exit code: 1",
+    "  Data: module not loaded",
+    "  Status: PASS",
+    "  Rationale: lsmod shows no cramfs",
+    "REQUIREMENT 2 - OVERALL Verify: Ensure cramfs kernel module is not available. "
+    "Rationale: PASS when req_1=PASS, FAIL otherwise:",
+    "  Data: N/A - Calculated from previous requirements",
+    "  Status: PASS",
+    "========================================================",
+    "OVERALL COMPLIANCE:",
+    "  Result: PASS",
+    "  Rationale: all requirements passed",
+]
+
+
+def test_conclusive_report_returns_a_structured_verdict():
+    verdict, reason = evaluate_compliance_report(_run_output(REPORT))
+
+    assert verdict['data_collection'] == 'PASS' and verdict['compliance_analysis'] == 'PASS'
+    assert verdict['overall_status'] == 'PASS'
+    assert [(req['index'], req['status']) for req in verdict['requirements']] == [(1, 'PASS'), (2, 'PASS')]
+    assert verdict['requirements'][0]['data'] == "module not loaded"
+    assert 'req_1=PASS' in reason
+
+
+def test_unknown_status_is_left_to_the_ai():
+    output = _run_output([line.replace("Status: PASS", "Status: UNKNOWN", 1) for line in REPORT])
+
+    verdict, reason = evaluate_compliance_report(output)
+    assert verdict is None
+    assert 'UNKNOWN' in reason
+
+
+def test_verdict_is_rendered_for_display():
+    output = _run_output(REPORT)
+    verdict, _ = evaluate_compliance_report(output, parse_run_report(output))
+
+    rendered = format_compliance_verdict(verdict)
+    assert "**Requirement 1: Check cramfs module is not loaded**" in rendered
+    assert "**COMPLIANCE STATUS**: COMPLIANT" in rendered
+
+
+def test_cached_report_cannot_be_modified_by_a_caller():
+    output = _run_output(REPORT)
+    report = parse_run_report(output)
+
+    assert isinstance(report.requirements, tuple) and isinstance(report.status_lines, tuple)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        report.requirements[0].status = 'FAIL'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        report.overall_status = 'FAIL'
+    assert parse_run_report(output).requirements[0].status == 'PASS'
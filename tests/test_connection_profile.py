@@ -0,0 +1,82 @@
+"""Tests for the managed SSH connection profile of playbook runs (connection_profile.py)."""
+
+import pytest
+
+from connection_profile import connection_profile_env, with_connection_profile
+
+
+PROFILE_KEYS = ('ANSIBLE_SSH_ARGS', 'ANSIBLE_SSH_CONTROL_PATH_DIR', 'ANSIBLE_SSH_CONTROL_PATH', 'ANSIBLE_PIPELINING',
+                'ANSIBLE_GATHERING', 'ANSIBLE_CACHE_PLUGIN', 'ANSIBLE_CACHE_PLUGIN_CONNECTION',
+                'ANSIBLE_CACHE_PLUGIN_TIMEOUT')
+
+CMD = ['ansible-navigator', 'run', "cis_audit_1_1_1.yml", '-i', "192.168.122.16,", '--mode', 'stdout']
+
+
+@pytest.fixture
+def profile(tmp_path, monkeypatch):
+    """Enabled profile in tmp_path, with none of its settings in the caller's environment."""
+    monkeypatch.setenv('CONNECTION_PROFILE_DIR', str(tmp_path))
+    for name in PROFILE_KEYS + ('CONNECTION_PROFILE_DISABLE', 'CONNECTION_PERSIST_SEC', 'CONNECTION_FACT_CACHE_SEC'):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+def _senv(cmd):
+    return [value for option, value in zip(cmd, cmd[1:]) if option == '--senv']
+
+
+def test_enabled_profile_settings(profile, monkeypatch):
+    monkeypatch.setenv('CONNECTION_PERSIST_SEC', "300")
+    settings = connection_profile_env()
+
+    assert settings['ANSIBLE_SSH_ARGS'] == "-C -o ControlMaster=auto -o ControlPersist=300s"
+    assert settings['ANSIBLE_SSH_CONTROL_PATH_DIR'] == str(profile / 'cp')
+    # ansible formats the ControlPath with %-interpolation, so ssh's %h/%p/%r are escaped
+    assert settings['ANSIBLE_SSH_CONTROL_PATH'] == "%(directory)s/%%h-%%p-%%r"
+    assert settings['ANSIBLE_PIPELINING'] == 'True'
+    assert 'ANSIBLE_GATHERING' not in settings
+    assert (profile / 'cp').is_dir() and (profile / 'facts').is_dir()
+
+
+def test_fact_cache_is_opt_in(profile, monkeypatch):
+    monkeypatch.setenv('CONNECTION_FACT_CACHE_SEC', "3600")
+    settings = connection_profile_env()
+
+    assert settings['ANSIBLE_GATHERING'] == 'smart'
+    assert settings['ANSIBLE_CACHE_PLUGIN_CONNECTION'] == str(profile / 'facts')
+    assert settings['ANSIBLE_CACHE_PLUGIN_TIMEOUT'] == "3600"
+
+
+def test_caller_environment_wins(profile, monkeypatch):
+    monkeypatch.setenv('ANSIBLE_PIPELINING', 'False')
+
+    assert 'ANSIBLE_PIPELINING' not in connection_profile_env()
+    assert not any(value.startswith('ANSIBLE_PIPELINING=') for value in _senv(with_connection_profile(CMD)))
+
+
+def test_navigator_command_gets_the_settings_and_mount(profile):
+    cmd = with_connection_profile(CMD)
+
+    assert cmd[:len(CMD)] == CMD
+    assert sorted(_senv(cmd)) == sorted(f"{key}={value}" for key, value in connection_profile_env().items())
+    assert cmd[-2:] == ['--eev', f"{profile}:{profile}:z"]
+
+
+def test_repeated_calls_do_not_duplicate_options(profile):
+    once = with_connection_profile(CMD)
+
+    assert with_connection_profile(once) == once
+    assert once.count('--eev') == 1
+
+
+def test_disabled_profile_leaves_runs_alone(profile, monkeypatch):
+    monkeypatch.setenv('CONNECTION_PROFILE_DISABLE', "1")
+
+    assert connection_profile_env() == {}
+    assert with_connection_profile(CMD) == CMD
+
+
+def test_other_navigator_subcommands_are_left_alone(profile):
+    cmd = ['ansible-navigator', 'collections']
+
+    assert with_connection_profile(cmd) == cmd
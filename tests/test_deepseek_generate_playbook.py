@@ -0,0 +1,222 @@
+"""Tests for the test-run classification and pipeline helpers of deepseek_generate_playbook.py."""
+
+import time
+import asyncio
+import threading
+import subprocess
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from deepseek_generate_playbook import (_record_prompt_cache_usage, astage_slot, build_compliance_analysis_prompt,
+                                        build_data_collection_prompt, build_generation_prompt,
+                                        build_playbook_analysis_prompt, classify_task_events, get_prompt_cache_stats,
+                                        get_stage_stats, set_stage_concurrency, split_host_results, stage_slot)
+from task_events import load_task_events
+
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def _result(returncode, stdout="", stderr=""):
+    return subprocess.CompletedProcess(['ansible-navigator', 'run'], returncode, stdout, stderr)
+
+
+def test_ignored_fatal_error_is_a_playbook_bug():
+    events = load_task_events(FIXTURES / "navigator_artifact.json")
+
+    success, output = classify_task_events(_result(0), events, "execution mode")
+
+    assert not success
+    assert output.startswith("PLAYBOOK BUG: Fatal errors in ignored tasks")
+    assert "TASK [Req 3 - Parse modprobe configuration]" in output
+
+
+def test_failed_task_fails_the_run():
+    events = [event for event in load_task_events(FIXTURES / "task_events.jsonl")
+              if event['host'] == "192.168.122.16"]
+
+    success, output = classify_task_events(_result(2), events, "execution mode")
+
+    assert not success
+    assert output.startswith("Playbook execution failed with return code 2")
+
+
+def test_unreachable_host_is_a_connection_error():
+    events = load_task_events(FIXTURES / "task_events.jsonl")
+
+    success, output = classify_task_events(_result(4), events, "execution mode")
+
+    assert not success
+    assert output.startswith("CONNECTION_ERROR")
+
+
+COMBINED_OUTPUT = """TASK [Req 1 - Check sshd configuration] ***
+ok: [192.168.122.16] => {"changed": false, "rc": 0, "stdout": "PermitRootLogin no"}
+fatal: [192.168.122.17]: UNREACHABLE! => {"msg": "Failed to connect to the host via ssh: No route to host"}
+TASK [Req 2 - Check sshd ciphers] ***
+fatal: [192.168.122.16]: FAILED! => {"changed": false, "rc": 1, "msg": "non-zero return code"}
+PLAY RECAP ***
+192.168.122.16 : ok=1 changed=0 unreachable=0 failed=1 skipped=0 rescued=0 ignored=0
+192.168.122.17 : ok=0 changed=0 unreachable=1 failed=0 skipped=0 rescued=0 ignored=0
+"""
+
+
+def test_multi_host_run_is_split_per_host():
+    result = _result(4, COMBINED_OUTPUT)
+    result.events = load_task_events(FIXTURES / "task_events.jsonl")
+
+    results = split_host_results(result, ["192.168.122.16", "192.168.122.17"], "execution mode")
+
+    failed_success, failed_output = results["192.168.122.16"]
+    assert not failed_success
+    assert failed_output.startswith("Playbook execution failed with return code 2")
+    assert "Req 2 - Check sshd ciphers" in failed_output
+    assert "192.168.122.17" not in failed_output
+
+    unreachable_success, unreachable_output = results["192.168.122.17"]
+    assert not unreachable_success
+    assert unreachable_output.startswith("CONNECTION_ERROR")
+
+
+def test_host_without_task_results_is_a_connection_error():
+    result = _result(2, COMBINED_OUTPUT)
+    result.events = [event for event in load_task_events(FIXTURES / "task_events.jsonl")
+                     if event['host'] == "192.168.122.16"]
+
+    results = split_host_results(result, ["192.168.122.16", "192.168.122.17"], "execution mode")
+
+    assert results["192.168.122.17"] == (
+        False, "CONNECTION_ERROR: No task results from 192.168.122.17 - validation cannot be performed")
+    assert not results["192.168.122.16"][0]
+
+
+def test_run_without_events_gives_every_host_the_combined_result():
+    results = split_host_results(_result(4, COMBINED_OUTPUT), ["192.168.122.16", "192.168.122.17"], "execution mode")
+
+    assert results["192.168.122.16"] == results["192.168.122.17"]
+    assert results["192.168.122.16"][1].startswith("CONNECTION_ERROR")
+
+
+def test_stage_limit_bounds_concurrent_threads():
+    stage = "test-host-stage"
+    set_stage_concurrency(stage, 2)
+    lock = threading.Lock()
+    inside = []
+    peak = [0]
+
+    def worker():
+        with stage_slot(stage):
+            with lock:
+                inside.append(1)
+                peak[0] = max(peak[0], len(inside))
+            time.sleep(0.1)
+            with lock:
+                inside.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = get_stage_stats()[stage]
+    assert peak[0] == 2
+    assert stats['peak'] == 2 and stats['limit'] == 2 and stats['calls'] == 6
+    # 6 workers through 2 slots: 4 of them queue, all of them are busy ~0.1s
+    assert stats['wait_sec'] >= 0.4
+    assert stats['busy_sec'] >= 0.5
+
+
+def test_async_stage_limit_bounds_concurrent_coroutines():
+    stage = "test-llm-stage"
+    set_stage_concurrency(stage, 3)
+    inside = []
+    peak = [0]
+
+    async def worker():
+        async with astage_slot(stage):
+            inside.append(1)
+            peak[0] = max(peak[0], len(inside))
+            await asyncio.sleep(0.05)
+            inside.pop()
+
+    async def run():
+        await asyncio.gather(*(worker() for _ in range(8)))
+
+    asyncio.run(run())
+
+    assert peak[0] == 3
+    assert get_stage_stats()[stage]['peak'] == 3
+
+
+def test_unlimited_stage_only_records_stats():
+    stage = "test-unlimited-stage"
+    set_stage_concurrency(stage, 0)
+
+    with stage_slot(stage):
+        with stage_slot(stage):
+            pass
+
+    stats = get_stage_stats()[stage]
+    assert (stats['calls'], stats['peak'], stats['limit']) == (2, 2, 0)
+
+
+CHECKPOINTS = [
+    {'objective': "Ensure freevxfs kernel module is not available",
+     'requirements': ["Check freevxfs module is not loaded", "Check freevxfs module is deny listed"],
+     'audit': "#!/usr/bin/env bash\n{\n   l_mod_name=\"freevxfs\"\n}",
+     'playbook': "---\n- name: CIS 1.1.1.2\n  hosts: all\n  tasks: []\n",
+     'output': "TASK [Req 1 - Check freevxfs module is not loaded] ***\nok: [192.168.122.16]\n"},
+    {'objective': "Ensure sshd Ciphers are configured",
+     'requirements': ["Check sshd Ciphers", "Check sshd MACs", "Check sshd KexAlgorithms"],
+     'audit': "# sshd -T | grep -Pi -- '^ciphers\\h+'",
+     'playbook': "---\n- name: CIS 5.1.4\n  hosts: all\n  tasks:\n    - name: Req 1 - Check sshd Ciphers\n",
+     'output': "TASK [Req 1 - Check sshd Ciphers] ***\nfatal: [192.168.122.16]: FAILED!\n"},
+]
+
+PROMPT_BUILDERS = {
+    'generation': lambda c: build_generation_prompt(c['objective'], requirements=c['requirements'],
+                                                    audit_procedure=c['audit']),
+    'enhancement': lambda c: build_generation_prompt(c['objective'], requirements=c['requirements'],
+                                                     audit_procedure=c['audit'], current_playbook=c['playbook'],
+                                                     feedback="Requirement 2 reads the wrong file"),
+    'structure': lambda c: build_playbook_analysis_prompt(c['requirements'], c['objective'], c['playbook'], c['audit']),
+    'data_collection': lambda c: build_data_collection_prompt(c['requirements'], c['objective'], c['output'],
+                                                              c['playbook'], c['audit'], suppress_header=True),
+    'compliance': lambda c: build_compliance_analysis_prompt(c['requirements'], c['objective'], c['output'],
+                                                             c['audit'], c['playbook']),
+}
+
+
+@pytest.mark.parametrize("builder", PROMPT_BUILDERS.values(), ids=PROMPT_BUILDERS.keys())
+def test_prompts_share_the_static_prefix(builder):
+    prompts = [builder(checkpoint) for checkpoint in CHECKPOINTS]
+
+    for prompt, checkpoint in zip(prompts, CHECKPOINTS):
+        # Every per-checkpoint input comes after the static instructions
+        static_end = prompt.index(checkpoint['objective'])
+        for value in (checkpoint['audit'], checkpoint['requirements'][0]):
+            assert prompt.index(value) > static_end
+    prefixes = [prompt[:prompt.index(checkpoint['objective'])] for prompt, checkpoint in zip(prompts, CHECKPOINTS)]
+    assert prefixes[0] == prefixes[1]
+    assert len(prefixes[0]) > 0.8 * len(prompts[0])
+
+
+def test_prompt_cache_tokens_are_counted(capsys):
+    before = get_prompt_cache_stats()
+    deepseek = AIMessage(content="", response_metadata={'token_usage': {
+        'prompt_tokens': 1000, 'prompt_cache_hit_tokens': 900, 'prompt_cache_miss_tokens': 100}})
+    other = AIMessage(content="", usage_metadata={'input_tokens': 400, 'output_tokens': 10, 'total_tokens': 410,
+                                                  'input_token_details': {'cache_read': 300}})
+
+    _record_prompt_cache_usage(deepseek, "Generation", quiet=False)
+    _record_prompt_cache_usage(other, "Analysis", quiet=True)
+    _record_prompt_cache_usage(AIMessage(content=""), "Analysis", quiet=False)  # no usage reported
+
+    after = get_prompt_cache_stats()
+    assert after['calls'] - before['calls'] == 2
+    assert after['hit_tokens'] - before['hit_tokens'] == 1200
+    assert after['miss_tokens'] - before['miss_tokens'] == 200
+    assert "Generation prompt tokens: 900 cached, 100 uncached (90% prefix cache hit)" in capsys.readouterr().out
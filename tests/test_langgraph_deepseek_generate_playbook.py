@@ -0,0 +1,35 @@
+"""Tests for the parallel structure analysis and test run of the workflow (langgraph_deepseek_generate_playbook.py)."""
+
+from langgraph_deepseek_generate_playbook import _apply_analyze_and_test, _failed_stage, should_continue_after_analyze_and_test
+
+
+def _state(**values):
+    state = {
+        'attempt': 1, 'max_retries': 3, 'filename': "cis_audit_1_1_1.yml", 'test_host': "192.168.122.16",
+        'test_hosts': ["192.168.122.16"], 'syntax_valid': True, 'playbook_structure_valid': False,
+        'playbook_structure_analysis': "PLAYBOOK STRUCTURE ANALYSIS: FAIL (previous attempt)",
+        'test_success': False, 'test_output': "", 'error_message': "", 'analysis_message': "",
+    }
+    state.update(values)
+    return state
+
+
+def test_abandoned_analysis_leaves_the_structure_result_unset():
+    state = _state()
+
+    _apply_analyze_and_test(state, {'test': (False, "fatal: [192.168.122.16]: FAILED! => {\"rc\": 127}")})
+
+    assert state['playbook_structure_valid'] is None
+    assert state['playbook_structure_analysis'] == ""
+    # The test failure, not a stale structure failure, drives the retry
+    assert _failed_stage(state)[0] == 'test'
+    assert should_continue_after_analyze_and_test(state) == "retry"
+
+
+def test_failed_analysis_drives_the_retry():
+    state = _state(test_success=True)
+
+    _apply_analyze_and_test(state, {'analysis': (False, "PLAYBOOK STRUCTURE ANALYSIS: FAIL")})
+
+    assert state['playbook_structure_valid'] is False
+    assert _failed_stage(state)[0] == 'structure'
@@ -0,0 +1,71 @@
+"""Tests for the LRU eviction and size accounting of LLMCache (llm_cache.py)."""
+
+import os
+
+from llm_cache import EVICT_TO_FRACTION, LLMCache, cache_key
+
+
+def _files_size(cache):
+    return sum(path.stat().st_size for path in cache.cache_dir.glob("*/*.json"))
+
+
+def _age(cache, key, seconds_ago):
+    path = cache._path(key)
+    mtime = path.stat().st_mtime - seconds_ago
+    os.utime(path, (mtime, mtime))
+
+
+def test_cache_key_depends_on_model_and_prompt():
+    assert cache_key("deepseek-chat", "prompt") == cache_key("deepseek-chat", "prompt")
+    assert cache_key("deepseek-chat", "prompt") != cache_key("deepseek-reasoner", "prompt")
+    assert cache_key("deepseek-chat", "prompt") != cache_key("deepseek-chat", "prompt 2")
+
+
+def test_get_returns_stored_content(tmp_path):
+    cache = LLMCache(tmp_path)
+    cache.put("ab" * 32, "response", model_name="deepseek-chat", site="generation")
+
+    assert cache.get("ab" * 32, site="generation") == "response"
+    assert cache.get("cd" * 32, site="generation") is None
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_disabled_site_bypasses_cache(tmp_path):
+    cache = LLMCache(tmp_path, disabled_sites=["compliance_analysis"])
+    cache.put("ab" * 32, "response", site="compliance_analysis")
+
+    assert cache.get("ab" * 32, site="compliance_analysis") is None
+    assert cache.get("ab" * 32, site="generation") is None
+    assert cache.stats['bypassed'] == 1
+
+
+def test_size_is_tracked_across_writes_and_replacements(tmp_path):
+    cache = LLMCache(tmp_path)
+    for i in range(5):
+        cache.put(f"{i:02d}" * 32, "x" * (100 * (i + 1)))
+    assert cache._total_bytes == _files_size(cache)
+
+    cache.put("00" * 32, "short")  # replaces an entry with a smaller one
+    assert cache._total_bytes == _files_size(cache)
+    assert cache.stats['evictions'] == 0
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache = LLMCache(tmp_path, max_bytes=10 ** 9)
+    keys = [f"{i:02d}" * 32 for i in range(4)]
+    for age, key in zip((40, 30, 20, 10), keys):
+        cache.put(key, "x" * 1000)
+        _age(cache, key, age)
+    assert cache.get(keys[0]) is not None  # a hit makes the oldest entry the most recent
+
+    entry_size = cache._path(keys[0]).stat().st_size
+    cache.max_bytes = entry_size * 4  # one more entry goes over the limit
+    cache.put("ff" * 32, "x" * 1000)
+
+    assert cache._path(keys[0]).exists()
+    assert not cache._path(keys[1]).exists()
+    assert not cache._path(keys[2]).exists()
+    assert cache._path(keys[3]).exists()
+    assert cache._path("ff" * 32).exists()
+    assert cache.stats['evictions'] == 2
+    assert cache._total_bytes == _files_size(cache) <= cache.max_bytes * EVICT_TO_FRACTION
@@ -0,0 +1,62 @@
+"""Tests for the shared, lazily built LLM client registry (llm_clients.py)."""
+
+import sys
+import asyncio
+import weakref
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import llm_clients
+from llm_clients import DEEPSEEK_CHAT_PARAMS, client_count, get_llm
+
+
+PARAMS = dict(DEEPSEEK_CHAT_PARAMS, api_key="test-key")
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(llm_clients, '_clients', {})
+    monkeypatch.setattr(llm_clients, '_loop_clients', weakref.WeakKeyDictionary())
+
+
+def test_same_client_and_params_share_one_instance():
+    llm = get_llm("openai", **PARAMS)
+
+    assert get_llm("openai", **dict(reversed(list(PARAMS.items())))) is llm
+    assert client_count() == 1
+
+
+def test_different_params_or_client_build_a_new_instance():
+    llm = get_llm("openai", **PARAMS)
+
+    assert get_llm("openai", **dict(PARAMS, temperature=0.7)) is not llm
+    assert get_llm("deepseek", **PARAMS) is not llm
+    assert client_count() == 3
+
+
+def test_event_loop_gets_its_own_instance():
+    llm = get_llm("openai", **PARAMS)
+
+    async def in_loop():
+        return get_llm("openai", **PARAMS), get_llm("openai", **PARAMS)
+
+    first, second = asyncio.run(in_loop())
+    assert first is second and first is not llm
+    assert first.http_async_client is not None
+
+
+def test_unknown_client_is_rejected():
+    with pytest.raises(ValueError):
+        get_llm("anthropic", **PARAMS)
+
+
+def test_nothing_is_built_at_import():
+    probe = ("import deepseek_generate_playbook, langgraph_deepseek_generate_playbook, llm_clients; "
+             "print(llm_clients.client_count(), llm_clients._http_client is None)")
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, timeout=120,
+                            cwd=Path(__file__).resolve().parent.parent)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-2:] == ["0", "True"]
@@ -0,0 +1,99 @@
+"""Tests for token-budgeted run output compaction (output_compaction.py)."""
+
+import json
+
+from compliance_report import extract_compliance_report
+from output_compaction import compact_run_output, estimate_tokens, parse_verbose_output, trim_text
+
+
+HOST = "192.168.122.16"
+
+REPORT = [
+    "=== COMPLIANCE REPORT ===",
+    "REQUIREMENT 1 - Check sshd PermitEmptyPasswords:",
+    "  Status: PASS",
+    "REQUIREMENT 2 - Check sshd Match blocks:",
+    "  Status: FAIL",
+    "OVERALL: FAIL",
+]
+
+
+def _result(keyword, task, result, suffix=""):
+    body = json.dumps(result, indent=4)
+    return f"TASK [{task}] ****\n{keyword}: [{HOST}]{suffix} => {body}\n"
+
+
+def _raw_output(ok_tasks=1, stdout_lines=5):
+    invocation = {'module_args': {'_raw_params': 'sshd -T', 'chdir': None, 'executable': None}}
+    stdout = '\n'.join(f"line {n} of the sshd -T output" for n in range(stdout_lines))
+    parts = ["PLAY [CIS 5.1.1 audit] ************************************************\n"]
+    for n in range(ok_tasks):
+        parts.append(_result("ok", f"Req 1 - Collect sshd settings {n}", {
+            'changed': False, 'rc': 0, 'stdout': stdout, 'stdout_lines': stdout.split('\n'),
+            'invocation': invocation, 'cmd': 'sshd -T'}))
+    parts.append(_result("fatal", "Req 2 - Check sshd Match blocks", {
+        'changed': True, 'rc': 1, 'stdout': '', 'stderr': 'grep: /etc/ssh/sshd_config.d: No such file',
+        'msg': 'non-zero return code', 'invocation': invocation}, ": FAILED!"))
+    parts.append("...ignoring\n")
+    parts.append(_result("ok", "Generate compliance report", {'msg': REPORT, 'changed': False}))
+    parts.append("PLAY RECAP *************************************************************\n"
+                 f"{HOST} : ok={ok_tasks + 2}    changed=1    unreachable=0    failed=0    "
+                 "skipped=0    rescued=0    ignored=1\n")
+    return ''.join(parts)
+
+
+def test_parse_verbose_output():
+    results, recap_lines, other_lines = parse_verbose_output(_raw_output())
+
+    assert [(result['task'], result['status']) for result in results] == [
+        ('Req 1 - Collect sshd settings 0', 'ok'),
+        ('Req 2 - Check sshd Match blocks', 'ignored'),
+        ('Generate compliance report', 'ok'),
+    ]
+    assert results[1]['rc'] == 1
+    assert recap_lines[0].startswith('PLAY RECAP')
+    assert other_lines == [(0, 'PLAY [CIS 5.1.1 audit] ' + '*' * 20)]
+
+
+def test_compaction_drops_verbose_blobs_and_keeps_the_essentials():
+    raw = _raw_output()
+    compact = compact_run_output(raw)
+
+    assert 'invocation' not in compact and 'stdout_lines' not in compact
+    assert 'grep: /etc/ssh/sshd_config.d: No such file' in compact
+    assert '...ignoring' in compact
+    assert f"{HOST} : ok=3" in compact
+    assert estimate_tokens(compact) < estimate_tokens(raw)
+
+
+def test_report_is_read_the_same_from_compacted_output():
+    raw = _raw_output(ok_tasks=200, stdout_lines=100)
+    compact = compact_run_output(raw, budget=2000)
+
+    assert extract_compliance_report(compact) == extract_compliance_report(raw) == '\n'.join(REPORT)
+
+
+def test_large_output_fits_the_budget():
+    raw = _raw_output(ok_tasks=200, stdout_lines=100)
+    compact = compact_run_output(raw, budget=2000)
+
+    assert estimate_tokens(raw) > 20000
+    assert estimate_tokens(compact) <= 2000
+    assert 'ok/changed/skipped task results omitted' in compact
+    assert 'Req 2 - Check sshd Match blocks' in compact  # failures are never omitted
+
+
+def test_output_without_task_results_is_trimmed():
+    raw = "ERROR! the playbook could not be loaded\n" + "context line\n" * 5000
+    compact = compact_run_output(raw, budget=500)
+
+    assert compact.startswith("ERROR! the playbook could not be loaded")
+    assert estimate_tokens(compact) <= 500
+
+
+def test_trim_text():
+    text = '\n'.join(f"line {n}" for n in range(10))
+
+    assert trim_text(text, 2, 1, 100) == "line 0\nline 1\n... (7 lines trimmed) ...\nline 9"
+    assert trim_text("x" * 50, 1, 1, 20) == "x" * 10 + " ... (30 chars trimmed) ... " + "x" * 10
+    assert trim_text(text, 0, 0, 0) == ""
@@ -0,0 +1,95 @@
+"""Tests for MultiPatternScanner against a naive str.find() scan (output_scanner.py)."""
+
+import random
+
+import pytest
+
+from output_scanner import MultiPatternScanner, first_hit, group_hits, next_hit, previous_hit
+
+
+GROUPS = {
+    'bug': [("is undefined", "Variable is undefined"), "undefined", "template error", "error"],
+    'ignored': ["...ignoring", "ignoring", "ign"],
+    'connection': ["UNREACHABLE!", "UNREACHABLE", "timed out"],
+    'overlap': ["abab", "bab", "aba", "a"],
+}
+
+OUTPUT = """TASK [Req 1 - Check auditd rules] ***
+fatal: [192.168.122.16]: FAILED! => {"msg": "'req1' is undefined"}
+...ignoring
+TASK [Req 2 - Check sshd] ***
+fatal: [192.168.122.17]: UNREACHABLE! => {"msg": "Connection timed out"}
+PLAY RECAP ***"""
+
+
+def naive_scan(groups, text, before=3, after=8):
+    """Every occurrence of every pattern via repeated str.find(), with lines[i - before:i + after] context."""
+    lines = text.split('\n')
+    hits = []
+    for group, patterns in groups.items():
+        for priority, entry in enumerate(patterns):
+            pattern, label = entry if isinstance(entry, tuple) else (entry, entry)
+            start = text.find(pattern)
+            while start != -1:
+                index = text.count('\n', 0, start)
+                hits.append({
+                    'group': group, 'pattern': pattern, 'label': label, 'priority': priority,
+                    'start': start, 'end': start + len(pattern), 'line_no': index + 1,
+                    'line': lines[index],
+                    'context': '\n'.join(lines[max(0, index - before):index + after])
+                })
+                start = text.find(pattern, start + 1)
+    return hits
+
+
+def _key(hit):
+    return (hit['start'], hit['group'], hit['priority'])
+
+
+def _same_hits(scanner_hits, expected):
+    assert sorted(scanner_hits, key=_key) == sorted(expected, key=_key)
+    assert [hit['start'] for hit in scanner_hits] == sorted(hit['start'] for hit in scanner_hits)
+
+
+def test_matches_naive_scan_on_run_output():
+    _same_hits(MultiPatternScanner(GROUPS).scan(OUTPUT), naive_scan(GROUPS, OUTPUT))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_naive_scan_on_random_text(seed):
+    rng = random.Random(seed)
+    text = ''.join(rng.choice("ab\n") for _ in range(rng.randint(0, 400)))
+    before, after = rng.randint(0, 4), rng.randint(1, 6)
+
+    hits = MultiPatternScanner(GROUPS).scan(text, before=before, after=after)
+    _same_hits(hits, naive_scan(GROUPS, text, before=before, after=after))
+
+
+def test_pattern_in_several_groups_hits_each_group():
+    groups = {'bug': ["timed out"], 'connection': ["timed out"]}
+    hits = MultiPatternScanner(groups).scan(OUTPUT)
+
+    assert sorted(hit['group'] for hit in hits) == ['bug', 'connection']
+
+
+def test_empty_groups_never_match():
+    assert MultiPatternScanner({'bug': []}).scan(OUTPUT) == []
+
+
+def test_first_hit_prefers_priority_then_position():
+    hits = MultiPatternScanner(GROUPS).scan(OUTPUT)
+
+    bug = first_hit(hits, 'bug')
+    assert bug['label'] == "Variable is undefined"
+    assert bug['line_no'] == 2
+    assert first_hit(hits, 'connection')['pattern'] == "UNREACHABLE!"
+    assert first_hit(hits, 'bug', start=OUTPUT.index("TASK [Req 2")) is None
+
+
+def test_next_and_previous_hit():
+    ignored = group_hits(MultiPatternScanner(GROUPS).scan(OUTPUT), 'ignored')
+    position = OUTPUT.index("...ignoring")
+
+    assert next_hit(ignored, position)['pattern'] == "...ignoring"
+    assert previous_hit(ignored, position) is None
+    assert next_hit(ignored, len(OUTPUT)) is None
@@ -0,0 +1,117 @@
+"""Tests for parsing and applying patch-mode edit blocks (playbook_patch.py)."""
+
+import pytest
+import yaml
+
+from playbook_patch import PlaybookPatchError, apply_playbook_patch, list_task_names, parse_playbook_patch
+
+
+PLAYBOOK = """---
+- name: CIS 5.1.1 audit
+  hosts: all
+  become: true
+  tasks:
+    # Requirement 1
+    - name: Req 1 - Check sshd config
+      shell: sshd -T | grep permitemptypasswords
+      register: req1
+
+    - name: Req 2 - Check sshd Match blocks
+      shell: grep -i '^Match' /etc/ssh/sshd_config
+      register: req2
+      failed_when: false
+
+    - name: Compliance report
+      debug:
+        msg: "{{ req1.stdout }}"
+"""
+
+RESPONSE = """The Match check fails when there are no Match blocks.
+
+REPLACE TASK: Req 2 - Check sshd Match blocks
+```yaml
+- name: Req 2 - Check sshd Match blocks
+  shell: grep -ci '^Match' /etc/ssh/sshd_config || true
+  register: req2
+```
+
+INSERT AFTER TASK: Req 2 - Check sshd Match blocks
+```yaml
+- name: Store requirement 2 details
+  set_fact:
+    data_2: "{{ req2.stdout }}"
+```
+
+**DELETE TASK**: `Compliance report`
+"""
+
+
+def test_parse_edit_blocks_in_response_order():
+    edits = parse_playbook_patch(RESPONSE)
+
+    assert [(edit['op'], edit['task']) for edit in edits] == [
+        ('replace', 'Req 2 - Check sshd Match blocks'),
+        ('insert_after', 'Req 2 - Check sshd Match blocks'),
+        ('delete', 'Compliance report'),
+    ]
+    assert "grep -ci" in edits[0]['content']
+    assert edits[2]['content'] is None
+
+
+def test_parse_rejects_response_without_edits():
+    with pytest.raises(PlaybookPatchError):
+        parse_playbook_patch("Here is the full playbook:\n```yaml\n- hosts: all\n```")
+
+
+def test_parse_rejects_edit_without_yaml():
+    with pytest.raises(PlaybookPatchError):
+        parse_playbook_patch("REPLACE TASK: Req 1 - Check sshd config\nuse sshd -T instead")
+
+
+def test_apply_replaces_inserts_and_deletes():
+    patched = apply_playbook_patch(PLAYBOOK, parse_playbook_patch(RESPONSE))
+
+    assert list_task_names(patched) == [
+        'Req 1 - Check sshd config',
+        'Req 2 - Check sshd Match blocks',
+        'Store requirement 2 details',
+    ]
+    tasks = yaml.safe_load(patched)[0]['tasks']
+    assert tasks[1]['shell'] == "grep -ci '^Match' /etc/ssh/sshd_config || true"
+    assert 'failed_when' not in tasks[1]
+    assert "# Requirement 1" in patched  # untouched text is kept verbatim
+
+
+def test_apply_insert_before():
+    edits = parse_playbook_patch(
+        "INSERT BEFORE TASK: Req 1 - Check sshd config\n"
+        "```yaml\n- name: Gather package facts\n  package_facts:\n```\n"
+    )
+
+    assert list_task_names(apply_playbook_patch(PLAYBOOK, edits))[:2] == [
+        'Gather package facts', 'Req 1 - Check sshd config'
+    ]
+
+
+def test_apply_rejects_unknown_task():
+    edits = [{'op': 'delete', 'task': 'Req 9 - Does not exist', 'content': None}]
+
+    with pytest.raises(PlaybookPatchError, match="task not found"):
+        apply_playbook_patch(PLAYBOOK, edits)
+
+
+def test_apply_rejects_task_edited_twice():
+    edits = [
+        {'op': 'delete', 'task': 'Compliance report', 'content': None},
+        {'op': 'delete', 'task': 'Compliance report', 'content': None},
+    ]
+
+    with pytest.raises(PlaybookPatchError, match="more than once"):
+        apply_playbook_patch(PLAYBOOK, edits)
+
+
+def test_apply_rejects_snippet_that_is_not_a_task_list():
+    edits = [{'op': 'replace', 'task': 'Compliance report', 'content': "debug:\n  msg: hi\n"}]
+
+    with pytest.raises(PlaybookPatchError):
+        apply_playbook_patch(PLAYBOOK, edits)
@@ -0,0 +1,129 @@
+"""Tests for the local pre-flight checks of generated playbooks (playbook_preflight.py)."""
+
+import importlib.util
+
+import pytest
+
+from playbook_preflight import format_preflight_errors, preflight_playbook
+
+
+REQUIREMENTS = ["1. Check sshd PermitEmptyPasswords", "2. Check sshd Match blocks"]
+
+# As the extraction prompts return them: a plain list, numbered by position
+UNNUMBERED_REQUIREMENTS = [
+    "Check sshd PermitEmptyPasswords is set to no",
+    "OVERALL Verify: Ensure sshd PermitEmptyPasswords is disabled",
+]
+
+CLEAN_PLAYBOOK = """---
+- name: CIS 5.1.1 audit
+  hosts: all
+  tasks:
+    - name: Req 1 - Check sshd config
+      shell: sshd -T | grep permitemptypasswords
+      register: task_1_result
+    - name: Store requirement 1
+      set_fact:
+        status_1: "{{ 'PASS' if 'no' in task_1_result.stdout else 'FAIL' }}"
+        data_1: "{{ task_1_result.stdout }}"
+    - name: Req 2 - Check sshd Match blocks
+      shell: grep -ci '^Match' /etc/ssh/sshd_config || true
+      register: task_2_result
+    - name: Store requirement 2
+      set_fact: status_2=PASS data_2={{ task_2_result.stdout }}
+    - name: Compliance report
+      debug:
+        msg: "{{ status_1 }} {{ status_2 }} {{ data_1 }} {{ data_2 }}"
+      when: status_1 is defined
+"""
+
+
+# The Jinja2 checks are skipped when Jinja2 is not installed (it comes with ansible-core)
+needs_jinja2 = pytest.mark.skipif(importlib.util.find_spec('jinja2') is None, reason="Jinja2 is not installed")
+
+
+def _checks(errors):
+    return [error['check'] for error in errors]
+
+
+def test_clean_playbook_has_no_errors():
+    assert preflight_playbook(CLEAN_PLAYBOOK, REQUIREMENTS) == []
+
+
+def test_yaml_that_does_not_parse():
+    errors = preflight_playbook("- hosts: all\n  tasks:\n    - name: x\n   shell: true\n")
+
+    assert _checks(errors) == ['yaml']
+    assert errors[0]['location'].startswith('line ')
+
+
+def test_playbook_that_is_not_a_list_of_plays():
+    assert _checks(preflight_playbook("hosts: all\n")) == ['yaml']
+
+
+@needs_jinja2
+def test_unbalanced_jinja_block():
+    playbook = CLEAN_PLAYBOOK.replace(
+        "msg: \"{{ status_1 }}", "msg: \"{% if status_1 == 'PASS' %}ok {{ status_1 }}")
+
+    errors = preflight_playbook(playbook, REQUIREMENTS)
+    assert _checks(errors) == ['jinja2']
+    assert 'Compliance report' in errors[0]['location']
+
+
+@needs_jinja2
+def test_bash_length_expansion_is_explained():
+    playbook = CLEAN_PLAYBOOK.replace(
+        "shell: grep -ci '^Match' /etc/ssh/sshd_config || true",
+        "shell: 'x={{ task_1_result.stdout }}; echo ${#x}'")
+
+    errors = preflight_playbook(playbook, REQUIREMENTS)
+    assert _checks(errors) == ['jinja2']
+    assert '{% raw %}' in errors[0]['message']
+
+
+def test_unsafe_strings_are_not_parsed():
+    playbook = CLEAN_PLAYBOOK.replace(
+        "shell: grep -ci '^Match' /etc/ssh/sshd_config || true",
+        "shell: !unsafe 'x=\"{{\"; echo ${#x}'")
+
+    assert preflight_playbook(playbook, REQUIREMENTS) == []
+
+
+def test_variable_of_unknown_requirement():
+    playbook = CLEAN_PLAYBOOK.replace("{{ data_2 }}", "{{ data_2 }} {{ status_3 }}")
+
+    errors = preflight_playbook(playbook, REQUIREMENTS)
+    assert _checks(errors) == ['variables']
+    assert 'status_3' in errors[0]['message'] and 'numbered 1, 2' in errors[0]['message']
+
+
+def test_unnumbered_requirements_are_numbered_by_position():
+    assert preflight_playbook(CLEAN_PLAYBOOK, UNNUMBERED_REQUIREMENTS) == []
+
+    playbook = CLEAN_PLAYBOOK.replace("{{ data_2 }}", "{{ data_2 }} {{ status_3 }}")
+    errors = preflight_playbook(playbook, UNNUMBERED_REQUIREMENTS)
+    assert _checks(errors) == ['variables']
+    assert 'status_3' in errors[0]['message'] and 'numbered 1, 2' in errors[0]['message']
+
+
+def test_status_used_but_never_set():
+    playbook = CLEAN_PLAYBOOK.replace("set_fact: status_2=PASS data_2=", "set_fact: data_2=")
+
+    errors = preflight_playbook(playbook, REQUIREMENTS)
+    assert _checks(errors) == ['variables']
+    assert 'status_2 is used but never set' in errors[0]['message']
+
+
+def test_never_set_check_is_skipped_with_included_variables():
+    playbook = CLEAN_PLAYBOOK.replace("set_fact: status_2=PASS data_2=", "set_fact: data_2=").replace(
+        "  tasks:\n", "  vars_files:\n    - status.yml\n  tasks:\n", 1)
+
+    assert preflight_playbook(playbook, REQUIREMENTS) == []
+
+
+def test_format_as_syntax_check_message():
+    message = format_preflight_errors(preflight_playbook("hosts: all\n"))
+
+    assert message.startswith("Pre-flight validation failed (1 issue(s)):")
+    assert "\n- [yaml] playbook: " in message
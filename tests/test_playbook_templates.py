@@ -0,0 +1,91 @@
+"""Tests for the checkpoint family templates against the bundled benchmark JSONs (playbook_templates.py)."""
+
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from playbook_preflight import preflight_playbook
+from playbook_templates import classify_checkpoint, render_checkpoint_template
+from single_rhel9_cis_checkpoint_to_playbook import get_checkpoint_info_from_json
+
+
+RESOURCES = Path(__file__).resolve().parent.parent / "resources"
+RHEL9_JSON = RESOURCES / "CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.json"
+RHEL8_JSON = RESOURCES / "CIS_Red_Hat_Enterprise_Linux_8_Benchmark_v4.0.0.json"
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def rhel9():
+    return _load(RHEL9_JSON)
+
+
+def _info(checkpoint_data, checkpoint_id):
+    return get_checkpoint_info_from_json(checkpoint_data, checkpoint_id)
+
+
+@pytest.mark.parametrize("checkpoint_id, family, params", [
+    ("1.1.2.1.1", 'separate_partition', {'mount': '/tmp', 'mount_units': ['tmp.mount']}),
+    ("1.1.2.1.2", 'mount_option', {'mount': '/tmp', 'option': 'nodev'}),
+    ("2.1.1", 'service_not_in_use', {'packages': ['autofs'], 'units': ['autofs.service']}),
+    ("7.1.1", 'file_permissions', {'path': '/etc/passwd', 'mode': '644', 'or_more_restrictive': True,
+                                   'uid': '0', 'gid': '0'}),
+])
+def test_family_parameters(rhel9, checkpoint_id, family, params):
+    assert classify_checkpoint(_info(rhel9, checkpoint_id)) == (family, params)
+
+
+@pytest.mark.parametrize("checkpoint_id, family", [
+    ("1.1.1.1", 'kernel_module'),
+    ("3.3.1", 'sysctl'),
+    ("1.4.2", 'audit_script'),
+])
+def test_script_families_keep_the_cis_script(rhel9, checkpoint_id, family):
+    classified_family, params = classify_checkpoint(_info(rhel9, checkpoint_id))
+
+    assert classified_family == family
+    assert params['script'].lstrip().startswith('#!/')
+
+
+@pytest.mark.parametrize("checkpoint_id", [
+    "1.6.6",   # - IF - CVE-2023-48795 has been addressed ... may be skipped
+    "1.7.1",   # Review any files returned and verify that they follow local site policy
+    "1.8.4",   # Note: idle-delay should be 900 seconds or less and follow local site policy
+    "7.2.9",   # Note: If a .netrc file is required, and follows local site policy ...
+])
+def test_script_verdict_qualified_by_the_audit_goes_to_llm_workflow(rhel9, checkpoint_id):
+    assert classify_checkpoint(_info(rhel9, checkpoint_id)) is None
+
+
+def test_outlier_goes_to_llm_workflow(rhel9):
+    info = _info(rhel9, "1.1.1.9")  # several modules in one checkpoint
+
+    assert classify_checkpoint(info) is None
+    assert render_checkpoint_template(info) is None
+
+
+@pytest.mark.parametrize("json_path", [RHEL9_JSON, RHEL8_JSON], ids=["rhel9", "rhel8"])
+def test_every_classified_checkpoint_renders_a_clean_playbook(json_path, capsys):
+    checkpoint_data = _load(json_path)
+    rendered = 0
+    for checkpoint in checkpoint_data:
+        info = _info(checkpoint_data, checkpoint['id'])
+        classified = classify_checkpoint(info)
+        if classified is None:
+            continue
+        template = render_checkpoint_template(info)
+        assert template is not None, f"{checkpoint['id']} ({classified[0]}): {capsys.readouterr().out}"
+        assert template['family'] == classified[0]
+        assert template['objective'].startswith(f"Audit CIS checkpoint {checkpoint['id']}: ")
+
+        play = yaml.safe_load(template['playbook'])[0]
+        assert play['tasks'][-1]['name'] == 'Generate compliance report'
+        assert preflight_playbook(template['playbook'], template['requirements']) == [], checkpoint['id']
+        rendered += 1
+    assert rendered > 50
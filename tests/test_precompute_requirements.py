@@ -0,0 +1,89 @@
+"""Tests for the precomputed requirements sidecar store (precompute_requirements.py)."""
+
+import json
+
+import pytest
+
+import single_rhel9_cis_checkpoint_to_playbook
+from precompute_requirements import STORE_VERSION, RequirementsStore, store_path_for
+
+
+CHECKPOINT = {
+    'checkpoint_id': "1.1.1.1",
+    'title': "Ensure cramfs kernel module is not available",
+    'rationale': "Removing support for unneeded filesystem types reduces the attack surface.",
+    'audit_procedure': "Run the following script to verify the cramfs kernel module is not available",
+    'remediation_procedure': "Deny list the cramfs module in /etc/modprobe.d/",
+}
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Record requirement extractions instead of calling the LLM."""
+    calls = []
+
+    def generate(checkpoint_info):
+        calls.append(checkpoint_info['audit_procedure'])
+        return {'objective': f"Audit {checkpoint_info['title']}",
+                'requirements': [f"Check cramfs (generation {len(calls)})"]}
+
+    monkeypatch.setattr(single_rhel9_cis_checkpoint_to_playbook, 'generate_playbook_requirements_from_checkpoint',
+                        generate)
+    return calls
+
+
+def test_stored_entry_is_reused(tmp_path, generated):
+    path = tmp_path / "benchmark.requirements.json"
+    first = RequirementsStore(path).get_or_generate(CHECKPOINT)
+
+    store = RequirementsStore(path)
+    assert store.get_or_generate(CHECKPOINT) == first
+    assert len(generated) == 1
+    assert store.stats == {'hits': 1, 'stale': 0, 'generated': 0}
+
+
+def test_changed_audit_procedure_regenerates(tmp_path, generated):
+    path = tmp_path / "benchmark.requirements.json"
+    RequirementsStore(path).get_or_generate(CHECKPOINT)
+    changed = dict(CHECKPOINT, audit_procedure=CHECKPOINT['audit_procedure'] + " or pre-compiled into the kernel")
+
+    store = RequirementsStore(path)
+    assert store.get(changed) is None
+    assert store.get_or_generate(changed)['requirements'] == ["Check cramfs (generation 2)"]
+    assert store.stats == {'hits': 0, 'stale': 2, 'generated': 1}
+    # The regenerated entry replaced the stale one on disk
+    assert RequirementsStore(path).get(changed) is not None
+    assert RequirementsStore(path).get(CHECKPOINT) is None
+
+
+@pytest.mark.parametrize("content", [
+    "{\"version\": 1, \"entries\": {\"1.1.1.1\": ",
+    "[]",
+    json.dumps({'version': STORE_VERSION, 'entries': []}),
+    json.dumps({'version': STORE_VERSION, 'entries': {"1.1.1.1": "not an entry"}}),
+    json.dumps({'version': STORE_VERSION, 'entries': {"1.1.1.1": {'source_sha256': "0" * 64}}}),
+])
+def test_corrupt_sidecar_falls_back_to_generation(tmp_path, generated, content):
+    path = tmp_path / "benchmark.requirements.json"
+    path.write_text(content)
+
+    spec = RequirementsStore(path).get_or_generate(CHECKPOINT)
+
+    assert spec['requirements'] == ["Check cramfs (generation 1)"]
+    assert RequirementsStore(path).get(CHECKPOINT) == spec
+
+
+def test_fallback_requirements_are_not_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(single_rhel9_cis_checkpoint_to_playbook, 'generate_playbook_requirements_from_checkpoint',
+                        lambda info: {'objective': "", 'requirements': ["Check system configuration for CIS 1.1.1.1"]})
+    path = tmp_path / "benchmark.requirements.json"
+
+    RequirementsStore(path).get_or_generate(CHECKPOINT)
+
+    assert RequirementsStore(path).get(CHECKPOINT) is None
+
+
+def test_store_sits_next_to_the_benchmark_json(tmp_path):
+    json_path = tmp_path / "CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.json"
+
+    assert store_path_for(json_path) == tmp_path / "CIS_Red_Hat_Enterprise_Linux_9_Benchmark_v2.0.0.requirements.json"
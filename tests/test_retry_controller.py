@@ -0,0 +1,103 @@
+"""Tests for retry budgets, failure fingerprints and retry decisions (retry_controller.py)."""
+
+import pytest
+
+from retry_controller import DIFFICULTY_BUDGETS, checkpoint_difficulty, decide_retry, failure_fingerprint, retry_budget
+
+
+AUDIT_SCRIPT = """Run the following script to verify:
+#!/usr/bin/env bash
+{
+  l_output=""
+  for l_mod in cramfs; do
+    echo "$l_mod"
+  done
+}
+"""
+
+TEST_OUTPUT = """TASK [Req 2 - Check auditd rules] ***
+fatal: [192.168.122.16]: FAILED! => {"changed": false, "msg": "auditctl: command not found", "rc": 127}
+"""
+
+
+@pytest.fixture(autouse=True)
+def _default_env(monkeypatch):
+    for name in ('RETRY_REPEAT_LIMIT', 'RETRY_BUDGET_SCALE', 'RETRY_CONTROLLER_DISABLE'):
+        monkeypatch.delenv(name, raising=False)
+
+
+def _requirements(count):
+    return [f"{n}. Check item {n}" for n in range(1, count + 1)]
+
+
+def test_difficulty_from_requirements_and_audit_procedure():
+    assert checkpoint_difficulty(_requirements(2)) == 'easy'
+    assert checkpoint_difficulty(_requirements(5)) == 'medium'
+    assert checkpoint_difficulty(_requirements(7)) == 'hard'
+    assert checkpoint_difficulty(_requirements(2), AUDIT_SCRIPT) == 'medium'  # script adds points
+    assert checkpoint_difficulty(_requirements(1), "line\n" * 60) == 'medium'  # long audit procedure
+
+
+def test_budget_follows_difficulty():
+    assert retry_budget(_requirements(2)) == (DIFFICULTY_BUDGETS['easy'], 'easy')
+    assert retry_budget(_requirements(7)) == (DIFFICULTY_BUDGETS['hard'], 'hard')
+
+
+def test_budget_never_drops_below_one_attempt_per_requirement():
+    for count in range(1, 16):
+        requirements = _requirements(count)
+        assert retry_budget(requirements, min_budget=len(requirements))[0] >= count
+
+    # Below the floor the difficulty budget is used as is
+    requirements = _requirements(2)
+    assert retry_budget(requirements, min_budget=len(requirements)) == (DIFFICULTY_BUDGETS['easy'], 'easy')
+
+
+def test_min_budget_is_a_floor():
+    requirements = _requirements(2)
+
+    assert retry_budget(requirements, min_budget=DIFFICULTY_BUDGETS['easy'] + 2) == (DIFFICULTY_BUDGETS['easy'] + 2, 'easy')
+
+
+def test_budget_scale(monkeypatch):
+    monkeypatch.setenv('RETRY_BUDGET_SCALE', '0.5')
+    assert retry_budget(_requirements(7))[0] == DIFFICULTY_BUDGETS['hard'] // 2
+
+    monkeypatch.setenv('RETRY_BUDGET_SCALE', 'lots')
+    assert retry_budget(_requirements(7))[0] == DIFFICULTY_BUDGETS['hard']
+
+
+def test_fingerprint_masks_hosts_and_numbers():
+    fingerprint = failure_fingerprint('test', TEST_OUTPUT)
+    other_host = failure_fingerprint('test', TEST_OUTPUT.replace('192.168.122.16', '192.168.122.17'))
+
+    assert fingerprint['error_class'] == 'Command not found'
+    assert fingerprint['task'] == 'Req 2 - Check auditd rules'
+    assert fingerprint['id'] == other_host['id']
+    assert fingerprint['id'] != failure_fingerprint('syntax', TEST_OUTPUT)['id']
+
+
+def test_structure_fingerprint_is_the_failing_requirements():
+    analysis = "PLAYBOOK_STRUCTURE: FAIL\nRequirement 2: FAIL - missing task\nRequirement 3: FAIL - no status"
+
+    assert failure_fingerprint('structure', analysis)['pattern'] == 'fail req 2,3'
+
+
+def test_decide_retry_escalates_then_stops():
+    first = failure_fingerprint('test', TEST_OUTPUT)
+    other = failure_fingerprint('syntax', "ERROR! Syntax Error while loading YAML.")
+
+    assert decide_retry([], first) == ('retry', 1)
+    assert decide_retry([first], first) == ('escalate', 2)
+    assert decide_retry([first, first], first) == ('stop', 3)
+    assert decide_retry([first, first, other], first) == ('retry', 1)  # the streak is broken
+
+
+def test_decide_retry_limits(monkeypatch):
+    fingerprint = failure_fingerprint('test', TEST_OUTPUT)
+
+    monkeypatch.setenv('RETRY_REPEAT_LIMIT', '0')
+    assert decide_retry([fingerprint] * 5, fingerprint) == ('escalate', 6)
+
+    monkeypatch.setenv('RETRY_CONTROLLER_DISABLE', '1')
+    assert decide_retry([fingerprint] * 5, fingerprint) == ('retry', 6)
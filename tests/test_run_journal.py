@@ -0,0 +1,80 @@
+"""Tests for RunJournal resume state (run_journal.py)."""
+
+from run_journal import RunJournal
+
+
+def _finish(journal, checkpoint, success, filename=None):
+    started = journal.start(checkpoint)
+    journal.finish(checkpoint, {'success': success, 'filename': filename, 'error': None}, started)
+
+
+def test_completed_checkpoint_is_skipped_on_resume(tmp_path):
+    playbook = tmp_path / "cis_audit_1_1_1.yml"
+    playbook.write_text("- hosts: all\n")
+    path = tmp_path / "run_journal.jsonl"
+    _finish(RunJournal(path), "1.1.1", True, str(playbook))
+    _finish(RunJournal(path, resume=True), "1.1.2", False)
+
+    journal = RunJournal(path, resume=True)
+    assert journal.is_completed("1.1.1")
+    assert not journal.is_completed("1.1.2")
+    assert journal.status("1.1.2") == 'failed'
+    assert not journal.is_completed("1.1.3")
+
+
+def test_edited_or_deleted_playbook_is_not_completed(tmp_path):
+    edited = tmp_path / "edited.yml"
+    deleted = tmp_path / "deleted.yml"
+    edited.write_text("- hosts: all\n")
+    deleted.write_text("- hosts: all\n")
+    path = tmp_path / "run_journal.jsonl"
+    journal = RunJournal(path)
+    _finish(journal, "edited", True, str(edited))
+    _finish(journal, "deleted", True, str(deleted))
+
+    edited.write_text("- hosts: all\n  tasks: []\n")
+    deleted.unlink()
+    journal = RunJournal(path, resume=True)
+    assert not journal.is_completed("edited")
+    assert not journal.is_completed("deleted")
+
+
+def test_pending_checkpoint_is_not_completed(tmp_path):
+    path = tmp_path / "run_journal.jsonl"
+    RunJournal(path).start("1.1.1")  # crashed before finish()
+
+    journal = RunJournal(path, resume=True)
+    assert journal.status("1.1.1") == 'pending'
+    assert not journal.is_completed("1.1.1")
+
+
+def test_fresh_run_forgets_previous_lineage(tmp_path):
+    path = tmp_path / "run_journal.jsonl"
+    _finish(RunJournal(path), "1.1.1", True)
+    RunJournal(path)  # fresh run, not resumed
+
+    assert not RunJournal(path, resume=True).is_completed("1.1.1")
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "run_journal.jsonl"
+    _finish(RunJournal(path), "1.1.1", True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "checkpoint", "checkpoint": "1.1.1", "sta')
+
+    journal = RunJournal(path, resume=True)
+    assert journal.is_completed("1.1.1")
+    _finish(journal, "1.1.2", True)  # appended after the truncated line
+
+    resumed = RunJournal(path, resume=True)
+    assert resumed.is_completed("1.1.1") and resumed.is_completed("1.1.2")
+
+
+def test_fresh_run_after_truncated_line_forgets_previous_lineage(tmp_path):
+    path = tmp_path / "run_journal.jsonl"
+    _finish(RunJournal(path), "1.1.1", True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "checkpoint", "checkpoint": "1.1.1", "sta')
+    RunJournal(path)  # its run_start record must not be lost to the partial line
+
+    assert not RunJournal(path, resume=True).is_completed("1.1.1")
@@ -0,0 +1,134 @@
+"""Tests for the sync/async step runners (step_runner.py)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from step_runner import (
+    Call,
+    Parallel,
+    RunCancelled,
+    Steps,
+    arun_steps,
+    cancellable_runs,
+    raise_if_cancelled,
+    run_steps,
+)
+
+
+def _double(value):
+    return value * 2
+
+
+async def _adouble(value):
+    return value * 2
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+def _single(step):
+    return (yield step)
+
+
+def _check_steps(value):
+    doubled = yield Call(_double, _adouble, value)
+    nested = yield Steps(_nested_steps(doubled))
+    return doubled, nested
+
+
+def _nested_steps(value):
+    return (yield Call(_double, None, value)) + 1  # no coroutine variant: run in a thread on the loop
+
+
+def test_sync_and_async_runners_give_the_same_result():
+    assert run_steps(_check_steps(3)) == (6, 13)
+    assert asyncio.run(arun_steps(_check_steps(3))) == (6, 13)
+
+
+def _recovering_steps():
+    try:
+        yield Call(_fail, None, "boom")
+    except ValueError as e:
+        return f"handled {e}"
+
+
+def test_step_exception_is_thrown_into_the_generator():
+    assert run_steps(_recovering_steps()) == "handled boom"
+    assert asyncio.run(arun_steps(_recovering_steps())) == "handled boom"
+
+
+def test_unhandled_step_exception_propagates():
+    def steps():
+        yield Call(_fail, None, "not handled")
+
+    with pytest.raises(ValueError, match="not handled"):
+        run_steps(steps())
+
+
+def _fast_failure_steps():
+    yield Call(_double, _adouble, 1)
+    return False
+
+
+def _slow_steps(started: list, finished: list):
+    started.append(True)
+    yield Call(time.sleep, asyncio.sleep, 0.5)
+    finished.append(True)
+    return True
+
+
+def test_parallel_stops_the_remaining_branches():
+    started, finished = [], []
+    parallel = Parallel({'slow': _slow_steps(started, finished), 'fast': _fast_failure_steps()},
+                        stop_when=lambda results: results.get('fast') is False)
+
+    results = asyncio.run(arun_steps(_single(parallel)))
+    assert results == {'fast': False}
+    assert started and not finished
+
+
+def test_parallel_waits_for_every_branch_without_stop_condition():
+    started, finished = [], []
+    parallel = Parallel({'slow': _slow_steps(started, finished), 'fast': _fast_failure_steps()})
+
+    assert run_steps(_single(parallel)) == {'slow': True, 'fast': False}
+    assert finished
+
+
+def test_sync_parallel_cancels_the_runs_of_abandoned_branches():
+    cancelled = threading.Event()
+
+    def wait_for_cancel():
+        for _ in range(100):
+            try:
+                raise_if_cancelled()
+            except RunCancelled:
+                cancelled.set()
+                raise
+            time.sleep(0.01)
+        return True
+
+    def waiting_steps():
+        return (yield Call(wait_for_cancel))
+
+    parallel = Parallel({'waiting': waiting_steps(), 'fast': _fast_failure_steps()},
+                        stop_when=lambda results: results.get('fast') is False)
+
+    assert run_steps(_single(parallel)) == {'fast': False}
+    assert cancelled.wait(2)
+
+
+def test_raise_if_cancelled_only_inside_a_cancelled_scope():
+    cancel_event = threading.Event()
+    raise_if_cancelled()  # no scope: nothing to cancel
+
+    with cancellable_runs(cancel_event):
+        raise_if_cancelled()
+        cancel_event.set()
+        with pytest.raises(RunCancelled):
+            raise_if_cancelled()
+    raise_if_cancelled()
@@ -0,0 +1,75 @@
+"""Tests for loading and summarizing the structured task events of test runs (task_events.py)."""
+
+from pathlib import Path
+
+from task_events import load_task_events, recap_from_events, render_task_events, report_lines_from_events
+
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+NAVIGATOR_ARTIFACT = FIXTURES / "navigator_artifact.json"
+CALLBACK_RECORDS = FIXTURES / "task_events.jsonl"
+
+
+def test_navigator_artifact_is_normalized():
+    events = load_task_events(NAVIGATOR_ARTIFACT)
+
+    # The entry of the task that never finished is dropped
+    assert [(event['task'], event['status']) for event in events] == [
+        ("Req 1 - Check cramfs module is not loaded", 'ok'),
+        ("Req 2 - Check cramfs module is deny listed", 'changed'),
+        ("Req 3 - Parse modprobe configuration", 'ignored'),
+        ("Generate compliance report", 'ok'),
+    ]
+    first = events[0]
+    assert first['host'] == "192.168.122.16"
+    assert first['action'] == "ansible.builtin.shell"
+    assert (first['rc'], first['stdout'], first['stderr'], first['duration']) == (0, "module not loaded", "", 0.42)
+    assert events[2]['ignored'] and events[2]['msg'].startswith("Invalid data passed to 'loop'")
+
+
+def test_callback_records_are_normalized():
+    events = load_task_events(CALLBACK_RECORDS)
+
+    # The unparsable line is skipped
+    assert [(event['host'], event['status'], event['rc']) for event in events] == [
+        ("192.168.122.16", 'ok', 0),
+        ("192.168.122.16", 'failed', 1),
+        ("192.168.122.17", 'unreachable', None),
+    ]
+    assert events[1]['stderr'].endswith("No such file or directory")
+    assert not any(event['ignored'] for event in events)
+
+
+def test_missing_or_empty_file_has_no_events(tmp_path):
+    empty = tmp_path / "empty.jsonl"
+    empty.write_text("\n")
+
+    assert load_task_events(tmp_path / "missing.json") is None
+    assert load_task_events(empty) is None
+
+
+def test_recap_counts_like_the_play_recap():
+    recap = recap_from_events(load_task_events(NAVIGATOR_ARTIFACT) + load_task_events(CALLBACK_RECORDS))
+
+    assert recap["192.168.122.16"] == {'ok': 5, 'changed': 1, 'unreachable': 0, 'failed': 1,
+                                       'skipped': 0, 'rescued': 0, 'ignored': 1}
+    assert recap["192.168.122.17"] == {'ok': 0, 'changed': 0, 'unreachable': 1, 'failed': 0,
+                                       'skipped': 0, 'rescued': 0, 'ignored': 0}
+
+
+def test_report_lines_come_from_the_report_task():
+    assert report_lines_from_events(load_task_events(NAVIGATOR_ARTIFACT)) == [
+        "=== COMPLIANCE REPORT ===",
+        "REQUIREMENT 1 - Check cramfs module is not loaded:",
+        "  Status: PASS",
+    ]
+    assert report_lines_from_events(load_task_events(CALLBACK_RECORDS)) == []
+
+
+def test_rendering_keeps_the_ansible_layout():
+    rendered = render_task_events(load_task_events(CALLBACK_RECORDS))
+
+    assert "TASK [Req 2 - Check sshd ciphers]" in rendered
+    assert "fatal: [192.168.122.16]: FAILED! =>" in rendered
+    assert "fatal: [192.168.122.17]: UNREACHABLE! =>" in rendered
+    assert "PLAY RECAP" in rendered
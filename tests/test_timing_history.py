@@ -0,0 +1,127 @@
+"""Tests for adaptive run timeouts and async task rewriting (timing_history.py)."""
+
+import yaml
+
+from timing_history import (
+    ASYNC_POLL_SEC,
+    DEFAULT_TIMEOUTS,
+    MIN_SAMPLES,
+    MIN_TIMEOUTS,
+    TimingHistory,
+    add_async_to_tasks,
+)
+
+
+CHECKPOINT = "cis_audit_6_1_1"
+HOST = "192.168.122.16"
+
+
+def _history(tmp_path, **kwargs):
+    return TimingHistory(tmp_path / "timing_history.jsonl", **kwargs)
+
+
+def test_fixed_timeout_until_enough_samples(tmp_path):
+    history = _history(tmp_path)
+    for _ in range(MIN_SAMPLES - 1):
+        history.record(CHECKPOINT, HOST, 'test', 10.0, 120)
+
+    timeout, reason = history.timeout_for(CHECKPOINT, HOST, 'test')
+    assert timeout == DEFAULT_TIMEOUTS['test']
+    assert reason.startswith("default")
+
+
+def test_adaptive_timeout_is_p99_times_factor(tmp_path):
+    history = _history(tmp_path, factor=2.0)
+    for duration in (40.0, 55.0, 84.2):
+        history.record(CHECKPOINT, HOST, 'test', duration, 120)
+
+    assert history.timeout_for(CHECKPOINT, HOST, 'test')[0] == 169  # ceil(84.2 * 2)
+    assert history.timeout_for(CHECKPOINT, "192.168.122.17", 'test')[0] == DEFAULT_TIMEOUTS['test']
+    assert history.timeout_for(CHECKPOINT, HOST, 'syntax')[0] == DEFAULT_TIMEOUTS['syntax']
+
+
+def test_adaptive_timeout_is_clamped(tmp_path):
+    history = _history(tmp_path, cap_sec=300)
+    for duration in (1.0, 1.0, 2.0):
+        history.record("quick", HOST, 'test', duration, 120)
+    for duration in (400.0, 500.0, 600.0):
+        history.record("slow", HOST, 'test', duration, 900)
+
+    assert history.timeout_for("quick", HOST, 'test')[0] == MIN_TIMEOUTS['test']
+    assert history.timeout_for("slow", HOST, 'test')[0] == 300
+
+
+def test_timeout_doubles_after_a_timed_out_run(tmp_path):
+    history = _history(tmp_path, cap_sec=900)
+    for duration in (40.0, 50.0, 60.0):
+        history.record(CHECKPOINT, HOST, 'test', duration, 120)
+    history.record(CHECKPOINT, HOST, 'test', 120.0, 120, timed_out=True)
+
+    timeout, reason = history.timeout_for(CHECKPOINT, HOST, 'test')
+    assert timeout == 240
+    assert "timed out" in reason
+
+
+def test_history_is_reloaded_from_disk(tmp_path):
+    history = _history(tmp_path)
+    for duration in (40.0, 55.0, 84.2):
+        history.record(CHECKPOINT, HOST, 'test', duration, 120)
+    with open(history.path, 'a', encoding='utf-8') as f:
+        f.write('{"checkpoint": "cis_audit_6_1_1", "ho')  # truncated by a crash
+
+    assert _history(tmp_path).timeout_for(CHECKPOINT, HOST, 'test')[0] == 169
+
+
+def test_disabled_history_uses_fixed_timeouts(tmp_path):
+    history = _history(tmp_path, enabled=False)
+    for duration in (40.0, 55.0, 84.2):
+        history.record(CHECKPOINT, HOST, 'test', duration, 120)
+
+    assert history.timeout_for(CHECKPOINT, HOST, 'test')[0] == DEFAULT_TIMEOUTS['test']
+    assert not history.path.exists()
+
+
+PLAYBOOK = """---
+- name: CIS 6.1.1 audit
+  hosts: all
+  tasks:
+    - name: Req 1 - Find world writable files
+      shell: find / -xdev -type f -perm -0002
+      register: req1
+      changed_when: false
+
+    - name: "Req 2 - Find unowned files"
+      ansible.builtin.command: find / -xdev -nouser
+      register: req2
+
+    - name: Req 3 - Already async
+      shell: find / -xdev -nogroup
+      async: 600
+      poll: 10
+
+    - name: Store results
+      set_fact:
+        data_1: "{{ req1.stdout }}"
+"""
+
+
+def test_add_async_to_slow_shell_and_command_tasks():
+    async_tasks = {
+        'Req 1 - Find world writable files': 180,
+        'Req 2 - Find unowned files': 240,
+        'Req 3 - Already async': 300,
+        'Store results': 60,
+    }
+    content, changed = add_async_to_tasks(PLAYBOOK, async_tasks)
+
+    assert changed == ['Req 1 - Find world writable files', 'Req 2 - Find unowned files']
+    tasks = yaml.safe_load(content)[0]['tasks']
+    assert (tasks[0]['async'], tasks[0]['poll']) == (180, ASYNC_POLL_SEC)
+    assert (tasks[1]['async'], tasks[1]['poll']) == (240, ASYNC_POLL_SEC)
+    assert (tasks[2]['async'], tasks[2]['poll']) == (600, 10)
+    assert 'async' not in tasks[3]
+    assert tasks[0]['changed_when'] is False
+
+
+def test_add_async_without_matching_tasks_keeps_content():
+    assert add_async_to_tasks(PLAYBOOK, {'Req 9 - Not in playbook': 120}) == (PLAYBOOK, [])
@@ -0,0 +1,182 @@
+"""Tests for the SQLite checkpoint saver of the LangGraph workflow (workflow_checkpoints.py)."""
+
+import asyncio
+import sqlite3
+import time
+from typing import TypedDict
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.graph import END, StateGraph
+
+import workflow_checkpoints
+from workflow_checkpoints import DEFAULT_CHECKPOINT_DB, SQLiteCheckpointSaver, get_workflow_checkpointer, workflow_thread_id
+
+
+THREAD = "cis_audit_1_8_4.yml#3f2a9c0d1b7e"
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite")
+    yield saver
+    saver.close()
+
+
+def _checkpoint(values):
+    checkpoint = empty_checkpoint()
+    checkpoint['channel_values'] = values
+    checkpoint['channel_versions'] = {key: f"{n:032}.0" for n, key in enumerate(values, 1)}
+    return checkpoint
+
+
+def _put(saver, values, parent_id=None):
+    config = {"configurable": {"thread_id": THREAD, "checkpoint_ns": ""}}
+    if parent_id:
+        config["configurable"]["checkpoint_id"] = parent_id
+    checkpoint = _checkpoint(values)
+    return checkpoint, saver.put(config, checkpoint, {"source": "loop", "step": 1}, {})
+
+
+def test_put_and_get_round_trip(saver):
+    values = {'attempt': 3, 'requirements': ["1. a", "2. b"],
+              'host_test_results': {'h1': {'success': True, 'output': "ok"}}}
+    checkpoint, config = _put(saver, values)
+
+    saved = saver.get_tuple({"configurable": {"thread_id": THREAD}})
+    assert saved.config == config
+    assert saved.checkpoint['id'] == checkpoint['id']
+    assert saved.checkpoint['channel_values'] == values
+    assert saved.metadata['step'] == 1
+    assert saved.parent_config is None
+    assert saver.get_tuple({"configurable": {"thread_id": "other"}}) is None
+
+
+def test_only_the_latest_checkpoint_is_kept(saver):
+    first, first_config = _put(saver, {'attempt': 1})
+    second, _ = _put(saver, {'attempt': 2}, parent_id=first['id'])
+
+    saved = list(saver.list({"configurable": {"thread_id": THREAD}}))
+    assert [item.checkpoint['id'] for item in saved] == [second['id']]
+    assert saved[0].parent_config == first_config
+
+
+def test_put_writes_round_trip(saver):
+    _, config = _put(saver, {'attempt': 1})
+    saver.put_writes(config, [('attempt', 2), ('test_output', "PLAY RECAP")], task_id="task-1")
+    saver.put_writes(config, [('attempt', 3)], task_id="task-1")  # a rerun of the task replaces its writes
+
+    saved = saver.get_tuple(config)
+    assert sorted(saved.pending_writes) == [('task-1', 'attempt', 3), ('task-1', 'test_output', "PLAY RECAP")]
+
+
+def test_delete_thread_removes_checkpoints_writes_and_failures(saver):
+    _, config = _put(saver, {'attempt': 1})
+    saver.put_writes(config, [('attempt', 2)], task_id="task-1")
+    assert saver.record_failure(THREAD) == 1
+    assert saver.record_failure(THREAD) == 2
+
+    saver.delete_thread(THREAD)
+    assert saver.get_tuple(config) is None
+    assert saver.failure_count(THREAD) == 0
+
+
+def test_async_methods(saver):
+    async def round_trip():
+        config = {"configurable": {"thread_id": THREAD, "checkpoint_ns": ""}}
+        checkpoint = _checkpoint({'attempt': 1})
+        config = await saver.aput(config, checkpoint, {"step": 1}, {})
+        await saver.aput_writes(config, [('attempt', 2)], task_id="task-1")
+        saved = await saver.aget_tuple(config)
+        listed = [item async for item in saver.alist(None)]
+        await saver.adelete_thread(THREAD)
+        return saved, listed, await saver.aget_tuple(config)
+
+    saved, listed, deleted = asyncio.run(round_trip())
+    assert saved.checkpoint['channel_values'] == {'attempt': 1}
+    assert saved.pending_writes == [('task-1', 'attempt', 2)]
+    assert len(listed) == 1
+    assert deleted is None
+
+
+def test_stale_threads_expire_on_open(tmp_path):
+    path = tmp_path / "checkpoints.sqlite"
+    saver = SQLiteCheckpointSaver(path)
+    _put(saver, {'attempt': 1})
+    saver.record_failure(THREAD)
+    saver.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE checkpoints SET updated_at = ?", (time.time() - 8 * 86400,))
+
+    reopened = SQLiteCheckpointSaver(path, max_age_days=7)
+    assert reopened.stats['expired'] == 1
+    assert reopened.get_tuple({"configurable": {"thread_id": THREAD}}) is None
+    assert reopened.failure_count(THREAD) == 0
+    reopened.close()
+
+
+def test_thread_id_depends_on_inputs():
+    state = {'filename': "cis_audit_1_8_4.yml", 'playbook_objective': "Audit 1.8.4", 'requirements': ["1. a"]}
+
+    assert workflow_thread_id(state) == workflow_thread_id(dict(state, attempt=5))
+    assert workflow_thread_id(state) != workflow_thread_id(dict(state, requirements=["1. b"]))
+    assert workflow_thread_id(state).startswith("cis_audit_1_8_4.yml#")
+
+
+def test_thread_id_depends_on_the_graph():
+    state = {'filename': "cis_audit_1_8_4.yml", 'playbook_objective': "Audit 1.8.4", 'requirements': ["1. a"]}
+    parallel = ["generate", "check_syntax", "analyze_and_test", "analyze_output"]
+    sequential = ["generate", "check_syntax", "analyze_playbook", "test_on_test_host", "analyze_output"]
+
+    assert workflow_thread_id(state, parallel) == workflow_thread_id(state, list(reversed(parallel)))
+    assert workflow_thread_id(state, parallel) != workflow_thread_id(state, sequential)
+
+
+def test_checkpointer_database_is_in_the_output_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv('WORKFLOW_CHECKPOINT_DB', raising=False)
+    monkeypatch.delenv('WORKFLOW_CHECKPOINT_DISABLE', raising=False)
+    monkeypatch.setattr(workflow_checkpoints, '_checkpointers', {})
+
+    saver = get_workflow_checkpointer(tmp_path / "playbooks")
+    try:
+        assert saver.path == str(tmp_path / "playbooks" / DEFAULT_CHECKPOINT_DB)
+        assert (tmp_path / "playbooks" / DEFAULT_CHECKPOINT_DB).exists()
+        assert get_workflow_checkpointer(tmp_path / "playbooks") is saver
+    finally:
+        saver.close()
+
+
+class _State(TypedDict):
+    steps: list
+
+
+def test_graph_resumes_after_the_last_completed_node(saver):
+    calls = []
+    fail = {'second': True}
+
+    def first(state):
+        calls.append('first')
+        return {'steps': state['steps'] + ['first']}
+
+    def second(state):
+        calls.append('second')
+        if fail['second']:
+            raise RuntimeError("DeepSeek timeout")
+        return {'steps': state['steps'] + ['second']}
+
+    graph = StateGraph(_State)
+    graph.add_node('first', first)
+    graph.add_node('second', second)
+    graph.set_entry_point('first')
+    graph.add_edge('first', 'second')
+    graph.add_edge('second', END)
+    workflow = graph.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": THREAD}}
+
+    with pytest.raises(RuntimeError):
+        workflow.invoke({'steps': []}, config, durability="sync")
+    fail['second'] = False
+    final = workflow.invoke(None, config, durability="sync")
+
+    assert final == {'steps': ['first', 'second']}
+    assert calls == ['first', 'second', 'second']
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Adaptive Run Timeouts from Historical Run Times
+
+One fixed timeout per run kind does not fit every checkpoint:
+filesystem-walking checks (sections 6 and 7) legitimately need minutes, while
+a quick check that hangs should be killed long before that.
+
+Every run is recorded in an append-only JSONL history keyed by checkpoint
+(playbook file name) and host:
+
+    {"checkpoint": "cis_audit_6_1_1", "host": "192.168.122.16", "kind": "test",
+     "duration": 84.2, "timeout": 120, "timed_out": false,
+     "tasks": {"Req 1 - Find world writable files": {"duration": 71.9, "action": "shell"}},
+     "timestamp": "..."}
+
+The timeout of the next run of that checkpoint on that host is
+p99(duration) x TIMEOUT_FACTOR, clamped between a per-kind floor and
+TIMEOUT_CAP_SEC. With fewer than MIN_SAMPLES runs the fixed timeout of the
+kind is used (30 s syntax check, 120 s test run, 300 s playbook_convert
+test); after a run timed out the next one gets twice the previous timeout.
+
+Shell/command tasks that took LONG_TASK_SEC or more (or were still running
+when a run timed out) are run with Ansible `async`/`poll`, so a hung task
+fails on its own instead of the whole run being killed.
+
+Environment variables:
+    TIMING_HISTORY_FILE      History file (default: .timing_history.jsonl)
+    TIMING_HISTORY_DISABLE   Set to 1 to always use the fixed timeouts
+    TIMEOUT_FACTOR           Multiplier applied to the p99 run time (default: 2.0)
+    TIMEOUT_CAP_SEC          Upper bound of any adaptive timeout (default: 900)
+
+Usage:
+    history = get_timing_history()
+    timeout, reason = history.timeout_for(checkpoint_key(filename), host, 'test')
+    history.record(checkpoint_key(filename), host, 'test', duration, timeout, tasks=task_timings)
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from pathlib import Path
+from datetime import datetime
+
+
+DEFAULT_HISTORY_FILE = ".timing_history.jsonl"
+DEFAULT_FACTOR = 2.0
+DEFAULT_CAP_SEC = 900
+
+# Fixed timeouts used until a checkpoint has enough history, and the lowest adaptive timeouts
+DEFAULT_TIMEOUTS = {'syntax': 30, 'test': 120, 'convert': 300}
+MIN_TIMEOUTS = {'syntax': 15, 'test': 30, 'convert': 60}
+
+MIN_SAMPLES = 3
+MAX_SAMPLES = 50            # most recent runs kept per checkpoint/host/kind
+
+LONG_TASK_SEC = 30          # shell/command tasks at least this slow run with async/poll
+ASYNC_POLL_SEC = 5
+ASYNC_ACTIONS = ('shell', 'command', 'ansible.builtin.shell', 'ansible.builtin.command',
+                 'ansible.legacy.shell', 'ansible.legacy.command')
+
+TASK_HEADER_PATTERN = re.compile(r'^TASK \[(.+?)\]', re.MULTILINE)
+TASK_NAME_PATTERN = re.compile(r'^(\s*)- name:\s*(.+?)\s*$')
+
+
+def checkpoint_key(filename) -> str:
+    """History key of a playbook (its file name without extension, e.g. cis_audit_6_1_1)."""
+    return Path(str(filename)).stem
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def task_timings(events: list, host: str) -> dict:
+    """
+    Per-task durations of one host from task events (see task_events.py).
+
+    Returns:
+        dict: {task_name: {'duration': seconds, 'action': module}}
+    """
+    timings = {}
+    for event in events or []:
+        if event['host'] != host or event['duration'] is None or not event['task']:
+            continue
+        timings[event['task']] = {'duration': event['duration'], 'action': event['action']}
+    return timings
+
+
+def running_task(output) -> str:
+    """Name of the task that was running when a run was killed (last TASK header), or None."""
+    if isinstance(output, bytes):
+        output = output.decode('utf-8', errors='replace')
+    headers = TASK_HEADER_PATTERN.findall(output or "")
+    return headers[-1] if headers else None
+
+
+def add_async_to_tasks(playbook_content: str, async_tasks: dict) -> tuple[str, list]:
+    """
+    Run the named shell/command tasks with `async: <seconds>` and `poll`.
+
+    Tasks that already set async, or that are not shell/command tasks, are left alone.
+
+    Args:
+        playbook_content: Playbook YAML text
+        async_tasks: {task_name: async seconds}
+
+    Returns:
+        tuple: (new_content, names of the tasks that were changed)
+    """
+    lines = playbook_content.split('\n')
+    output = []
+    changed = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        output.append(line)
+        index += 1
+        match = TASK_NAME_PATTERN.match(line)
+        if not match:
+            continue
+        name = match.group(2).strip('\'"')
+        if name not in async_tasks:
+            continue
+
+        # The task body: following lines indented deeper than its "- name:"
+        indent = len(match.group(1))
+        key_indent = indent + 2
+        body = []
+        for body_line in lines[index:]:
+            if body_line.strip() and len(body_line) - len(body_line.lstrip()) <= indent:
+                break
+            body.append(body_line)
+        keys = {body_line.strip().split(':', 1)[0] for body_line in body
+                if body_line.strip() and len(body_line) - len(body_line.lstrip()) == key_indent}
+        if 'async' in keys or not keys.intersection(ASYNC_ACTIONS):
+            continue
+        output.append(f"{' ' * key_indent}async: {async_tasks[name]}")
+        output.append(f"{' ' * key_indent}poll: {ASYNC_POLL_SEC}")
+        changed.append(name)
+    return '\n'.join(output), changed
+
+
+class TimingHistory:
+    """
+    Append-only JSONL history of run and task durations per checkpoint and host.
+    Safe to use from concurrent checkpoint workers.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, factor: float = DEFAULT_FACTOR,
+                 cap_sec: int = DEFAULT_CAP_SEC, enabled: bool = True):
+        """
+        Args:
+            path: Path to the JSONL history file
+            factor: Multiplier applied to the p99 run time
+            cap_sec: Upper bound of any adaptive timeout
+            enabled: If False, nothing is recorded and the fixed timeouts are used
+        """
+        self.path = Path(path)
+        self.factor = factor
+        self.cap_sec = cap_sec
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._runs = {}   # (checkpoint, host, kind) -> recent records
+        self.stats = {'recorded': 0, 'adaptive': 0, 'fixed': 0, 'escalated': 0, 'timed_out': 0, 'async_tasks': 0}
+        if enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self._remember(record)
+                    except (ValueError, KeyError, TypeError):
+                        continue  # skip partial/corrupt lines
+        except OSError:
+            pass
+
+    def _remember(self, record: dict):
+        runs = self._runs.setdefault((record['checkpoint'], record['host'], record['kind']), [])
+        runs.append(record)
+        del runs[:-MAX_SAMPLES]
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def record(self, checkpoint: str, host: str, kind: str, duration: float, timeout: int,
+               timed_out: bool = False, tasks: dict = None):
+        """
+        Record one run.
+
+        Args:
+            checkpoint: checkpoint_key() of the playbook
+            host: Host the run targeted
+            kind: 'syntax', 'test' or 'convert'
+            duration: Wall time of the run in seconds (the timeout if it timed out)
+            timeout: Timeout the run was given
+            timed_out: True if the run was killed at its timeout
+            tasks: Per-task timings from task_timings() (a task still running at a
+                timeout is recorded with timed_out set)
+        """
+        if not self.enabled:
+            return
+        record = {
+            'checkpoint': checkpoint,
+            'host': host,
+            'kind': kind,
+            'duration': round(duration, 2),
+            'timeout': timeout,
+            'timed_out': timed_out,
+            'tasks': tasks or {},
+            'timestamp': datetime.now().isoformat()
+        }
+        with self._lock:
+            self._remember(record)
+            self.stats['recorded'] += 1
+            if timed_out:
+                self.stats['timed_out'] += 1
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"⚠️  Timing history write failed: {e}")
+
+    def timeout_for(self, checkpoint: str, host: str, kind: str) -> tuple[int, str]:
+        """
+        Timeout for the next run of a checkpoint on a host.
+
+        Returns:
+            tuple: (timeout_seconds, reason) - reason explains how it was chosen
+        """
+        default = DEFAULT_TIMEOUTS[kind]
+        with self._lock:
+            runs = list(self._runs.get((checkpoint, host, kind), [])) if self.enabled else []
+
+        if runs and runs[-1]['timed_out']:
+            timeout = min(self.cap_sec, max(default, int(runs[-1]['timeout'] * 2)))
+            self._count('escalated')
+            return timeout, f"last run timed out after {runs[-1]['timeout']}s"
+
+        durations = [run['duration'] for run in runs if not run['timed_out']]
+        if len(durations) < MIN_SAMPLES:
+            self._count('fixed')
+            return default, f"default, {len(durations)}/{MIN_SAMPLES} timed run(s)"
+
+        p99 = percentile(durations, 99)
+        timeout = int(min(self.cap_sec, max(MIN_TIMEOUTS[kind], math.ceil(p99 * self.factor))))
+        self._count('adaptive')
+        return timeout, f"p99 {p99:.1f}s x {self.factor:g} over {len(durations)} run(s)"
+
+    def long_tasks(self, checkpoint: str, host: str) -> dict:
+        """
+        Shell/command tasks of a checkpoint that are slow on a host.
+
+        Returns:
+            dict: {task_name: async seconds} for tasks whose p99 reached LONG_TASK_SEC
+            or that were running when a test run timed out
+        """
+        with self._lock:
+            runs = list(self._runs.get((checkpoint, host, 'test'), [])) if self.enabled else []
+
+        durations = {}
+        hung = set()
+        for run in runs:
+            for name, timing in run.get('tasks', {}).items():
+                if timing.get('timed_out'):
+                    hung.add(name)
+                elif timing.get('action') in ASYNC_ACTIONS:
+                    durations.setdefault(name, []).append(timing['duration'])
+
+        async_tasks = {}
+        for name, values in durations.items():
+            p99 = percentile(values, 99)
+            if p99 >= LONG_TASK_SEC:
+                async_tasks[name] = int(min(self.cap_sec, math.ceil(p99 * self.factor)))
+        for name in hung:
+            hung_timeout = max(run['timeout'] for run in runs if name in run.get('tasks', {}))
+            async_tasks[name] = max(async_tasks.get(name, 0), int(min(self.cap_sec, hung_timeout * 2)))
+        return async_tasks
+
+    def note_async_tasks(self, count: int):
+        """Count tasks that were switched to async/poll (for summary())."""
+        self._count('async_tasks', count)
+
+    def summary(self) -> str:
+        """One-line summary for run reports."""
+        stats = self.stats
+        return (f"{stats['recorded']} run(s) recorded, {stats['timed_out']} timed out; timeouts: "
+                f"{stats['adaptive']} adaptive, {stats['escalated']} escalated, {stats['fixed']} default; "
+                f"{stats['async_tasks']} task(s) switched to async")
+
+
+def _history_from_env() -> TimingHistory:
+    """Build the shared history from environment variables."""
+    try:
+        factor = float(os.environ.get('TIMEOUT_FACTOR', DEFAULT_FACTOR))
+    except ValueError:
+        factor = DEFAULT_FACTOR
+    try:
+        cap_sec = int(os.environ.get('TIMEOUT_CAP_SEC', DEFAULT_CAP_SEC))
+    except ValueError:
+        cap_sec = DEFAULT_CAP_SEC
+    return TimingHistory(
+        path=os.environ.get('TIMING_HISTORY_FILE', DEFAULT_HISTORY_FILE),
+        factor=factor,
+        cap_sec=cap_sec,
+        enabled=os.environ.get('TIMING_HISTORY_DISABLE', '').lower() not in ('1', 'true', 'yes')
+    )
+
+
+# Shared history used by deepseek_generate_playbook.py and playbook_convert.py,
+# created on first use so environment variables loaded by load_dotenv() apply
+_timing_history = None
+_timing_history_lock = threading.Lock()
+
+
+def get_timing_history() -> TimingHistory:
+    """Get the shared history instance."""
+    global _timing_history
+    with _timing_history_lock:
+        if _timing_history is None:
+            _timing_history = _history_from_env()
+        return _timing_history
+
+
+def print_timing_stats():
+    """Print the shared history counters."""
+    history = get_timing_history()
+    if history.enabled:
+        print(f"⏱️  Run timeouts: {history.summary()}")
+    else:
+        print("⏱️  Run timeouts: fixed (timing history disabled)")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+On-Disk Checkpointer for the LangGraph Playbook Workflow
+
+A workflow run builds up state over many attempts (the enhanced playbook,
+analysis messages, the test host index). When the process dies or the
+30-minute DeepSeek timeout aborts a node during, say, attempt 7 of a CIS
+checkpoint, a rerun should pick up from there rather than from
+check_existing_playbook.
+
+SQLiteCheckpointSaver is a LangGraph checkpoint saver on the standard
+library's sqlite3. The graph saves its state after every completed node; a
+rerun of the same CIS checkpoint and filename finds the saved state and
+resumes from the last completed node instead of starting over:
+
+    saver = get_workflow_checkpointer(output_dir)
+    workflow = create_playbook_workflow(checkpointer=saver)
+    config = {"configurable": {"thread_id": workflow_thread_id(initial_state, workflow.nodes)}}
+
+The database lives in the run's output directory (next to run_journal.jsonl).
+The thread id is the playbook filename plus a digest of the workflow inputs
+(objective with the CIS checkpoint id, requirements, hosts and flags) and of
+the graph's node set, so changed inputs - or a graph built differently, e.g.
+with PARALLEL_ANALYSIS_DISABLE toggled - start a fresh run. Only the latest checkpoint of a thread is
+kept - that is all a resume needs - and a thread is deleted once its workflow
+finishes. A run that raised is resumed at most WORKFLOW_CHECKPOINT_MAX_FAILURES
+times; after that its thread is deleted and the next run starts over, so a
+state that always fails is not resumed forever. Threads not updated for
+WORKFLOW_CHECKPOINT_MAX_AGE_DAYS are dropped when the database is opened.
+
+Environment variables:
+    WORKFLOW_CHECKPOINT_DB            SQLite file (default: <output dir>/.workflow_checkpoints.sqlite)
+    WORKFLOW_CHECKPOINT_MAX_AGE_DAYS  Drop unfinished threads older than this (default: 7)
+    WORKFLOW_CHECKPOINT_MAX_FAILURES  Start over after this many failed runs of a thread (default: 3)
+    WORKFLOW_CHECKPOINT_DISABLE       Set to 1 to run the workflow without a checkpointer
+"""
+
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import random
+import threading
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+
+DEFAULT_CHECKPOINT_DB = ".workflow_checkpoints.sqlite"
+DEFAULT_MAX_AGE_DAYS = 7
+DEFAULT_MAX_FAILURES = 3
+
+# Initial state fields that identify a workflow run (see _prepare_workflow_run())
+THREAD_KEY_FIELDS = (
+    'playbook_objective', 'requirements', 'target_host', 'test_hosts', 'become_user',
+    'audit_procedure', 'example_output', 'max_retries', 'enhance', 'skip_execution',
+    'skip_test', 'skip_playbook_analysis', 'parallel_test_hosts'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint_type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    value_type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS failures (
+    thread_id TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def workflow_thread_id(initial_state: dict, graph_nodes=()) -> str:
+    """
+    Thread id of a workflow run: its playbook filename and a digest of its inputs and graph.
+
+    Args:
+        initial_state: Initial workflow state (PlaybookGenerationState)
+        graph_nodes: Node names of the compiled graph (a saved run can only resume
+                     on a graph that has the node it stopped before)
+
+    Returns:
+        str: e.g. "cis_audit_1_8_4.yml#3f2a9c0d1b7e" (same CIS checkpoint, filename and graph -> same id)
+    """
+    inputs = {field: initial_state.get(field) for field in THREAD_KEY_FIELDS}
+    inputs['graph_nodes'] = sorted(graph_nodes)
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"{initial_state.get('filename', '')}#{digest[:12]}"
+
+
+# Not langgraph-checkpoint-sqlite's SqliteSaver: that package is not a dependency
+# of this project (its async saver also needs aiosqlite), and it keeps every
+# checkpoint of a thread while a resume only needs the latest one.
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpoint saver keeping the latest checkpoint of each thread in SQLite."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_DB, max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+                 max_failures: int = DEFAULT_MAX_FAILURES):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            max_age_days: Unfinished threads not updated for this long are dropped on open
+            max_failures: A thread whose runs failed this many times is started over
+        """
+        super().__init__(serde=JsonPlusSerializer())
+        self.path = str(path)
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.stats = {'saved': 0, 'resumed': 0, 'cleared': 0, 'abandoned': 0, 'expired': 0}
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+            cutoff = time.time() - max_age_days * 86400
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(updated_at) < ?", (cutoff,))]
+            for thread_id in expired:
+                self._delete_thread_rows(thread_id)
+            self._conn.execute("DELETE FROM failures WHERE thread_id NOT IN (SELECT thread_id FROM checkpoints)")
+            self.stats['expired'] = len(expired)
+
+    def _delete_thread_rows(self, thread_id: str):
+        self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+        self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+        self._conn.execute("DELETE FROM failures WHERE thread_id = ?", (thread_id,))
+
+    def _tuple_from_row(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_type, checkpoint, metadata_type, metadata = row
+        writes = self._conn.execute(
+            "SELECT task_id, channel, value_type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ]
+        )
+
+    def get_tuple(self, config: dict):
+        """Checkpoint tuple of config's checkpoint_id, or the thread's latest checkpoint, or None."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, "
+                 "checkpoint, metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        params = [thread_id, checkpoint_ns]
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._tuple_from_row(row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        """Checkpoint tuples, newest first (only the latest one of each thread is kept)."""
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, "
+                 "checkpoint, metadata_type, metadata FROM checkpoints WHERE 1 = 1")
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+        with self._lock:
+            tuples = [self._tuple_from_row(row) for row in self._conn.execute(query, params).fetchall()]
+        count = 0
+        for checkpoint_tuple in tuples:
+            if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            yield checkpoint_tuple
+
+    def put(self, config: dict, checkpoint: dict, metadata: dict, new_versions: dict) -> dict:
+        """Save a checkpoint as the thread's latest one (older checkpoints and their writes are dropped)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 checkpoint_type, checkpoint_blob, metadata_type, metadata_blob, time.time())
+            )
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?",
+                (thread_id, checkpoint_ns, checkpoint["id"])
+            )
+            self._conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?",
+                (thread_id, checkpoint_ns, checkpoint["id"])
+            )
+            self.stats['saved'] += 1
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: dict, writes, task_id: str, task_path: str = "") -> None:
+        """Save the writes of a task run from a checkpoint (special channels are only written once)."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, value_type, value_blob, task_path))
+        verb = "INSERT OR REPLACE" if all(channel not in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock, self._conn:
+            self._conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete the checkpoints and writes of a thread."""
+        with self._lock, self._conn:
+            self._delete_thread_rows(thread_id)
+
+    def record_failure(self, thread_id: str) -> int:
+        """
+        Count a failed run of a thread.
+
+        Returns:
+            int: Failed runs of the thread so far
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO failures VALUES (?, 1) ON CONFLICT(thread_id) DO UPDATE SET count = count + 1",
+                (thread_id,)
+            )
+            return self._conn.execute("SELECT count FROM failures WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+    def failure_count(self, thread_id: str) -> int:
+        """Failed runs of a thread since it was started."""
+        with self._lock:
+            row = self._conn.execute("SELECT count FROM failures WHERE thread_id = ?", (thread_id,)).fetchone()
+            return row[0] if row else 0
+
+    # The async methods run the blocking sqlite3 calls in a worker thread, so
+    # a save does not stall the other runs multiplexed on the event loop
+
+    async def aget_tuple(self, config: dict):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: dict, checkpoint: dict, metadata: dict, new_versions: dict) -> dict:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: dict, writes, task_id: str, task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current, channel) -> str:
+        """Monotonic channel version ("<counter>.<random>", as InMemorySaver)."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Shared savers used by langgraph_deepseek_generate_playbook.py, one per
+# database path, created on first use so environment variables loaded by
+# load_dotenv() apply
+_checkpointers = {}
+_checkpointer_lock = threading.Lock()
+
+
+def is_checkpointing_enabled() -> bool:
+    """Check whether workflow runs are checkpointed to disk."""
+    return os.environ.get('WORKFLOW_CHECKPOINT_DISABLE', '').lower() not in ('1', 'true', 'yes')
+
+
+def get_workflow_checkpointer(directory: str = "."):
+    """
+    Get the shared checkpoint saver of a run's output directory.
+
+    Args:
+        directory: Output directory of the run; the database is created in it
+                   unless WORKFLOW_CHECKPOINT_DB names a file
+
+    Returns:
+        SQLiteCheckpointSaver: Shared saver, or None when checkpointing is disabled
+        or the database cannot be opened (the workflow then runs without one)
+    """
+    if not is_checkpointing_enabled():
+        return None
+    path = os.path.abspath(os.environ.get('WORKFLOW_CHECKPOINT_DB')
+                           or os.path.join(directory or ".", DEFAULT_CHECKPOINT_DB))
+    with _checkpointer_lock:
+        if path not in _checkpointers:
+            try:
+                max_age_days = float(os.environ.get('WORKFLOW_CHECKPOINT_MAX_AGE_DAYS', DEFAULT_MAX_AGE_DAYS))
+            except ValueError:
+                max_age_days = DEFAULT_MAX_AGE_DAYS
+            try:
+                max_failures = int(os.environ.get('WORKFLOW_CHECKPOINT_MAX_FAILURES', DEFAULT_MAX_FAILURES))
+            except ValueError:
+                max_failures = DEFAULT_MAX_FAILURES
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _checkpointers[path] = SQLiteCheckpointSaver(path, max_age_days=max_age_days,
+                                                             max_failures=max_failures)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️  Workflow checkpoints disabled: cannot open {path}: {e}")
+                return None
+        return _checkpointers[path]
+
+
+def print_workflow_checkpoint_stats():
+    """Print each workflow checkpoint database opened by this process and its save/resume counters."""
+    if not is_checkpointing_enabled():
+        print("📌 Workflow checkpoints: disabled")
+        return
+    with _checkpointer_lock:
+        savers = list(_checkpointers.values())
+    for saver in savers:
+        stats = saver.stats
+        print(f"📌 Workflow checkpoints {saver.path}: {stats['saved']} saved, {stats['resumed']} run(s) resumed, "
+              f"{stats['cleared']} finished run(s) cleared, {stats['abandoned']} failing run(s) started over, "
+              f"{stats['expired']} stale run(s) expired")